@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# update and read rates of DepthCache by book size, run with: python benchmarks/depth_cache.py
+import os
+import random
+import sys
+import timeit
+from operator import itemgetter
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root)
+
+from binance.ws.depthcache import DepthCache
+
+LEVELS = [100, 1000, 5000]
+UPDATES = 20000
+
+
+class SortOnReadDepthCache:
+    """The previous DepthCache, which sorted and converted the whole book on every read"""
+
+    def __init__(self, symbol, conv_type=float):
+        self._bids = {}
+        self._asks = {}
+        self.conv_type = conv_type
+
+    def add_bid(self, bid):
+        self._bids[bid[0]] = self.conv_type(bid[1])
+        if bid[1] == "0.00000000":
+            del self._bids[bid[0]]
+
+    def add_ask(self, ask):
+        self._asks[ask[0]] = self.conv_type(ask[1])
+        if ask[1] == "0.00000000":
+            del self._asks[ask[0]]
+
+    def get_bids(self):
+        lst = [[self.conv_type(p), self.conv_type(q)] for p, q in self._bids.items()]
+        return sorted(lst, key=itemgetter(0), reverse=True)
+
+
+def price(ticks):
+    return f"{ticks / 100:.8f}"
+
+
+def filled(cls, levels, **kwargs):
+    cache = cls("BTCUSDT", **kwargs)
+    for i in range(levels):
+        cache.add_bid([price(1000000 - i), "1.00000000"])
+        cache.add_ask([price(1000001 + i), "1.00000000"])
+    return cache
+
+
+def updates(levels):
+    # a third of the updates delete a level, the others change or add one near the top
+    rand = random.Random(1)
+    return [
+        [price(1000000 - rand.randint(0, levels)), rand.choice(["0.00000000", "2.50000000", "1.0"])]
+        for _ in range(UPDATES)
+    ]
+
+
+def update_rate(cls, levels, **kwargs):
+    cache = filled(cls, levels, **kwargs)
+    bids = updates(levels)
+
+    def apply():
+        for bid in bids:
+            cache.add_bid(bid)
+
+    return UPDATES / min(timeit.repeat(apply, number=1, repeat=3))
+
+
+def read_rate(read, levels):
+    number = max(10, 200000 // levels)
+    return number / min(timeit.repeat(read, number=number, repeat=3))
+
+
+def main():
+    print(f"{'levels':>8}{'updates/s':>14}{'before':>14}{'full reads/s':>16}{'before':>12}")
+    for levels in LEVELS:
+        print(
+            f"{levels:>8}"
+            f"{update_rate(DepthCache, levels):>14,.0f}"
+            f"{update_rate(SortOnReadDepthCache, levels):>14,.0f}"
+            f"{read_rate(filled(DepthCache, levels).get_bids, levels):>16,.0f}"
+            f"{read_rate(filled(SortOnReadDepthCache, levels).get_bids, levels):>12,.0f}"
+        )
+
+    # the top of the book doesn't depend on its size, before it needed a full read
+    print(f"\n{'levels':>8}{'top 10 reads/s':>16}{'best bid/s':>14}{'mid/s':>14}")
+    for levels in LEVELS:
+        cache = filled(DepthCache, levels)
+        print(
+            f"{levels:>8}"
+            f"{read_rate(lambda cache=cache: cache.get_bids(10), 1):>16,.0f}"
+            f"{read_rate(cache.best_bid, 1):>14,.0f}"
+            f"{read_rate(cache.mid, 1):>14,.0f}"
+        )
+
+    # prices and quantities as ticks and lots of the symbol filters, read as float or int
+    print(f"\n{'levels':>8}{'int updates/s':>16}{'float reads/s':>16}{'int reads/s':>14}")
+    filters = {"tick_size": "0.01000000", "step_size": "0.00001000"}
+    for levels in LEVELS:
+        ticks = filled(DepthCache, levels, conv_type=int, **filters)
+        print(
+            f"{levels:>8}"
+            f"{update_rate(DepthCache, levels, **filters):>16,.0f}"
+            f"{read_rate(filled(DepthCache, levels, **filters).get_bids, levels):>16,.0f}"
+            f"{read_rate(ticks.get_bids, levels):>14,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# per-call cost of converting dates to timestamps, run with: python benchmarks/timestamps.py
+import os
+import subprocess
+import sys
+import timeit
+from datetime import date, datetime, timezone
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root)
+
+from binance.helpers import convert_ts_str
+
+INPUTS = [
+    ("int", 1519862400000),
+    ("ms string", "1519862400000"),
+    ("seconds string", "1519862400"),
+    ("ISO 8601", "2024-01-01T12:30:00Z"),
+    ("date string", "1 Jan, 2024"),
+    ("relative", "11 hours ago UTC"),
+    ("datetime", datetime(2024, 1, 1, tzinfo=timezone.utc)),
+    ("date", date(2024, 1, 1)),
+    ("natural language, cached", "1 month ago UTC"),
+]
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    import_time = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import dateparser"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr.splitlines()[-1]
+    print(f"dateparser import, skipped unless needed: {import_time.split('|')[1].strip()} us")
+
+    import dateparser
+
+    print(f"{'input':<28}{'convert_ts_str':>16}{'dateparser':>14}")
+    for name, value in INPUTS:
+        fast = per_call_us(lambda value=value: convert_ts_str(value), 10000)
+        if isinstance(value, str):
+            # every string went through dateparser before
+            slow = per_call_us(
+                lambda value=value: dateparser.parse(value, settings={"TIMEZONE": "UTC"}), 20
+            )
+            print(f"{name:<28}{fast:>13.2f} us{slow:>11.0f} us")
+        else:
+            print(f"{name:<28}{fast:>13.2f} us{'-':>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,12 @@ from binance.async_client import AsyncClient  # noqa
 from binance.client import Client  # noqa
 from binance.ws.depthcache import (
     DepthCacheManager,  # noqa
+    MultiplexDepthCacheManager,  # noqa
     OptionsDepthCacheManager,  # noqa
     ThreadedDepthCacheManager,  # noqa
     FuturesDepthCacheManager,  # noqa
 )
+from binance.ws.kline_feed import KlineFeed  # noqa
 from binance.ws.streams import (
     BinanceSocketManager,  # noqa
     ThreadedWebsocketManager,  # noqa
@@ -0,0 +1,206 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+from binance.columnar import OUTPUT_COLUMNS, OUTPUT_LIST, _require_numpy, check_output
+from binance.helpers import convert_ts_str, interval_to_milliseconds
+from binance.ratelimit import MARKET_FUTURES, MARKET_FUTURES_COIN
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+ANALYTICS_OPEN_INTEREST = "open_interest"
+ANALYTICS_TOP_LONG_SHORT_ACCOUNT_RATIO = "top_long_short_account_ratio"
+ANALYTICS_TOP_LONG_SHORT_POSITION_RATIO = "top_long_short_position_ratio"
+ANALYTICS_GLOBAL_LONG_SHORT_RATIO = "global_long_short_ratio"
+ANALYTICS_TAKER_VOLUME = "taker_volume"
+ANALYTICS_BASIS = "basis"
+
+# path of each statistic under futures/data
+ANALYTICS_PATHS = {
+    MARKET_FUTURES: {
+        ANALYTICS_OPEN_INTEREST: "openInterestHist",
+        ANALYTICS_TOP_LONG_SHORT_ACCOUNT_RATIO: "topLongShortAccountRatio",
+        ANALYTICS_TOP_LONG_SHORT_POSITION_RATIO: "topLongShortPositionRatio",
+        ANALYTICS_GLOBAL_LONG_SHORT_RATIO: "globalLongShortAccountRatio",
+        ANALYTICS_TAKER_VOLUME: "takerlongshortRatio",
+        ANALYTICS_BASIS: "basis",
+    },
+    MARKET_FUTURES_COIN: {
+        ANALYTICS_OPEN_INTEREST: "openInterestHist",
+        ANALYTICS_TOP_LONG_SHORT_ACCOUNT_RATIO: "topLongShortAccountRatio",
+        ANALYTICS_TOP_LONG_SHORT_POSITION_RATIO: "topLongShortPositionRatio",
+        ANALYTICS_GLOBAL_LONG_SHORT_RATIO: "globalLongShortAccountRatio",
+        ANALYTICS_TAKER_VOLUME: "takerBuySellVol",
+        ANALYTICS_BASIS: "basis",
+    },
+}
+
+_LONG_SHORT_ACCOUNT_FIELDS = ("longShortRatio", "longAccount", "shortAccount")
+_BASIS_FIELDS = ("indexPrice", "futuresPrice", "basis", "basisRate", "annualizedBasisRate")
+
+# numeric fields of each statistic, kept in the numpy and columns outputs next to the timestamp
+ANALYTICS_FIELDS = {
+    MARKET_FUTURES: {
+        ANALYTICS_OPEN_INTEREST: ("sumOpenInterest", "sumOpenInterestValue"),
+        ANALYTICS_TOP_LONG_SHORT_ACCOUNT_RATIO: _LONG_SHORT_ACCOUNT_FIELDS,
+        ANALYTICS_TOP_LONG_SHORT_POSITION_RATIO: _LONG_SHORT_ACCOUNT_FIELDS,
+        ANALYTICS_GLOBAL_LONG_SHORT_RATIO: _LONG_SHORT_ACCOUNT_FIELDS,
+        ANALYTICS_TAKER_VOLUME: ("buySellRatio", "buyVol", "sellVol"),
+        ANALYTICS_BASIS: _BASIS_FIELDS,
+    },
+    MARKET_FUTURES_COIN: {
+        ANALYTICS_OPEN_INTEREST: ("sumOpenInterest", "sumOpenInterestValue"),
+        ANALYTICS_TOP_LONG_SHORT_ACCOUNT_RATIO: _LONG_SHORT_ACCOUNT_FIELDS,
+        ANALYTICS_TOP_LONG_SHORT_POSITION_RATIO: (
+            "longShortRatio",
+            "longPosition",
+            "shortPosition",
+        ),
+        ANALYTICS_GLOBAL_LONG_SHORT_RATIO: _LONG_SHORT_ACCOUNT_FIELDS,
+        ANALYTICS_TAKER_VOLUME: (
+            "takerBuyVol",
+            "takerSellVol",
+            "takerBuyVolValue",
+            "takerSellVolValue",
+        ),
+        ANALYTICS_BASIS: _BASIS_FIELDS,
+    },
+}
+
+ANALYTICS_PERIODS = ("5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d")
+ANALYTICS_MAX_LIMIT = 500
+# the statistics are only kept for the last 30 days
+ANALYTICS_LOOKBACK = 30 * 24 * 60 * 60 * 1000
+
+
+def analytics_path(endpoint: str, market: str = MARKET_FUTURES) -> str:
+    """Get the futures/data path of a statistic
+
+    :param endpoint: one of the ANALYTICS_* statistics e.g. ANALYTICS_OPEN_INTEREST
+    :type endpoint: str
+    :param market: MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+    :type market: str
+
+    :return: path of the endpoint
+
+    """
+    if market not in ANALYTICS_PATHS:
+        raise ValueError(
+            f"Unknown market {market!r}, must be {MARKET_FUTURES} or {MARKET_FUTURES_COIN}"
+        )
+    if endpoint not in ANALYTICS_PATHS[market]:
+        raise ValueError(
+            f"Unknown statistic {endpoint!r}, must be one of {', '.join(ANALYTICS_PATHS[market])}"
+        )
+    return ANALYTICS_PATHS[market][endpoint]
+
+
+def analytics_dtype(endpoint: str, market: str = MARKET_FUTURES):
+    """Get the numpy structured dtype of a statistic, the timestamp followed by its numeric fields
+
+    :return: numpy.dtype
+
+    """
+    _require_numpy()
+    analytics_path(endpoint, market)
+    fields = ANALYTICS_FIELDS[market][endpoint]
+    return np.dtype([("timestamp", "i8")] + [(name, "f8") for name in fields])
+
+
+def analytics_windows(
+    period: str,
+    now: int,
+    start_str=None,
+    end_str=None,
+    limit: int = ANALYTICS_MAX_LIMIT,
+) -> List[Tuple[int, int]]:
+    """Split a time range into windows of at most limit periods, one request each
+
+    The start is moved forward to the first timestamp still kept by the exchange.
+
+    :param period: one of ANALYTICS_PERIODS
+    :type period: str
+    :param now: current time in milliseconds
+    :type now: int
+    :param start_str: optional - start date string in UTC format or timestamp in milliseconds, default
+        the start of the lookback
+    :type start_str: str|int
+    :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+    :type end_str: str|int
+    :param limit: number of periods in a window
+    :type limit: int
+
+    :return: list of (start, end) both inclusive
+
+    """
+    if period not in ANALYTICS_PERIODS:
+        raise ValueError(
+            f"Unknown period {period!r}, must be one of {', '.join(ANALYTICS_PERIODS)}"
+        )
+    end_ts = convert_ts_str(end_str)
+    end_ts = now if end_ts is None else min(end_ts, now)
+    start_ts = convert_ts_str(start_str)
+    lookback_start = now - ANALYTICS_LOOKBACK
+    start_ts = lookback_start if start_ts is None else max(start_ts, lookback_start)
+
+    period_ms = interval_to_milliseconds(period)
+    assert period_ms is not None
+    window_ms = limit * period_ms
+    return [
+        (window_start, min(window_start + window_ms - 1, end_ts))
+        for window_start in range(start_ts, end_ts + 1, window_ms)
+    ]
+
+
+def merge_analytics(pages: Iterable, start_ts: int, end_ts: int) -> List[Dict]:
+    """Merge pages of a statistic into one list sorted by timestamp
+
+    Rows outside of the range are dropped, of rows with the same timestamp the last one is kept.
+
+    :param pages: lists of rows as returned by the statistic endpoint
+
+    """
+    rows = {}
+    for page in pages:
+        for row in page:
+            if start_ts <= row["timestamp"] <= end_ts:
+                rows[row["timestamp"]] = row
+    return [rows[timestamp] for timestamp in sorted(rows)]
+
+
+def analytics_output(
+    rows: List[Dict],
+    endpoint: str,
+    market: str = MARKET_FUTURES,
+    output: str = OUTPUT_LIST,
+):
+    """Convert rows of a statistic to the requested output type
+
+    The numpy and columns outputs keep the timestamp and the numeric fields, the symbol, pair and
+    contract type are the ones of the request.
+
+    :param rows: rows in the format returned by the API
+    :type rows: list
+    :param endpoint: one of the ANALYTICS_* statistics
+    :type endpoint: str
+    :param market: MARKET_FUTURES or MARKET_FUTURES_COIN
+    :type market: str
+    :param output: output type, one of OUTPUT_LIST, OUTPUT_NUMPY or OUTPUT_COLUMNS
+    :type output: str
+
+    :return: list of dicts, numpy structured array or dict of numpy arrays
+
+    """
+    check_output(output)
+    if output == OUTPUT_LIST:
+        return rows
+    dtype = analytics_dtype(endpoint, market)
+    array = np.empty(len(rows), dtype=dtype)
+    for name in dtype.names:
+        # the API returns the numbers as strings
+        array[name] = np.asarray([row[name] for row in rows], dtype=dtype[name])
+    if output == OUTPUT_COLUMNS:
+        return {name: np.ascontiguousarray(array[name]) for name in dtype.names}
+    return array
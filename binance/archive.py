@@ -0,0 +1,490 @@
+import hashlib
+import io
+import re
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+from binance.columnar import (
+    KLINE_FIELDS,
+    OUTPUT_LIST,
+    OUTPUT_NUMPY,
+    KlineArrayBuilder,
+    _require_numpy,
+    check_output,
+    kline_dtype,
+    klines_output,
+)
+from binance.enums import HistoricalKlinesType
+from binance.export import (
+    AGG_TRADE_EXPORT_FIELDS,
+    DAY_MS,
+    DEFAULT_ROW_GROUP_SIZE,
+    FORMAT_PARQUET,
+    TRADE_EXPORT_FIELDS,
+    DayPartitionedWriter,
+    _require_pyarrow,
+    _schema,
+    pa,
+)
+from binance.gaps import _interval_ms, _range, _store_window, find_gaps
+from binance.helpers import interval_to_milliseconds
+from binance.ratelimit import MARKET_SPOT
+from binance.store import KlineStore
+
+if TYPE_CHECKING:
+    import numpy
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+ARCHIVE_KLINES = "klines"
+ARCHIVE_AGG_TRADES = "aggTrades"
+ARCHIVE_TRADES = "trades"
+
+# size of the blocks of csv decoded at a time, a monthly trades archive can be several GB
+ARCHIVE_CHUNK_BYTES = 64 * 1024 * 1024
+
+# spot archives have times in microseconds from 2025, anything this large isn't in milliseconds
+_MICROSECONDS = 10**15
+
+_ARCHIVE_RE = re.compile(
+    r"^(?P<symbol>[A-Z0-9_]+)-(?P<kind>[A-Za-z0-9]+)-(?P<date>\d{4}-\d{2}(?:-\d{2})?)\.zip$"
+)
+
+# klines as returned by the API, prices and quantities are kept as the strings of the archive
+_KLINE_TEXT_FIELDS = tuple(
+    (name, "i8" if dtype == "i8" else "U40") for name, dtype in KLINE_FIELDS
+) + (("ignore", "U40"),)
+
+
+class ArchiveFile:
+    """A file of the Binance public data archive, e.g. BTCUSDT-1m-2024-01.zip or
+    BTCUSDT-aggTrades-2024-01-15.zip"""
+
+    def __init__(
+        self,
+        path: Path,
+        symbol: str,
+        kind: str,
+        interval: Optional[str],
+        start_ts: int,
+        end_ts: int,
+    ):
+        #: path of the zip file
+        self.path = path
+        #: symbol of the archive
+        self.symbol = symbol
+        #: ARCHIVE_KLINES, ARCHIVE_AGG_TRADES or ARCHIVE_TRADES
+        self.kind = kind
+        #: kline interval, None for trades
+        self.interval = interval
+        #: start of the month or day of the archive in milliseconds, inclusive
+        self.start_ts = start_ts
+        #: end of the month or day of the archive in milliseconds, exclusive
+        self.end_ts = end_ts
+
+    def __repr__(self):
+        return f"ArchiveFile({str(self.path)!r})"
+
+
+class ArchiveImport:
+    """Result of importing archive files into a KlineStore"""
+
+    def __init__(self):
+        #: archive files imported
+        self.files: List[Path] = []
+        #: number of klines read from the archives
+        self.rows = 0
+        #: number of klines fetched through REST after the archives
+        self.rest_rows = 0
+
+    def __repr__(self):
+        return (
+            f"ArchiveImport(files={len(self.files)}, rows={self.rows}, rest_rows={self.rest_rows})"
+        )
+
+
+def _date_range(date: str) -> Tuple[int, int]:
+    parts = [int(part) for part in date.split("-")]
+    if len(parts) == 3:
+        start = datetime(parts[0], parts[1], parts[2], tzinfo=timezone.utc)
+        end = start.timestamp() + 24 * 60 * 60
+        return int(start.timestamp() * 1000), int(end * 1000)
+    year, month = parts
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+def parse_archive_name(path: Union[str, Path]) -> Optional[ArchiveFile]:
+    """Parse the name of a monthly or daily archive file of klines, aggTrades or trades
+
+    :param path: path of the zip file
+    :type path: str|Path
+
+    :return: ArchiveFile, None if the name isn't one of a klines, aggTrades or trades archive
+
+    """
+    path = Path(path)
+    match = _ARCHIVE_RE.match(path.name)
+    if not match:
+        return None
+    kind = match.group("kind")
+    interval = None
+    if kind not in (ARCHIVE_AGG_TRADES, ARCHIVE_TRADES):
+        if interval_to_milliseconds(kind) is None:
+            return None
+        interval, kind = kind, ARCHIVE_KLINES
+    start_ts, end_ts = _date_range(match.group("date"))
+    return ArchiveFile(path, match.group("symbol"), kind, interval, start_ts, end_ts)
+
+
+def archive_files(
+    directory: Union[str, Path],
+    symbol: str,
+    kind: str = ARCHIVE_KLINES,
+    interval: Optional[str] = None,
+) -> List[ArchiveFile]:
+    """Find the archive files of a symbol in a directory and its subdirectories
+
+    Daily files of a day already covered by a monthly file are skipped.
+
+    :param directory: directory the archives were downloaded to
+    :type directory: str|Path
+    :param symbol: Name of symbol pair e.g. BNBBTC
+    :type symbol: str
+    :param kind: ARCHIVE_KLINES (default), ARCHIVE_AGG_TRADES or ARCHIVE_TRADES
+    :type kind: str
+    :param interval: kline interval, required for ARCHIVE_KLINES
+    :type interval: str
+
+    :return: list of ArchiveFile sorted by time
+
+    """
+    if kind == ARCHIVE_KLINES and interval is None:
+        raise ValueError("interval is required for klines archives")
+    found = []
+    for path in Path(directory).expanduser().rglob("*.zip"):
+        archive = parse_archive_name(path)
+        if (
+            archive is not None
+            and archive.symbol == symbol.upper()
+            and archive.kind == kind
+            and archive.interval == interval
+        ):
+            found.append(archive)
+    found.sort(key=lambda archive: (archive.start_ts, -archive.end_ts))
+    files: List[ArchiveFile] = []
+    for archive in found:
+        if files and archive.end_ts <= files[-1].end_ts:
+            continue
+        files.append(archive)
+    return files
+
+
+def verify_archive(path: Union[str, Path]):
+    """Check a zip file against the .CHECKSUM file downloaded next to it, if there is one
+
+    :raises ValueError: if the SHA256 of the file doesn't match
+
+    """
+    path = Path(path)
+    checksum_path = path.with_name(path.name + ".CHECKSUM")
+    if not checksum_path.exists():
+        return
+    expected = checksum_path.read_text().split()[0].lower()
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    if digest.hexdigest() != expected:
+        raise ValueError(f"Checksum of {path} doesn't match {checksum_path.name}")
+
+
+def _csv_blocks(path: Path, chunk_bytes: int) -> Iterator[bytes]:
+    # blocks of whole csv lines without the header, which only futures archives have
+    with zipfile.ZipFile(path) as archive:
+        # each archive holds a single csv file
+        with archive.open(archive.namelist()[0]) as f:
+            header = True
+            rest = b""
+            while True:
+                data = f.read(chunk_bytes)
+                block = rest + data
+                end = len(block) if not data else block.rfind(b"\n") + 1
+                block, rest = block[:end], block[end:]
+                if header and block:
+                    header = False
+                    if not block[:1].isdigit():
+                        block = block[block.find(b"\n") + 1 :] if b"\n" in block else b""
+                if block.strip():
+                    yield block
+                if not data:
+                    return
+
+
+def _decode(block: bytes, dtype, columns: Sequence[int]) -> "numpy.ndarray":
+    # vectorised decoding of a block of csv lines into a structured array
+    array = np.loadtxt(
+        io.BytesIO(block), delimiter=",", dtype=dtype, usecols=list(columns), ndmin=1
+    )
+    for name in dtype.names:
+        if name in ("open_time", "close_time", "time"):
+            column = array[name]
+            column[column >= _MICROSECONDS] //= 1000
+    return array
+
+
+def iter_archive_klines(
+    path: Union[str, Path], text: bool = False, chunk_bytes: int = ARCHIVE_CHUNK_BYTES
+) -> Iterator["numpy.ndarray"]:
+    """Decode the klines of an archive file block by block
+
+    :param path: path of the zip file
+    :type path: str|Path
+    :param text: keep prices and quantities as the strings of the archive, with the ignore field, like
+        the API returns them, default decode them to the numeric kline_dtype
+    :type text: bool
+    :param chunk_bytes: size of the csv blocks decoded at a time
+    :type chunk_bytes: int
+
+    :return: generator of numpy structured arrays
+
+    """
+    _require_numpy()
+    dtype = np.dtype(list(_KLINE_TEXT_FIELDS)) if text else kline_dtype()
+    for block in _csv_blocks(Path(path), chunk_bytes):
+        yield _decode(block, dtype, range(len(dtype)))
+
+
+def read_archive_klines(path: Union[str, Path], output: str = OUTPUT_NUMPY):
+    """Read the klines of an archive file
+
+    .. code-block:: python
+
+        klines = read_archive_klines("BTCUSDT-1m-2024-01.zip")
+        closes = klines["close"]
+
+    :param path: path of the zip file
+    :type path: str|Path
+    :param output: output type, one of OUTPUT_LIST, OUTPUT_NUMPY (default) or OUTPUT_COLUMNS
+    :type output: str
+
+    :return: list of klines in the format returned by get_klines, numpy structured array or dict of
+        numpy arrays
+
+    """
+    check_output(output)
+    if output == OUTPUT_LIST:
+        return [list(row) for array in iter_archive_klines(path, True) for row in array.tolist()]
+    builder = KlineArrayBuilder()
+    for array in iter_archive_klines(path):
+        builder.extend_array(array)
+    return klines_output(builder, output)
+
+
+def import_kline_archives(
+    store: KlineStore,
+    directory: Union[str, Path],
+    symbol: str,
+    interval: str,
+    klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    client=None,
+    end_str=None,
+    verify: bool = True,
+) -> ArchiveImport:
+    """Import downloaded kline archive files into a KlineStore and top up the rest through REST
+
+    Each month or day of an archive is marked as synced in the store, and open times the archive has no
+    klines for are recorded as empty. With a client, the ranges after the archives, or between them,
+    which the store is still missing are then fetched with get_historical_klines, so only the last days
+    cost request weight.
+
+    .. code-block:: python
+
+        store = KlineStore("~/.binance")
+        # e.g. files of https://data.binance.vision/?prefix=data/spot/monthly/klines/BTCUSDT/1m/
+        imported = import_kline_archives(store, "/data/archives", "BTCUSDT", "1m", client=client)
+        klines = client.get_historical_klines("BTCUSDT", "1m", "1 Jan, 2020", cache_dir="~/.binance")
+
+    :param store: KlineStore to import into
+    :param directory: directory the archives were downloaded to, searched with its subdirectories
+    :type directory: str|Path
+    :param symbol: Name of symbol pair e.g. BNBBTC
+    :type symbol: str
+    :param interval: Binance Kline interval
+    :type interval: str
+    :param klines_type: Historical klines type of the archives: SPOT, FUTURES or FUTURES_COIN
+    :type klines_type: HistoricalKlinesType
+    :param client: optional - Client instance to fetch the klines missing after the archives
+    :type client: binance.Client
+    :param end_str: optional - end date string in UTC format or timestamp in milliseconds of the REST top
+        up, default the last closed kline
+    :type end_str: str|int
+    :param verify: check each archive against its .CHECKSUM file, if it was downloaded
+    :type verify: bool
+
+    :return: ArchiveImport
+
+    """
+    _interval_ms(interval)
+    result = ArchiveImport()
+    files = archive_files(directory, symbol, ARCHIVE_KLINES, interval)
+    for archive in files:
+        if verify:
+            verify_archive(archive.path)
+        open_times: List[int] = []
+        for array in iter_archive_klines(archive.path, text=True):
+            in_range = (array["open_time"] >= archive.start_ts) & (array["open_time"] < archive.end_ts)
+            array = array[in_range]
+            store.add_klines(symbol, interval, array.tolist(), klines_type)
+            open_times.extend(array["open_time"].tolist())
+        gaps = find_gaps(
+            {"open_time": open_times}, interval, archive.start_ts, archive.end_ts - 1
+        )
+        for empty_start, empty_end in gaps.missing:
+            store.add_empty_range(symbol, interval, empty_start, empty_end, klines_type)
+        store.add_coverage(symbol, interval, archive.start_ts, archive.end_ts, klines_type)
+        result.files.append(archive.path)
+        result.rows += len(open_times)
+
+    if client is not None and files:
+        start_ts, end_ts = _range(interval, files[0].start_ts, end_str)
+        for window in store.missing_ranges(symbol, interval, start_ts, end_ts + 1, klines_type):
+            klines = client.get_historical_klines(
+                symbol, interval, window[0], window[1] - 1, klines_type=klines_type, cache_dir=False
+            )
+            result.rest_rows += _store_window(store, symbol, interval, klines_type, window, klines)
+    return result
+
+
+# numpy dtype of each arrow type of the export fields
+_TRADE_DTYPES = {"int64": "i8", "float64": "f8", "bool": "?"}
+
+
+def _trade_fields(kind: str):
+    if kind == ARCHIVE_AGG_TRADES:
+        return AGG_TRADE_EXPORT_FIELDS
+    if kind == ARCHIVE_TRADES:
+        return TRADE_EXPORT_FIELDS
+    raise ValueError(
+        f"Unknown trades archive {kind!r}, must be {ARCHIVE_AGG_TRADES} or {ARCHIVE_TRADES}"
+    )
+
+
+def iter_archive_trades(
+    path: Union[str, Path],
+    kind: str = ARCHIVE_AGG_TRADES,
+    chunk_bytes: int = ARCHIVE_CHUNK_BYTES,
+) -> Iterator["numpy.ndarray"]:
+    """Decode the trades of an aggTrades or trades archive file block by block
+
+    The arrays have the columns of the parquet export, e.g. agg_trade_id, price, quantity,
+    first_trade_id, last_trade_id, time, is_buyer_maker and is_best_match. Futures archives don't
+    have is_best_match, it's left False.
+
+    :param path: path of the zip file
+    :type path: str|Path
+    :param kind: ARCHIVE_AGG_TRADES (default) or ARCHIVE_TRADES
+    :type kind: str
+    :param chunk_bytes: size of the csv blocks decoded at a time
+    :type chunk_bytes: int
+
+    :return: generator of numpy structured arrays
+
+    """
+    _require_numpy()
+    fields = _trade_fields(kind)
+    dtype = np.dtype([(name, _TRADE_DTYPES[arrow_type]) for name, _, arrow_type in fields])
+    for block in _csv_blocks(Path(path), chunk_bytes):
+        columns = min(block.split(b"\n", 1)[0].count(b",") + 1, len(fields))
+        # booleans are decoded from their first letter, spot archives have True and futures true
+        raw_dtype = np.dtype(
+            [
+                (name, "S1" if arrow_type == "bool" else _TRADE_DTYPES[arrow_type])
+                for name, _, arrow_type in fields[:columns]
+            ]
+        )
+        raw = _decode(block, raw_dtype, range(columns))
+        array = np.zeros(len(raw), dtype=dtype)
+        for name in raw_dtype.names:
+            if raw.dtype[name].kind == "S":
+                array[name] = (raw[name] == b"T") | (raw[name] == b"t")
+            else:
+                array[name] = raw[name]
+        yield array
+
+
+def import_trade_archives(
+    path: Union[str, Path],
+    directory: Union[str, Path],
+    symbol: str,
+    kind: str = ARCHIVE_AGG_TRADES,
+    market: str = MARKET_SPOT,
+    fmt: str = FORMAT_PARQUET,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    verify: bool = True,
+) -> List[Path]:
+    """Import downloaded aggTrades or trades archive files into the day partitions of the parquet export
+
+    The files are written to the directories of export_aggregate_trades and export_trades, which resume
+    after the last completed day, so they top up the days after the archives through REST.
+
+    .. code-block:: python
+
+        import_trade_archives("/data", "/data/archives", "BTCUSDT", ARCHIVE_AGG_TRADES)
+        export_aggregate_trades(client, "/data", "BTCUSDT", "1 Jan, 2020")
+
+    :param path: root directory of the export
+    :type path: str|Path
+    :param directory: directory the archives were downloaded to, searched with its subdirectories
+    :type directory: str|Path
+    :param symbol: Name of symbol pair e.g. BNBBTC
+    :type symbol: str
+    :param kind: ARCHIVE_AGG_TRADES (default) or ARCHIVE_TRADES
+    :type kind: str
+    :param market: market of trades archives, one of MARKET_SPOT (default), MARKET_FUTURES or
+        MARKET_FUTURES_COIN from binance.ratelimit
+    :type market: str
+    :param fmt: FORMAT_PARQUET (default) or FORMAT_ARROW
+    :type fmt: str
+    :param row_group_size: number of rows per row group of the rows written one at a time, the
+        decoded blocks are written as they are
+    :type row_group_size: int
+    :param verify: check each archive against its .CHECKSUM file, if it was downloaded
+    :type verify: bool
+
+    :return: list of the files written
+
+    """
+    _require_pyarrow()
+    fields = _trade_fields(kind)
+    if kind == ARCHIVE_AGG_TRADES:
+        output = Path(path) / "aggTrades" / f"symbol={symbol.upper()}"
+    else:
+        output = Path(path) / "trades" / market / f"symbol={symbol.upper()}"
+    files = archive_files(directory, symbol, kind)
+    if not files:
+        return []
+    schema = _schema(fields)
+    # the days of the archives are complete
+    writer = DayPartitionedWriter(output, fields, files[-1].end_ts - 1, fmt, row_group_size)
+    for archive in files:
+        if verify:
+            verify_archive(archive.path)
+        for array in iter_archive_trades(archive.path, kind):
+            days = array["time"] // DAY_MS
+            # split the block where a new day starts
+            for rows in np.split(array, np.flatnonzero(np.diff(days)) + 1):
+                if not len(rows):
+                    continue
+                table = pa.Table.from_arrays(
+                    [pa.array(rows[name]) for name in schema.names], schema=schema
+                )
+                writer.write_table(table, int(rows["time"][0]))
+    return writer.close()
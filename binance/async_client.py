@@ -1,6 +1,7 @@
 import asyncio
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode, quote
 import time
 import warnings
@@ -19,6 +20,34 @@ from binance.helpers import (
     get_loop,
     interval_to_milliseconds,
 )
+from binance.analytics import (
+    ANALYTICS_MAX_LIMIT,
+    analytics_output,
+    analytics_path,
+    analytics_windows,
+    merge_analytics,
+)
+from binance.columnar import (
+    OUTPUT_LIST,
+    check_output,
+    klines_output,
+    new_klines_output,
+)
+from binance.ratelimit import (
+    FUNDING_RATE_REQUESTS_PER_WINDOW,
+    FUNDING_RATE_WINDOW,
+    FUTURES_DATA_REQUESTS_PER_WINDOW,
+    FUTURES_DATA_WINDOW,
+    MARKET_FUTURES,
+    MARKET_FUTURES_COIN,
+    MARKET_SPOT,
+    MARKET_WEIGHT_PER_MINUTE,
+    AsyncWeightLimiter,
+    agg_trades_request_weight,
+    historical_trades_request_weight,
+    klines_market,
+    klines_request_weight,
+)
 from .base_client import BaseClient
 from .client import Client
 
@@ -40,6 +69,7 @@ class AsyncClient(BaseClient):
         https_proxy: Optional[str] = None,
         time_unit: Optional[str] = None,
         verbose: bool = False,
+        kline_cache_dir: Optional[Union[str, Path]] = None,
     ):
         self.https_proxy = https_proxy
         self.loop = loop or get_loop()
@@ -65,7 +95,9 @@ class AsyncClient(BaseClient):
             private_key_pass,
             time_unit=time_unit,
             verbose=verbose,
+            kline_cache_dir=kline_cache_dir,
         )
+        self._weight_limiters: Dict[str, AsyncWeightLimiter] = {}
 
     @classmethod
     async def create(
@@ -84,6 +116,7 @@ class AsyncClient(BaseClient):
         https_proxy: Optional[str] = None,
         time_unit: Optional[str] = None,
         verbose: bool = False,
+        kline_cache_dir: Optional[Union[str, Path]] = None,
     ):
         self = cls(
             api_key,
@@ -99,7 +132,8 @@ class AsyncClient(BaseClient):
             private_key_pass,
             https_proxy,
             time_unit,
-            verbose
+            verbose,
+            kline_cache_dir,
         )
         self.https_proxy = https_proxy  # move this to the constructor
 
@@ -130,9 +164,64 @@ class AsyncClient(BaseClient):
         if self.ws_api:
             await self.ws_api.close()
             self._ws_api = None
+        self.earliest_timestamp_cache.flush()
 
     close_connection.__doc__ = Client.close_connection.__doc__
 
+    def get_weight_limiter(self, market: str = MARKET_SPOT) -> AsyncWeightLimiter:
+        """Get the request weight budget shared by the concurrent fetches of this client
+
+        Each REST api family (spot, USD-M futures, COIN-M futures) has its own budget.
+
+        :param market: one of MARKET_SPOT, MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+
+        :return: AsyncWeightLimiter
+
+        """
+        if market not in self._weight_limiters:
+            self._weight_limiters[market] = AsyncWeightLimiter(
+                MARKET_WEIGHT_PER_MINUTE[market]
+            )
+        return self._weight_limiters[market]
+
+    def _request_limiter(self, key: str, requests: int, window: float) -> AsyncWeightLimiter:
+        if key not in self._weight_limiters:
+            self._weight_limiters[key] = AsyncWeightLimiter(requests, window=window)
+        return self._weight_limiters[key]
+
+    def get_futures_data_limiter(self, market: str = MARKET_FUTURES) -> AsyncWeightLimiter:
+        """Get the budget of the futures statistics endpoints shared by the concurrent fetches of this client
+
+        The futures/data endpoints are limited to FUTURES_DATA_REQUESTS_PER_WINDOW requests per
+        FUTURES_DATA_WINDOW seconds, each request spends 1.
+
+        :param market: MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+
+        :return: AsyncWeightLimiter
+
+        """
+        return self._request_limiter(
+            f"{market}_data", FUTURES_DATA_REQUESTS_PER_WINDOW, FUTURES_DATA_WINDOW
+        )
+
+    def get_funding_rate_limiter(self, market: str = MARKET_FUTURES) -> AsyncWeightLimiter:
+        """Get the budget of the funding rate history endpoint shared by the concurrent fetches of this client
+
+        The fundingRate endpoint is limited to FUNDING_RATE_REQUESTS_PER_WINDOW requests per
+        FUNDING_RATE_WINDOW seconds, each request spends 1.
+
+        :param market: MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+
+        :return: AsyncWeightLimiter
+
+        """
+        return self._request_limiter(
+            f"{market}_funding", FUNDING_RATE_REQUESTS_PER_WINDOW, FUNDING_RATE_WINDOW
+        )
+
     async def _request(
         self, method, uri: str, signed: bool, force_params: bool = False, **kwargs
     ):
@@ -400,7 +489,45 @@ class AsyncClient(BaseClient):
 
     get_aggregate_trades.__doc__ = Client.get_aggregate_trades.__doc__
 
-    async def aggregate_trade_iter(self, symbol, start_str=None, last_id=None):
+    async def aggregate_trade_iter(
+        self, symbol, start_str=None, last_id=None, prefetch: int = 0
+    ):
+        """Iterate over aggregate trade data from (start_time or last_id) to
+        the end of the history so far.
+
+        If start_time is specified, start with the first trade after
+        start_time. Meant to initialise a local cache of trade data.
+
+        If last_id is specified, start with the trade after it. This is meant
+        for updating a pre-existing local trade data cache.
+
+        Only allows start_str or last_id—not both. Not guaranteed to work
+        right if you're running more than one of these simultaneously. You
+        will probably hit your rate limit.
+
+        With prefetch the next pages are requested while the consumer processes the current one.
+        Aggregate trade ids are consecutive, so the fromId of each page is worked out from the page size.
+        Trades are still yielded once each and in order.
+
+        See dateparser docs for valid start and end string formats http://dateparser.readthedocs.io/en/latest/
+
+        If using offset strings for dates add "UTC" to date string e.g. "now UTC", "11 hours ago UTC"
+
+        :param symbol: Symbol string e.g. ETHBTC
+        :type symbol: str
+        :param start_str: Start date string in UTC format or timestamp in milliseconds. The iterator will
+        return the first trade occurring later than this time.
+        :type start_str: str|int
+        :param last_id: aggregate trade ID of the last known aggregate trade.
+        Not a regular trade ID. See https://binance-docs.github.io/apidocs/spot/en/#compressed-aggregate-trades-list
+        :type last_id: int
+        :param prefetch: optional - number of pages requested ahead of the one being consumed, default 0
+        :type prefetch: int
+
+        :returns: an iterator of JSON objects, one per trade. The format of
+        each object is identical to Client.aggregate_trades().
+
+        """
         if start_str is not None and last_id is not None:
             raise ValueError(
                 "start_time and last_id may not be simultaneously specified."
@@ -436,6 +563,18 @@ class AsyncClient(BaseClient):
                 yield t
             last_id = trades[-1][self.AGG_ID]
 
+        if prefetch:
+            async for t in self._from_id_pages(
+                self.get_aggregate_trades,
+                symbol,
+                last_id,
+                self.AGG_ID,
+                self.AGG_TRADES_MAX_LIMIT,
+                prefetch,
+            ):
+                yield t
+            return
+
         while True:
             # There is no need to wait between queries, to avoid hitting the
             # rate limit. We're using blocking IO, and as long as we're the
@@ -453,7 +592,434 @@ class AsyncClient(BaseClient):
                 yield t
             last_id = trades[-1][self.AGG_ID]
 
-    aggregate_trade_iter.__doc__ = Client.aggregate_trade_iter.__doc__
+    async def _from_id_pages(
+        self, endpoint, symbol, last_id: int, id_key: str, limit: int, prefetch: int = 0
+    ):
+        """Yield the rows after last_id of an endpoint paged by fromId, prefetch pages ahead
+
+        Pages are requested with fromId set to the id following the previous page. Rows already
+        yielded are skipped in case the ids of a page aren't consecutive, so each row is yielded once.
+
+        """
+        next_id = last_id + 1
+        depth = prefetch
+        pending: Deque[asyncio.Future] = deque()
+        try:
+            while True:
+                while len(pending) <= depth:
+                    pending.append(
+                        asyncio.ensure_future(
+                            endpoint(symbol=symbol, fromId=next_id, limit=limit)
+                        )
+                    )
+                    next_id += limit
+                page = await pending.popleft()
+                rows = [r for r in page if r[id_key] > last_id]
+                for r in rows:
+                    yield r
+                if rows:
+                    last_id = rows[-1][id_key]
+                    # skip ahead if the ids of the page weren't consecutive
+                    next_id = max(next_id, last_id + 1)
+                if len(page) == limit:
+                    depth = prefetch
+                    continue
+                # the end of the history so far, the pages requested after it are empty
+                for task in pending:
+                    task.cancel()
+                pending.clear()
+                if not rows:
+                    return
+                # check for new rows without reading ahead until a full page comes back
+                depth = 0
+                next_id = last_id + 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _agg_trades_endpoint(self, market: str):
+        if market == MARKET_SPOT:
+            return self.get_aggregate_trades
+        if market == MARKET_FUTURES:
+            return self.futures_aggregate_trades
+        if market == MARKET_FUTURES_COIN:
+            return self.futures_coin_aggregate_trades
+        raise ValueError(f"Unknown market {market!r}")
+
+    def _historical_trades_endpoint(self, market: str):
+        if market == MARKET_SPOT:
+            return self.get_historical_trades
+        if market == MARKET_FUTURES:
+            return self.futures_historical_trades
+        if market == MARKET_FUTURES_COIN:
+            return self.futures_coin_historical_trades
+        raise ValueError(f"Unknown market {market!r}")
+
+    async def _first_aggregate_trade(
+        self, symbol, start_ts: int, market: str
+    ) -> Optional[Dict]:
+        """Get the first aggregate trade at or after start_ts
+
+        The trades of the hour after start_ts are requested first, the time range of a request can be at
+        most an hour. When there are none the start is checked against the first trade of the symbol and
+        the consecutive aggregate trade ids are bisected up to the latest trade, so a start before the
+        listing or in a gap of trading takes a few dozen requests at most.
+
+        :return: aggregate trade or None if there are no trades after start_ts yet
+
+        """
+        endpoint = self._agg_trades_endpoint(market)
+        trades = await endpoint(
+            symbol=symbol, startTime=start_ts, endTime=start_ts + 60 * 60 * 1000 - 1, limit=1
+        )
+        if trades:
+            return trades[0]
+        earliest = await endpoint(symbol=symbol, fromId=0, limit=1)
+        if not earliest:
+            return None
+        if earliest[0][self.AGG_TIME] >= start_ts:
+            return earliest[0]
+        latest = await endpoint(symbol=symbol, limit=1)
+        if latest[-1][self.AGG_TIME] < start_ts:
+            return None
+        # the first trade at or after start_ts has an id in (before_id, after_id], after is the first
+        # trade from after_id on
+        before_id, after_id, after = earliest[0][self.AGG_ID], latest[-1][self.AGG_ID], latest[-1]
+        while after_id - before_id > 1:
+            middle_id = (before_id + after_id) // 2
+            trade = (await endpoint(symbol=symbol, fromId=middle_id, limit=1))[0]
+            if trade[self.AGG_TIME] >= start_ts:
+                after_id, after = middle_id, trade
+            else:
+                before_id = trade[self.AGG_ID]
+        return after
+
+    async def _aggregate_trade_bounds(
+        self, symbol, start_str, end_str, market: str
+    ) -> Optional[Tuple[Dict, Dict, bool]]:
+        """Get the aggregate trades bounding a time range
+
+        :return: (first trade of the range, bounding trade, True if the bounding trade is the first
+            one after the range or False if it's the latest trade) or None if there are no trades
+
+        """
+        start_ts = convert_ts_str(start_str)
+        if start_ts is None:
+            raise ValueError("start_str is required.")
+        first = await self._first_aggregate_trade(symbol, start_ts, market)
+        if first is None:
+            return None
+        end_bound = await self._aggregate_trade_end_bound(symbol, end_str, market)
+        if end_bound is None:
+            return None
+        return (first,) + end_bound
+
+    async def _aggregate_trade_end_bound(
+        self, symbol, end_str, market: str
+    ) -> Optional[Tuple[Dict, bool]]:
+        """Get the aggregate trade bounding the end of a time range
+
+        :return: (bounding trade, True if it's the first trade after the range or False if it's the
+            latest trade) or None if there are no trades
+
+        """
+        end_ts = convert_ts_str(end_str)
+        if end_ts is not None:
+            after = await self._first_aggregate_trade(symbol, end_ts + 1, market)
+            if after is not None:
+                return after, True
+        # no trades after the end of the range, it ends with the latest trade
+        latest = await self._agg_trades_endpoint(market)(symbol=symbol, limit=1)
+        if not latest:
+            return None
+        return latest[-1], False
+
+    async def get_aggregate_trade_id_range(
+        self, symbol, start_str, end_str=None, market: str = MARKET_SPOT
+    ) -> Optional[Tuple[int, int]]:
+        """Get the ids of the first and last aggregate trades in a time range
+
+        :param symbol: Symbol string e.g. BTCUSDT
+        :type symbol: str
+        :param start_str: Start date string in UTC format or timestamp in milliseconds
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :type end_str: str|int
+        :param market: one of MARKET_SPOT, MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+
+        :return: (first id, last id) both inclusive, or None if there are no trades in the range
+
+        """
+        bounds = await self._aggregate_trade_bounds(symbol, start_str, end_str, market)
+        if bounds is None:
+            return None
+        first, last, after = bounds
+        first_id = first[self.AGG_ID]
+        last_id = last[self.AGG_ID] - 1 if after else last[self.AGG_ID]
+        if last_id < first_id:
+            return None
+        return first_id, last_id
+
+    async def get_trade_id_range(
+        self, symbol, start_str, end_str=None, market: str = MARKET_SPOT
+    ) -> Optional[Tuple[int, int]]:
+        """Get the ids of the first and last trades in a time range
+
+        The trade endpoints can't be queried by time, the ids are taken from the aggregate trades
+        bounding the range.
+
+        :param symbol: Symbol string e.g. BTCUSDT
+        :type symbol: str
+        :param start_str: Start date string in UTC format or timestamp in milliseconds
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :type end_str: str|int
+        :param market: one of MARKET_SPOT, MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+
+        :return: (first id, last id) both inclusive, or None if there are no trades in the range
+
+        """
+        bounds = await self._aggregate_trade_bounds(symbol, start_str, end_str, market)
+        if bounds is None:
+            return None
+        first, last, after = bounds
+        first_id = first[self.AGG_FIRST_TRADE_ID]
+        if after:
+            last_id = last[self.AGG_FIRST_TRADE_ID] - 1
+        else:
+            last_id = last[self.AGG_LAST_TRADE_ID]
+        if last_id < first_id:
+            return None
+        return first_id, last_id
+
+    async def _id_range_pages(
+        self,
+        endpoint,
+        symbol,
+        first_id: int,
+        last_id: int,
+        id_key: str,
+        page_size: int,
+        weight: int,
+        weight_limiter: AsyncWeightLimiter,
+        concurrency: int,
+    ):
+        """Yield the rows with ids from first_id to last_id, fetching pages of ids concurrently
+
+        Up to concurrency pages are in flight at a time. Rows are yielded in order and once each,
+        pages overlap when the ids aren't consecutive.
+
+        """
+
+        async def _fetch(from_id: int):
+            await weight_limiter.acquire(weight)
+            return await endpoint(
+                symbol=symbol,
+                fromId=from_id,
+                limit=min(page_size, last_id - from_id + 1),
+            )
+
+        page_ids = range(first_id, last_id + 1, page_size)
+        pending: Deque[asyncio.Future] = deque()
+        yielded_id = first_id - 1
+        try:
+            for i in range(len(page_ids)):
+                # keep up to concurrency pages in flight, the next page is always the oldest
+                while len(pending) < concurrency and i + len(pending) < len(page_ids):
+                    from_id = page_ids[i + len(pending)]
+                    pending.append(asyncio.ensure_future(_fetch(from_id)))
+                for row in await pending.popleft():
+                    if yielded_id < row[id_key] <= last_id:
+                        yielded_id = row[id_key]
+                        yield row
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def aggregate_trade_backfill(
+        self,
+        symbol,
+        start_str,
+        end_str=None,
+        market: str = MARKET_SPOT,
+        concurrency: int = 4,
+        weight_limiter: Optional[AsyncWeightLimiter] = None,
+    ):
+        """Iterate over the aggregate trades of a time range, fetching pages concurrently
+
+        Aggregate trade ids are consecutive, so the ids of the first and last trades in the range are
+        looked up and split into pages of AGG_TRADES_MAX_LIMIT ids which are fetched independently.
+        Up to concurrency pages are in flight at a time and trades are yielded in order, once each.
+
+        .. code:: python
+
+            async for trade in client.aggregate_trade_backfill("BTCUSDT", "1 Jan, 2024", "1 Feb, 2024"):
+                print(trade)
+
+        :param symbol: Symbol string e.g. BTCUSDT
+        :type symbol: str
+        :param start_str: Start date string in UTC format or timestamp in milliseconds
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :type end_str: str|int
+        :param market: one of MARKET_SPOT (default), MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+        :param concurrency: number of pages requested at a time
+        :type concurrency: int
+        :param weight_limiter: optional - request weight budget, defaults to the budget of the market
+        :type weight_limiter: AsyncWeightLimiter
+
+        :returns: an async iterator of aggregate trades in the format of get_aggregate_trades
+
+        """
+        id_range = await self.get_aggregate_trade_id_range(
+            symbol, start_str, end_str, market
+        )
+        if id_range is None:
+            return
+        async for trade in self._id_range_pages(
+            self._agg_trades_endpoint(market),
+            symbol,
+            id_range[0],
+            id_range[1],
+            self.AGG_ID,
+            self.AGG_TRADES_MAX_LIMIT,
+            agg_trades_request_weight(market),
+            weight_limiter or self.get_weight_limiter(market),
+            concurrency,
+        ):
+            yield trade
+
+    async def historical_trade_iter(
+        self,
+        symbol,
+        start_str=None,
+        last_id=None,
+        market: str = MARKET_SPOT,
+        prefetch: int = 0,
+    ):
+        """Iterate over trades from (start_time or last_id) to the end of the history so far.
+
+        Pages are requested from the historical trades endpoint of the market by fromId. A start time is
+        converted to the id of its first trade with the aggregate trades endpoint.
+
+        Only allows start_str or last_id—not both. Without either the iteration starts at the first trade.
+
+        :param symbol: Symbol string e.g. BTCUSDT
+        :type symbol: str
+        :param start_str: Start date string in UTC format or timestamp in milliseconds. The iterator will
+            return the first trade occurring at or after this time.
+        :type start_str: str|int
+        :param last_id: id of the last known trade, the iterator starts with the trade after it
+        :type last_id: int
+        :param market: one of MARKET_SPOT (default), MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+        :param prefetch: optional - number of pages requested ahead of the one being consumed, default 0
+        :type prefetch: int
+
+        :returns: an async iterator of trades in the format of get_historical_trades
+
+        """
+        if start_str is not None and last_id is not None:
+            raise ValueError(
+                "start_time and last_id may not be simultaneously specified."
+            )
+        start_ts = convert_ts_str(start_str)
+        if start_ts is not None:
+            first = await self._first_aggregate_trade(symbol, start_ts, market)
+            if first is None:
+                return
+            last_id = first[self.AGG_FIRST_TRADE_ID] - 1
+        elif last_id is None:
+            last_id = -1
+
+        async for t in self._from_id_pages(
+            self._historical_trades_endpoint(market),
+            symbol,
+            last_id,
+            "id",
+            self.HISTORICAL_TRADES_MAX_LIMIT[market],
+            prefetch,
+        ):
+            yield t
+
+    async def historical_trade_backfill(
+        self,
+        symbol,
+        start_str=None,
+        end_str=None,
+        market: str = MARKET_SPOT,
+        concurrency: int = 4,
+        weight_limiter: Optional[AsyncWeightLimiter] = None,
+        last_id: Optional[int] = None,
+    ):
+        """Iterate over the trades of a time range, fetching pages concurrently
+
+        The ids of the first and last trades in the range are looked up with the aggregate trades
+        endpoint and split into pages fetched independently from the historical trades endpoint.
+        Up to concurrency pages are in flight at a time and trades are yielded in order, once each.
+
+        Pass the id of the last trade processed as last_id to resume an interrupted backfill, the
+        backfill then starts after it and start_str isn't needed.
+
+        .. code:: python
+
+            async for trade in client.historical_trade_backfill("BTCUSDT", "1 Jan, 2024", "2 Jan, 2024"):
+                print(trade)
+
+        :param symbol: Symbol string e.g. BTCUSDT
+        :type symbol: str
+        :param start_str: Start date string in UTC format or timestamp in milliseconds, required
+            without last_id
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :type end_str: str|int
+        :param market: one of MARKET_SPOT (default), MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+        :param concurrency: number of pages requested at a time
+        :type concurrency: int
+        :param weight_limiter: optional - request weight budget, defaults to the budget of the market
+        :type weight_limiter: AsyncWeightLimiter
+        :param last_id: optional - id of the last trade already processed, the backfill starts after it
+        :type last_id: int
+
+        :returns: an async iterator of trades in the format of get_historical_trades
+
+        """
+        if last_id is not None:
+            # resuming, the start is known without looking up the first trade of start_str
+            end_bound = await self._aggregate_trade_end_bound(symbol, end_str, market)
+            if end_bound is None:
+                return
+            bound, after = end_bound
+            first_id = last_id + 1
+            if after:
+                end_id = bound[self.AGG_FIRST_TRADE_ID] - 1
+            else:
+                end_id = bound[self.AGG_LAST_TRADE_ID]
+        elif start_str is None:
+            raise ValueError("start_str is required without last_id.")
+        else:
+            id_range = await self.get_trade_id_range(symbol, start_str, end_str, market)
+            if id_range is None:
+                return
+            first_id, end_id = id_range
+        if first_id > end_id:
+            return
+        async for trade in self._id_range_pages(
+            self._historical_trades_endpoint(market),
+            symbol,
+            first_id,
+            end_id,
+            "id",
+            self.HISTORICAL_TRADES_MAX_LIMIT[market],
+            historical_trades_request_weight(market),
+            weight_limiter or self.get_weight_limiter(market),
+            concurrency,
+        ):
+            yield trade
 
     async def get_ui_klines(self, **params) -> Dict:
         return await self._get("uiKlines", data=params)
@@ -470,6 +1036,12 @@ class AsyncClient(BaseClient):
     ) -> Dict:
         if "endTime" in params and not params["endTime"]:
             del params["endTime"]
+        if klines_type in (
+            HistoricalKlinesType.FUTURES_INDEX_PRICE,
+            HistoricalKlinesType.FUTURES_COIN_INDEX_PRICE,
+        ) and "symbol" in params:
+            # index price klines are requested by pair
+            params["pair"] = params.pop("symbol")
         if HistoricalKlinesType.SPOT == klines_type:
             return await self.get_klines(**params)
         elif HistoricalKlinesType.FUTURES == klines_type:
@@ -495,6 +1067,9 @@ class AsyncClient(BaseClient):
         interval,
         klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
     ):
+        cached_ts = self.earliest_timestamp_cache.get(symbol, interval, klines_type)
+        if cached_ts is not None:
+            return cached_ts
         kline = await self._klines(
             klines_type=klines_type,
             symbol=symbol,
@@ -503,6 +1078,7 @@ class AsyncClient(BaseClient):
             startTime=0,
             endTime=int(time.time() * 1000),
         )
+        self.earliest_timestamp_cache.set(symbol, interval, klines_type, kline[0][0])
         return kline[0][0]
 
     _get_earliest_valid_timestamp.__doc__ = Client._get_earliest_valid_timestamp.__doc__
@@ -515,6 +1091,10 @@ class AsyncClient(BaseClient):
         end_str=None,
         limit=None,
         klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+        concurrency: Optional[int] = None,
+        weight_limiter: Optional[AsyncWeightLimiter] = None,
+        cache_dir: Optional[Union[str, Path, bool]] = None,
+        output: str = OUTPUT_LIST,
     ):
         return await self._historical_klines(
             symbol,
@@ -523,6 +1103,10 @@ class AsyncClient(BaseClient):
             end_str=end_str,
             limit=limit,
             klines_type=klines_type,
+            concurrency=concurrency,
+            weight_limiter=weight_limiter,
+            cache_dir=cache_dir,
+            output=output,
         )
 
     get_historical_klines.__doc__ = Client.get_historical_klines.__doc__
@@ -535,14 +1119,51 @@ class AsyncClient(BaseClient):
         end_str=None,
         limit=None,
         klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+        concurrency: Optional[int] = None,
+        weight_limiter: Optional[AsyncWeightLimiter] = None,
+        cache_dir: Optional[Union[str, Path, bool]] = None,
+        output: str = OUTPUT_LIST,
     ):
+        """Get Historical Klines from Binance (spot or futures)
+
+        See dateparser docs for valid start and end string formats https://dateparser.readthedocs.io/en/latest/
+
+        If using offset strings for dates add "UTC" to date string e.g. "now UTC", "11 hours ago UTC"
+
+        :param symbol: Name of symbol pair e.g. BNBBTC
+        :type symbol: str
+        :param interval: Binance Kline interval
+        :type interval: str
+        :param start_str: optional - start date string in UTC format or timestamp in milliseconds
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds (default will fetch everything up to now)
+        :type end_str: None|str|int
+        :param limit: Default 1000; max 1000.
+        :type limit: int
+        :param klines_type: Historical klines type: SPOT or FUTURES
+        :type klines_type: HistoricalKlinesType
+        :param concurrency: optional - number of page sized windows to fetch at a time
+        :type concurrency: int
+        :param weight_limiter: optional - request weight budget for the concurrent fetch
+        :type weight_limiter: AsyncWeightLimiter
+        :param cache_dir: optional - directory of a local store of closed klines, defaults to the kline_cache_dir
+            of the client, True requires it and False skips the store
+        :type cache_dir: str|Path|bool
+        :param output: optional - "list" (default) for the API format, "numpy" for a numpy structured array
+            or "columns" for a dict of numpy arrays with int64 timestamps and float64 prices and volumes
+        :type output: str
+
+        :return: list of OHLCV values (Open time, Open, High, Low, Close, Volume, Close time, Quote asset volume, Number of trades, Taker buy base asset volume, Taker buy quote asset volume, Ignore)
+
+        """
         initial_limit_set = True
         if limit is None:
             limit = 1000
             initial_limit_set = False
 
-        # init our list
-        output_data = []
+        check_output(output)
+        if cache_dir is True and not self.kline_cache_dir:
+            raise ValueError("cache_dir=True requires the kline_cache_dir of the client")
 
         # convert interval to useful value in seconds
         timeframe = interval_to_milliseconds(interval)
@@ -558,7 +1179,47 @@ class AsyncClient(BaseClient):
         # if an end time was passed convert it
         end_ts = convert_ts_str(end_str)
         if end_ts and start_ts and end_ts <= start_ts:
-            return output_data
+            return klines_output([], output)
+
+        # the local store needs a start and a fixed length interval to work out the missing ranges
+        if cache_dir is None or cache_dir is True:
+            cache_dir = self.kline_cache_dir
+        if cache_dir and start_ts is not None and timeframe:
+            output_data = await self._historical_klines_cached(
+                symbol,
+                interval,
+                start_ts,
+                end_ts,
+                limit if initial_limit_set else None,
+                klines_type,
+                cache_dir,
+                concurrency,
+                weight_limiter,
+            )
+            return klines_output(output_data, output)
+
+        # the windows can only be computed up front with a start and a fixed length interval
+        if concurrency and start_ts is not None and timeframe:
+            output_data = await self._historical_klines_concurrent(
+                symbol,
+                interval,
+                start_ts,
+                end_ts,
+                limit if initial_limit_set else None,
+                klines_type,
+                concurrency,
+                weight_limiter,
+            )
+            return klines_output(output_data, output)
+
+        # init our list, or preallocate the arrays when the number of klines is known
+        capacity = limit if initial_limit_set else None
+        if start_ts is not None and end_ts and timeframe:
+            # klines after now don't exist yet
+            now = int(time.time() * 1000 + self.timestamp_offset)
+            expected = max((min(end_ts, now) - start_ts) // timeframe + 1, 0)
+            capacity = min(capacity, expected) if capacity else expected
+        output_data = new_klines_output(output, capacity)
 
         idx = 0
         while True:
@@ -572,13 +1233,15 @@ class AsyncClient(BaseClient):
                 endTime=end_ts,
             )
 
-            # append this loops data to our output data
+            # append this loops data to our output data, truncated to the limit if needed
             if temp_data:
-                output_data += temp_data
+                if initial_limit_set:
+                    output_data.extend(temp_data[: limit - len(output_data)])
+                else:
+                    output_data.extend(temp_data)
 
-            # check if output_data is greater than limit and truncate if needed and break loop
-            if initial_limit_set and len(output_data) > limit:
-                output_data = output_data[:limit]
+            # break loop once we have reached the limit
+            if initial_limit_set and len(output_data) >= limit:
                 break
 
             # handle the case where exactly the limit amount of data was returned last loop
@@ -600,9 +1263,147 @@ class AsyncClient(BaseClient):
             if idx % 3 == 0:
                 await asyncio.sleep(1)
 
+        return klines_output(output_data, output)
+
+    async def _historical_klines_cached(
+        self,
+        symbol,
+        interval,
+        start_ts: int,
+        end_ts: Optional[int],
+        limit: Optional[int],
+        klines_type: HistoricalKlinesType,
+        cache_dir: Union[str, Path],
+        concurrency: Optional[int] = None,
+        weight_limiter: Optional[AsyncWeightLimiter] = None,
+    ):
+        store = self._get_kline_store(cache_dir)
+        timeframe = interval_to_milliseconds(interval)
+        assert timeframe
+        now = int(time.time() * 1000 + self.timestamp_offset)
+        # work on open times in [start_ts, stop_ts)
+        stop_ts = end_ts + 1 if end_ts else now
+        if limit:
+            stop_ts = min(stop_ts, start_ts + limit * timeframe)
+        # klines opening from closed_ts onwards haven't closed yet
+        closed_ts = now - timeframe + 1
+
+        for gap_start, gap_end in store.missing_ranges(
+            symbol, interval, start_ts, min(stop_ts, closed_ts), klines_type
+        ):
+            klines = await self._historical_klines(
+                symbol,
+                interval,
+                gap_start,
+                gap_end - 1,
+                klines_type=klines_type,
+                concurrency=concurrency,
+                weight_limiter=weight_limiter,
+                cache_dir=False,
+            )
+            store.add_klines(
+                symbol, interval, [k for k in klines if k[6] < now], klines_type
+            )
+            store.add_coverage(symbol, interval, gap_start, gap_end, klines_type)
+
+        output_data = store.get_klines(
+            symbol, interval, start_ts, stop_ts - 1, klines_type
+        )
+        if stop_ts > closed_ts:
+            output_data += await self._historical_klines(
+                symbol,
+                interval,
+                max(start_ts, closed_ts),
+                stop_ts - 1,
+                klines_type=klines_type,
+                cache_dir=False,
+            )
+        if limit:
+            output_data = output_data[:limit]
         return output_data
 
-    _historical_klines.__doc__ = Client._historical_klines.__doc__
+    _historical_klines_cached.__doc__ = Client._historical_klines_cached.__doc__
+
+    async def _historical_klines_concurrent(
+        self,
+        symbol,
+        interval,
+        start_ts: int,
+        end_ts: Optional[int],
+        limit: Optional[int],
+        klines_type: HistoricalKlinesType,
+        concurrency: int,
+        weight_limiter: Optional[AsyncWeightLimiter] = None,
+    ):
+        """Fetch historical klines by splitting the range into page sized windows fetched concurrently
+
+        Each window spans at most one page of candles so a single request covers it. Windows are
+        reassembled in order and candles are deduplicated by open time.
+
+        :param start_ts: start timestamp in milliseconds, already moved to the earliest valid timestamp
+        :type start_ts: int
+        :param end_ts: optional - end timestamp in milliseconds, defaults to now
+        :type end_ts: int
+        :param limit: optional - maximum number of klines to return
+        :type limit: int
+        :param concurrency: number of windows to fetch at a time
+        :type concurrency: int
+        :param weight_limiter: optional - request weight budget, defaults to the budget shared by this client
+        :type weight_limiter: AsyncWeightLimiter
+
+        :return: list of OHLCV values
+
+        """
+        timeframe = interval_to_milliseconds(interval)
+        assert timeframe
+        page_size = min(limit, 1000) if limit else 1000
+        # work on [start_ts, stop_ts), endTime is inclusive like in the sequential fetch
+        stop_ts = end_ts + 1 if end_ts else int(time.time() * 1000 + self.timestamp_offset)
+        if limit:
+            stop_ts = min(stop_ts, start_ts + limit * timeframe)
+        weight_limiter = weight_limiter or self.get_weight_limiter(
+            klines_market(klines_type)
+        )
+        weight = klines_request_weight(klines_type, page_size)
+        semaphore = asyncio.Semaphore(concurrency)
+        window = page_size * timeframe
+
+        async def fetch_window(window_start):
+            async with semaphore:
+                await weight_limiter.acquire(weight)
+                # endTime is inclusive, so stop just before the next window
+                return await self._klines(
+                    klines_type=klines_type,
+                    symbol=symbol,
+                    interval=interval,
+                    limit=page_size,
+                    startTime=window_start,
+                    endTime=min(window_start + window, stop_ts) - 1,
+                )
+
+        tasks = [
+            asyncio.ensure_future(fetch_window(window_start))
+            for window_start in range(start_ts, stop_ts, window)
+        ]
+        try:
+            pages = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        output_data = []
+        last_open_time = None
+        for page in pages:
+            for kline in page or []:
+                if last_open_time is not None and kline[0] <= last_open_time:
+                    continue
+                output_data.append(kline)
+                last_open_time = kline[0]
+
+        if limit:
+            output_data = output_data[:limit]
+        return output_data
 
     async def get_historical_klines_generator(
         self,
@@ -1978,7 +2779,16 @@ class AsyncClient(BaseClient):
     futures_continuous_klines.__doc__ = Client.futures_continuous_klines.__doc__
 
     async def futures_historical_klines(
-        self, symbol: str, interval: str, start_str, end_str=None, limit=None
+        self,
+        symbol: str,
+        interval: str,
+        start_str,
+        end_str=None,
+        limit=None,
+        concurrency: Optional[int] = None,
+        weight_limiter: Optional[AsyncWeightLimiter] = None,
+        cache_dir: Optional[Union[str, Path, bool]] = None,
+        output: str = OUTPUT_LIST,
     ):
         return await self._historical_klines(
             symbol,
@@ -1987,6 +2797,10 @@ class AsyncClient(BaseClient):
             end_str=end_str,
             limit=limit,
             klines_type=HistoricalKlinesType.FUTURES,
+            concurrency=concurrency,
+            weight_limiter=weight_limiter,
+            cache_dir=cache_dir,
+            output=output,
         )
 
     futures_historical_klines.__doc__ = Client.futures_historical_klines.__doc__
@@ -2014,6 +2828,54 @@ class AsyncClient(BaseClient):
 
     futures_funding_rate.__doc__ = Client.futures_funding_rate.__doc__
 
+    async def futures_funding_rate_iter(
+        self,
+        symbol,
+        start_str=None,
+        end_str=None,
+        market: str = MARKET_FUTURES,
+        weight_limiter: Optional[AsyncWeightLimiter] = None,
+    ):
+        """Iterate over the funding rate history of a perpetual, FUNDING_RATE_MAX_LIMIT rates at a time
+
+        :param symbol: Symbol string e.g. BTCUSDT or BTCUSD_PERP
+        :type symbol: str
+        :param start_str: optional - start date string in UTC format or timestamp in milliseconds, default the
+            first funding of the symbol
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :type end_str: str|int
+        :param market: MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+        :param weight_limiter: optional - request budget spent before each page, e.g. get_funding_rate_limiter
+        :type weight_limiter: AsyncWeightLimiter
+
+        :return: an async iterator of funding rates in the format of futures_funding_rate, oldest first
+
+        """
+        if market == MARKET_FUTURES:
+            endpoint = self.futures_funding_rate
+        elif market == MARKET_FUTURES_COIN:
+            endpoint = self.futures_coin_funding_rate
+        else:
+            raise ValueError(f"Unknown market {market!r}")
+        start_ts = convert_ts_str(start_str) or 0
+        end_ts = convert_ts_str(end_str)
+        while True:
+            if weight_limiter is not None:
+                await weight_limiter.acquire(1)
+            rates = await endpoint(
+                symbol=symbol,
+                startTime=start_ts,
+                endTime=end_ts,
+                limit=self.FUNDING_RATE_MAX_LIMIT,
+            )
+            for rate in rates:
+                yield rate
+            if len(rates) < self.FUNDING_RATE_MAX_LIMIT:
+                return
+            start_ts = rates[-1]["fundingTime"] + 1
+
     async def futures_top_longshort_account_ratio(self, **params):
         return await self._request_futures_data_api(
             "get", "topLongShortAccountRatio", data=params
@@ -2042,6 +2904,121 @@ class AsyncClient(BaseClient):
 
     futures_taker_longshort_ratio.__doc__ = Client.futures_taker_longshort_ratio.__doc__
 
+    async def futures_basis(self, **params):
+        return await self._request_futures_data_api("get", "basis", data=params)
+
+    futures_basis.__doc__ = Client.futures_basis.__doc__
+
+    def _futures_data_endpoint(self, endpoint: str, market: str):
+        path = analytics_path(endpoint, market)
+        if market == MARKET_FUTURES:
+            request = self._request_futures_data_api
+        else:
+            request = self._request_futures_coin_data_api
+        return lambda **params: request("get", path, data=params)
+
+    async def futures_analytics_generator(
+        self,
+        endpoint: str,
+        period: str = "5m",
+        start_str=None,
+        end_str=None,
+        market: str = MARKET_FUTURES,
+        **params,
+    ):
+        request = self._futures_data_endpoint(endpoint, market)
+        now = int(time.time() * 1000 + self.timestamp_offset)
+        for start_ts, end_ts in analytics_windows(period, now, start_str, end_str):
+            page = await request(
+                period=period,
+                startTime=start_ts,
+                endTime=end_ts,
+                limit=ANALYTICS_MAX_LIMIT,
+                **params,
+            )
+            for row in merge_analytics([page], start_ts, end_ts):
+                yield row
+
+    futures_analytics_generator.__doc__ = Client.futures_analytics_generator.__doc__
+
+    async def get_futures_analytics(
+        self,
+        endpoint: str,
+        period: str = "5m",
+        start_str=None,
+        end_str=None,
+        market: str = MARKET_FUTURES,
+        output: str = OUTPUT_LIST,
+        concurrency: int = 4,
+        weight_limiter: Optional[AsyncWeightLimiter] = None,
+        **params,
+    ):
+        """Get the history of a futures statistic over a time range, fetching windows concurrently
+
+        The range is split into windows of ANALYTICS_MAX_LIMIT periods, up to concurrency windows are
+        requested at a time within the futures/data request limit. The pages are merged by timestamp.
+
+        .. code:: python
+
+            from binance.analytics import ANALYTICS_TOP_LONG_SHORT_POSITION_RATIO
+
+            ratios = await client.get_futures_analytics(
+                ANALYTICS_TOP_LONG_SHORT_POSITION_RATIO,
+                "5m",
+                "30 days ago UTC",
+                symbol="BTCUSDT",
+                output="columns",
+                concurrency=8,
+            )
+
+        :param endpoint: one of the ANALYTICS_* statistics from binance.analytics e.g. ANALYTICS_BASIS
+        :type endpoint: str
+        :param period: one of ANALYTICS_PERIODS, default 5m
+        :type period: str
+        :param start_str: optional - start date string in UTC format or timestamp in milliseconds, default
+            the start of the 30 day lookback
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :type end_str: str|int
+        :param market: MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+        :param output: optional - OUTPUT_LIST (default) for the rows returned by the endpoint, OUTPUT_NUMPY for a
+            structured array or OUTPUT_COLUMNS for a dict of arrays, both with the timestamp and the numeric
+            fields of the statistic
+        :type output: str
+        :param concurrency: number of windows requested at a time
+        :type concurrency: int
+        :param weight_limiter: optional - request budget, defaults to get_futures_data_limiter of the market
+        :type weight_limiter: AsyncWeightLimiter
+        :param params: parameters of the endpoint e.g. symbol, or pair and contractType
+
+        :return: rows sorted by timestamp, once each
+
+        """
+        check_output(output)
+        request = self._futures_data_endpoint(endpoint, market)
+        weight_limiter = weight_limiter or self.get_futures_data_limiter(market)
+        semaphore = asyncio.Semaphore(concurrency)
+        now = int(time.time() * 1000 + self.timestamp_offset)
+        windows = analytics_windows(period, now, start_str, end_str)
+
+        async def _fetch(window: Tuple[int, int]):
+            async with semaphore:
+                await weight_limiter.acquire(1)
+                return await request(
+                    period=period,
+                    startTime=window[0],
+                    endTime=window[1],
+                    limit=ANALYTICS_MAX_LIMIT,
+                    **params,
+                )
+
+        rows = []
+        if windows:
+            pages = await asyncio.gather(*(_fetch(window) for window in windows))
+            rows = merge_analytics(pages, windows[0][0], windows[-1][1])
+        return analytics_output(rows, endpoint, market, output)
+
     async def futures_ticker(self, **params):
         return await self._request_futures_api("get", "ticker/24hr", data=params)
 
@@ -2683,6 +3660,47 @@ class AsyncClient(BaseClient):
 
     futures_coin_open_interest_hist.__doc__ = Client.futures_coin_open_interest_hist.__doc__
 
+    async def futures_coin_top_longshort_position_ratio(self, **params):
+        return await self._request_futures_coin_data_api(
+            "get", "topLongShortPositionRatio", data=params
+        )
+
+    futures_coin_top_longshort_position_ratio.__doc__ = (
+        Client.futures_coin_top_longshort_position_ratio.__doc__
+    )
+
+    async def futures_coin_top_longshort_account_ratio(self, **params):
+        return await self._request_futures_coin_data_api(
+            "get", "topLongShortAccountRatio", data=params
+        )
+
+    futures_coin_top_longshort_account_ratio.__doc__ = (
+        Client.futures_coin_top_longshort_account_ratio.__doc__
+    )
+
+    async def futures_coin_global_longshort_ratio(self, **params):
+        return await self._request_futures_coin_data_api(
+            "get", "globalLongShortAccountRatio", data=params
+        )
+
+    futures_coin_global_longshort_ratio.__doc__ = (
+        Client.futures_coin_global_longshort_ratio.__doc__
+    )
+
+    async def futures_coin_taker_buy_sell_volume(self, **params):
+        return await self._request_futures_coin_data_api(
+            "get", "takerBuySellVol", data=params
+        )
+
+    futures_coin_taker_buy_sell_volume.__doc__ = (
+        Client.futures_coin_taker_buy_sell_volume.__doc__
+    )
+
+    async def futures_coin_basis(self, **params):
+        return await self._request_futures_coin_data_api("get", "basis", data=params)
+
+    futures_coin_basis.__doc__ = Client.futures_coin_basis.__doc__
+
     async def futures_coin_leverage_bracket(self, **params):
         return await self._request_futures_coin_api(
             "get", "leverageBracket", version=2, signed=True, data=params
@@ -1,7 +1,7 @@
 from base64 import b64encode
 from pathlib import Path
 import random
-from typing import Dict, Optional, List, Tuple, Union, Any
+from typing import ClassVar, Dict, Optional, List, Tuple, Union, Any
 
 import asyncio
 import hashlib
@@ -18,6 +18,8 @@ from urllib.parse import urlencode
 from binance.ws.websocket_api import WebsocketAPI
 
 from .helpers import get_loop
+from .ratelimit import MARKET_FUTURES, MARKET_FUTURES_COIN, MARKET_SPOT
+from .store import EarliestTimestampCache, KlineStore
 
 
 class BaseClient:
@@ -132,6 +134,19 @@ class BaseClient:
     AGG_BUYER_MAKES = "m"
     AGG_BEST_MATCH = "M"
 
+    # largest page of aggregate trades returned by a single request
+    AGG_TRADES_MAX_LIMIT = 1000
+
+    # largest page of trades returned by a single historicalTrades request
+    HISTORICAL_TRADES_MAX_LIMIT: ClassVar[Dict[str, int]] = {
+        MARKET_SPOT: 1000,
+        MARKET_FUTURES: 500,
+        MARKET_FUTURES_COIN: 500,
+    }
+
+    # largest page of funding rates returned by a single fundingRate request
+    FUNDING_RATE_MAX_LIMIT = 1000
+
     # new asset transfer api enum
     SPOT_TO_FIAT = "MAIN_C2C"
     SPOT_TO_USDT_FUTURE = "MAIN_UMFUTURE"
@@ -169,6 +184,7 @@ class BaseClient:
         loop: Optional[asyncio.AbstractEventLoop] = None,
         time_unit: Optional[str] = None,
         verbose: bool = False,
+        kline_cache_dir: Optional[Union[str, Path]] = None,
     ):
         """Binance API Client constructor
 
@@ -188,6 +204,8 @@ class BaseClient:
         :type time_unit: optional - str
         :param verbose: Enable verbose logging for debugging
         :type verbose: bool
+        :param kline_cache_dir: optional - directory of a local store used by the historical klines functions
+        :type kline_cache_dir: str|Path
 
         """
 
@@ -220,6 +238,13 @@ class BaseClient:
         self.testnet = testnet
         self.demo = demo
         self.timestamp_offset = 0
+        self.kline_cache_dir = kline_cache_dir
+        self._kline_stores: Dict[str, KlineStore] = {}
+        self.earliest_timestamp_cache = EarliestTimestampCache(
+            Path(kline_cache_dir).expanduser() / "earliest_timestamps.json"
+            if kline_cache_dir
+            else None
+        )
         ws_api_url = self.WS_API_URL.format(tld)
         if testnet:
             ws_api_url = self.WS_API_TESTNET_URL
@@ -258,6 +283,12 @@ class BaseClient:
     def _init_session(self):
         raise NotImplementedError
 
+    def _get_kline_store(self, cache_dir: Union[str, Path]) -> KlineStore:
+        key = str(Path(cache_dir).expanduser())
+        if key not in self._kline_stores:
+            self._kline_stores[key] = KlineStore(key)
+        return self._kline_stores[key]
+
     def _init_private_key(
         self,
         private_key: Optional[Union[str, Path]],
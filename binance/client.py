@@ -12,6 +12,7 @@ from .helpers import (
     convert_list_to_json_array,
     interval_to_milliseconds,
     convert_ts_str,
+    read_ahead,
 )
 from .exceptions import (
     BinanceAPIException,
@@ -19,6 +20,15 @@ from .exceptions import (
     NotImplementedException,
 )
 from .enums import HistoricalKlinesType
+from .analytics import (
+    ANALYTICS_MAX_LIMIT,
+    analytics_output,
+    analytics_path,
+    analytics_windows,
+    merge_analytics,
+)
+from .columnar import OUTPUT_LIST, check_output, klines_output, new_klines_output
+from .ratelimit import MARKET_FUTURES, MARKET_FUTURES_COIN, MARKET_SPOT
 
 
 class Client(BaseClient):
@@ -36,6 +46,7 @@ class Client(BaseClient):
         ping: Optional[bool] = True,
         time_unit: Optional[str] = None,
         verbose: bool = False,
+        kline_cache_dir: Optional[Union[str, Path]] = None,
     ):
         super().__init__(
             api_key,
@@ -49,6 +60,7 @@ class Client(BaseClient):
             private_key_pass,
             time_unit=time_unit,
             verbose=verbose,
+            kline_cache_dir=kline_cache_dir,
         )
 
         # init DNS and SSL cert
@@ -684,6 +696,119 @@ class Client(BaseClient):
                 yield t
             last_id = trades[-1][self.AGG_ID]
 
+    def historical_trade_iter(
+        self, symbol: str, start_str=None, last_id=None, market: str = MARKET_SPOT
+    ):
+        """Iterate over trades from (start_time or last_id) to the end of the history so far.
+
+        Pages are requested from the historical trades endpoint of the market by fromId. A start time is
+        converted to the id of its first trade with the aggregate trades endpoint.
+
+        Only allows start_str or last_id—not both. Without either the iteration starts at the first trade.
+
+        :param symbol: Symbol string e.g. BTCUSDT
+        :type symbol: str
+        :param start_str: Start date string in UTC format or timestamp in milliseconds. The iterator will
+            return the first trade occurring at or after this time.
+        :type start_str: str|int
+        :param last_id: id of the last known trade, the iterator starts with the trade after it
+        :type last_id: int
+        :param market: one of MARKET_SPOT (default), MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+
+        :returns: an iterator of trades in the format of get_historical_trades
+
+        """
+        if start_str is not None and last_id is not None:
+            raise ValueError(
+                "start_time and last_id may not be simultaneously specified."
+            )
+        start_ts = convert_ts_str(start_str)
+        if start_ts is not None:
+            first = self._first_aggregate_trade(symbol, start_ts, market)
+            if first is None:
+                return
+            last_id = first[self.AGG_FIRST_TRADE_ID] - 1
+        elif last_id is None:
+            last_id = -1
+
+        yield from self._from_id_pages(
+            self._historical_trades_endpoint(market),
+            symbol,
+            last_id,
+            "id",
+            self.HISTORICAL_TRADES_MAX_LIMIT[market],
+        )
+
+    def _from_id_pages(self, endpoint, symbol: str, last_id: int, id_key: str, limit: int):
+        """Yield the rows after last_id of an endpoint paged by fromId, until an empty page
+
+        Rows already yielded are skipped in case the ids of a page aren't consecutive.
+
+        """
+        while True:
+            page = endpoint(symbol=symbol, fromId=last_id + 1, limit=limit)
+            rows = [r for r in page if r[id_key] > last_id]
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][id_key]
+
+    def _agg_trades_endpoint(self, market: str):
+        if market == MARKET_SPOT:
+            return self.get_aggregate_trades
+        if market == MARKET_FUTURES:
+            return self.futures_aggregate_trades
+        if market == MARKET_FUTURES_COIN:
+            return self.futures_coin_aggregate_trades
+        raise ValueError(f"Unknown market {market!r}")
+
+    def _historical_trades_endpoint(self, market: str):
+        if market == MARKET_SPOT:
+            return self.get_historical_trades
+        if market == MARKET_FUTURES:
+            return self.futures_historical_trades
+        if market == MARKET_FUTURES_COIN:
+            return self.futures_coin_historical_trades
+        raise ValueError(f"Unknown market {market!r}")
+
+    def _first_aggregate_trade(self, symbol: str, start_ts: int, market: str) -> Optional[Dict]:
+        """Get the first aggregate trade at or after start_ts
+
+        The trades of the hour after start_ts are requested first, the time range of a request can be at
+        most an hour. When there are none the start is checked against the first trade of the symbol and
+        the consecutive aggregate trade ids are bisected up to the latest trade, so a start before the
+        listing or in a gap of trading takes a few dozen requests at most.
+
+        :return: aggregate trade or None if there are no trades after start_ts yet
+
+        """
+        endpoint = self._agg_trades_endpoint(market)
+        trades = endpoint(
+            symbol=symbol, startTime=start_ts, endTime=start_ts + 60 * 60 * 1000 - 1, limit=1
+        )
+        if trades:
+            return trades[0]
+        earliest = endpoint(symbol=symbol, fromId=0, limit=1)
+        if not earliest:
+            return None
+        if earliest[0][self.AGG_TIME] >= start_ts:
+            return earliest[0]
+        latest = endpoint(symbol=symbol, limit=1)
+        if latest[-1][self.AGG_TIME] < start_ts:
+            return None
+        # the first trade at or after start_ts has an id in (before_id, after_id], after is the first
+        # trade from after_id on
+        before_id, after_id, after = earliest[0][self.AGG_ID], latest[-1][self.AGG_ID], latest[-1]
+        while after_id - before_id > 1:
+            middle_id = (before_id + after_id) // 2
+            trade = endpoint(symbol=symbol, fromId=middle_id, limit=1)[0]
+            if trade[self.AGG_TIME] >= start_ts:
+                after_id, after = middle_id, trade
+            else:
+                before_id = trade[self.AGG_ID]
+        return after
+
     def get_ui_klines(self, **params) -> Dict:
         """Kline/candlestick bars for a symbol with UI enhancements. Klines are uniquely identified by their open time.
 
@@ -792,6 +917,12 @@ class Client(BaseClient):
         """
         if "endTime" in params and not params["endTime"]:
             del params["endTime"]
+        if klines_type in (
+            HistoricalKlinesType.FUTURES_INDEX_PRICE,
+            HistoricalKlinesType.FUTURES_COIN_INDEX_PRICE,
+        ) and "symbol" in params:
+            # index price klines are requested by pair
+            params["pair"] = params.pop("symbol")
 
         if HistoricalKlinesType.SPOT == klines_type:
             return self.get_klines(**params)
@@ -836,9 +967,15 @@ class Client(BaseClient):
         :param klines_type: Historical klines type: SPOT or FUTURES
         :type klines_type: HistoricalKlinesType
 
+        The result is kept in `earliest_timestamp_cache` so the probe is only requested once per
+        symbol, interval and klines type. Assign an EarliestTimestampCache with a path to persist it.
+
         :return: first valid timestamp
 
         """
+        cached_ts = self.earliest_timestamp_cache.get(symbol, interval, klines_type)
+        if cached_ts is not None:
+            return cached_ts
         kline = self._klines(
             klines_type=klines_type,
             symbol=symbol,
@@ -847,6 +984,7 @@ class Client(BaseClient):
             startTime=0,
             endTime=int(time.time() * 1000),
         )
+        self.earliest_timestamp_cache.set(symbol, interval, klines_type, kline[0][0])
         return kline[0][0]
 
     def get_historical_klines(
@@ -857,6 +995,8 @@ class Client(BaseClient):
         end_str=None,
         limit=None,
         klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+        cache_dir: Optional[Union[str, Path, bool]] = None,
+        output: str = OUTPUT_LIST,
     ):
         """Get Historical Klines from Binance
 
@@ -883,6 +1023,18 @@ class Client(BaseClient):
         :type limit: int
         :param klines_type: Historical klines type: SPOT or FUTURES
         :type klines_type: HistoricalKlinesType
+        :param concurrency: optional, AsyncClient only - split the range into page sized windows and fetch this many
+            windows at a time. Requires start_str, default None fetches one page after the other.
+        :type concurrency: int
+        :param weight_limiter: optional, AsyncClient only - request weight budget for the concurrent fetch, defaults
+            to the budget shared by the client, see AsyncClient.get_weight_limiter
+        :type weight_limiter: AsyncWeightLimiter
+        :param cache_dir: optional - directory of a local store of closed klines, only the ranges missing from the store
+            are requested. Defaults to the kline_cache_dir of the client, True requires it and False skips the store.
+        :type cache_dir: str|Path|bool
+        :param output: optional - "list" (default) for the API format, "numpy" for a numpy structured array
+            or "columns" for a dict of numpy arrays with int64 timestamps and float64 prices and volumes
+        :type output: str
 
         :return: list of OHLCV values (Open time, Open, High, Low, Close, Volume, Close time, Quote asset volume, Number of trades, Taker buy base asset volume, Taker buy quote asset volume, Ignore)
 
@@ -894,6 +1046,8 @@ class Client(BaseClient):
             end_str=end_str,
             limit=limit,
             klines_type=klines_type,
+            cache_dir=cache_dir,
+            output=output,
         )
 
     def _historical_klines(
@@ -904,6 +1058,8 @@ class Client(BaseClient):
         end_str=None,
         limit=None,
         klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+        cache_dir: Optional[Union[str, Path, bool]] = None,
+        output: str = OUTPUT_LIST,
     ):
         """Get Historical Klines from Binance (spot or futures)
 
@@ -923,6 +1079,12 @@ class Client(BaseClient):
         :type limit: int
         :param klines_type: Historical klines type: SPOT or FUTURES
         :type klines_type: HistoricalKlinesType
+        :param cache_dir: optional - directory of a local store of closed klines, defaults to the kline_cache_dir
+            of the client, True requires it and False skips the store
+        :type cache_dir: str|Path|bool
+        :param output: optional - "list" (default) for the API format, "numpy" for a numpy structured array
+            or "columns" for a dict of numpy arrays with int64 timestamps and float64 prices and volumes
+        :type output: str
 
         :return: list of OHLCV values (Open time, Open, High, Low, Close, Volume, Close time, Quote asset volume, Number of trades, Taker buy base asset volume, Taker buy quote asset volume, Ignore)
 
@@ -933,8 +1095,9 @@ class Client(BaseClient):
             limit = 1000
             initial_limit_set = False
 
-        # init our list
-        output_data = []
+        check_output(output)
+        if cache_dir is True and not self.kline_cache_dir:
+            raise ValueError("cache_dir=True requires the kline_cache_dir of the client")
 
         # convert interval to useful value in seconds
         timeframe = interval_to_milliseconds(interval)
@@ -952,7 +1115,31 @@ class Client(BaseClient):
         # if an end time was passed convert it
         end_ts = convert_ts_str(end_str)
         if end_ts and start_ts and end_ts <= start_ts:
-            return output_data
+            return klines_output([], output)
+
+        # the local store needs a start and a fixed length interval to work out the missing ranges
+        if cache_dir is None or cache_dir is True:
+            cache_dir = self.kline_cache_dir
+        if cache_dir and start_ts is not None and timeframe:
+            output_data = self._historical_klines_cached(
+                symbol,
+                interval,
+                start_ts,
+                end_ts,
+                limit if initial_limit_set else None,
+                klines_type,
+                cache_dir,
+            )
+            return klines_output(output_data, output)
+
+        # init our list, or preallocate the arrays when the number of klines is known
+        capacity = limit if initial_limit_set else None
+        if start_ts is not None and end_ts and timeframe:
+            # klines after now don't exist yet
+            now = int(time.time() * 1000 + self.timestamp_offset)
+            expected = max((min(end_ts, now) - start_ts) // timeframe + 1, 0)
+            capacity = min(capacity, expected) if capacity else expected
+        output_data = new_klines_output(output, capacity)
 
         idx = 0
         while True:
@@ -966,13 +1153,15 @@ class Client(BaseClient):
                 endTime=end_ts,
             )
 
-            # append this loops data to our output data
+            # append this loops data to our output data, truncated to the limit if needed
             if temp_data:
-                output_data += temp_data
+                if initial_limit_set:
+                    output_data.extend(temp_data[: limit - len(output_data)])
+                else:
+                    output_data.extend(temp_data)
 
-            # check if output_data is greater than limit and truncate if needed and break loop
-            if initial_limit_set and len(output_data) > limit:
-                output_data = output_data[:limit]
+            # break loop once we have reached the limit
+            if initial_limit_set and len(output_data) >= limit:
                 break
 
             # handle the case where exactly the limit amount of data was returned last loop
@@ -993,6 +1182,76 @@ class Client(BaseClient):
             if idx % 3 == 0:
                 time.sleep(1)
 
+        return klines_output(output_data, output)
+
+    def _historical_klines_cached(
+        self,
+        symbol,
+        interval,
+        start_ts: int,
+        end_ts: Optional[int],
+        limit: Optional[int],
+        klines_type: HistoricalKlinesType,
+        cache_dir: Union[str, Path],
+    ):
+        """Get Historical Klines through the local kline store
+
+        Only the ranges missing from the store are requested, and only closed klines are stored.
+        Klines that are still open are requested every time.
+
+        :param start_ts: start timestamp in milliseconds, already moved to the earliest valid timestamp
+        :type start_ts: int
+        :param end_ts: optional - end timestamp in milliseconds, inclusive, defaults to now
+        :type end_ts: int
+        :param limit: optional - maximum number of klines to return
+        :type limit: int
+        :param cache_dir: directory of the local store
+        :type cache_dir: str|Path
+
+        :return: list of OHLCV values
+
+        """
+        store = self._get_kline_store(cache_dir)
+        timeframe = interval_to_milliseconds(interval)
+        assert timeframe
+        now = int(time.time() * 1000 + self.timestamp_offset)
+        # work on open times in [start_ts, stop_ts)
+        stop_ts = end_ts + 1 if end_ts else now
+        if limit:
+            stop_ts = min(stop_ts, start_ts + limit * timeframe)
+        # klines opening from closed_ts onwards haven't closed yet
+        closed_ts = now - timeframe + 1
+
+        for gap_start, gap_end in store.missing_ranges(
+            symbol, interval, start_ts, min(stop_ts, closed_ts), klines_type
+        ):
+            klines = self._historical_klines(
+                symbol,
+                interval,
+                gap_start,
+                gap_end - 1,
+                klines_type=klines_type,
+                cache_dir=False,
+            )
+            store.add_klines(
+                symbol, interval, [k for k in klines if k[6] < now], klines_type
+            )
+            store.add_coverage(symbol, interval, gap_start, gap_end, klines_type)
+
+        output_data = store.get_klines(
+            symbol, interval, start_ts, stop_ts - 1, klines_type
+        )
+        if stop_ts > closed_ts:
+            output_data += self._historical_klines(
+                symbol,
+                interval,
+                max(start_ts, closed_ts),
+                stop_ts - 1,
+                klines_type=klines_type,
+                cache_dir=False,
+            )
+        if limit:
+            output_data = output_data[:limit]
         return output_data
 
     def get_historical_klines_generator(
@@ -1003,6 +1262,7 @@ class Client(BaseClient):
         end_str=None,
         limit=None,
         klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+        prefetch: int = 0,
     ):
         """Get Historical Klines generator from Binance
 
@@ -1029,13 +1289,23 @@ class Client(BaseClient):
         :type limit: int
         :param klines_type: Historical klines type: SPOT or FUTURES
         :type klines_type: HistoricalKlinesType
+        :param prefetch: optional - number of pages fetched ahead on a background thread while the klines are
+            consumed, default 0 fetches each page when it's needed. Not supported by the AsyncClient, which
+            fetches pages concurrently with get_historical_klines
+        :type prefetch: int
 
         :return: generator of OHLCV values
 
         """
 
         return self._historical_klines_generator(
-            symbol, interval, start_str, end_str, limit, klines_type=klines_type
+            symbol,
+            interval,
+            start_str,
+            end_str,
+            limit,
+            klines_type=klines_type,
+            prefetch=prefetch,
         )
 
     def _historical_klines_generator(
@@ -1046,9 +1316,34 @@ class Client(BaseClient):
         end_str=None,
         limit=None,
         klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+        prefetch: int = 0,
     ):
         """Get Historical Klines generator from Binance (spot or futures)
 
+        :param prefetch: optional - number of pages fetched ahead on a background thread, default 0
+
+        :return: generator of OHLCV values
+
+        """
+        pages = self._historical_klines_pages(
+            symbol, interval, start_str, end_str, limit, klines_type
+        )
+        if prefetch:
+            pages = read_ahead(pages, prefetch)
+        for page in pages:
+            yield from page
+
+    def _historical_klines_pages(
+        self,
+        symbol,
+        interval,
+        start_str=None,
+        end_str=None,
+        limit=None,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ):
+        """Get Historical Klines pages from Binance (spot or futures)
+
         See dateparser docs for valid start and end string formats https://dateparser.readthedocs.io/en/latest/
 
         If using offset strings for dates add "UTC" to date string e.g. "now UTC", "11 hours ago UTC"
@@ -1064,7 +1359,7 @@ class Client(BaseClient):
         :param klines_type: Historical klines type: SPOT or FUTURES
         :type klines_type: HistoricalKlinesType
 
-        :return: generator of OHLCV values
+        :return: generator of pages of OHLCV values
 
         """
 
@@ -1105,8 +1400,7 @@ class Client(BaseClient):
 
             # yield data
             if output_data:
-                for o in output_data:
-                    yield o
+                yield output_data
 
             # handle the case where exactly the limit amount of data was returned last loop
             # check if we received less than the required limit and exit the loop
@@ -7518,7 +7812,14 @@ class Client(BaseClient):
         return self._request_futures_api("get", "continuousKlines", data=params)
 
     def futures_historical_klines(
-        self, symbol: str, interval: str, start_str, end_str=None, limit=None
+        self,
+        symbol: str,
+        interval: str,
+        start_str,
+        end_str=None,
+        limit=None,
+        cache_dir: Optional[Union[str, Path, bool]] = None,
+        output: str = OUTPUT_LIST,
     ):
         """Get historical futures klines from Binance
 
@@ -7532,6 +7833,17 @@ class Client(BaseClient):
         :type end_str: str|int
         :param limit: Default None (fetches full range in batches of max 1000 per request). To limit the number of rows, pass an integer.
         :type limit: int
+        :param concurrency: optional, AsyncClient only - split the range into page sized windows and fetch this many
+            windows at a time, see get_historical_klines
+        :type concurrency: int
+        :param weight_limiter: optional, AsyncClient only - request weight budget for the concurrent fetch, defaults
+            to the budget shared by the client, see AsyncClient.get_weight_limiter
+        :type weight_limiter: AsyncWeightLimiter
+        :param cache_dir: optional - directory of a local store of closed klines, see get_historical_klines
+        :type cache_dir: str|Path|bool
+        :param output: optional - "list" (default) for the API format, "numpy" for a numpy structured array
+            or "columns" for a dict of numpy arrays with int64 timestamps and float64 prices and volumes
+        :type output: str
 
         :return: list of OHLCV values (Open time, Open, High, Low, Close, Volume, Close time, Quote asset volume, Number of trades, Taker buy base asset volume, Taker buy quote asset volume, Ignore)
 
@@ -7543,6 +7855,8 @@ class Client(BaseClient):
             end_str=end_str,
             limit=limit,
             klines_type=HistoricalKlinesType.FUTURES,
+            cache_dir=cache_dir,
+            output=output,
         )
 
     def futures_historical_mark_price_klines(
@@ -7615,6 +7929,47 @@ class Client(BaseClient):
         """
         return self._request_futures_api("get", "fundingRate", data=params)
 
+    def futures_funding_rate_iter(
+        self, symbol, start_str=None, end_str=None, market: str = MARKET_FUTURES
+    ):
+        """Iterate over the funding rate history of a perpetual, FUNDING_RATE_MAX_LIMIT rates at a time
+
+        https://developers.binance.com/docs/derivatives/usds-margined-futures/market-data/rest-api/Get-Funding-Rate-History
+        https://developers.binance.com/docs/derivatives/coin-margined-futures/market-data/rest-api/Get-Funding-Rate-History-of-Perpetual-Futures
+
+        :param symbol: Symbol string e.g. BTCUSDT or BTCUSD_PERP
+        :type symbol: str
+        :param start_str: optional - start date string in UTC format or timestamp in milliseconds, default the
+            first funding of the symbol
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :type end_str: str|int
+        :param market: MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+
+        :return: generator of funding rates in the format of futures_funding_rate, oldest first
+
+        """
+        if market == MARKET_FUTURES:
+            endpoint = self.futures_funding_rate
+        elif market == MARKET_FUTURES_COIN:
+            endpoint = self.futures_coin_funding_rate
+        else:
+            raise ValueError(f"Unknown market {market!r}")
+        start_ts = convert_ts_str(start_str) or 0
+        end_ts = convert_ts_str(end_str)
+        while True:
+            rates = endpoint(
+                symbol=symbol,
+                startTime=start_ts,
+                endTime=end_ts,
+                limit=self.FUNDING_RATE_MAX_LIMIT,
+            )
+            yield from rates
+            if len(rates) < self.FUNDING_RATE_MAX_LIMIT:
+                return
+            start_ts = rates[-1]["fundingTime"] + 1
+
     def futures_top_longshort_account_ratio(self, **params):
         """Get present long to short ratio for top accounts of a specific symbol.
 
@@ -7656,6 +8011,103 @@ class Client(BaseClient):
         """
         return self._request_futures_data_api("get", "basis", data=params)
 
+    def _futures_data_endpoint(self, endpoint: str, market: str):
+        path = analytics_path(endpoint, market)
+        if market == MARKET_FUTURES:
+            request = self._request_futures_data_api
+        else:
+            request = self._request_futures_coin_data_api
+        return lambda **params: request("get", path, data=params)
+
+    def futures_analytics_generator(
+        self,
+        endpoint: str,
+        period: str = "5m",
+        start_str=None,
+        end_str=None,
+        market: str = MARKET_FUTURES,
+        **params,
+    ):
+        """Iterate over the history of a futures statistic, one page of ANALYTICS_MAX_LIMIT periods at a time
+
+        The statistics endpoints return at most 500 periods per request and only keep the last 30 days,
+        the range is split into windows of 500 periods which are requested in order. A start before the
+        lookback is moved forward to its start.
+
+        .. code:: python
+
+            from binance.analytics import ANALYTICS_OPEN_INTEREST
+
+            for row in client.futures_analytics_generator(
+                ANALYTICS_OPEN_INTEREST, "5m", "7 days ago UTC", symbol="BTCUSDT"
+            ):
+                print(row["timestamp"], row["sumOpenInterest"])
+
+        :param endpoint: one of the ANALYTICS_* statistics from binance.analytics e.g. ANALYTICS_BASIS
+        :type endpoint: str
+        :param period: one of ANALYTICS_PERIODS, default 5m
+        :type period: str
+        :param start_str: optional - start date string in UTC format or timestamp in milliseconds, default
+            the start of the lookback
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :type end_str: str|int
+        :param market: MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+        :type market: str
+        :param params: parameters of the endpoint e.g. symbol, or pair and contractType
+
+        :return: generator of rows in the format returned by the endpoint, sorted by timestamp
+
+        """
+        request = self._futures_data_endpoint(endpoint, market)
+        now = int(time.time() * 1000 + self.timestamp_offset)
+        for start_ts, end_ts in analytics_windows(period, now, start_str, end_str):
+            page = request(
+                period=period,
+                startTime=start_ts,
+                endTime=end_ts,
+                limit=ANALYTICS_MAX_LIMIT,
+                **params,
+            )
+            yield from merge_analytics([page], start_ts, end_ts)
+
+    def get_futures_analytics(
+        self,
+        endpoint: str,
+        period: str = "5m",
+        start_str=None,
+        end_str=None,
+        market: str = MARKET_FUTURES,
+        output: str = OUTPUT_LIST,
+        **params,
+    ):
+        """Get the history of a futures statistic over a time range, see futures_analytics_generator
+
+        .. code:: python
+
+            from binance.analytics import ANALYTICS_TAKER_VOLUME
+
+            taker = client.get_futures_analytics(
+                ANALYTICS_TAKER_VOLUME, "1h", "30 days ago UTC", symbol="BTCUSDT", output="numpy"
+            )
+            ratios = taker["buySellRatio"]
+
+        :param output: optional - OUTPUT_LIST (default) for the rows returned by the endpoint, OUTPUT_NUMPY for a
+            structured array or OUTPUT_COLUMNS for a dict of arrays, both with the timestamp and the numeric
+            fields of the statistic
+        :type output: str
+
+        :return: rows sorted by timestamp, once each
+
+        """
+        check_output(output)
+        rows = list(
+            self.futures_analytics_generator(
+                endpoint, period, start_str, end_str, market, **params
+            )
+        )
+        return analytics_output(rows, endpoint, market, output)
+
     def futures_ticker(self, **params):
         """24 hour rolling window price change statistics.
 
@@ -11682,6 +12134,8 @@ class Client(BaseClient):
     def close_connection(self):
         if self.session:
             self.session.close()
+        if getattr(self, "earliest_timestamp_cache", None):
+            self.earliest_timestamp_cache.flush()
 
     def __del__(self):
         self.close_connection()
@@ -0,0 +1,191 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+if TYPE_CHECKING:
+    import numpy
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+OUTPUT_LIST = "list"
+OUTPUT_NUMPY = "numpy"
+OUTPUT_COLUMNS = "columns"
+
+OUTPUT_TYPES = (OUTPUT_LIST, OUTPUT_NUMPY, OUTPUT_COLUMNS)
+
+# most klines preallocated up front, 88 MB, a longer series grows the array as its pages arrive
+MAX_PREALLOCATED_KLINES = 1000000
+
+# kline fields in the order returned by the API, the trailing "ignore" field is dropped
+KLINE_FIELDS = (
+    ("open_time", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+    ("close_time", "i8"),
+    ("quote_volume", "f8"),
+    ("trades", "i8"),
+    ("taker_buy_base_volume", "f8"),
+    ("taker_buy_quote_volume", "f8"),
+)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            "numpy is not installed, please install it to use columnar output (pip install numpy)"
+        )
+
+
+def kline_dtype():
+    """Get the numpy structured dtype of a kline, 88 bytes per kline
+
+    :return: numpy.dtype
+
+    """
+    _require_numpy()
+    return np.dtype(list(KLINE_FIELDS))
+
+
+def check_output(output: str):
+    """Raise a ValueError for an unknown output type"""
+    if output not in OUTPUT_TYPES:
+        raise ValueError(
+            f"Unknown output {output!r}, must be one of {', '.join(OUTPUT_TYPES)}"
+        )
+
+
+class KlineArrayBuilder:
+    """Build a numpy structured array of klines page by page
+
+    Each page is decoded into typed columns as it's added, so the list of strings returned by
+    the API is never kept for the whole series.
+
+    .. code-block:: python
+
+        builder = KlineArrayBuilder(capacity=5000)
+        builder.extend(client.get_klines(symbol="BNBBTC", interval="1m", limit=1000))
+        klines = builder.to_array()
+        closes = klines["close"]
+
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        """Initialise the KlineArrayBuilder
+
+        :param capacity: optional - number of klines expected, preallocated up front up to
+            MAX_PREALLOCATED_KLINES
+        :type capacity: int
+
+        """
+        _require_numpy()
+        self._array = np.empty(
+            min(capacity or 1000, MAX_PREALLOCATED_KLINES), dtype=kline_dtype()
+        )
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, klines):
+        """Add klines in the format returned by the API
+
+        :param klines: list of klines
+        :type klines: list
+
+        """
+        count = len(klines)
+        if not count:
+            return
+        rows = self._reserve(count)
+        columns = list(zip(*klines))
+        for i, (name, dtype) in enumerate(KLINE_FIELDS):
+            rows[name] = np.asarray(columns[i], dtype=dtype)
+        self._size += count
+
+    def extend_array(self, array: "numpy.ndarray"):
+        """Add klines already in a structured array of kline_dtype"""
+        count = len(array)
+        if not count:
+            return
+        self._reserve(count)[:] = array
+        self._size += count
+
+    def _reserve(self, count: int) -> "numpy.ndarray":
+        # get the rows following the added klines, growing the array if needed
+        required = self._size + count
+        if required > len(self._array):
+            # grow geometrically to keep the number of copies low
+            grown = np.empty(max(required, 2 * len(self._array)), dtype=self._array.dtype)
+            grown[: self._size] = self._array[: self._size]
+            self._array = grown
+        return self._array[self._size : required]
+
+    def to_array(self):
+        """Get the klines as a numpy structured array
+
+        :return: numpy.ndarray with the fields open_time, open, high, low, close, volume, close_time, quote_volume,
+            trades, taker_buy_base_volume, taker_buy_quote_volume
+
+        """
+        if self._size == len(self._array):
+            return self._array
+        return self._array[: self._size].copy()
+
+    def to_columns(self) -> Dict[str, "numpy.ndarray"]:
+        """Get the klines as a dict of contiguous numpy arrays, one per field
+
+        :return: dict of field name to numpy.ndarray
+
+        """
+        array = self._array[: self._size]
+        return {name: np.ascontiguousarray(array[name]) for name, _ in KLINE_FIELDS}
+
+    def result(self, output: str):
+        """Get the klines in the given output type, OUTPUT_NUMPY or OUTPUT_COLUMNS"""
+        if output == OUTPUT_COLUMNS:
+            return self.to_columns()
+        return self.to_array()
+
+
+def new_klines_output(
+    output: str = OUTPUT_LIST, capacity: Optional[int] = None
+) -> Union[List[List], KlineArrayBuilder]:
+    """Create an empty container to collect klines into
+
+    :param output: output type, one of OUTPUT_LIST, OUTPUT_NUMPY or OUTPUT_COLUMNS
+    :type output: str
+    :param capacity: optional - number of klines expected
+    :type capacity: int
+
+    :return: a list or a KlineArrayBuilder, both support len() and extend()
+
+    """
+    check_output(output)
+    if output == OUTPUT_LIST:
+        return []
+    return KlineArrayBuilder(capacity)
+
+
+def klines_output(klines: Union[List[List], KlineArrayBuilder], output: str = OUTPUT_LIST) -> Any:
+    """Convert collected klines to the requested output type
+
+    :param klines: list of klines or a KlineArrayBuilder
+    :param output: output type, one of OUTPUT_LIST, OUTPUT_NUMPY or OUTPUT_COLUMNS
+    :type output: str
+
+    :return: list of klines, numpy structured array or dict of numpy arrays
+
+    """
+    check_output(output)
+    if isinstance(klines, KlineArrayBuilder):
+        return klines.result(output)
+    if output == OUTPUT_LIST:
+        return klines
+    builder = KlineArrayBuilder(len(klines))
+    builder.extend(klines)
+    return builder.result(output)
@@ -0,0 +1,748 @@
+import json
+import logging
+import lzma
+import struct
+import time
+import zlib
+from bisect import bisect_right
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from binance.export import DAY_MS, _day_str
+from binance.helpers import _format_units, _step_scale, _to_units
+from binance.ws.depthcache import DepthCache
+
+COMPRESSION_NONE = "none"
+COMPRESSION_ZLIB = "zlib"
+COMPRESSION_LZMA = "lzma"
+
+COMPRESSION_TYPES = (COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_LZMA)
+
+EVENT_SNAPSHOT = 0
+EVENT_DIFF = 1
+
+# number of diff events per block, a block is read and decompressed as a whole
+DEFAULT_BLOCK_EVENTS = 1000
+# seconds between the full book snapshots which replays start from
+DEFAULT_SNAPSHOT_INTERVAL = 60
+# decimals used for prices and quantities when the symbol filters aren't given
+DEFAULT_DECIMALS = 8
+
+_FILE_MAGIC = b"BNDEPTH1"
+_BLOCK_MAGIC = b"DBLK"
+# magic, compression, flags, events, first timestamp, last timestamp, raw size, payload size
+_BLOCK_HEADER = struct.Struct("<4sBBIqqII")
+_META_LENGTH = struct.Struct("<I")
+_FLAG_SNAPSHOT = 1
+_COMPRESSION_CODES = {COMPRESSION_NONE: 0, COMPRESSION_ZLIB: 1, COMPRESSION_LZMA: 2}
+_DECOMPRESS = {0: bytes, 1: zlib.decompress, 2: lzma.decompress}
+
+logger = logging.getLogger(__name__)
+
+#: (price, quantity) of a level in ticks and lots
+Level = Tuple[int, int]
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def _write_levels(out: bytearray, levels: Iterable[Level]):
+    levels = sorted(levels, key=lambda level: level[0])
+    _write_varint(out, len(levels))
+    previous = 0
+    for price, quantity in levels:
+        # sorted prices are encoded as positive deltas, small with the levels near each other
+        _write_varint(out, price - previous)
+        _write_varint(out, quantity)
+        previous = price
+
+
+def _read_levels(data: bytes, pos: int) -> Tuple[List[Level], int]:
+    count, pos = _read_varint(data, pos)
+    levels = []
+    price = 0
+    for _ in range(count):
+        delta, pos = _read_varint(data, pos)
+        quantity, pos = _read_varint(data, pos)
+        price += delta
+        levels.append((price, quantity))
+    return levels, pos
+
+
+class DepthEvent:
+    """Snapshot or diff event read from a depth archive"""
+
+    def __init__(
+        self,
+        kind: int,
+        timestamp: int,
+        first_update_id: int,
+        last_update_id: int,
+        bids: List[Level],
+        asks: List[Level],
+    ):
+        #: EVENT_SNAPSHOT or EVENT_DIFF
+        self.kind = kind
+        #: event time in milliseconds
+        self.timestamp = timestamp
+        #: first update id of a diff, the last update id for a snapshot
+        self.first_update_id = first_update_id
+        self.last_update_id = last_update_id
+        #: levels in ticks and lots, a quantity of 0 removes the level
+        self.bids = bids
+        self.asks = asks
+
+
+class DepthArchiveWriter:
+    """Write the snapshots and diffs of a symbol's order book to a depth archive file
+
+    The file starts with a header holding the price and quantity scales, followed by blocks of
+    events. Each block has a fixed size header with its time range and is optionally compressed.
+    Prices are stored as integer ticks and quantities as integer lots, with the prices of a side
+    delta encoded as varints. A block is started with each snapshot, so readers can seek to the
+    snapshot block before a timestamp and replay the diffs from there.
+
+    An existing file is appended to, after dropping an incomplete last block.
+
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        symbol: str,
+        tick_size: Optional[str] = None,
+        step_size: Optional[str] = None,
+        compression: str = COMPRESSION_ZLIB,
+        block_events: int = DEFAULT_BLOCK_EVENTS,
+    ):
+        """Initialise the DepthArchiveWriter
+
+        :param path: file to write
+        :type path: str|Path
+        :param symbol: Name of symbol pair e.g. BNBBTC
+        :type symbol: str
+        :param tick_size: optional - tickSize of the symbol's PRICE_FILTER, default 8 decimals
+        :type tick_size: str
+        :param step_size: optional - stepSize of the symbol's LOT_SIZE filter, default 8 decimals
+        :type step_size: str
+        :param compression: none, zlib (default) or lzma
+        :type compression: str
+        :param block_events: number of events after which a block is written
+        :type block_events: int
+
+        """
+        if compression not in COMPRESSION_TYPES:
+            raise ValueError(f"Unknown compression {compression!r}, use one of {COMPRESSION_TYPES}")
+        price_decimals, tick = _step_scale(tick_size) if tick_size else (DEFAULT_DECIMALS, 1)
+        qty_decimals, lot = _step_scale(step_size) if step_size else (DEFAULT_DECIMALS, 1)
+        self.path = Path(path)
+        self.meta = {
+            "symbol": symbol.upper(),
+            "price_decimals": price_decimals,
+            "tick": tick,
+            "qty_decimals": qty_decimals,
+            "lot": lot,
+        }
+        self.compression = compression
+        self.block_events = block_events
+        self._block = bytearray()
+        self._flags = 0
+        self._events = 0
+        self._first_ts = self._last_ts = 0
+        self._last_update_id = 0
+        self._open()
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size:
+            meta, _, end = _scan_file(self.path)
+            if meta != self.meta:
+                raise ValueError(f"{self.path} was written with {meta}, not {self.meta}")
+            self._file = open(self.path, "r+b")
+            # drop what was left of a block being written when the process stopped
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(self.path, "wb")
+            meta = json.dumps(self.meta).encode()
+            self._file.write(_FILE_MAGIC + _META_LENGTH.pack(len(meta)) + meta)
+        self._has_snapshot = False
+
+    def price_ticks(self, price) -> int:
+        """Convert a price string, float or Decimal to ticks"""
+        units = _to_units(price, self.meta["price_decimals"])
+        ticks, remainder = divmod(units, self.meta["tick"])
+        if remainder:
+            raise ValueError(f"Price {price} isn't a multiple of the tick size")
+        return ticks
+
+    def quantity_lots(self, quantity) -> int:
+        """Convert a quantity string, float or Decimal to lots"""
+        units = _to_units(quantity, self.meta["qty_decimals"])
+        lots, remainder = divmod(units, self.meta["lot"])
+        if remainder:
+            raise ValueError(f"Quantity {quantity} isn't a multiple of the lot size")
+        return lots
+
+    def levels(self, levels: Iterable) -> List[Level]:
+        """Convert [price, quantity] levels to ticks and lots"""
+        return [
+            (self.price_ticks(price), self.quantity_lots(quantity)) for price, quantity in levels
+        ]
+
+    def write_snapshot(
+        self, timestamp: int, update_id: int, bids: Iterable[Level], asks: Iterable[Level]
+    ):
+        """Write the full book, starting a new block
+
+        :param timestamp: milliseconds
+        :type timestamp: int
+        :param update_id: last update id included in the book
+        :type update_id: int
+        :param bids: levels in ticks and lots
+        :param asks: levels in ticks and lots
+
+        """
+        self.flush()
+        self._flags = _FLAG_SNAPSHOT
+        self._has_snapshot = True
+        self._write_event(EVENT_SNAPSHOT, timestamp, update_id, update_id, bids, asks)
+
+    def write_diff(
+        self,
+        timestamp: int,
+        first_update_id: int,
+        last_update_id: int,
+        bids: Iterable[Level],
+        asks: Iterable[Level],
+    ):
+        """Write a diff event, a quantity of 0 removes the level
+
+        :param timestamp: event time in milliseconds
+        :type timestamp: int
+        :param first_update_id: first update id of the event (U)
+        :type first_update_id: int
+        :param last_update_id: last update id of the event (u)
+        :type last_update_id: int
+        :param bids: levels in ticks and lots
+        :param asks: levels in ticks and lots
+
+        """
+        if not self._has_snapshot:
+            raise ValueError("A snapshot must be written before the diffs")
+        self._write_event(EVENT_DIFF, timestamp, first_update_id, last_update_id, bids, asks)
+        if self._events >= self.block_events:
+            self.flush()
+
+    def _write_event(self, kind, timestamp, first_update_id, last_update_id, bids, asks):
+        block = self._block
+        if not self._events:
+            self._first_ts = self._last_ts = timestamp
+            self._last_update_id = 0
+        block.append(kind)
+        _write_varint(block, _zigzag(timestamp - self._last_ts))
+        _write_varint(block, _zigzag(last_update_id - self._last_update_id))
+        if kind == EVENT_DIFF:
+            _write_varint(block, last_update_id - first_update_id)
+        _write_levels(block, bids)
+        _write_levels(block, asks)
+        self._last_ts = timestamp
+        self._last_update_id = last_update_id
+        self._events += 1
+
+    def flush(self):
+        """Write the pending events as a block"""
+        if not self._events:
+            return
+        raw = bytes(self._block)
+        if self.compression == COMPRESSION_ZLIB:
+            payload = zlib.compress(raw)
+        elif self.compression == COMPRESSION_LZMA:
+            payload = lzma.compress(raw)
+        else:
+            payload = raw
+        header = _BLOCK_HEADER.pack(
+            _BLOCK_MAGIC,
+            _COMPRESSION_CODES[self.compression],
+            self._flags,
+            self._events,
+            self._first_ts,
+            self._last_ts,
+            len(raw),
+            len(payload),
+        )
+        self._file.write(header + payload)
+        self._file.flush()
+        self._block = bytearray()
+        self._flags = 0
+        self._events = 0
+
+    def close(self):
+        """Write the pending events and close the file"""
+        self.flush()
+        self._file.close()
+
+
+def _scan_file(path: Path) -> Tuple[Dict, List[Tuple], int]:
+    """Read the header and the block headers of a depth archive file
+
+    :return: (meta, [(flags, events, first ts, last ts, payload offset, compression, raw size,
+        payload size)], end offset of the last complete block)
+
+    """
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        if f.read(len(_FILE_MAGIC)) != _FILE_MAGIC:
+            raise ValueError(f"{path} isn't a depth archive")
+        (meta_length,) = _META_LENGTH.unpack(f.read(_META_LENGTH.size))
+        meta = json.loads(f.read(meta_length))
+        blocks = []
+        end = f.tell()
+        while end + _BLOCK_HEADER.size <= size:
+            header = f.read(_BLOCK_HEADER.size)
+            magic, compression, flags, events, first_ts, last_ts, raw_size, payload_size = (
+                _BLOCK_HEADER.unpack(header)
+            )
+            offset = end + _BLOCK_HEADER.size
+            if magic != _BLOCK_MAGIC or offset + payload_size > size:
+                break
+            blocks.append(
+                (flags, events, first_ts, last_ts, offset, compression, raw_size, payload_size)
+            )
+            end = offset + payload_size
+            f.seek(end)
+    return meta, blocks, end
+
+
+def _decode_block(data: bytes) -> Iterator[DepthEvent]:
+    pos = 0
+    # timestamps are relative to the first one of the block, which the caller adds
+    timestamp = update_id = 0
+    while pos < len(data):
+        kind = data[pos]
+        delta, pos = _read_varint(data, pos + 1)
+        timestamp += _unzigzag(delta)
+        delta, pos = _read_varint(data, pos)
+        update_id += _unzigzag(delta)
+        first_update_id = update_id
+        if kind == EVENT_DIFF:
+            span, pos = _read_varint(data, pos)
+            first_update_id = update_id - span
+        bids, pos = _read_levels(data, pos)
+        asks, pos = _read_levels(data, pos)
+        yield DepthEvent(kind, timestamp, first_update_id, update_id, bids, asks)
+
+
+class DepthBook:
+    """Order book rebuilt from a depth archive, with prices in ticks and quantities in lots"""
+
+    def __init__(self, meta: Dict):
+        #: symbol and scales of the archive file the book was read from
+        self.meta = meta
+        self.symbol: str = meta["symbol"]
+        #: price ticks -> quantity lots
+        self.bids: Dict[int, int] = {}
+        self.asks: Dict[int, int] = {}
+        #: time of the last applied event in milliseconds
+        self.timestamp: Optional[int] = None
+        #: last update id included in the book
+        self.update_id: Optional[int] = None
+
+    def apply(self, event: DepthEvent):
+        """Apply a snapshot or diff event"""
+        if event.kind == EVENT_SNAPSHOT:
+            self.bids = dict(event.bids)
+            self.asks = dict(event.asks)
+        else:
+            for side, levels in ((self.bids, event.bids), (self.asks, event.asks)):
+                for price, quantity in levels:
+                    if quantity:
+                        side[price] = quantity
+                    else:
+                        side.pop(price, None)
+        self.timestamp = event.timestamp
+        self.update_id = event.last_update_id
+
+    def price(self, ticks: int) -> str:
+        """Price string of a number of ticks"""
+        return _format_units(ticks * self.meta["tick"], self.meta["price_decimals"])
+
+    def quantity(self, lots: int) -> str:
+        """Quantity string of a number of lots"""
+        return _format_units(lots * self.meta["lot"], self.meta["qty_decimals"])
+
+    def _levels(self, side: Dict[int, int], reverse: bool, conv_type: Callable) -> List[List]:
+        prices = sorted(side, reverse=reverse)
+        if conv_type is int:
+            return [[price, side[price]] for price in prices]
+        return [
+            [conv_type(self.price(price)), conv_type(self.quantity(side[price]))]
+            for price in prices
+        ]
+
+    def get_bids(self, conv_type: Callable = float) -> List[List]:
+        """Bids from the highest price, with price and quantity as conv_type, int for ticks and
+        lots"""
+        return self._levels(self.bids, True, conv_type)
+
+    def get_asks(self, conv_type: Callable = float) -> List[List]:
+        """Asks from the lowest price, with price and quantity as conv_type, int for ticks and
+        lots"""
+        return self._levels(self.asks, False, conv_type)
+
+    def to_depth_cache(self, conv_type: Callable = float) -> DepthCache:
+        """Copy the book to a DepthCache with integer levels of the archive's tick and lot sizes"""
+        depth_cache = DepthCache(
+            self.symbol,
+            conv_type,
+            tick_size=self.price(1),
+            step_size=self.quantity(1),
+        )
+        depth_cache.load_levels(self.bids, self.asks)
+        depth_cache.update_time = self.timestamp
+        return depth_cache
+
+
+def _symbol_directory(directory: Union[str, Path], symbol: str) -> Path:
+    return Path(directory) / f"symbol={symbol.upper()}"
+
+
+def _cache_levels(writer: DepthArchiveWriter, depth_cache: DepthCache, levels: Dict) -> List[Level]:
+    """Levels of a side of a DepthCache in the ticks and lots of the writer"""
+    if depth_cache.tick_size is None or depth_cache.step_size is None:
+        return writer.levels(levels.items())
+    price_decimals, tick = _step_scale(depth_cache.tick_size)
+    qty_decimals, lot = _step_scale(depth_cache.step_size)
+    meta = writer.meta
+    if (price_decimals, tick, qty_decimals, lot) == (
+        meta["price_decimals"],
+        meta["tick"],
+        meta["qty_decimals"],
+        meta["lot"],
+    ):
+        return list(levels.items())
+    return writer.levels(
+        (_format_units(price * tick, price_decimals), _format_units(quantity * lot, qty_decimals))
+        for price, quantity in levels.items()
+    )
+
+
+class _SymbolRecording:
+    def __init__(self, writer: DepthArchiveWriter, day: int):
+        self.writer = writer
+        self.day = day
+        self.next_snapshot = 0
+
+
+class DepthRecorder:
+    """Record the order books of DepthCacheManagers to depth archives
+
+    Pass the recorder to one or more DepthCacheManagers. The book is written as a snapshot when the
+    cache is initialised and every snapshot_interval seconds after it, with the diff events applied
+    to the cache in between. Files are written to directory/symbol=<symbol>/date=<YYYY-MM-DD>.depth
+    and read with DepthArchiveReader.
+
+    .. code-block:: python
+
+        from binance.helpers import symbol_filters
+
+        filters = symbol_filters(await client.get_exchange_info())
+        recorder = DepthRecorder("depth", filters=filters)
+        async with DepthCacheManager(client, "BTCUSDT", recorder=recorder) as dcm:
+            while True:
+                await dcm.recv()
+
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+        compression: str = COMPRESSION_ZLIB,
+        block_events: int = DEFAULT_BLOCK_EVENTS,
+        filters: Optional[Dict[str, Tuple[str, str]]] = None,
+    ):
+        """Initialise the DepthRecorder
+
+        :param directory: directory to write the archives to
+        :type directory: str|Path
+        :param snapshot_interval: seconds between snapshots of the book
+        :type snapshot_interval: int
+        :param compression: none, zlib (default) or lzma
+        :type compression: str
+        :param block_events: number of diff events after which a block is written
+        :type block_events: int
+        :param filters: optional - (tickSize, stepSize) per symbol from symbol_filters, prices and
+            quantities are stored with 8 decimals for the other symbols
+        :type filters: dict
+
+        """
+        if compression not in COMPRESSION_TYPES:
+            raise ValueError(f"Unknown compression {compression!r}, use one of {COMPRESSION_TYPES}")
+        self.directory = Path(directory)
+        self.snapshot_interval = snapshot_interval
+        self.compression = compression
+        self.block_events = block_events
+        self.filters = filters or {}
+        self._recordings: Dict[str, _SymbolRecording] = {}
+
+    def _recording(self, symbol: str, timestamp: int, depth_cache: DepthCache) -> _SymbolRecording:
+        day = timestamp // DAY_MS
+        recording = self._recordings.get(symbol)
+        if recording is None or recording.day != day:
+            if recording is not None:
+                recording.writer.close()
+            # a cache with integer levels has the filters of the symbol
+            tick_size, step_size = self.filters.get(
+                symbol, (depth_cache.tick_size, depth_cache.step_size)
+            )
+            writer = DepthArchiveWriter(
+                _symbol_directory(self.directory, symbol) / f"date={_day_str(day)}.depth",
+                symbol,
+                tick_size,
+                step_size,
+                self.compression,
+                self.block_events,
+            )
+            recording = self._recordings[symbol] = _SymbolRecording(writer, day)
+        return recording
+
+    def record_snapshot(
+        self,
+        symbol: str,
+        depth_cache: DepthCache,
+        update_id: int,
+        timestamp: Optional[int] = None,
+    ):
+        """Write the book of a depth cache
+
+        :param symbol: Name of symbol pair e.g. BNBBTC
+        :type symbol: str
+        :param depth_cache: cache holding the book
+        :type depth_cache: DepthCache
+        :param update_id: last update id included in the book
+        :type update_id: int
+        :param timestamp: optional - milliseconds, default now
+        :type timestamp: int
+
+        """
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
+        recording = self._recording(symbol.upper(), timestamp, depth_cache)
+        writer = recording.writer
+        writer.write_snapshot(
+            timestamp,
+            update_id,
+            _cache_levels(writer, depth_cache, depth_cache._bids),
+            _cache_levels(writer, depth_cache, depth_cache._asks),
+        )
+        recording.next_snapshot = timestamp + self.snapshot_interval * 1000
+
+    def record_diff(self, symbol: str, msg: Dict, depth_cache: DepthCache):
+        """Write a diff depth event after it was applied to the depth cache
+
+        :param symbol: Name of symbol pair e.g. BNBBTC
+        :type symbol: str
+        :param msg: diff depth event with E, U, u, b and a
+        :type msg: dict
+        :param depth_cache: cache the event was applied to
+        :type depth_cache: DepthCache
+
+        """
+        symbol = symbol.upper()
+        recording = self._recordings.get(symbol)
+        if recording is None:
+            logger.debug(f"Diff of {symbol} before its first snapshot isn't recorded")
+            return
+        timestamp = msg["E"]
+        if timestamp >= recording.next_snapshot or timestamp // DAY_MS != recording.day:
+            # the cache already includes the event
+            self.record_snapshot(symbol, depth_cache, msg["u"], timestamp)
+            return
+        writer = recording.writer
+        writer.write_diff(
+            timestamp,
+            msg["U"],
+            msg["u"],
+            writer.levels(msg.get("b", [])),
+            writer.levels(msg.get("a", [])),
+        )
+
+    def flush(self):
+        """Write the pending events of all symbols"""
+        for recording in self._recordings.values():
+            recording.writer.flush()
+
+    def close(self):
+        """Write the pending events and close the files"""
+        for recording in self._recordings.values():
+            recording.writer.close()
+        self._recordings = {}
+
+
+class DepthArchiveReader:
+    """Read the depth archives of a symbol written by DepthRecorder
+
+    The block headers of the files are indexed when the reader is created, so a replay starting at
+    any timestamp only decodes the blocks from the snapshot before it.
+
+    .. code-block:: python
+
+        reader = DepthArchiveReader("depth", "BTCUSDT")
+        book = reader.book_at(date_to_milliseconds("2024-03-01 12:00:00"))
+        print(book.get_bids()[:5])
+
+        for book in reader.replay(start_ts, end_ts):
+            strategy.on_book(book)
+
+    """
+
+    def __init__(self, directory: Union[str, Path], symbol: str):
+        """Initialise the DepthArchiveReader
+
+        :param directory: directory the recorder wrote to
+        :type directory: str|Path
+        :param symbol: Name of symbol pair e.g. BNBBTC
+        :type symbol: str
+
+        """
+        self.directory = _symbol_directory(directory, symbol)
+        self.symbol = symbol.upper()
+        #: (path, meta) of the archive files
+        self.files: List[Tuple[Path, Dict]] = []
+        # (file number, flags, events, first ts, last ts, offset, compression, raw size, payload
+        # size) of the blocks in time order
+        self._blocks: List[Tuple] = []
+        paths = sorted(self.directory.glob("date=*.depth")) if self.directory.is_dir() else []
+        for path in paths:
+            meta, blocks, _ = _scan_file(path)
+            for block in blocks:
+                self._blocks.append((len(self.files),) + block)
+            self.files.append((path, meta))
+        self._snapshot_blocks = [
+            i for i, block in enumerate(self._blocks) if block[1] & _FLAG_SNAPSHOT
+        ]
+        self._snapshot_times = [self._blocks[i][3] for i in self._snapshot_blocks]
+
+    @property
+    def start_ts(self) -> Optional[int]:
+        """Time of the first recorded event"""
+        return self._blocks[0][3] if self._blocks else None
+
+    @property
+    def end_ts(self) -> Optional[int]:
+        """Time of the last recorded event"""
+        return max(block[4] for block in self._blocks) if self._blocks else None
+
+    def _seek(self, start_ts: Optional[int]) -> int:
+        if not self._snapshot_blocks:
+            return len(self._blocks)
+        if start_ts is None:
+            return self._snapshot_blocks[0]
+        position = bisect_right(self._snapshot_times, start_ts) - 1
+        return self._snapshot_blocks[max(position, 0)]
+
+    def _read(self, start: int, end_ts: Optional[int]) -> Iterator[Tuple[Dict, DepthEvent]]:
+        handles = {}
+        try:
+            for file_no, _, _, first_ts, _, offset, compression, _, size in self._blocks[start:]:
+                if end_ts is not None and first_ts > end_ts:
+                    return
+                if file_no not in handles:
+                    handles[file_no] = open(self.files[file_no][0], "rb")
+                f = handles[file_no]
+                f.seek(offset)
+                meta = self.files[file_no][1]
+                for event in _decode_block(_DECOMPRESS[compression](f.read(size))):
+                    event.timestamp += first_ts
+                    if end_ts is not None and event.timestamp > end_ts:
+                        return
+                    yield meta, event
+        finally:
+            for f in handles.values():
+                f.close()
+
+    def events(
+        self, start_ts: Optional[int] = None, end_ts: Optional[int] = None
+    ) -> Iterator[DepthEvent]:
+        """Iterate over the recorded events
+
+        Iteration starts with the last snapshot at or before start_ts, so the book can be rebuilt
+        from the first event.
+
+        :param start_ts: optional - milliseconds, default from the first event
+        :type start_ts: int
+        :param end_ts: optional - milliseconds, inclusive, default to the last event
+        :type end_ts: int
+
+        """
+        for _, event in self._read(self._seek(start_ts), end_ts):
+            yield event
+
+    def replay(
+        self, start_ts: Optional[int] = None, end_ts: Optional[int] = None
+    ) -> Iterator[DepthBook]:
+        """Replay the book from start_ts to end_ts
+
+        The same DepthBook is updated and yielded after each event from start_ts, copy what needs
+        to be kept. The events before start_ts since the last snapshot are applied without being
+        yielded.
+
+        :param start_ts: optional - milliseconds, default from the first event
+        :type start_ts: int
+        :param end_ts: optional - milliseconds, inclusive, default to the last event
+        :type end_ts: int
+
+        """
+        book = None
+        for meta, event in self._read(self._seek(start_ts), end_ts):
+            if book is None or book.meta is not meta:
+                if event.kind != EVENT_SNAPSHOT:
+                    continue
+                book = DepthBook(meta)
+            book.apply(event)
+            if start_ts is None or event.timestamp >= start_ts:
+                yield book
+
+    def book_at(self, timestamp: int) -> Optional[DepthBook]:
+        """Rebuild the book as it was at a time
+
+        :param timestamp: milliseconds
+        :type timestamp: int
+
+        :return: DepthBook after the last event at or before timestamp, None if there is none
+
+        """
+        book = None
+        for meta, event in self._read(self._seek(timestamp), timestamp):
+            if book is None or book.meta is not meta:
+                # like replay, a file is only read from its first snapshot
+                if event.kind != EVENT_SNAPSHOT:
+                    continue
+                book = DepthBook(meta)
+            book.apply(event)
+        return book
+
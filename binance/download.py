@@ -0,0 +1,418 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from binance.async_client import AsyncClient
+from binance.enums import HistoricalKlinesType
+from binance.helpers import convert_ts_str, interval_to_milliseconds
+from binance.ratelimit import MARKET_FUTURES, MARKET_SPOT, klines_market
+from binance.store import KlineStore
+
+# number of klines fetched and stored before the checkpoint is saved
+CHUNK_KLINES = 50000
+
+DEFAULT_CONCURRENCY = 4
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadCheckpoint:
+    """Progress of each series of a download, persisted as JSON so a restart skips finished work
+
+    Each series is saved with the open time the download has reached, klines before it are in the store.
+
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """Initialise the DownloadCheckpoint
+
+        :param path: optional - JSON file to persist the checkpoint in, loaded if it exists
+        :type path: str|Path
+
+        """
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._series: Dict[str, int] = {}
+        if self.path and self.path.exists():
+            with open(self.path, "r") as f:
+                self._series = json.load(f)
+
+    @staticmethod
+    def key(symbol: str, interval: str, klines_type: HistoricalKlinesType) -> str:
+        return f"{klines_type.name}|{symbol.upper()}|{interval}"
+
+    def get(self, symbol: str, interval: str, klines_type: HistoricalKlinesType) -> Optional[int]:
+        """Get the open time the download of a series has reached
+
+        :return: timestamp in milliseconds or None if the series hasn't been started
+
+        """
+        return self._series.get(self.key(symbol, interval, klines_type))
+
+    def set(self, symbol: str, interval: str, klines_type: HistoricalKlinesType, timestamp: int):
+        """Save the open time the download of a series has reached"""
+        with self._lock:
+            self._series[self.key(symbol, interval, klines_type)] = timestamp
+            if not self.path:
+                return
+            # write to a temporary file first so an interrupted save doesn't corrupt the checkpoint
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._series, f)
+            os.replace(tmp_path, self.path)
+
+
+class DownloadProgress:
+    """Counters of a running download"""
+
+    def __init__(self, series_total: int = 0):
+        self.series_total = series_total
+        self.series_done = 0
+        self.klines = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def klines_per_second(self) -> float:
+        return self.klines / max(self.elapsed, 1e-9)
+
+    def __str__(self):
+        return (
+            f"{self.series_done}/{self.series_total} series, {self.klines} klines, "
+            f"{self.klines_per_second:.0f} klines/s"
+        )
+
+
+async def resolve_symbols(
+    client: AsyncClient,
+    klines_type: HistoricalKlinesType,
+    symbol_filter: Callable[[Dict], bool],
+) -> List[str]:
+    """Get the symbols of the exchange info of a klines type matching a filter
+
+    :param client: AsyncClient instance
+    :param klines_type: Historical klines type, selects the spot, USD-M or COIN-M exchange info
+    :type klines_type: HistoricalKlinesType
+    :param symbol_filter: called with each symbol of the exchange info, e.g.
+        ``lambda s: s["quoteAsset"] == "USDT"``
+    :type symbol_filter: callable
+
+    :return: list of symbol names
+
+    """
+    market = klines_market(klines_type)
+    if market == MARKET_SPOT:
+        info = await client.get_exchange_info()
+    elif market == MARKET_FUTURES:
+        info = await client.futures_exchange_info()
+    else:
+        info = await client.futures_coin_exchange_info()
+    return [s["symbol"] for s in info["symbols"] if symbol_filter(s)]
+
+
+def trading_symbols(quote_asset: Optional[str] = None) -> Callable[[Dict], bool]:
+    """Get a symbol filter for resolve_symbols matching the symbols currently trading
+
+    :param quote_asset: optional - only match symbols quoted in this asset, e.g. USDT
+    :type quote_asset: str
+
+    """
+
+    def _filter(symbol_info: Dict) -> bool:
+        # COIN-M futures report the status as contractStatus
+        status = symbol_info.get("status", symbol_info.get("contractStatus"))
+        if status != "TRADING":
+            return False
+        return quote_asset is None or symbol_info.get("quoteAsset") == quote_asset.upper()
+
+    return _filter
+
+
+class KlineDownloader:
+    """Download the klines of many symbols, intervals and klines types into a KlineStore
+
+    All series are fetched concurrently through the request weight budgets of the client, one per
+    REST api family, so the download as a whole stays under the exchange limits. Progress is saved
+    to a checkpoint after every chunk of klines and a restarted download carries on from there, or
+    from an earlier start, skipping the ranges the store already covers.
+
+    The store is the same one used by ``get_historical_klines(cache_dir=directory)``. Create the client
+    with ``kline_cache_dir=directory`` to keep the first kline of each series for a restart too.
+
+    .. code-block:: python
+
+        client = await AsyncClient.create()
+        downloader = KlineDownloader(
+            client,
+            "/data/klines",
+            trading_symbols("USDT"),
+            ["1m", "1h"],
+            start_str="1 Jan, 2020",
+            klines_types=[HistoricalKlinesType.SPOT, HistoricalKlinesType.FUTURES],
+        )
+        await downloader.run()
+
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        directory: Union[str, Path],
+        symbols: Union[Sequence[str], Callable[[Dict], bool]],
+        intervals: Sequence[str],
+        start_str=None,
+        end_str=None,
+        klines_types: Sequence[HistoricalKlinesType] = (HistoricalKlinesType.SPOT,),
+        concurrency: int = DEFAULT_CONCURRENCY,
+        window_concurrency: int = 1,
+        checkpoint_path: Optional[Union[str, Path]] = None,
+        progress_callback: Optional[Callable[[DownloadProgress], None]] = None,
+        progress_interval: float = 10,
+    ):
+        """Initialise the KlineDownloader
+
+        :param client: AsyncClient instance
+        :type client: AsyncClient
+        :param directory: directory of the KlineStore
+        :type directory: str|Path
+        :param symbols: list of symbols or a filter of exchange info symbols, see trading_symbols
+        :type symbols: list|callable
+        :param intervals: kline intervals, e.g. ["1m", "1h"]
+        :type intervals: list
+        :param start_str: optional - start date string in UTC format or timestamp in milliseconds,
+            default the first kline of each series
+        :type start_str: str|int
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :type end_str: str|int
+        :param klines_types: Historical klines types to download, default SPOT
+        :type klines_types: list
+        :param concurrency: number of series downloaded at a time
+        :type concurrency: int
+        :param window_concurrency: number of page sized windows of a series fetched at a time
+        :type window_concurrency: int
+        :param checkpoint_path: optional - JSON checkpoint file, default download.json in directory
+        :type checkpoint_path: str|Path
+        :param progress_callback: optional - called with the DownloadProgress every progress_interval
+            seconds and when the download finishes, default logs it
+        :type progress_callback: callable
+        :param progress_interval: seconds between progress reports
+        :type progress_interval: float
+
+        """
+        if concurrency < 1 or window_concurrency < 1:
+            raise ValueError("concurrency and window_concurrency must be at least 1")
+        self.client = client
+        self.directory = Path(directory).expanduser()
+        self.symbols = symbols
+        self.intervals = list(intervals)
+        self.start_ts = convert_ts_str(start_str) or 0
+        self.end_ts = convert_ts_str(end_str)
+        self.klines_types = list(klines_types)
+        self.concurrency = concurrency
+        self.window_concurrency = window_concurrency
+        self.store = KlineStore(self.directory)
+        self.checkpoint = DownloadCheckpoint(
+            checkpoint_path or self.directory / "download.json"
+        )
+        self.progress_callback = progress_callback or (
+            lambda progress: logger.info("Downloaded %s", progress)
+        )
+        self.progress_interval = progress_interval
+        self.progress = DownloadProgress()
+
+    async def series(self) -> List[Tuple[HistoricalKlinesType, str, str]]:
+        """Get the (klines type, symbol, interval) series to download, resolving a symbol filter"""
+        series = []
+        for klines_type in self.klines_types:
+            if callable(self.symbols):
+                symbols: Iterable[str] = await resolve_symbols(
+                    self.client, klines_type, self.symbols
+                )
+            else:
+                symbols = self.symbols
+            for symbol in symbols:
+                for interval in self.intervals:
+                    series.append((klines_type, symbol.upper(), interval))
+        return series
+
+    async def run(self) -> DownloadProgress:
+        """Download all series, carrying on from the checkpoint
+
+        :return: DownloadProgress once every series is done
+
+        """
+        series = await self.series()
+        self.progress = DownloadProgress(len(series))
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _bounded(klines_type, symbol, interval):
+            async with semaphore:
+                await self.download(symbol, interval, klines_type)
+            self.progress.series_done += 1
+
+        reporter = asyncio.ensure_future(self._report())
+        try:
+            await asyncio.gather(*(_bounded(*s) for s in series))
+        finally:
+            reporter.cancel()
+        self.progress_callback(self.progress)
+        return self.progress
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            self.progress_callback(self.progress)
+
+    async def download(
+        self,
+        symbol: str,
+        interval: str,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ):
+        """Download the closed klines of one series into the store, chunk by chunk"""
+        timeframe = interval_to_milliseconds(interval)
+        if timeframe is None or interval.endswith("M"):
+            raise ValueError(f"Interval {interval!r} doesn't have a fixed length")
+        now = int(time.time() * 1000 + self.client.timestamp_offset)
+        # only closed klines are stored
+        stop_ts = now - timeframe + 1
+        if self.end_ts is not None:
+            stop_ts = min(stop_ts, self.end_ts + 1)
+
+        first_valid_ts = await self.client._get_earliest_valid_timestamp(
+            symbol, interval, klines_type
+        )
+        # keep the probed first kline for a restart, even if this series is interrupted
+        self.client.earliest_timestamp_cache.flush()
+        start_ts = max(self.start_ts, first_valid_ts)
+        checkpoint_ts = self.checkpoint.get(symbol, interval, klines_type)
+        if (
+            checkpoint_ts is not None
+            and start_ts < checkpoint_ts < stop_ts
+            and not self.store.missing_ranges(
+                symbol, interval, start_ts, checkpoint_ts, klines_type
+            )
+        ):
+            # carry on from the checkpoint, otherwise the ranges the store covers are skipped chunk
+            # by chunk, e.g. when the start is earlier than the previous run's
+            start_ts = checkpoint_ts
+        weight_limiter = self.client.get_weight_limiter(klines_market(klines_type))
+
+        while start_ts < stop_ts:
+            chunk_end = min(start_ts + CHUNK_KLINES * timeframe, stop_ts)
+            for gap_start, gap_end in self.store.missing_ranges(
+                symbol, interval, start_ts, chunk_end, klines_type
+            ):
+                klines = await self.client.get_historical_klines(
+                    symbol,
+                    interval,
+                    gap_start,
+                    gap_end,
+                    klines_type=klines_type,
+                    concurrency=self.window_concurrency,
+                    weight_limiter=weight_limiter,
+                    cache_dir=False,
+                )
+                # the end is inclusive, drop a kline opening at the end of the gap
+                klines = [k for k in klines if k[0] < gap_end]
+                self.store.add_klines(symbol, interval, klines, klines_type)
+                self.store.add_coverage(symbol, interval, gap_start, gap_end, klines_type)
+                self.progress.klines += len(klines)
+            start_ts = chunk_end
+            self.checkpoint.set(symbol, interval, klines_type, start_ts)
+
+
+KLINES_TYPES = {
+    "spot": HistoricalKlinesType.SPOT,
+    "futures": HistoricalKlinesType.FUTURES,
+    "futures_coin": HistoricalKlinesType.FUTURES_COIN,
+}
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Command line entry point, run ``python -m binance.download --help`` for the options"""
+    parser = argparse.ArgumentParser(
+        prog="python -m binance.download",
+        description="Download klines of many symbols and intervals into a local store",
+    )
+    parser.add_argument("directory", help="directory of the kline store")
+    universe = parser.add_mutually_exclusive_group(required=True)
+    universe.add_argument("--symbols", nargs="+", help="symbols to download")
+    universe.add_argument(
+        "--quote-asset",
+        help="download every trading symbol quoted in this asset, e.g. USDT",
+    )
+    universe.add_argument(
+        "--all-trading", action="store_true", help="download every trading symbol"
+    )
+    parser.add_argument("--intervals", nargs="+", default=["1m"], help="kline intervals")
+    parser.add_argument(
+        "--types",
+        nargs="+",
+        default=["spot"],
+        choices=sorted(KLINES_TYPES),
+        help="klines types",
+    )
+    parser.add_argument("--start", help="start date in UTC format or timestamp in milliseconds")
+    parser.add_argument("--end", help="end date in UTC format or timestamp in milliseconds")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="number of series downloaded at a time",
+    )
+    parser.add_argument(
+        "--window-concurrency",
+        type=int,
+        default=1,
+        help="number of windows of a series fetched at a time",
+    )
+    parser.add_argument("--checkpoint", help="checkpoint file, default download.json in the directory")
+    parser.add_argument("--tld", default="com", help="top level domain, e.g. us")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    def _ts(value):
+        return int(value) if value and value.isdigit() else value
+
+    symbols: Union[Sequence[str], Callable[[Dict], bool]]
+    if args.symbols:
+        symbols = args.symbols
+    else:
+        symbols = trading_symbols(args.quote_asset)
+
+    async def _run():
+        client = await AsyncClient.create(tld=args.tld)
+        try:
+            downloader = KlineDownloader(
+                client,
+                args.directory,
+                symbols,
+                args.intervals,
+                start_str=_ts(args.start),
+                end_str=_ts(args.end),
+                klines_types=[KLINES_TYPES[t] for t in args.types],
+                concurrency=args.concurrency,
+                window_concurrency=args.window_concurrency,
+                checkpoint_path=args.checkpoint,
+            )
+            await downloader.run()
+        finally:
+            await client.close_connection()
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+pa: Any
+pa_ipc: Any
+pq: Any
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pa_ipc = None
+    pq = None
+
+from binance.columnar import KLINE_FIELDS
+from binance.enums import HistoricalKlinesType
+from binance.helpers import convert_ts_str
+from binance.ratelimit import MARKET_SPOT
+
+FORMAT_PARQUET = "parquet"
+FORMAT_ARROW = "arrow"
+
+FORMAT_EXTENSIONS = {FORMAT_PARQUET: ".parquet", FORMAT_ARROW: ".arrow"}
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+DEFAULT_ROW_GROUP_SIZE = 100000
+
+# (column name, key in the API response, arrow type name)
+KLINE_EXPORT_FIELDS: Sequence[Tuple[str, Union[int, str], str]] = tuple(
+    (name, i, "int64" if dtype == "i8" else "float64")
+    for i, (name, dtype) in enumerate(KLINE_FIELDS)
+)
+
+AGG_TRADE_EXPORT_FIELDS: Sequence[Tuple[str, Union[int, str], str]] = (
+    ("agg_trade_id", "a", "int64"),
+    ("price", "p", "float64"),
+    ("quantity", "q", "float64"),
+    ("first_trade_id", "f", "int64"),
+    ("last_trade_id", "l", "int64"),
+    ("time", "T", "int64"),
+    ("is_buyer_maker", "m", "bool"),
+    ("is_best_match", "M", "bool"),
+)
+
+# fields shared by the spot and futures historicalTrades responses
+TRADE_EXPORT_FIELDS: Sequence[Tuple[str, Union[int, str], str]] = (
+    ("trade_id", "id", "int64"),
+    ("price", "price", "float64"),
+    ("quantity", "qty", "float64"),
+    ("quote_quantity", "quoteQty", "float64"),
+    ("time", "time", "int64"),
+    ("is_buyer_maker", "isBuyerMaker", "bool"),
+)
+
+_PARTITION_RE = re.compile(r"^date=(\d{4}-\d{2}-\d{2})\.(parquet|arrow)$")
+
+logger = logging.getLogger(__name__)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError(
+            "pyarrow is not installed, please install it to export to parquet or arrow (pip install pyarrow)"
+        )
+
+
+def _day_str(day: int) -> str:
+    return datetime.fromtimestamp(day * DAY_MS / 1000, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _partial_path(directory: Path, day: int, ext: str) -> Path:
+    return directory / f"date={_day_str(day)}.partial{ext}"
+
+
+def _schema(fields):
+    return pa.schema([(name, pa.type_for_alias(arrow_type)) for name, _, arrow_type in fields])
+
+
+def rows_to_table(rows: List, fields=KLINE_EXPORT_FIELDS):
+    """Convert rows returned by the API to an arrow table
+
+    Strings are decoded with vectorised arrow casts.
+
+    :param rows: list of klines or list of trade dicts
+    :param fields: sequence of (column name, key in the row, arrow type name)
+
+    :return: pyarrow.Table
+
+    """
+    _require_pyarrow()
+    schema = _schema(fields)
+    arrays = []
+    for (name, key, _), field in zip(fields, schema):
+        values = [row[key] for row in rows]
+        # the API returns prices and quantities as strings
+        arrays.append(pa.array(values).cast(field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class PartitionWriter:
+    """Write the rows of one partition to a parquet or arrow IPC file, a row group at a time
+
+    Rows are written to a temporary file which is only given its final name once closed, so a file
+    with the final name is always a completed partition.
+
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        fields=KLINE_EXPORT_FIELDS,
+        fmt: str = FORMAT_PARQUET,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ):
+        """Initialise the PartitionWriter
+
+        :param path: final path of the partition file
+        :type path: str|Path
+        :param fields: sequence of (column name, key in the row, arrow type name)
+        :param fmt: FORMAT_PARQUET or FORMAT_ARROW
+        :type fmt: str
+        :param row_group_size: number of rows buffered before a row group is written
+        :type row_group_size: int
+
+        """
+        _require_pyarrow()
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unknown export format {fmt!r}")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._fields = fields
+        self._fmt = fmt
+        self._row_group_size = row_group_size
+        self._buffer: List = []
+        self._writer = None
+        self.rows = 0
+
+    def write(self, rows: Iterable):
+        """Buffer rows, writing a row group each time the buffer is full"""
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self._row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as a row group"""
+        if not self._buffer:
+            return
+        self._write(rows_to_table(self._buffer, self._fields))
+        self._buffer = []
+
+    def write_table(self, table):
+        """Write an arrow table with the columns of the fields after the buffered rows
+
+        :param table: pyarrow.Table, e.g. decoded from an archive file
+
+        """
+        self.flush()
+        self._write(table)
+
+    def _write(self, table):
+        if self._writer is None:
+            if self._fmt == FORMAT_PARQUET:
+                self._writer = pq.ParquetWriter(str(self._tmp_path), table.schema)
+            else:
+                self._writer = pa_ipc.new_file(str(self._tmp_path), table.schema)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self, path: Optional[Union[str, Path]] = None) -> Optional[Path]:
+        """Write the remaining rows and move the file to its final path
+
+        :param path: optional - path to use instead of the final path, e.g. for a partition that isn't complete
+
+        :return: path of the file written, None if there were no rows
+
+        """
+        self.flush()
+        if self._writer is None:
+            return None
+        self._writer.close()
+        path = Path(path) if path else self.path
+        os.replace(self._tmp_path, path)
+        return path
+
+
+def completed_days(directory: Union[str, Path]) -> List[str]:
+    """List the days with a completed partition in a symbol directory
+
+    :return: sorted list of dates formatted as YYYY-MM-DD
+
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    days = []
+    for entry in directory.iterdir():
+        match = _PARTITION_RE.match(entry.name)
+        if match:
+            days.append(match.group(1))
+    return sorted(days)
+
+
+def _resume_start(directory: Path, start_str) -> int:
+    start_ts = convert_ts_str(start_str)
+    if start_ts is None:
+        raise ValueError("start_str is required")
+    days = completed_days(directory)
+    if not days:
+        return start_ts
+    last_day = datetime.strptime(days[-1], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return max(start_ts, int(last_day.timestamp() * 1000) + DAY_MS)
+
+
+class DayPartitionedWriter:
+    """Write rows ordered by time to one file per UTC day in a directory
+
+    Days are written as date=YYYY-MM-DD files. A day that isn't over when the writer is closed, or
+    before end_ts, is written as date=YYYY-MM-DD.partial and replaced by the next export.
+
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        fields,
+        end_ts: Optional[int] = None,
+        fmt: str = FORMAT_PARQUET,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ):
+        """Initialise the DayPartitionedWriter
+
+        :param directory: directory to write the files in
+        :param fields: sequence of (column name, key in the row, arrow type name)
+        :param end_ts: optional - timestamp in milliseconds the export ends at, default now
+        :param fmt: FORMAT_PARQUET or FORMAT_ARROW
+        :param row_group_size: number of rows per row group
+
+        """
+        self.directory = Path(directory)
+        self.fields = fields
+        self.end_ts = end_ts
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        self.written: List[Path] = []
+        self._ext = FORMAT_EXTENSIONS[fmt]
+        self._writer: Optional[PartitionWriter] = None
+        self._day: Optional[int] = None
+
+    def write(self, row, ts: int):
+        """Write a row with a time of ts milliseconds"""
+        self._switch_day(ts // DAY_MS).write((row,))
+
+    def write_table(self, table, ts: int):
+        """Write an arrow table of rows of a single UTC day
+
+        :param table: pyarrow.Table with the columns of the fields, ordered by time
+        :param ts: time of the first row in milliseconds
+
+        """
+        self._switch_day(ts // DAY_MS).write_table(table)
+
+    def _switch_day(self, row_day: int) -> PartitionWriter:
+        if self._writer is not None and row_day == self._day:
+            return self._writer
+        # a later day has started so the previous one is complete
+        if self._writer is not None:
+            assert self._day is not None
+            path = self._writer.close()
+            if path:
+                self.written.append(path)
+                logger.debug(f"Exported {self._writer.rows} rows to {path}")
+            # drop what an earlier export wrote of this day before it was over
+            partial_path = _partial_path(self.directory, self._day, self._ext)
+            if partial_path.exists():
+                partial_path.unlink()
+        self._day = row_day
+        self._writer = PartitionWriter(
+            self.directory / f"date={_day_str(row_day)}{self._ext}",
+            self.fields,
+            self.fmt,
+            self.row_group_size,
+        )
+        return self._writer
+
+    def close(self) -> List[Path]:
+        """Write the last day, as a partial file if it isn't over
+
+        :return: list of the files written
+
+        """
+        if self._writer is not None:
+            assert self._day is not None
+            day_end = (self._day + 1) * DAY_MS - 1
+            limit_ts = int(time.time() * 1000) if self.end_ts is None else self.end_ts
+            partial_path = _partial_path(self.directory, self._day, self._ext)
+            if limit_ts < day_end:
+                path = self._writer.close(partial_path)
+            else:
+                path = self._writer.close()
+                if partial_path.exists():
+                    partial_path.unlink()
+            if path:
+                self.written.append(path)
+            self._writer = None
+        return self.written
+
+
+def export_rows(
+    rows: Iterable,
+    directory: Union[str, Path],
+    time_key: Callable,
+    fields,
+    end_ts: Optional[int] = None,
+    fmt: str = FORMAT_PARQUET,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> List[Path]:
+    """Write rows to one file per UTC day in a directory
+
+    Days are written as date=YYYY-MM-DD files. A day that isn't over at the end of the export, or
+    before end_ts, is written as date=YYYY-MM-DD.partial and replaced by the next export.
+
+    :param rows: iterable of rows ordered by time
+    :param directory: directory to write the files in
+    :param time_key: function returning the time of a row in milliseconds
+    :param fields: sequence of (column name, key in the row, arrow type name)
+    :param end_ts: optional - stop at rows later than this timestamp in milliseconds
+    :param fmt: FORMAT_PARQUET or FORMAT_ARROW
+    :param row_group_size: number of rows per row group
+
+    :return: list of the files written
+
+    """
+    writer = DayPartitionedWriter(directory, fields, end_ts, fmt, row_group_size)
+    for row in rows:
+        ts = time_key(row)
+        if end_ts is not None and ts > end_ts:
+            break
+        writer.write(row, ts)
+    return writer.close()
+
+
+def export_klines(
+    client,
+    path: Union[str, Path],
+    symbol: str,
+    interval: str,
+    start_str,
+    end_str=None,
+    klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    fmt: str = FORMAT_PARQUET,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> List[Path]:
+    """Export historical klines to parquet or arrow IPC files partitioned by symbol and day
+
+    Files are written to path/klines/<klines type>/<interval>/symbol=<symbol>/date=<YYYY-MM-DD>.parquet
+    while pages arrive from get_historical_klines_generator, so memory use doesn't depend on the length of
+    the range. A new export of the same symbol resumes after the last completed day.
+
+    .. code-block:: python
+
+        export_klines(client, "/data", "BTCUSDT", Client.KLINE_INTERVAL_1SECOND, "1 Jan, 2024", "1 Feb, 2024")
+
+    :param client: Client instance
+    :type client: binance.Client
+    :param path: root directory of the export
+    :type path: str|Path
+    :param symbol: Name of symbol pair e.g. BNBBTC
+    :type symbol: str
+    :param interval: Binance Kline interval
+    :type interval: str
+    :param start_str: Start date string in UTC format or timestamp in milliseconds
+    :type start_str: str|int
+    :param end_str: optional - end date string in UTC format or timestamp in milliseconds (default up to now)
+    :type end_str: str|int
+    :param klines_type: Historical klines type: SPOT or FUTURES
+    :type klines_type: HistoricalKlinesType
+    :param fmt: FORMAT_PARQUET (default) or FORMAT_ARROW
+    :type fmt: str
+    :param row_group_size: number of rows per row group
+    :type row_group_size: int
+
+    :return: list of the files written
+
+    """
+    _require_pyarrow()
+    directory = (
+        Path(path) / "klines" / klines_type.name.lower() / interval / f"symbol={symbol.upper()}"
+    )
+    start_ts = _resume_start(directory, start_str)
+    end_ts = convert_ts_str(end_str)
+    if end_ts is not None and start_ts > end_ts:
+        return []
+    klines = client.get_historical_klines_generator(
+        symbol, interval, start_ts, end_ts, klines_type=klines_type
+    )
+    return export_rows(
+        klines,
+        directory,
+        lambda kline: kline[0],
+        KLINE_EXPORT_FIELDS,
+        end_ts,
+        fmt,
+        row_group_size,
+    )
+
+
+def export_aggregate_trades(
+    client,
+    path: Union[str, Path],
+    symbol: str,
+    start_str,
+    end_str=None,
+    fmt: str = FORMAT_PARQUET,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> List[Path]:
+    """Export aggregate trades to parquet or arrow IPC files partitioned by symbol and day
+
+    Files are written to path/aggTrades/symbol=<symbol>/date=<YYYY-MM-DD>.parquet while trades arrive
+    from aggregate_trade_iter. A new export of the same symbol resumes after the last completed day.
+
+    :param client: Client instance
+    :type client: binance.Client
+    :param path: root directory of the export
+    :type path: str|Path
+    :param symbol: Name of symbol pair e.g. BNBBTC
+    :type symbol: str
+    :param start_str: Start date string in UTC format or timestamp in milliseconds
+    :type start_str: str|int
+    :param end_str: optional - end date string in UTC format or timestamp in milliseconds (default up to now)
+    :type end_str: str|int
+    :param fmt: FORMAT_PARQUET (default) or FORMAT_ARROW
+    :type fmt: str
+    :param row_group_size: number of rows per row group
+    :type row_group_size: int
+
+    :return: list of the files written
+
+    """
+    _require_pyarrow()
+    directory = Path(path) / "aggTrades" / f"symbol={symbol.upper()}"
+    start_ts = _resume_start(directory, start_str)
+    end_ts = convert_ts_str(end_str)
+    if end_ts is not None and start_ts > end_ts:
+        return []
+    trades = client.aggregate_trade_iter(symbol, start_str=start_ts)
+    return export_rows(
+        trades,
+        directory,
+        lambda trade: trade["T"],
+        AGG_TRADE_EXPORT_FIELDS,
+        end_ts,
+        fmt,
+        row_group_size,
+    )
+
+
+async def export_trades(
+    client,
+    path: Union[str, Path],
+    symbol: str,
+    start_str,
+    end_str=None,
+    market: str = MARKET_SPOT,
+    concurrency: int = 4,
+    fmt: str = FORMAT_PARQUET,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> List[Path]:
+    """Export trades to parquet or arrow IPC files partitioned by symbol and day
+
+    Files are written to path/trades/<market>/symbol=<symbol>/date=<YYYY-MM-DD>.parquet while trades
+    arrive from historical_trade_backfill, which fetches pages of trade ids concurrently. The completed
+    days are the checkpoints, a new export of the same symbol resumes after the last one.
+
+    .. code-block:: python
+
+        await export_trades(client, "/data", "BTCUSDT", "1 Jan, 2024", "8 Jan, 2024", concurrency=8)
+
+    :param client: AsyncClient instance
+    :type client: binance.AsyncClient
+    :param path: root directory of the export
+    :type path: str|Path
+    :param symbol: Name of symbol pair e.g. BNBBTC
+    :type symbol: str
+    :param start_str: Start date string in UTC format or timestamp in milliseconds
+    :type start_str: str|int
+    :param end_str: optional - end date string in UTC format or timestamp in milliseconds (default up to now)
+    :type end_str: str|int
+    :param market: one of MARKET_SPOT (default), MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+    :type market: str
+    :param concurrency: number of pages requested at a time
+    :type concurrency: int
+    :param fmt: FORMAT_PARQUET (default) or FORMAT_ARROW
+    :type fmt: str
+    :param row_group_size: number of rows per row group
+    :type row_group_size: int
+
+    :return: list of the files written
+
+    """
+    _require_pyarrow()
+    directory = Path(path) / "trades" / market / f"symbol={symbol.upper()}"
+    start_ts = _resume_start(directory, start_str)
+    end_ts = convert_ts_str(end_str)
+    if end_ts is not None and start_ts > end_ts:
+        return []
+    writer = DayPartitionedWriter(
+        directory, TRADE_EXPORT_FIELDS, end_ts, fmt, row_group_size
+    )
+    async for trade in client.historical_trade_backfill(
+        symbol, start_ts, end_ts, market=market, concurrency=concurrency
+    ):
+        writer.write(trade, trade["time"])
+    return writer.close()
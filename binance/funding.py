@@ -0,0 +1,354 @@
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from binance.enums import HistoricalKlinesType
+from binance.helpers import convert_ts_str, interval_to_milliseconds
+from binance.ratelimit import MARKET_FUTURES, MARKET_FUTURES_COIN, AsyncWeightLimiter
+
+# klines types of the prices joined with the funding rates of each market
+FUNDING_KLINES_TYPES = {
+    MARKET_FUTURES: (
+        HistoricalKlinesType.FUTURES_MARK_PRICE,
+        HistoricalKlinesType.FUTURES_INDEX_PRICE,
+    ),
+    MARKET_FUTURES_COIN: (
+        HistoricalKlinesType.FUTURES_COIN_MARK_PRICE,
+        HistoricalKlinesType.FUTURES_COIN_INDEX_PRICE,
+    ),
+}
+
+
+class FundingRateStore:
+    """Local SQLite store of funding rate history
+
+    Keeps the funding rates as returned by the API, so later syncs only request the funding events
+    after the last one stored.
+
+    .. code-block:: python
+
+        store = FundingRateStore("~/.binance")
+        await sync_funding_rates(client, store)
+        rates = store.get_funding_rates("BTCUSDT")
+
+    """
+
+    FILENAME = "funding.sqlite3"
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        """Initialise the FundingRateStore
+
+        :param cache_dir: directory to keep the database in, created if it doesn't exist
+        :type cache_dir: str|Path
+
+        """
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / self.FILENAME
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS funding ("
+            "market TEXT, symbol TEXT, funding_time INTEGER, funding_rate TEXT, mark_price TEXT, "
+            "PRIMARY KEY (market, symbol, funding_time)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+    def add_funding_rates(self, symbol: str, rates: List[Dict], market: str = MARKET_FUTURES):
+        """Store funding rates, replacing any already stored with the same funding time
+
+        :param rates: funding rates in the format returned by futures_funding_rate
+        :type rates: list
+
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO funding VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        market,
+                        symbol.upper(),
+                        rate["fundingTime"],
+                        rate["fundingRate"],
+                        # COIN-M funding rates don't have the mark price
+                        rate.get("markPrice"),
+                    )
+                    for rate in rates
+                ],
+            )
+
+    def get_funding_rates(
+        self,
+        symbol: str,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        market: str = MARKET_FUTURES,
+    ) -> List[Dict]:
+        """Get stored funding rates with a funding time between start_ts and end_ts, both inclusive
+
+        :return: list of funding rates in the format returned by futures_funding_rate
+
+        """
+        query = (
+            "SELECT funding_time, funding_rate, mark_price FROM funding "
+            "WHERE market = ? AND symbol = ?"
+        )
+        args: list = [market, symbol.upper()]
+        if start_ts is not None:
+            query += " AND funding_time >= ?"
+            args.append(start_ts)
+        if end_ts is not None:
+            query += " AND funding_time <= ?"
+            args.append(end_ts)
+        query += " ORDER BY funding_time"
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        rates = []
+        for funding_time, funding_rate, mark_price in rows:
+            rate = {
+                "symbol": symbol.upper(),
+                "fundingTime": funding_time,
+                "fundingRate": funding_rate,
+            }
+            if mark_price is not None:
+                rate["markPrice"] = mark_price
+            rates.append(rate)
+        return rates
+
+    def last_funding_time(self, symbol: str, market: str = MARKET_FUTURES) -> Optional[int]:
+        """Get the time of the last funding stored for a symbol, None if there are none"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(funding_time) FROM funding WHERE market = ? AND symbol = ?",
+                (market, symbol.upper()),
+            ).fetchone()
+        return row[0]
+
+    def symbols(self, market: str = MARKET_FUTURES) -> List[str]:
+        """Get the symbols with stored funding rates"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT symbol FROM funding WHERE market = ? ORDER BY symbol", (market,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+async def perpetual_symbols(client, market: str = MARKET_FUTURES) -> Dict[str, str]:
+    """Get the perpetuals trading on a futures market
+
+    :param client: AsyncClient instance
+    :param market: MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+    :type market: str
+
+    :return: dict of symbol to the pair of its index price
+
+    """
+    if market == MARKET_FUTURES:
+        info = await client.futures_exchange_info()
+    elif market == MARKET_FUTURES_COIN:
+        info = await client.futures_coin_exchange_info()
+    else:
+        raise ValueError(f"Unknown market {market!r}")
+    return {
+        s["symbol"]: s["pair"]
+        for s in info["symbols"]
+        if s.get("contractType") == "PERPETUAL"
+        # COIN-M symbols have a contractStatus instead of a status
+        and s.get("status", s.get("contractStatus")) == "TRADING"
+    }
+
+
+async def sync_funding_rates(
+    client,
+    store: FundingRateStore,
+    symbols: Optional[Sequence[str]] = None,
+    market: str = MARKET_FUTURES,
+    start_str=None,
+    concurrency: int = 8,
+    weight_limiter: Optional[AsyncWeightLimiter] = None,
+) -> Dict[str, int]:
+    """Fetch the funding rate history of many perpetuals concurrently into a FundingRateStore
+
+    Symbols which are already in the store only fetch the funding events after the last one stored.
+
+    .. code-block:: python
+
+        store = FundingRateStore("~/.binance")
+        new_rates = await sync_funding_rates(client, store, concurrency=16)
+
+    :param client: AsyncClient instance
+    :param store: FundingRateStore to sync
+    :param symbols: optional - perpetuals to sync, default all perpetuals trading on the market
+    :type symbols: list
+    :param market: MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+    :type market: str
+    :param start_str: optional - start date string in UTC format or timestamp in milliseconds for symbols
+        which aren't in the store yet, default the first funding of each symbol
+    :type start_str: str|int
+    :param concurrency: number of symbols fetched at a time
+    :type concurrency: int
+    :param weight_limiter: optional - request budget, defaults to get_funding_rate_limiter of the market
+    :type weight_limiter: AsyncWeightLimiter
+
+    :return: dict of symbol to the number of funding rates added
+
+    """
+    if symbols is None:
+        symbols = list(await perpetual_symbols(client, market))
+    weight_limiter = weight_limiter or client.get_funding_rate_limiter(market)
+    semaphore = asyncio.Semaphore(concurrency)
+    start_ts = convert_ts_str(start_str)
+
+    async def _sync(symbol: str) -> int:
+        last = store.last_funding_time(symbol, market)
+        async with semaphore:
+            rates = [
+                rate
+                async for rate in client.futures_funding_rate_iter(
+                    symbol,
+                    start_ts if last is None else last + 1,
+                    market=market,
+                    weight_limiter=weight_limiter,
+                )
+            ]
+        store.add_funding_rates(symbol, rates, market)
+        return len(rates)
+
+    counts = await asyncio.gather(*(_sync(symbol) for symbol in symbols))
+    return dict(zip(symbols, counts))
+
+
+def join_funding_klines(
+    rates: List[Dict],
+    mark_klines: List[List],
+    index_klines: List[List],
+    interval: str = "1h",
+) -> List[Dict]:
+    """Join funding rates with the mark and index prices at their funding time
+
+    The price at a funding is the open of the kline opening at the funding time, funding times a few
+    milliseconds late are rounded down to the interval.
+
+    :param rates: funding rates in the format returned by futures_funding_rate
+    :type rates: list
+    :param mark_klines: mark price klines covering the funding times
+    :type mark_klines: list
+    :param index_klines: index price klines covering the funding times
+    :type index_klines: list
+    :param interval: interval of the klines
+    :type interval: str
+
+    :return: list of dicts with the fundingTime, fundingRate, markPrice and indexPrice as numbers, the
+        prices are None where there's no kline
+
+    """
+    interval_ms = interval_to_milliseconds(interval)
+    mark_opens = {kline[0]: float(kline[1]) for kline in mark_klines}
+    index_opens = {kline[0]: float(kline[1]) for kline in index_klines}
+    rows = []
+    for rate in rates:
+        open_time = rate["fundingTime"] - rate["fundingTime"] % interval_ms
+        rows.append(
+            {
+                "fundingTime": rate["fundingTime"],
+                "fundingRate": float(rate["fundingRate"]),
+                "markPrice": mark_opens.get(open_time),
+                "indexPrice": index_opens.get(open_time),
+            }
+        )
+    return rows
+
+
+async def funding_report(
+    client,
+    store: FundingRateStore,
+    symbols: Optional[Sequence[str]] = None,
+    market: str = MARKET_FUTURES,
+    start_str=None,
+    end_str=None,
+    interval: str = "1h",
+    concurrency: int = 8,
+    cache_dir: Optional[Union[str, Path, bool]] = None,
+) -> Dict[str, List[Dict]]:
+    """Sync the funding rates of many perpetuals and join them with their mark and index prices
+
+    The funding rates are synced with sync_funding_rates. The mark and index price klines are fetched
+    with get_historical_klines into the kline store of cache_dir, so a later report only requests the
+    new funding events and klines.
+
+    .. code-block:: python
+
+        store = FundingRateStore("~/.binance")
+        report = await funding_report(client, store, start_str="30 days ago UTC")
+        carry = {symbol: sum(row["fundingRate"] for row in rows) for symbol, rows in report.items()}
+
+    :param client: AsyncClient instance
+    :param store: FundingRateStore to sync
+    :param symbols: optional - perpetuals to report, default all perpetuals trading on the market
+    :type symbols: list
+    :param market: MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+    :type market: str
+    :param start_str: optional - start date string in UTC format or timestamp in milliseconds of the report,
+        default the first funding of each symbol
+    :type start_str: str|int
+    :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+    :type end_str: str|int
+    :param interval: interval of the price klines, default 1h
+    :type interval: str
+    :param concurrency: number of symbols fetched at a time
+    :type concurrency: int
+    :param cache_dir: optional - directory of the kline store, default the directory of the funding store,
+        pass False to skip the store
+    :type cache_dir: str|Path|bool
+
+    :return: dict of symbol to the rows of join_funding_klines
+
+    """
+    pairs = await perpetual_symbols(client, market)
+    if symbols is None:
+        symbols = list(pairs)
+    await sync_funding_rates(client, store, symbols, market, start_str, concurrency)
+    if cache_dir is None:
+        cache_dir = store.cache_dir
+    mark_type, index_type = FUNDING_KLINES_TYPES[market]
+    interval_ms = interval_to_milliseconds(interval)
+    start_ts = convert_ts_str(start_str)
+    end_ts = convert_ts_str(end_str)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _report(symbol: str) -> List[Dict]:
+        rates = store.get_funding_rates(symbol, start_ts, end_ts, market)
+        if not rates:
+            return []
+        first = rates[0]["fundingTime"] - rates[0]["fundingTime"] % interval_ms
+        last = rates[-1]["fundingTime"]
+        async with semaphore:
+            mark_klines, index_klines = await asyncio.gather(
+                client.get_historical_klines(
+                    symbol,
+                    interval,
+                    first,
+                    last,
+                    klines_type=mark_type,
+                    cache_dir=cache_dir,
+                ),
+                client.get_historical_klines(
+                    pairs.get(symbol, symbol),
+                    interval,
+                    first,
+                    last,
+                    klines_type=index_type,
+                    cache_dir=cache_dir,
+                ),
+            )
+        return join_funding_klines(rates, mark_klines, index_klines, interval)
+
+    rows = await asyncio.gather(*(_report(symbol) for symbol in symbols))
+    return dict(zip(symbols, rows))
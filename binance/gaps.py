@@ -0,0 +1,304 @@
+import asyncio
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+from binance.enums import HistoricalKlinesType
+from binance.helpers import convert_ts_str, interval_to_milliseconds
+from binance.mmap_store import DEFAULT_ORIGIN
+from binance.store import KlineStore
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# REST may not have published the klines of the last few intervals yet, a range that is still
+# empty this close to now isn't recorded as empty on the exchange
+UNPUBLISHED_INTERVALS = 3
+
+# klines returned by a single klines request
+KLINES_PAGE_SIZE = 1000
+
+
+class KlineGaps:
+    """Result of checking klines against the open times expected for their interval"""
+
+    def __init__(
+        self,
+        missing: List[Tuple[int, int]],
+        duplicates: List[int],
+        misaligned: List[int],
+        missing_count: int = 0,
+    ):
+        #: ranges of missing open times, start inclusive and end exclusive
+        self.missing = missing
+        #: open times found more than once
+        self.duplicates = duplicates
+        #: open times which aren't on the grid of the interval
+        self.misaligned = misaligned
+        #: number of missing klines
+        self.missing_count = missing_count
+
+    def __bool__(self):
+        return bool(self.missing or self.duplicates or self.misaligned)
+
+    def __repr__(self):
+        return (
+            f"KlineGaps(missing={self.missing!r}, duplicates={self.duplicates!r}, "
+            f"misaligned={self.misaligned!r})"
+        )
+
+
+def _interval_ms(interval: str) -> int:
+    interval_ms = interval_to_milliseconds(interval)
+    if interval_ms is None or interval.endswith("M"):
+        raise ValueError(f"Interval {interval!r} doesn't have a fixed length")
+    return interval_ms
+
+
+def _grid_anchor(interval: str) -> int:
+    # weekly klines open on Mondays, the other intervals are aligned to the epoch
+    return DEFAULT_ORIGIN if interval.endswith("w") else 0
+
+
+def _open_times(klines) -> List[int]:
+    if np is not None and isinstance(klines, np.ndarray):
+        return klines["open_time"].tolist()
+    if isinstance(klines, dict):
+        return list(klines["open_time"])
+    return [kline[0] for kline in klines]
+
+
+def _subtract(
+    ranges: List[Tuple[int, int]], excluded: Sequence[Tuple[int, int]]
+) -> List[Tuple[int, int]]:
+    # remove the sorted excluded ranges from the sorted ranges
+    result = []
+    for start, end in ranges:
+        for ex_start, ex_end in excluded:
+            if ex_end <= start or ex_start >= end:
+                continue
+            if ex_start > start:
+                result.append((start, ex_start))
+            start = max(start, ex_end)
+            if start >= end:
+                break
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+def find_gaps(
+    klines,
+    interval: str,
+    start_ts: Optional[int] = None,
+    end_ts: Optional[int] = None,
+    known_empty: Sequence[Tuple[int, int]] = (),
+) -> KlineGaps:
+    """Check klines against the open times expected for their interval
+
+    :param klines: list of klines, a numpy structured array or a dict of columns
+    :param interval: kline interval
+    :type interval: str
+    :param start_ts: optional - first open time expected, default the first kline
+    :type start_ts: int
+    :param end_ts: optional - last open time expected, default the last kline
+    :type end_ts: int
+    :param known_empty: optional - ranges of open times the exchange has no klines for, not reported
+        as missing, e.g. KlineStore.empty_ranges
+    :type known_empty: list
+
+    :return: KlineGaps, false if the klines are complete
+
+    """
+    interval_ms = _interval_ms(interval)
+    anchor = _grid_anchor(interval)
+    open_times = sorted(_open_times(klines))
+    if start_ts is None:
+        if not open_times:
+            return KlineGaps([], [], [])
+        start_ts = open_times[0]
+    if end_ts is None:
+        end_ts = open_times[-1] if open_times else start_ts - 1
+    # first open time on the grid within the range
+    first = start_ts + (anchor - start_ts) % interval_ms
+    stop = end_ts + 1
+
+    missing = []
+    duplicates = []
+    misaligned = []
+    expected = first
+    previous = None
+    for open_time in open_times:
+        if open_time < first or open_time >= stop:
+            continue
+        if open_time == previous:
+            duplicates.append(open_time)
+            continue
+        previous = open_time
+        if (open_time - anchor) % interval_ms:
+            misaligned.append(open_time)
+            continue
+        if open_time > expected:
+            missing.append((expected, open_time))
+        expected = open_time + interval_ms
+    if expected < stop:
+        missing.append((expected, stop))
+
+    missing = _subtract(missing, sorted(known_empty))
+    missing_count = sum(-(-(end - start) // interval_ms) for start, end in missing)
+    return KlineGaps(missing, duplicates, misaligned, missing_count)
+
+
+def check_store(
+    store: KlineStore,
+    symbol: str,
+    interval: str,
+    start_str,
+    end_str=None,
+    klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+) -> KlineGaps:
+    """Check the klines of a KlineStore, ranges recorded as empty on the exchange aren't reported
+
+    :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default the
+        last closed kline
+
+    """
+    start_ts, end_ts = _range(interval, start_str, end_str)
+    return find_gaps(
+        store.get_klines(symbol, interval, start_ts, end_ts, klines_type),
+        interval,
+        start_ts,
+        end_ts,
+        store.empty_ranges(symbol, interval, klines_type),
+    )
+
+
+def _range(interval: str, start_str, end_str) -> Tuple[int, int]:
+    start_ts = convert_ts_str(start_str)
+    if start_ts is None:
+        raise ValueError("start_str is required")
+    # only klines which have closed are expected
+    last_closed = int(time.time() * 1000) - _interval_ms(interval)
+    end_ts = convert_ts_str(end_str)
+    return start_ts, last_closed if end_ts is None else min(end_ts, last_closed)
+
+
+def _store_window(
+    store: KlineStore,
+    symbol: str,
+    interval: str,
+    klines_type: HistoricalKlinesType,
+    window: Tuple[int, int],
+    klines: List[List],
+):
+    # store the refetched klines, what is still missing is empty on the exchange
+    start, end = window
+    klines = [k for k in klines if start <= k[0] < end]
+    store.add_klines(symbol, interval, klines, klines_type)
+    interval_ms = _interval_ms(interval)
+    # the recent klines still missing are fetched again by the next repair
+    settled = int(time.time() * 1000) - UNPUBLISHED_INTERVALS * interval_ms
+    if klines:
+        settled = max(settled, klines[-1][0] + interval_ms)
+    settled = min(settled, end)
+    for empty_start, empty_end in find_gaps(klines, interval, start, end - 1).missing:
+        if empty_start < settled:
+            store.add_empty_range(
+                symbol, interval, empty_start, min(empty_end, settled), klines_type
+            )
+    if start < settled:
+        store.add_coverage(symbol, interval, start, settled, klines_type)
+    return len(klines)
+
+
+def repair_store(
+    client,
+    store: KlineStore,
+    symbol: str,
+    interval: str,
+    start_str,
+    end_str=None,
+    klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+) -> KlineGaps:
+    """Refetch the missing klines of a KlineStore
+
+    Windows which are still empty after refetching are recorded with KlineStore.add_empty_range, so
+    they aren't reported or refetched again. The last UNPUBLISHED_INTERVALS intervals before now are
+    not recorded as empty, REST may not have published their klines yet.
+
+    .. code-block:: python
+
+        store = KlineStore("~/.binance")
+        gaps = repair_store(client, store, "BTCUSDT", "1m", "1 Jan, 2024")
+
+    :param client: Client instance
+    :param store: KlineStore to check and repair
+    :param symbol: Name of symbol pair e.g. BNBBTC
+    :type symbol: str
+    :param interval: Binance Kline interval
+    :type interval: str
+    :param start_str: Start date string in UTC format or timestamp in milliseconds
+    :type start_str: str|int
+    :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default the
+        last closed kline
+    :type end_str: str|int
+    :param klines_type: Historical klines type: SPOT or FUTURES
+    :type klines_type: HistoricalKlinesType
+
+    :return: KlineGaps found before the repair
+
+    """
+    gaps = check_store(store, symbol, interval, start_str, end_str, klines_type)
+    for window in gaps.missing:
+        klines = client.get_historical_klines(
+            symbol, interval, window[0], window[1] - 1, klines_type=klines_type, cache_dir=False
+        )
+        _store_window(store, symbol, interval, klines_type, window, klines)
+    return gaps
+
+
+async def repair_store_async(
+    client,
+    store: KlineStore,
+    symbol: str,
+    interval: str,
+    start_str,
+    end_str=None,
+    klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    concurrency: int = 4,
+) -> KlineGaps:
+    """Refetch the missing klines of a KlineStore with an AsyncClient, see repair_store
+
+    :param concurrency: number of requests in flight, the windows are split into page sized windows
+        which are fetched concurrently
+    :type concurrency: int
+
+    """
+    gaps = check_store(store, symbol, interval, start_str, end_str, klines_type)
+    semaphore = asyncio.Semaphore(concurrency)
+    page_ms = KLINES_PAGE_SIZE * _interval_ms(interval)
+
+    async def _repair(window: Tuple[int, int]):
+        async with semaphore:
+            # a single request through the weight budget of the client
+            klines = await client.get_historical_klines(
+                symbol,
+                interval,
+                window[0],
+                window[1] - 1,
+                klines_type=klines_type,
+                concurrency=1,
+                cache_dir=False,
+            )
+        _store_window(store, symbol, interval, klines_type, window, klines)
+
+    await asyncio.gather(
+        *(
+            _repair((page_start, min(page_start + page_ms, end)))
+            for start, end in gaps.missing
+            for page_start in range(start, end, page_ms)
+        )
+    )
+    return gaps
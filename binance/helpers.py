@@ -1,38 +1,122 @@
 import asyncio
 from decimal import Decimal
 import json
-from typing import Union, Optional, Dict
+import queue
+import re
+import threading
+import time
+from typing import Any, Iterable, Iterator, Union, Optional, Dict, Tuple
 
-import dateparser
-import pytz
-
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
 from binance.exceptions import UnknownDateFormat
 
+EPOCH = datetime.fromtimestamp(0, timezone.utc)
 
-def date_to_milliseconds(date_str: str) -> int:
-    """Convert UTC date to milliseconds
+# seconds a string parsed by dateparser is cached for, relative strings like "1 month ago" shift with time
+DATEPARSER_CACHE_TTL = 1.0
+DATEPARSER_CACHE_SIZE = 256
+_dateparser_cache: Dict[str, Tuple[int, float]] = {}
 
-    If using offset strings add "UTC" to date string e.g. "now UTC", "11 hours ago UTC"
+# absolute formats parsed without dateparser, a trailing "UTC" is dropped first
+DATE_FORMATS = (
+    "%d %b, %Y",
+    "%d %B, %Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%Y/%m/%d",
+    "%Y/%m/%d %H:%M:%S",
+)
 
-    See dateparse docs for formats http://dateparser.readthedocs.io/en/latest/
+_EPOCH_RE = re.compile(r"^(\d{10}|\d{13})$")
+_RELATIVE_RE = re.compile(
+    r"^(?:now|(\d+) (second|minute|hour|day|week)s? ago)(?: utc)?$", re.IGNORECASE
+)
+_UTC_SUFFIX_RE = re.compile(r"\s+utc$", re.IGNORECASE)
+_SECONDS_PER_UNIT = {
+    "second": 1,
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+}
+
+
+def datetime_to_milliseconds(d: datetime) -> int:
+    """Convert a datetime to milliseconds, a naive datetime is taken as UTC"""
+    if d.tzinfo is None or d.tzinfo.utcoffset(d) is None:
+        d = d.replace(tzinfo=timezone.utc)
+    return (d - EPOCH) // timedelta(milliseconds=1)
+
+
+def _parse_fast(date_str: str) -> Optional[int]:
+    # deterministic formats, None for strings only dateparser understands
+    date_str = date_str.strip()
+    if _EPOCH_RE.match(date_str):
+        ms = int(date_str)
+        return ms * 1000 if len(date_str) == 10 else ms
+    relative = _RELATIVE_RE.match(date_str)
+    if relative:
+        now = int(time.time() * 1000)
+        if relative.group(1) is None:
+            return now
+        return now - int(relative.group(1)) * _SECONDS_PER_UNIT[relative.group(2).lower()] * 1000
+    iso_str = date_str[:-1] + "+00:00" if date_str.endswith(("Z", "z")) else date_str
+    try:
+        return datetime_to_milliseconds(datetime.fromisoformat(iso_str))
+    except ValueError:
+        pass
+    date_str = _UTC_SUFFIX_RE.sub("", date_str)
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime_to_milliseconds(datetime.strptime(date_str, date_format))
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_dateparser(date_str: str) -> int:
+    # dateparser is slow to import, only load it for strings which need it
+    import dateparser
 
-    :param date_str: date in readable format, i.e. "January 01, 2018", "11 hours ago UTC", "now UTC"
-    """
-    # get epoch value in UTC
-    epoch: datetime = datetime.fromtimestamp(0, timezone.utc)
-    # parse our date string
     d: Optional[datetime] = dateparser.parse(date_str, settings={"TIMEZONE": "UTC"})
     if not d:
         raise UnknownDateFormat(date_str)
+    ms = datetime_to_milliseconds(d)
+    if len(_dateparser_cache) >= DATEPARSER_CACHE_SIZE:
+        _dateparser_cache.pop(next(iter(_dateparser_cache)))
+    _dateparser_cache[date_str] = (ms, time.monotonic())
+    return ms
 
-    # if the date is not timezone aware apply UTC timezone
-    if d.tzinfo is None or d.tzinfo.utcoffset(d) is None:
-        d = d.replace(tzinfo=pytz.utc)
 
-    # return the difference in time
-    return int((d - epoch).total_seconds() * 1000.0)
+def date_to_milliseconds(date_str: Union[str, datetime, date]) -> int:
+    """Convert UTC date to milliseconds
+
+    Timestamps in seconds or milliseconds, ISO 8601, dates like "1 Jan, 2020" and offsets like
+    "11 hours ago UTC" are parsed directly. Other strings are parsed with dateparser, loaded on first
+    use, and cached for DATEPARSER_CACHE_TTL seconds.
+
+    If using offset strings add "UTC" to date string e.g. "now UTC", "11 hours ago UTC"
+
+    See dateparse docs for formats http://dateparser.readthedocs.io/en/latest/
+
+    :param date_str: date in readable format, i.e. "January 01, 2018", "11 hours ago UTC", "now UTC",
+        or a datetime or date, naive ones are taken as UTC
+    """
+    if isinstance(date_str, datetime):
+        return datetime_to_milliseconds(date_str)
+    if isinstance(date_str, date):
+        return datetime_to_milliseconds(datetime(date_str.year, date_str.month, date_str.day))
+    # only strings which needed dateparser are cached
+    cached = _dateparser_cache.get(date_str)
+    if cached is not None and time.monotonic() - cached[1] < DATEPARSER_CACHE_TTL:
+        return cached[0]
+    ms = _parse_fast(date_str)
+    if ms is None:
+        ms = _parse_dateparser(date_str)
+    return ms
 
 
 def interval_to_milliseconds(interval: str) -> Optional[int]:
@@ -73,6 +157,53 @@ def round_step_size(
     return float(quantity - quantity % Decimal(str(step_size)))
 
 
+def _step_scale(step: str) -> Tuple[int, int]:
+    """Decimals and number of units of a tick or lot size, e.g. 0.50000000 is 1 decimal, 5 units"""
+    value = Decimal(step).normalize()
+    exponent = value.as_tuple().exponent
+    if not isinstance(exponent, int) or value <= 0:
+        raise ValueError(f"Invalid tick or lot size {step}")
+    decimals = max(0, -exponent)
+    return decimals, int(value.scaleb(decimals))
+
+
+def _to_units(value, decimals: int) -> int:
+    text = value if isinstance(value, str) else format(Decimal(str(value)), "f")
+    whole, _, fraction = text.partition(".")
+    if len(fraction) > decimals:
+        if fraction[decimals:].strip("0"):
+            raise ValueError(f"{value} has more than {decimals} decimals")
+        fraction = fraction[:decimals]
+    return int(whole + fraction.ljust(decimals, "0"))
+
+
+def _format_units(units: int, decimals: int) -> str:
+    if not decimals:
+        return str(units)
+    text = str(units).rjust(decimals + 1, "0")
+    return f"{text[:-decimals]}.{text[-decimals:]}"
+
+
+def symbol_filters(exchange_info: Dict) -> Dict[str, Tuple[str, str]]:
+    """Tick and lot sizes of the symbols from the exchange info
+
+    :param exchange_info: response of get_exchange_info or futures_exchange_info
+    :type exchange_info: dict
+
+    :return: dict of symbol to (tickSize, stepSize)
+
+    """
+    filters = {}
+    for symbol in exchange_info["symbols"]:
+        by_type = {f["filterType"]: f for f in symbol.get("filters", [])}
+        if "PRICE_FILTER" in by_type and "LOT_SIZE" in by_type:
+            filters[symbol["symbol"]] = (
+                by_type["PRICE_FILTER"]["tickSize"],
+                by_type["LOT_SIZE"]["stepSize"],
+            )
+    return filters
+
+
 def convert_ts_str(ts_str):
     if ts_str is None:
         return ts_str
@@ -81,6 +212,69 @@ def convert_ts_str(ts_str):
     return date_to_milliseconds(ts_str)
 
 
+_END = object()
+
+
+def read_ahead(iterable: Iterable, size: int) -> Iterator:
+    """Iterate over an iterable on a background thread, up to size items ahead of the consumer
+
+    The background thread blocks once size items are waiting, so a slow consumer holds back the
+    producer. An exception raised by the iterable is raised in the consumer. Closing the returned
+    generator stops the background thread after the item it is producing and closes the iterable.
+
+    .. code-block:: python
+
+        for page in read_ahead(pages, 3):
+            process(page)
+
+    :param iterable: items to produce on the background thread, e.g. a generator of pages
+    :param size: number of items buffered ahead of the consumer, at least 1
+    :type size: int
+
+    :return: generator of the items of the iterable
+
+    """
+    buffer: queue.Queue[Tuple[Any, Optional[BaseException]]] = queue.Queue(max(size, 1))
+    stop = threading.Event()
+
+    def _put(item, error=None) -> bool:
+        # wait for room in the buffer, False once the consumer is gone
+        while not stop.is_set():
+            try:
+                buffer.put((item, error), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not _put(item):
+                    return
+            _put(_END)
+        except BaseException as e:
+            _put(_END, e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=_produce, name="binance-read-ahead", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
 def convert_list_to_json_array(l):
     if l is None:
         return l
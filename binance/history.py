@@ -0,0 +1,365 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from binance.helpers import convert_ts_str
+from binance.ratelimit import MARKET_FUTURES, MARKET_FUTURES_COIN, MARKET_SPOT, AsyncWeightLimiter
+
+HISTORY_TRADES = "trades"
+HISTORY_ORDERS = "orders"
+HISTORY_INCOME = "income"
+
+DAY = 24 * 60 * 60 * 1000
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryEndpoint:
+    """Limits of an account history endpoint"""
+
+    def __init__(
+        self,
+        method: str,
+        window_ms: int,
+        limit: int,
+        weight: int,
+        key: Tuple[str, ...],
+        requires_symbol: bool = True,
+        id_param: Optional[str] = None,
+    ):
+        #: name of the client method
+        self.method = method
+        #: longest time range of a request
+        self.window_ms = window_ms
+        #: most rows returned by a request
+        self.limit = limit
+        #: request weight
+        self.weight = weight
+        #: fields identifying a row
+        self.key = key
+        #: whether requests need a symbol
+        self.requires_symbol = requires_symbol
+        #: parameter requesting the rows from an id on, the id is the last field of key
+        self.id_param = id_param
+
+
+HISTORY_ENDPOINTS = {
+    MARKET_SPOT: {
+        HISTORY_TRADES: HistoryEndpoint(
+            "get_my_trades", DAY, 1000, 20, ("symbol", "id"), id_param="fromId"
+        ),
+        HISTORY_ORDERS: HistoryEndpoint(
+            "get_all_orders", DAY, 1000, 20, ("symbol", "orderId"), id_param="orderId"
+        ),
+    },
+    MARKET_FUTURES: {
+        HISTORY_TRADES: HistoryEndpoint(
+            "futures_account_trades",
+            7 * DAY,
+            1000,
+            5,
+            ("symbol", "id"),
+            id_param="fromId",
+        ),
+        HISTORY_ORDERS: HistoryEndpoint(
+            "futures_get_all_orders",
+            7 * DAY,
+            1000,
+            5,
+            ("symbol", "orderId"),
+            id_param="orderId",
+        ),
+        HISTORY_INCOME: HistoryEndpoint(
+            "futures_income_history",
+            7 * DAY,
+            1000,
+            30,
+            ("symbol", "tranId", "incomeType"),
+            requires_symbol=False,
+        ),
+    },
+    MARKET_FUTURES_COIN: {
+        HISTORY_TRADES: HistoryEndpoint(
+            "futures_coin_account_trades",
+            7 * DAY,
+            1000,
+            20,
+            ("symbol", "id"),
+            id_param="fromId",
+        ),
+        HISTORY_ORDERS: HistoryEndpoint(
+            "futures_coin_get_all_orders",
+            7 * DAY,
+            100,
+            20,
+            ("symbol", "orderId"),
+            id_param="orderId",
+        ),
+        HISTORY_INCOME: HistoryEndpoint(
+            "futures_coin_income_history",
+            7 * DAY,
+            1000,
+            20,
+            ("symbol", "tranId", "incomeType"),
+            requires_symbol=False,
+        ),
+    },
+}
+
+
+def history_endpoint(kind: str, market: str = MARKET_FUTURES) -> HistoryEndpoint:
+    """Get the limits of an account history endpoint
+
+    :param kind: HISTORY_TRADES, HISTORY_ORDERS or HISTORY_INCOME
+    :type kind: str
+    :param market: one of MARKET_SPOT, MARKET_FUTURES or MARKET_FUTURES_COIN from binance.ratelimit
+    :type market: str
+
+    :return: HistoryEndpoint
+
+    """
+    if market not in HISTORY_ENDPOINTS:
+        raise ValueError(f"Unknown market {market!r}")
+    if kind not in HISTORY_ENDPOINTS[market]:
+        kinds = ", ".join(HISTORY_ENDPOINTS[market])
+        raise ValueError(f"Unknown history {kind!r} for {market}, must be one of {kinds}")
+    return HISTORY_ENDPOINTS[market][kind]
+
+
+def history_windows(start_ts: int, end_ts: int, window_ms: int) -> List[Tuple[int, int]]:
+    """Split a time range into windows no longer than window_ms
+
+    :return: list of (start, end) both inclusive
+
+    """
+    return [
+        (window_start, min(window_start + window_ms - 1, end_ts))
+        for window_start in range(start_ts, end_ts + 1, window_ms)
+    ]
+
+
+def _range(start_str, end_str) -> Tuple[int, int]:
+    start_ts = convert_ts_str(start_str)
+    if start_ts is None:
+        raise ValueError("start_str is required")
+    end_ts = convert_ts_str(end_str)
+    if end_ts is None:
+        end_ts = int(time.time() * 1000)
+    return start_ts, end_ts
+
+
+def _symbols(spec: HistoryEndpoint, symbols: Optional[Sequence[str]]) -> List[Optional[str]]:
+    if symbols:
+        return list(symbols)
+    if spec.requires_symbol:
+        raise ValueError(f"{spec.method} requires symbols")
+    return [None]
+
+
+class _WindowPages:
+    """Page through a window of an account history endpoint for a symbol"""
+
+    def __init__(
+        self,
+        spec: HistoryEndpoint,
+        symbol: Optional[str],
+        window: Tuple[int, int],
+        params: Dict,
+    ):
+        self._spec = spec
+        self._window_end = window[1]
+        self._request_params: Dict = dict(params, limit=spec.limit)
+        if symbol is not None:
+            self._request_params["symbol"] = symbol
+        # timestamp of the rows paged through by id, when a page was all that timestamp
+        self._same_time: Optional[int] = None
+        #: parameters of the next request, None once the window is complete
+        self.params: Optional[Dict] = self._time_params(window[0])
+
+    def _time_params(self, start_ts: int) -> Optional[Dict]:
+        if start_ts > self._window_end:
+            return None
+        return dict(self._request_params, startTime=start_ts, endTime=self._window_end)
+
+    def _id_params(self, rows: List[Dict]) -> Dict:
+        assert self._spec.id_param is not None
+        return dict(self._request_params, **{self._spec.id_param: rows[-1][self._spec.key[-1]] + 1})
+
+    def add(self, page: List[Dict]) -> List[Dict]:
+        """Move on to the page after the one received
+
+        :return: the rows of the page within the window
+
+        """
+        spec = self._spec
+        if self._same_time is not None:
+            # requests by id aren't limited to the window, keep the rows of the timestamp and carry on
+            # by time after it once a page goes past it
+            rows = [row for row in page if row["time"] == self._same_time]
+            if len(page) == spec.limit and len(rows) == len(page):
+                self.params = self._id_params(page)
+            else:
+                self.params = self._time_params(self._same_time + 1)
+                self._same_time = None
+            return rows
+        assert self.params is not None
+        if len(page) < spec.limit:
+            self.params = None
+            return page
+        last_time = page[-1]["time"]
+        if last_time > self.params["startTime"]:
+            # rows sharing the last timestamp may continue on the next page, they are deduplicated
+            self.params = self._time_params(last_time)
+        elif spec.id_param is not None:
+            # a page that is all one timestamp can't be split by time, page through it by id
+            self._same_time = last_time
+            self.params = self._id_params(page)
+        else:
+            logger.warning(
+                "%s returned %d rows at %d, more rows at that time may be missing",
+                spec.method,
+                len(page),
+                last_time,
+            )
+            self.params = self._time_params(last_time + 1)
+        return page
+
+
+def merge_history(rows: List[Dict], key: Sequence[str]) -> List[Dict]:
+    """Sort rows by time and drop duplicates of the same key, keeping the first
+
+    :param rows: rows of an account history endpoint
+    :type rows: list
+    :param key: fields identifying a row, e.g. HistoryEndpoint.key
+    :type key: tuple
+
+    """
+    seen = set()
+    merged = []
+    for row in sorted(rows, key=lambda row: row["time"]):
+        row_key = tuple(row.get(name) for name in key)
+        if row_key in seen:
+            continue
+        seen.add(row_key)
+        merged.append(row)
+    return merged
+
+
+def account_history(
+    client,
+    kind: str,
+    start_str,
+    end_str=None,
+    symbols: Optional[Sequence[str]] = None,
+    market: str = MARKET_FUTURES,
+    **params,
+):
+    """Iterate over the account history of a time range in time order
+
+    The range is split into windows no longer than the endpoint allows, 1 day for spot and 7 days for
+    futures, and each window is paged through for each symbol. Rows are yielded once each, in time
+    order. The exchange only keeps a limited history, e.g. 3 months of futures orders.
+
+    .. code-block:: python
+
+        trades = account_history(client, HISTORY_TRADES, "1 Jan, 2024", "1 Feb, 2024", ["BTCUSDT"])
+        for trade in trades:
+            print(trade)
+
+    :param client: Client instance
+    :param kind: HISTORY_TRADES, HISTORY_ORDERS or HISTORY_INCOME (futures only)
+    :type kind: str
+    :param start_str: Start date string in UTC format or timestamp in milliseconds
+    :type start_str: str|int
+    :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+    :type end_str: str|int
+    :param symbols: symbols to get the history of, optional for the income history which defaults to
+        all symbols
+    :type symbols: list
+    :param market: one of MARKET_SPOT, MARKET_FUTURES (default) or MARKET_FUTURES_COIN from binance.ratelimit
+    :type market: str
+    :param params: other parameters of the endpoint, e.g. incomeType
+
+    :return: generator of rows in the format of the endpoint
+
+    """
+    spec = history_endpoint(kind, market)
+    endpoint = getattr(client, spec.method)
+    symbol_list = _symbols(spec, symbols)
+    start_ts, end_ts = _range(start_str, end_str)
+    for window_start, window_end in history_windows(start_ts, end_ts, spec.window_ms):
+        rows: List[Dict] = []
+        for symbol in symbol_list:
+            pages = _WindowPages(spec, symbol, (window_start, window_end), params)
+            while pages.params is not None:
+                rows.extend(pages.add(endpoint(**pages.params)))
+        yield from merge_history(rows, spec.key)
+
+
+async def account_history_async(
+    client,
+    kind: str,
+    start_str,
+    end_str=None,
+    symbols: Optional[Sequence[str]] = None,
+    market: str = MARKET_FUTURES,
+    concurrency: int = 8,
+    weight_limiter: Optional[AsyncWeightLimiter] = None,
+    **params,
+):
+    """Iterate over the account history of a time range with an AsyncClient, see account_history
+
+    The windows of all symbols are fetched concurrently, up to concurrency requests at a time within
+    the weight budget of the market. Windows are fetched ahead of the one being consumed and rows are
+    still yielded once each, in time order.
+
+    .. code-block:: python
+
+        income = account_history_async(client, HISTORY_INCOME, "1 Jan, 2024", concurrency=16)
+        async for row in income:
+            print(row)
+
+    :param concurrency: number of requests in flight at a time
+    :type concurrency: int
+    :param weight_limiter: optional - request weight budget, defaults to the budget of the market
+    :type weight_limiter: AsyncWeightLimiter
+
+    :returns: an async iterator of rows in the format of the endpoint
+
+    """
+    spec = history_endpoint(kind, market)
+    endpoint = getattr(client, spec.method)
+    symbol_list = _symbols(spec, symbols)
+    start_ts, end_ts = _range(start_str, end_str)
+    weight_limiter = weight_limiter or client.get_weight_limiter(market)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _fetch(symbol: Optional[str], window: Tuple[int, int]) -> List[Dict]:
+        rows: List[Dict] = []
+        pages = _WindowPages(spec, symbol, window, params)
+        while pages.params is not None:
+            async with semaphore:
+                await weight_limiter.acquire(spec.weight)
+                page = await endpoint(**pages.params)
+            rows.extend(pages.add(page))
+        return rows
+
+    async def _fetch_window(window: Tuple[int, int]) -> List[Dict]:
+        pages = await asyncio.gather(*(_fetch(symbol, window) for symbol in symbol_list))
+        return merge_history([row for page in pages for row in page], spec.key)
+
+    windows = history_windows(start_ts, end_ts, spec.window_ms)
+    pending: Deque[asyncio.Future] = deque()
+    try:
+        for i in range(len(windows)):
+            # keep windows ahead in flight, the semaphore bounds the requests
+            while len(pending) < concurrency and i + len(pending) < len(windows):
+                window = windows[i + len(pending)]
+                pending.append(asyncio.ensure_future(_fetch_window(window)))
+            for row in await pending.popleft():
+                yield row
+    finally:
+        for task in pending:
+            task.cancel()
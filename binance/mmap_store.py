@@ -0,0 +1,428 @@
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from binance.columnar import KLINE_FIELDS, OUTPUT_NUMPY, _require_numpy
+from binance.enums import HistoricalKlinesType
+from binance.helpers import convert_ts_str, interval_to_milliseconds
+
+if TYPE_CHECKING:
+    import numpy
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# 2017-01-02 00:00:00 UTC, a Monday before the first Binance kline
+DEFAULT_ORIGIN = 1483315200000
+
+# number of rows the column files grow by at a time
+GROW_ROWS = 4096
+
+# kline websocket message keys in the order of KLINE_FIELDS
+KLINE_EVENT_KEYS = ("t", "o", "h", "l", "c", "v", "T", "q", "n", "V", "Q")
+
+
+class MmapKlineSeries:
+    """Klines of one symbol, interval and klines type kept in memory-mapped column files
+
+    Each field of KLINE_FIELDS is a file of fixed width values, the kline opening at open_time is
+    stored at row ``(open_time - origin) // interval_ms``. Rows which haven't been written have an
+    open time of 0.
+
+    A series has a single writer, any number of processes may map it read-only at the same time.
+
+    """
+
+    META_FILENAME = "meta.json"
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        interval: str,
+        origin: int = DEFAULT_ORIGIN,
+        readonly: bool = False,
+    ):
+        """Initialise the MmapKlineSeries, creating the files if they don't exist
+
+        :param path: directory of the column files
+        :type path: str|Path
+        :param interval: kline interval
+        :type interval: str
+        :param origin: open time of row 0, only used when the series is created
+        :type origin: int
+        :param readonly: map the files read-only, the series must already exist
+        :type readonly: bool
+
+        """
+        _require_numpy()
+        interval_ms = interval_to_milliseconds(interval)
+        if interval_ms is None or interval.endswith("M"):
+            raise ValueError(f"Interval {interval!r} doesn't have a fixed length")
+        self.path = Path(path)
+        self.interval = interval
+        self.interval_ms = interval_ms
+        self.readonly = readonly
+        meta_path = self.path / self.META_FILENAME
+        if meta_path.exists():
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            self.origin = meta["origin"]
+        elif readonly:
+            raise FileNotFoundError(f"No kline series in {self.path}")
+        else:
+            # align the origin to the kline grid of the exchange, weekly klines open on Mondays
+            anchor = DEFAULT_ORIGIN if interval.endswith("w") else 0
+            offset = (origin - anchor) % interval_ms
+            self.origin = origin - offset
+            self.path.mkdir(parents=True, exist_ok=True)
+            for name, dtype in KLINE_FIELDS:
+                (self.path / f"{name}.{dtype}").touch()
+            tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(
+                    {
+                        "origin": self.origin,
+                        "interval": interval,
+                        "interval_ms": interval_ms,
+                        "fields": KLINE_FIELDS,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, meta_path)
+        self._columns: Dict[str, Any] = {}
+        self._rows = 0
+        self.refresh()
+
+    def __len__(self):
+        return self._rows
+
+    def _column_path(self, name: str, dtype: str) -> Path:
+        return self.path / f"{name}.{dtype}"
+
+    def refresh(self):
+        """Map the column files again if another process has grown them
+
+        :return: True if the files were remapped
+
+        """
+        # the writer may be growing the files, only the rows all the columns have are mapped
+        rows = min(os.path.getsize(self._column_path(*field)) for field in KLINE_FIELDS) // 8
+        if rows == self._rows and self._columns:
+            return False
+        mode = "r" if self.readonly else "r+"
+        self._rows = rows
+        self._columns = {}
+        for name, dtype in KLINE_FIELDS:
+            if rows:
+                self._columns[name] = np.memmap(
+                    self._column_path(name, dtype), dtype=dtype, mode=mode, shape=(rows,)
+                )
+            else:
+                self._columns[name] = np.zeros(0, dtype=dtype)
+        return True
+
+    def _grow(self, rows: int):
+        # extending with truncate leaves sparse files on most filesystems, unwritten rows use no disk
+        rows = -(-rows // GROW_ROWS) * GROW_ROWS
+        # open_time is grown last, its new rows read as not written until then
+        for name, dtype in reversed(KLINE_FIELDS):
+            column = self._columns.pop(name, None)
+            if isinstance(column, np.memmap):
+                column.flush()
+            with open(self._column_path(name, dtype), "r+b") as f:
+                f.truncate(rows * 8)
+        self._rows = 0
+        self.refresh()
+
+    def row(self, open_time: int) -> int:
+        """Get the row index of the kline opening at open_time"""
+        return (open_time - self.origin) // self.interval_ms
+
+    def open_time(self, row: int) -> int:
+        """Get the open time of the kline stored at row"""
+        return self.origin + row * self.interval_ms
+
+    def write(self, columns):
+        """Write klines given as columns, replacing any stored with the same open time
+
+        :param columns: dict of field name to array, like the output of get_historical_klines
+            with output="columns", or a numpy structured array with output="numpy"
+
+        """
+        if self.readonly:
+            raise ValueError("Can't write to a read-only kline series")
+        open_times = np.asarray(columns["open_time"], dtype="i8")
+        if not len(open_times):
+            return
+        rows = (open_times - self.origin) // self.interval_ms
+        if rows.min() < 0:
+            raise ValueError(
+                f"Kline open time {int(open_times.min())} is before the origin {self.origin} of {self.path}"
+            )
+        required = int(rows.max()) + 1
+        if required > self._rows:
+            self._grow(required)
+        # the open time is written last so a reader never sees a row that is only partly written
+        for name, dtype in KLINE_FIELDS[1:]:
+            self._columns[name][rows] = np.asarray(columns[name], dtype=dtype)
+        self._columns["open_time"][rows] = open_times
+
+    def write_klines(self, klines: List[List]):
+        """Write klines in the format returned by get_klines"""
+        if not klines:
+            return
+        values = list(zip(*klines))
+        self.write({name: values[i] for i, (name, _) in enumerate(KLINE_FIELDS)})
+
+    def flush(self):
+        """Flush written rows to disk"""
+        for column in self._columns.values():
+            if isinstance(column, np.memmap):
+                column.flush()
+
+    def get(
+        self, start_ts: Optional[int] = None, end_ts: Optional[int] = None
+    ) -> Dict[str, "numpy.ndarray"]:
+        """Get the rows with an open time between start_ts and end_ts, both inclusive
+
+        The arrays are views of the mapped files, nothing is copied. Rows which haven't been
+        written have an open time of 0.
+
+        :return: dict of field name to numpy.ndarray
+
+        """
+        start = 0 if start_ts is None else max(-(-(start_ts - self.origin) // self.interval_ms), 0)
+        stop = self._rows if end_ts is None else min(self.row(end_ts) + 1, self._rows)
+        stop = max(start, stop)
+        return {name: column[start:stop] for name, column in self._columns.items()}
+
+    def last_open_time(self) -> Optional[int]:
+        """Get the open time of the last written kline
+
+        :return: timestamp in milliseconds or None if the series is empty
+
+        """
+        open_times = self._columns["open_time"]
+        # the files grow by GROW_ROWS at a time so the last kline is almost always in the last block
+        tail = max(self._rows - GROW_ROWS, 0)
+        written = np.flatnonzero(open_times[tail:])
+        if not len(written):
+            written = np.flatnonzero(open_times[:tail])
+            tail = 0
+        if not len(written):
+            return None
+        return int(open_times[tail + written[-1]])
+
+    def missing_rows(self, start_ts: int, end_ts: int) -> "numpy.ndarray":
+        """Get the open times between start_ts and end_ts, both inclusive, which haven't been written"""
+        start = max(-(-(start_ts - self.origin) // self.interval_ms), 0)
+        stop = self.row(end_ts) + 1
+        rows = np.arange(start, max(start, stop))
+        stored = rows < self._rows
+        written = np.zeros(len(rows), dtype=bool)
+        written[stored] = self._columns["open_time"][rows[stored]] != 0
+        return self.origin + rows[~written] * self.interval_ms
+
+
+class MmapKlineStore:
+    """Memory-mapped store of klines for many symbols with O(1) lookup by open time
+
+    Each symbol, interval and klines type is a MmapKlineSeries in its own directory. The store
+    is filled from get_historical_klines and kline_socket messages by one process, others can
+    open it with ``readonly=True`` and read the klines straight from the page cache.
+
+    .. code-block:: python
+
+        store = MmapKlineStore("/data/klines")
+        store.fetch(client, "BTCUSDT", Client.KLINE_INTERVAL_1MINUTE, "1 Jan, 2024")
+
+        # in the kline_socket handler
+        store.add_kline_event(msg)
+
+        # in other processes
+        store = MmapKlineStore("/data/klines", readonly=True)
+        closes = store.get("BTCUSDT", "1m", start_ts)["close"]
+
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        readonly: bool = False,
+        origin: int = DEFAULT_ORIGIN,
+    ):
+        """Initialise the MmapKlineStore
+
+        :param directory: root directory of the store, created if it doesn't exist
+        :type directory: str|Path
+        :param readonly: map the files read-only
+        :type readonly: bool
+        :param origin: optional - earliest open time new series can hold, default 2017-01-02
+        :type origin: int
+
+        """
+        self.directory = Path(directory).expanduser()
+        if not readonly:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.readonly = readonly
+        self.origin = origin
+        self._series: Dict[Tuple[str, str, str], MmapKlineSeries] = {}
+
+    def series(
+        self,
+        symbol: str,
+        interval: str,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ) -> MmapKlineSeries:
+        """Get the series of a symbol and interval, creating it if the store is writable"""
+        key = (klines_type.name, symbol.upper(), interval)
+        series = self._series.get(key)
+        if series is None:
+            series = MmapKlineSeries(
+                self.directory / key[0].lower() / interval / key[1],
+                interval,
+                origin=self.origin,
+                readonly=self.readonly,
+            )
+            self._series[key] = series
+        return series
+
+    def refresh(self):
+        """Remap the open series which have been grown by the writer"""
+        for series in self._series.values():
+            series.refresh()
+
+    def flush(self):
+        """Flush written rows of all open series to disk"""
+        for series in self._series.values():
+            series.flush()
+
+    def get(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ) -> Dict[str, "numpy.ndarray"]:
+        """Get the klines of a series with an open time between start_ts and end_ts, both inclusive
+
+        In a read-only store the series is remapped first if the writer has grown it.
+
+        :return: dict of field name to numpy.ndarray, views of the mapped files
+
+        """
+        series = self.series(symbol, interval, klines_type)
+        if self.readonly:
+            series.refresh()
+        return series.get(start_ts, end_ts)
+
+    def add_klines(
+        self,
+        symbol: str,
+        interval: str,
+        klines: List[List],
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ):
+        """Store klines in the format returned by get_klines"""
+        self.series(symbol, interval, klines_type).write_klines(klines)
+
+    def add_kline_event(
+        self, msg: Dict, klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT
+    ) -> bool:
+        """Store the kline of a kline_socket message
+
+        The kline is stored while it's still open and overwritten by each update until it closes.
+        Messages of a multiplex socket are unwrapped.
+
+        :param msg: message received from kline_socket or a multiplex socket of kline streams
+        :type msg: dict
+        :param klines_type: Historical klines type of the socket, e.g. FUTURES for a futures kline socket
+        :type klines_type: HistoricalKlinesType
+
+        :return: True if the message was a kline event
+
+        """
+        msg = msg.get("data", msg)
+        if msg.get("e") != "kline":
+            return False
+        kline = msg["k"]
+        self.series(kline["s"], kline["i"], klines_type).write_klines(
+            [[kline[key] for key in KLINE_EVENT_KEYS]]
+        )
+        return True
+
+    def _fetch_range(self, series: MmapKlineSeries, start_str, end_str) -> Tuple[int, Optional[int]]:
+        start_ts = convert_ts_str(start_str)
+        last_open_time = series.last_open_time()
+        if last_open_time is not None and (start_ts is None or start_ts <= last_open_time):
+            # the last stored kline may have been written by the socket before it closed
+            start_ts = last_open_time
+        elif start_ts is None:
+            start_ts = series.origin
+        return start_ts, convert_ts_str(end_str)
+
+    def fetch(
+        self,
+        client,
+        symbol: str,
+        interval: str,
+        start_str=None,
+        end_str=None,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ) -> int:
+        """Fetch klines with get_historical_klines and store them
+
+        Fetching resumes from the last stored kline, so calling it again only requests new klines.
+
+        :param client: Client instance
+        :param start_str: optional - start date string in UTC format or timestamp in milliseconds,
+            default the origin of the series
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+
+        :return: number of klines fetched
+
+        """
+        series = self.series(symbol, interval, klines_type)
+        start_ts, end_ts = self._fetch_range(series, start_str, end_str)
+        klines = client.get_historical_klines(
+            symbol, interval, start_ts, end_ts, klines_type=klines_type, output=OUTPUT_NUMPY
+        )
+        series.write(klines)
+        return len(klines)
+
+    async def fetch_async(
+        self,
+        client,
+        symbol: str,
+        interval: str,
+        start_str=None,
+        end_str=None,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+        concurrency: Optional[int] = None,
+    ) -> int:
+        """Fetch klines with AsyncClient.get_historical_klines and store them
+
+        :param client: AsyncClient instance
+        :param concurrency: optional - number of windows fetched at the same time
+
+        :return: number of klines fetched
+
+        """
+        series = self.series(symbol, interval, klines_type)
+        start_ts, end_ts = self._fetch_range(series, start_str, end_str)
+        klines = await client.get_historical_klines(
+            symbol,
+            interval,
+            start_ts,
+            end_ts,
+            klines_type=klines_type,
+            concurrency=concurrency,
+            output=OUTPUT_NUMPY,
+        )
+        series.write(klines)
+        return len(klines)
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from binance.enums import HistoricalKlinesType
+
+# request weight allowed per minute for each REST api family
+SPOT_WEIGHT_PER_MINUTE = 6000
+FUTURES_WEIGHT_PER_MINUTE = 2400
+FUTURES_COIN_WEIGHT_PER_MINUTE = 2400
+
+MARKET_SPOT = "spot"
+MARKET_FUTURES = "futures"
+MARKET_FUTURES_COIN = "futures_coin"
+
+MARKET_WEIGHT_PER_MINUTE = {
+    MARKET_SPOT: SPOT_WEIGHT_PER_MINUTE,
+    MARKET_FUTURES: FUTURES_WEIGHT_PER_MINUTE,
+    MARKET_FUTURES_COIN: FUTURES_COIN_WEIGHT_PER_MINUTE,
+}
+
+
+# the futures/data statistics have their own limit of requests per IP, independent of the weight
+FUTURES_DATA_REQUESTS_PER_WINDOW = 1000
+FUTURES_DATA_WINDOW = 5 * 60
+
+# the funding rate history has its own limit of requests per IP
+FUNDING_RATE_REQUESTS_PER_WINDOW = 500
+FUNDING_RATE_WINDOW = 5 * 60
+
+
+def klines_market(klines_type: HistoricalKlinesType) -> str:
+    """Get the REST api family serving a historical klines type
+
+    :param klines_type: Historical klines type
+    :type klines_type: HistoricalKlinesType
+
+    :return: one of MARKET_SPOT, MARKET_FUTURES or MARKET_FUTURES_COIN
+
+    """
+    if klines_type == HistoricalKlinesType.SPOT:
+        return MARKET_SPOT
+    if klines_type in (
+        HistoricalKlinesType.FUTURES_COIN,
+        HistoricalKlinesType.FUTURES_COIN_MARK_PRICE,
+        HistoricalKlinesType.FUTURES_COIN_INDEX_PRICE,
+    ):
+        return MARKET_FUTURES_COIN
+    return MARKET_FUTURES
+
+
+def klines_request_weight(
+    klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT, limit: int = 1000
+) -> int:
+    """Get the request weight of a single klines call
+
+    Spot klines have a flat weight, futures klines are weighted by the limit parameter.
+
+    :param klines_type: Historical klines type
+    :type klines_type: HistoricalKlinesType
+    :param limit: limit parameter of the request
+    :type limit: int
+
+    :return: request weight
+
+    """
+    if klines_market(klines_type) == MARKET_SPOT:
+        return 2
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+# weight of a single aggTrades request, flat for any limit
+AGG_TRADES_REQUEST_WEIGHT = {
+    MARKET_SPOT: 2,
+    MARKET_FUTURES: 20,
+    MARKET_FUTURES_COIN: 20,
+}
+
+
+def agg_trades_request_weight(market: str = MARKET_SPOT) -> int:
+    """Get the request weight of a single aggTrades call
+
+    :param market: one of MARKET_SPOT, MARKET_FUTURES or MARKET_FUTURES_COIN
+    :type market: str
+
+    :return: request weight
+
+    """
+    return AGG_TRADES_REQUEST_WEIGHT[market]
+
+
+# weight of a single historicalTrades request, flat for any limit
+HISTORICAL_TRADES_REQUEST_WEIGHT = {
+    MARKET_SPOT: 25,
+    MARKET_FUTURES: 20,
+    MARKET_FUTURES_COIN: 20,
+}
+
+
+def historical_trades_request_weight(market: str = MARKET_SPOT) -> int:
+    """Get the request weight of a single historicalTrades call
+
+    :param market: one of MARKET_SPOT, MARKET_FUTURES or MARKET_FUTURES_COIN
+    :type market: str
+
+    :return: request weight
+
+    """
+    return HISTORICAL_TRADES_REQUEST_WEIGHT[market]
+
+
+class AsyncWeightLimiter:
+    """Request weight budget shared by concurrent coroutines
+
+    Keeps a sliding window of the weight spent and makes callers wait until the budget
+    has room for their request.
+
+    .. code-block:: python
+
+        limiter = AsyncWeightLimiter(weight_per_minute=1200)
+
+        await limiter.acquire(5)
+        res = await client.futures_klines(symbol="BTCUSDT", interval="1m", limit=1000)
+
+    """
+
+    def __init__(self, weight_per_minute: int = SPOT_WEIGHT_PER_MINUTE, window: float = 60):
+        """Initialise the AsyncWeightLimiter
+
+        :param weight_per_minute: Maximum weight to spend in each window
+        :type weight_per_minute: int
+        :param window: Length of the window in seconds, default 60
+        :type window: float
+
+        """
+        self.weight_per_minute = weight_per_minute
+        self._window = window
+        self._spent: Deque[Tuple[float, int]] = deque()
+        self._used = 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def used_weight(self) -> int:
+        """Weight spent in the current window"""
+        self._expire(time.monotonic())
+        return self._used
+
+    def _expire(self, now: float):
+        while self._spent and self._spent[0][0] + self._window <= now:
+            self._used -= self._spent.popleft()[1]
+
+    async def acquire(self, weight: int = 1):
+        """Wait until the budget has room for a request of the given weight and spend it
+
+        :param weight: Weight of the request about to be sent
+        :type weight: int
+
+        """
+        # create the lock lazily so the limiter can be built outside the event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                # always let a request through on an empty window, even if it's above the budget
+                if not self._spent or self._used + weight <= self.weight_per_minute:
+                    break
+                await asyncio.sleep(self._spent[0][0] + self._window - now)
+            self._spent.append((now, weight))
+            self._used += weight
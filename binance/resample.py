@@ -0,0 +1,291 @@
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+
+from binance.columnar import (
+    KLINE_FIELDS,
+    OUTPUT_COLUMNS,
+    OUTPUT_NUMPY,
+    KlineArrayBuilder,
+    _require_numpy,
+    kline_dtype,
+)
+from binance.helpers import interval_to_milliseconds
+from binance.mmap_store import KLINE_EVENT_KEYS
+
+if TYPE_CHECKING:
+    import numpy
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# fields summed over the klines of a bar
+SUM_FIELDS = (
+    "volume",
+    "quote_volume",
+    "trades",
+    "taker_buy_base_volume",
+    "taker_buy_quote_volume",
+)
+
+
+def _to_ms(value: Union[str, int]) -> int:
+    if isinstance(value, str):
+        ms = interval_to_milliseconds(value)
+        if ms is None or value.endswith("M"):
+            raise ValueError(f"Interval {value!r} doesn't have a fixed length")
+        return ms
+    return int(value)
+
+
+def _check_alignment(interval_ms: int, offset: int, base_ms: int):
+    # a bar made of whole klines starts and ends on the boundaries of the klines
+    if base_ms <= 0 or interval_ms % base_ms or offset % base_ms:
+        raise ValueError(
+            f"Bars of {interval_ms}ms with offset {offset}ms are not aligned to klines of {base_ms}ms"
+        )
+
+
+def _kline_interval(array: "numpy.ndarray", base_interval: Optional[Union[str, int]]) -> int:
+    if base_interval is not None:
+        return _to_ms(base_interval)
+    # the length of the first kline, the close time is the last millisecond of a kline
+    return int(array["close_time"][0] - array["open_time"][0] + 1)
+
+
+def as_kline_array(klines) -> "numpy.ndarray":
+    """Convert klines to a numpy structured array sorted by open time
+
+    :param klines: list of klines in the format returned by get_klines, a structured array from
+        output="numpy", a dict of columns from output="columns" or from MmapKlineStore.get
+        where rows which haven't been written are dropped
+
+    :return: numpy.ndarray with the kline_dtype fields
+
+    """
+    _require_numpy()
+    if isinstance(klines, np.ndarray):
+        array = klines
+    elif isinstance(klines, dict):
+        array = np.empty(len(klines["open_time"]), dtype=kline_dtype())
+        for name, _ in KLINE_FIELDS:
+            array[name] = klines[name]
+    else:
+        builder = KlineArrayBuilder(len(klines))
+        builder.extend(klines)
+        array = builder.to_array()
+    # rows of a memory-mapped store which haven't been written have an open time of 0
+    array = array[array["open_time"] != 0]
+    if len(array) > 1 and np.any(np.diff(array["open_time"]) <= 0):
+        array = np.sort(array, order="open_time")
+        keep = np.ones(len(array), dtype=bool)
+        # keep the last of klines with the same open time, e.g. updates of an open kline
+        keep[:-1] = array["open_time"][1:] != array["open_time"][:-1]
+        array = array[keep]
+    return array
+
+
+def _last_closed(array: "numpy.ndarray") -> bool:
+    # the last kline from REST is still open until its close time has passed
+    return int(array["close_time"][-1]) < time.time() * 1000
+
+
+def _aggregate(array: "numpy.ndarray", interval_ms: int, offset: int, last_closed: bool = True):
+    # klines are sorted, each bar is a run of klines with the same bucket
+    buckets = (array["open_time"] - offset) // interval_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(array)] - 1
+    bars = np.empty(len(starts), dtype=array.dtype)
+    bars["open_time"] = buckets[starts] * interval_ms + offset
+    bars["close_time"] = bars["open_time"] + interval_ms - 1
+    bars["open"] = array["open"][starts]
+    bars["close"] = array["close"][ends]
+    bars["high"] = np.maximum.reduceat(array["high"], starts)
+    bars["low"] = np.minimum.reduceat(array["low"], starts)
+    for name in SUM_FIELDS:
+        bars[name] = np.add.reduceat(array[name], starts)
+    # a bar is complete once its last kline closes at the close of the bar, open klines already
+    # have the close time they will close at
+    complete = array["close_time"][ends] >= bars["close_time"]
+    if not last_closed:
+        complete[-1] = False
+    return bars, complete, starts
+
+
+def _result(bars: "numpy.ndarray", output: str):
+    if output == OUTPUT_COLUMNS:
+        return {name: np.ascontiguousarray(bars[name]) for name, _ in KLINE_FIELDS}
+    if output == OUTPUT_NUMPY:
+        return bars
+    raise ValueError(f"Unknown output {output!r}, must be {OUTPUT_NUMPY} or {OUTPUT_COLUMNS}")
+
+
+def resample_klines(
+    klines,
+    interval: Union[str, int],
+    offset: Union[str, int] = 0,
+    include_partial: bool = True,
+    output: str = OUTPUT_NUMPY,
+    base_interval: Optional[Union[str, int]] = None,
+):
+    """Aggregate klines into bars of a longer or custom aligned interval
+
+    Open is the first open, close the last close, high and low the extremes and the volumes and
+    trade counts are summed. Bars start at ``offset + n * interval`` milliseconds after the epoch,
+    the interval and offset have to be multiples of the interval of the klines.
+
+    .. code-block:: python
+
+        klines = client.get_historical_klines("BTCUSDT", "1m", "1 day ago UTC", output="numpy")
+        bars = resample_klines(klines, "45m")
+        # 4h bars starting at 01:30 UTC
+        session_bars = resample_klines(klines, "4h", offset="90m")
+
+    :param klines: klines of a shorter interval, see as_kline_array for the accepted formats
+    :param interval: interval of the bars, an interval string like "45m" or milliseconds
+    :type interval: str|int
+    :param offset: optional - alignment of the bars, an interval string or milliseconds, default 0
+    :type offset: str|int
+    :param include_partial: include the last bar if its klines don't cover it yet, default True
+    :type include_partial: bool
+    :param output: OUTPUT_NUMPY (default) for a structured array or OUTPUT_COLUMNS for a dict of arrays
+    :type output: str
+    :param base_interval: optional - interval of the klines, by default the length of the first kline
+    :type base_interval: str|int
+
+    :raises ValueError: if the bars are not aligned to the klines
+
+    :return: bars with the fields of kline_dtype, close_time is the end of the bar even for a partial bar
+
+    """
+    array = as_kline_array(klines)
+    interval_ms = _to_ms(interval)
+    offset_ms = _to_ms(offset)
+    if base_interval is not None:
+        _check_alignment(interval_ms, offset_ms, _to_ms(base_interval))
+    if not len(array):
+        return _result(np.empty(0, dtype=kline_dtype()), output)
+    _check_alignment(interval_ms, offset_ms, _kline_interval(array, base_interval))
+    bars, complete, _ = _aggregate(array, interval_ms, offset_ms, _last_closed(array))
+    if not include_partial and not complete[-1]:
+        bars = bars[:-1]
+    return _result(bars, output)
+
+
+class KlineResampler:
+    """Resample klines incrementally as new klines arrive
+
+    Completed bars are kept, only the klines of the last bar which hasn't completed yet are aggregated
+    again on each update. Updates of a kline that is still open replace the earlier version.
+
+    .. code-block:: python
+
+        resampler = KlineResampler("45m")
+        resampler.update(client.get_historical_klines("BTCUSDT", "1m", "1 day ago UTC"))
+
+        # in the kline_socket handler
+        resampler.update_event(msg)
+        bars = resampler.bars()
+
+    """
+
+    def __init__(
+        self,
+        interval: Union[str, int],
+        offset: Union[str, int] = 0,
+        base_interval: Optional[Union[str, int]] = None,
+    ):
+        """Initialise the KlineResampler
+
+        :param interval: interval of the bars, an interval string like "45m" or milliseconds
+        :type interval: str|int
+        :param offset: optional - alignment of the bars, an interval string or milliseconds, default 0
+        :type offset: str|int
+        :param base_interval: optional - interval of the klines, by default the length of the first
+            kline added
+        :type base_interval: str|int
+
+        :raises ValueError: if the bars are not aligned to the klines
+
+        """
+        _require_numpy()
+        self.interval_ms = _to_ms(interval)
+        self.offset = _to_ms(offset)
+        #: interval of the klines, set by the first update if it wasn't passed
+        self.base_interval_ms: Optional[int] = None
+        if base_interval is not None:
+            self.base_interval_ms = _to_ms(base_interval)
+            _check_alignment(self.interval_ms, self.offset, self.base_interval_ms)
+        self._complete = KlineArrayBuilder()
+        self._complete_until: Optional[int] = None
+        # klines of the bar which hasn't completed yet
+        self._pending = np.empty(0, dtype=kline_dtype())
+        self._partial: Optional[numpy.ndarray] = None
+
+    def update(self, klines, closed: Optional[bool] = None) -> "numpy.ndarray":
+        """Add klines, usually the latest ones
+
+        Klines opening before the end of the last completed bar are ignored.
+
+        :param klines: klines of a shorter interval, see as_kline_array for the accepted formats
+        :param closed: optional - whether the last kline has closed, by default when its close time
+            has passed
+        :type closed: bool
+
+        :raises ValueError: if the bars are not aligned to the klines
+
+        :return: the bars that were completed or changed by the update, the last one may be partial
+
+        """
+        array = as_kline_array(klines)
+        if self._complete_until is not None:
+            array = array[array["open_time"] >= self._complete_until]
+        if not len(array):
+            return np.empty(0, dtype=kline_dtype())
+        if self.base_interval_ms is None:
+            base_ms = _kline_interval(array, None)
+            _check_alignment(self.interval_ms, self.offset, base_ms)
+            self.base_interval_ms = base_ms
+        array = as_kline_array(np.concatenate([self._pending, array]))
+        if closed is None:
+            closed = _last_closed(array)
+        bars, complete, starts = _aggregate(array, self.interval_ms, self.offset, closed)
+        done = len(bars) if complete[-1] else len(bars) - 1
+        if done:
+            self._complete.extend_array(bars[:done])
+            self._complete_until = int(bars["close_time"][done - 1]) + 1
+        if done < len(bars):
+            self._pending = array[starts[-1] :]
+            self._partial = bars[-1:]
+        else:
+            self._pending = array[:0]
+            self._partial = None
+        return bars
+
+    def update_event(self, msg: Dict) -> "numpy.ndarray":
+        """Add the kline of a kline_socket message, see update
+
+        :return: the bars that were completed or changed, empty if the message isn't a kline event
+
+        """
+        msg = msg.get("data", msg)
+        if msg.get("e") != "kline":
+            return np.empty(0, dtype=kline_dtype())
+        kline = msg["k"]
+        return self.update([[kline[key] for key in KLINE_EVENT_KEYS]], closed=kline["x"])
+
+    def bars(self, include_partial: bool = True, output: str = OUTPUT_NUMPY):
+        """Get all bars resampled so far
+
+        :param include_partial: include the last bar if it hasn't completed yet, default True
+        :type include_partial: bool
+        :param output: OUTPUT_NUMPY (default) or OUTPUT_COLUMNS
+        :type output: str
+
+        """
+        bars = self._complete.to_array()
+        if include_partial and self._partial is not None:
+            bars = np.concatenate([bars, self._partial])
+        return _result(bars, output)
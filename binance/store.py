@@ -0,0 +1,379 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from binance.enums import HistoricalKlinesType
+
+
+class EarliestTimestampCache:
+    """Cache of the earliest valid kline open time per (symbol, interval, klines type)
+
+    Used by the historical klines functions so the earliest timestamp probe is only requested
+    once per series instead of on every call. New entries are written to the file by flush, which
+    the client calls when its connection is closed.
+
+    .. code-block:: python
+
+        client.earliest_timestamp_cache = EarliestTimestampCache("earliest_timestamps.json")
+        ...
+        client.earliest_timestamp_cache.flush()
+
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, ttl: Optional[float] = None):
+        """Initialise the EarliestTimestampCache
+
+        :param path: optional - JSON file to persist the cache in, loaded if it exists
+        :type path: str|Path
+        :param ttl: optional - number of seconds an entry stays valid, default None never expires
+        :type ttl: float
+
+        """
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (earliest open time, time it was fetched)
+        self._entries: Dict[Tuple[str, str, str], Tuple[int, float]] = {}
+        # whether entries were set since the cache was saved
+        self._dirty = False
+        if self.path and self.path.exists():
+            self.load()
+
+    @staticmethod
+    def _key(symbol: str, interval: str, klines_type: HistoricalKlinesType):
+        return symbol.upper(), interval, klines_type.name
+
+    def get(
+        self,
+        symbol: str,
+        interval: str,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ) -> Optional[int]:
+        """Get the cached earliest timestamp
+
+        :return: timestamp in milliseconds or None if not cached or expired
+
+        """
+        entry = self._entries.get(self._key(symbol, interval, klines_type))
+        if entry is None:
+            return None
+        ts, fetched = entry
+        if self.ttl is not None and time.time() - fetched > self.ttl:
+            return None
+        return ts
+
+    def set(
+        self,
+        symbol: str,
+        interval: str,
+        klines_type: HistoricalKlinesType,
+        timestamp: int,
+    ):
+        """Cache the earliest timestamp of a series, saved to the path by the next flush"""
+        with self._lock:
+            self._entries[self._key(symbol, interval, klines_type)] = (
+                timestamp,
+                time.time(),
+            )
+            self._dirty = True
+
+    def flush(self):
+        """Save the cache if entries were set since it was last saved"""
+        if self._dirty:
+            self.save()
+
+    def invalidate(
+        self,
+        symbol: Optional[str] = None,
+        interval: Optional[str] = None,
+        klines_type: Optional[HistoricalKlinesType] = None,
+    ):
+        """Remove entries from the cache, e.g. after a symbol has been relisted
+
+        Each parameter narrows down the entries removed, with no parameters the whole cache is cleared.
+
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if symbol is not None and key[0] != symbol.upper():
+                    continue
+                if interval is not None and key[1] != interval:
+                    continue
+                if klines_type is not None and key[2] != klines_type.name:
+                    continue
+                del self._entries[key]
+        self.save()
+
+    def load(self):
+        """Load the cache from its path"""
+        assert self.path
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        with self._lock:
+            for key, entry in data.items():
+                symbol, interval, klines_type = key.split("|")
+                self._entries[(symbol, interval, klines_type)] = (
+                    entry["ts"],
+                    entry["fetched"],
+                )
+
+    def save(self):
+        """Save the cache to its path, does nothing for an in memory cache"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "|".join(key): {"ts": ts, "fetched": fetched}
+                for key, (ts, fetched) in self._entries.items()
+            }
+            # write to a temporary file first so an interrupted save doesn't corrupt the cache
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+class KlineStore:
+    """Local SQLite store of closed klines
+
+    Keeps the klines as returned by the API along with the ranges of open times that have been
+    synced, so a range that was synced but has no klines (e.g. an exchange outage) isn't requested again.
+
+    .. code-block:: python
+
+        store = KlineStore("~/.binance")
+        missing = store.missing_ranges("BTCUSDT", "1m", start_ts, end_ts)
+
+    """
+
+    FILENAME = "klines.sqlite3"
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        """Initialise the KlineStore
+
+        :param cache_dir: directory to keep the database in, created if it doesn't exist
+        :type cache_dir: str|Path
+
+        """
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / self.FILENAME
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS klines ("
+            "klines_type TEXT, symbol TEXT, interval TEXT, "
+            "open_time INTEGER, open TEXT, high TEXT, low TEXT, close TEXT, volume TEXT, "
+            "close_time INTEGER, quote_volume TEXT, trades INTEGER, "
+            "taker_buy_base_volume TEXT, taker_buy_quote_volume TEXT, ignore TEXT, "
+            "PRIMARY KEY (klines_type, symbol, interval, open_time)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS coverage ("
+            "klines_type TEXT, symbol TEXT, interval TEXT, start INTEGER, end INTEGER)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS coverage_series "
+            "ON coverage (klines_type, symbol, interval, start)"
+        )
+        # ranges of open times the exchange has no klines for, e.g. maintenance windows
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS empty ("
+            "klines_type TEXT, symbol TEXT, interval TEXT, start INTEGER, end INTEGER)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS empty_series "
+            "ON empty (klines_type, symbol, interval, start)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _series(symbol: str, interval: str, klines_type: HistoricalKlinesType):
+        return klines_type.name, symbol.upper(), interval
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+    def add_klines(
+        self,
+        symbol: str,
+        interval: str,
+        klines: List[List],
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ):
+        """Store klines, replacing any already stored with the same open time
+
+        :param klines: klines in the format returned by get_klines
+        :type klines: list
+
+        """
+        series = self._series(symbol, interval, klines_type)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO klines VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [series + tuple(kline[:12]) for kline in klines],
+            )
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ) -> List[List]:
+        """Get stored klines with an open time between start_ts and end_ts, both inclusive
+
+        :return: list of klines in the format returned by get_klines
+
+        """
+        query = "SELECT * FROM klines WHERE klines_type = ? AND symbol = ? AND interval = ?"
+        args: list = list(self._series(symbol, interval, klines_type))
+        if start_ts is not None:
+            query += " AND open_time >= ?"
+            args.append(start_ts)
+        if end_ts is not None:
+            query += " AND open_time <= ?"
+            args.append(end_ts)
+        query += " ORDER BY open_time"
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [list(row[3:]) for row in rows]
+
+    def _ranges(self, table: str, series: Tuple[str, str, str]) -> List[Tuple[int, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT start, end FROM {table} WHERE klines_type = ? AND symbol = ? AND interval = ? "
+                "ORDER BY start",
+                series,
+            ).fetchall()
+        return [(start, end) for start, end in rows]
+
+    def _add_range(self, table: str, series: Tuple[str, str, str], start_ts: int, end_ts: int):
+        # insert [start_ts, end_ts) merged with the ranges it touches or overlaps
+        if end_ts <= start_ts:
+            return
+        merged_start, merged_end = start_ts, end_ts
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT start, end FROM {table} WHERE klines_type = ? AND symbol = ? AND interval = ? "
+                "AND start <= ? AND end >= ?",
+                series + (end_ts, start_ts),
+            ).fetchall()
+            for start, end in rows:
+                merged_start = min(merged_start, start)
+                merged_end = max(merged_end, end)
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE klines_type = ? AND symbol = ? AND interval = ? "
+                "AND start <= ? AND end >= ?",
+                series + (end_ts, start_ts),
+            )
+            self._conn.execute(
+                f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?)",
+                series + (merged_start, merged_end),
+            )
+
+    def covered_ranges(
+        self,
+        symbol: str,
+        interval: str,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ) -> List[Tuple[int, int]]:
+        """Get the synced ranges of open times of a series
+
+        :return: sorted list of non overlapping (start, end) ranges, start inclusive and end exclusive
+
+        """
+        return self._ranges("coverage", self._series(symbol, interval, klines_type))
+
+    def add_coverage(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: int,
+        end_ts: int,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ):
+        """Mark the open times in [start_ts, end_ts) as synced, merging with touching ranges"""
+        self._add_range(
+            "coverage", self._series(symbol, interval, klines_type), start_ts, end_ts
+        )
+
+    def empty_ranges(
+        self,
+        symbol: str,
+        interval: str,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ) -> List[Tuple[int, int]]:
+        """Get the ranges of open times the exchange has no klines for
+
+        :return: sorted list of non overlapping (start, end) ranges, start inclusive and end exclusive
+
+        """
+        return self._ranges("empty", self._series(symbol, interval, klines_type))
+
+    def add_empty_range(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: int,
+        end_ts: int,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ):
+        """Record that the exchange has no klines opening in [start_ts, end_ts), so they aren't refetched"""
+        self._add_range(
+            "empty", self._series(symbol, interval, klines_type), start_ts, end_ts
+        )
+
+    def missing_ranges(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: int,
+        end_ts: int,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ) -> List[Tuple[int, int]]:
+        """Get the parts of [start_ts, end_ts) that haven't been synced yet
+
+        :return: sorted list of (start, end) ranges, start inclusive and end exclusive
+
+        """
+        missing = []
+        current = start_ts
+        for start, end in self.covered_ranges(symbol, interval, klines_type):
+            if end <= current:
+                continue
+            if start >= end_ts:
+                break
+            if start > current:
+                missing.append((current, start))
+            current = max(current, end)
+        if current < end_ts:
+            missing.append((current, end_ts))
+        return missing
+
+    def invalidate(
+        self,
+        symbol: str,
+        interval: Optional[str] = None,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+    ):
+        """Remove the stored klines, synced and empty ranges of a symbol, optionally only for one interval"""
+        query = " WHERE klines_type = ? AND symbol = ?"
+        args: list = [klines_type.name, symbol.upper()]
+        if interval is not None:
+            query += " AND interval = ?"
+            args.append(interval)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM klines" + query, args)
+            self._conn.execute("DELETE FROM coverage" + query, args)
+            self._conn.execute("DELETE FROM empty" + query, args)
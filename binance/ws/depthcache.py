@@ -1,31 +1,119 @@
 import logging
+from bisect import bisect_left, insort
+from decimal import Decimal
 from operator import itemgetter
 import asyncio
 import time
-from typing import Optional, Dict, Callable
+from typing import Any, Optional, Dict, Callable, List
 
-from ..helpers import get_loop
+from ..enums import FuturesType
+from ..helpers import _format_units, _step_scale, _to_units, get_loop
 from .streams import BinanceSocketManager
 from .threaded_stream import ThreadedApiManager
 
 
+def _to_steps(step_size: str) -> Callable:
+    """Parser of a price or quantity to a number of tick or lot sizes"""
+    decimals, units = _step_scale(step_size)
+    if units == 1:
+        # a power of ten, the most common filters
+        return lambda value: _to_units(value, decimals)
+
+    def to_steps(value) -> int:
+        steps, remainder = divmod(_to_units(value, decimals), units)
+        if remainder:
+            raise ValueError(f"{value} isn't a multiple of {step_size}")
+        return steps
+
+    return to_steps
+
+
+def _from_steps(step_size: str, conv_type: Callable) -> Optional[Callable]:
+    """Converter of a number of tick or lot sizes to conv_type, None to keep the integer"""
+    if conv_type is int:
+        return None
+    decimals, units = _step_scale(step_size)
+    if conv_type is float:
+        scale = 10**decimals
+        # int division is correctly rounded, the float is the closest one to the decimal value
+        return lambda steps: steps * units / scale
+    if conv_type is Decimal:
+        return lambda steps: Decimal(steps * units).scaleb(-decimals)
+    return lambda steps: conv_type(_format_units(steps * units, decimals))
+
+
 class DepthCache(object):
-    def __init__(self, symbol, conv_type: Callable = float):
+    def __init__(
+        self,
+        symbol,
+        conv_type: Callable = float,
+        tick_size: Optional[str] = None,
+        step_size: Optional[str] = None,
+    ):
         """Initialise the DepthCache
 
+        The levels of each side are kept in a dict of price to quantity, both converted with
+        conv_type, and a list of the prices in ascending order maintained with bisect on each
+        update, so reading the book doesn't sort or convert it again.
+
+        With the tickSize and stepSize of the symbol's PRICE_FILTER and LOT_SIZE filters, prices
+        are kept as integer ticks and quantities as integer lots instead. The same price always
+        is the same level whatever its precision, and levels are compared as integers. They are
+        converted to conv_type when read, use int to get the ticks and lots.
+
         :param symbol: Symbol to create depth cache for
         :type symbol: string
         :param conv_type: Optional type to represent price, and amount, default is float.
         :type conv_type: function.
+        :param tick_size: Optional tick size of the symbol e.g. "0.01000000", needs step_size
+        :type tick_size: str
+        :param step_size: Optional lot size of the symbol e.g. "0.00001000", needs tick_size
+        :type step_size: str
 
         """
         self.symbol = symbol
         self._bids = {}
         self._asks = {}
-        self.update_time = None
+        # prices of _bids and _asks in ascending order
+        self._bid_prices = []
+        self._ask_prices = []
+        self.update_time: Optional[int] = None
         self.conv_type: Callable = conv_type
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self._to_price = self._to_quantity = conv_type
+        # conversion of the integer levels when read, None to return them as they are
+        self._from_price: Optional[Callable] = None
+        self._from_quantity: Optional[Callable] = None
+        if tick_size or step_size:
+            if not (tick_size and step_size):
+                raise ValueError("Integer levels need both the tick_size and the step_size")
+            self._to_price = _to_steps(tick_size)
+            self._to_quantity = _to_steps(step_size)
+            self._from_price = _from_steps(tick_size, conv_type)
+            self._from_quantity = _from_steps(step_size, conv_type)
         self._log = logging.getLogger(__name__)
 
+    def _update(self, levels: Dict, prices: List, level):
+        price = self._to_price(level[0])
+        quantity = self._to_quantity(level[1])
+        if not quantity or level[1] == "0.00000000":
+            if levels.pop(price, None) is not None:
+                del prices[bisect_left(prices, price)]
+            return
+        if price not in levels:
+            insort(prices, price)
+        levels[price] = quantity
+
+    def _levels(self, levels: Dict, prices) -> List[List]:
+        from_price, from_quantity = self._from_price, self._from_quantity
+        if from_price is None or from_quantity is None:
+            return [[price, levels[price]] for price in prices]
+        return [[from_price(price), from_quantity(levels[price])] for price in prices]
+
+    def _price(self, price):
+        return price if self._from_price is None else self._from_price(price)
+
     def add_bid(self, bid):
         """Add a bid to the cache
 
@@ -33,9 +121,7 @@ class DepthCache(object):
         :return:
 
         """
-        self._bids[bid[0]] = self.conv_type(bid[1])
-        if bid[1] == "0.00000000":
-            del self._bids[bid[0]]
+        self._update(self._bids, self._bid_prices, bid)
 
     def add_ask(self, ask):
         """Add an ask to the cache
@@ -44,13 +130,37 @@ class DepthCache(object):
         :return:
 
         """
-        self._asks[ask[0]] = self.conv_type(ask[1])
-        if ask[1] == "0.00000000":
-            del self._asks[ask[0]]
+        self._update(self._asks, self._ask_prices, ask)
+
+    def clear(self):
+        """Remove all the bids and asks"""
+        self._bids = {}
+        self._asks = {}
+        self._bid_prices = []
+        self._ask_prices = []
 
-    def get_bids(self):
+    def load_levels(self, bids: Dict[int, int], asks: Dict[int, int]):
+        """Replace the bids and asks with integer levels
+
+        :param bids: quantity in lots by price in ticks of the tick_size and step_size of the cache
+        :type bids: dict
+        :param asks: quantity in lots by price in ticks
+        :type asks: dict
+
+        """
+        if self.tick_size is None:
+            raise ValueError("Integer levels need the tick_size and the step_size of the cache")
+        self._bids = dict(bids)
+        self._asks = dict(asks)
+        self._bid_prices = sorted(bids)
+        self._ask_prices = sorted(asks)
+
+    def get_bids(self, n: Optional[int] = None):
         """Get the current bids
 
+        :param n: optional - number of levels from the best bid, default all
+        :type n: int
+
         :return: list of bids with price and quantity as conv_type
 
         .. code-block:: python
@@ -79,11 +189,18 @@ class DepthCache(object):
             ]
 
         """
-        return DepthCache.sort_depth(self._bids, reverse=True, conv_type=self.conv_type)
+        # the best bids are at the end of the ascending prices, only the top n are copied
+        prices = (
+            reversed(self._bid_prices) if n is None else self._bid_prices[: -max(n, 0) - 1 : -1]
+        )
+        return self._levels(self._bids, prices)
 
-    def get_asks(self):
+    def get_asks(self, n: Optional[int] = None):
         """Get the current asks
 
+        :param n: optional - number of levels from the best ask, default all
+        :type n: int
+
         :return: list of asks with price and quantity as conv_type.
 
         .. code-block:: python
@@ -112,9 +229,49 @@ class DepthCache(object):
             ]
 
         """
-        return DepthCache.sort_depth(
-            self._asks, reverse=False, conv_type=self.conv_type
-        )
+        prices = self._ask_prices if n is None else self._ask_prices[: max(n, 0)]
+        return self._levels(self._asks, prices)
+
+    def best_bid(self):
+        """Get the highest bid
+
+        :return: [price, quantity] as conv_type, None if there are no bids
+
+        """
+        if not self._bid_prices:
+            return None
+        return self._levels(self._bids, self._bid_prices[-1:])[0]
+
+    def best_ask(self):
+        """Get the lowest ask
+
+        :return: [price, quantity] as conv_type, None if there are no asks
+
+        """
+        if not self._ask_prices:
+            return None
+        return self._levels(self._asks, self._ask_prices[:1])[0]
+
+    def mid(self):
+        """Get the price halfway between the best bid and ask
+
+        :return: price as conv_type, None if a side is empty, in ticks with integer levels and
+            conv_type int
+
+        """
+        if not self._bid_prices or not self._ask_prices:
+            return None
+        return (self._price(self._bid_prices[-1]) + self._price(self._ask_prices[0])) / 2
+
+    def spread(self):
+        """Get the difference between the best ask and bid prices
+
+        :return: price difference as conv_type, None if a side is empty
+
+        """
+        if not self._bid_prices or not self._ask_prices:
+            return None
+        return self._price(self._ask_prices[0] - self._bid_prices[-1])
 
     @staticmethod
     def sort_depth(vals, reverse=False, conv_type: Callable = float):
@@ -147,6 +304,8 @@ class BaseDepthCacheManager:
         bm=None,
         limit=10,
         conv_type=float,
+        tick_size: Optional[str] = None,
+        step_size: Optional[str] = None,
     ):
         """Create a DepthCacheManager instance
 
@@ -164,6 +323,10 @@ class BaseDepthCacheManager:
         :type limit: int
         :param conv_type: Optional type to represent price, and amount, default is float.
         :type conv_type: function.
+        :param tick_size: Optional tickSize of the symbol to keep prices as integer ticks, needs step_size
+        :type tick_size: str
+        :param step_size: Optional stepSize of the symbol to keep quantities as integer lots
+        :type step_size: str
 
         """
 
@@ -177,6 +340,8 @@ class BaseDepthCacheManager:
         self._refresh_interval = refresh_interval
         self._conn_key = None
         self._conv_type = conv_type
+        self._tick_size = tick_size
+        self._step_size = step_size
         self._log = logging.getLogger(__name__)
 
     async def __aenter__(self):
@@ -207,7 +372,9 @@ class BaseDepthCacheManager:
         """
         self._log.debug(f"Initialising depth cache for {self._symbol}")
         # initialise or clear depth cache
-        self._depth_cache = DepthCache(self._symbol, conv_type=self._conv_type)
+        self._depth_cache = DepthCache(
+            self._symbol, self._conv_type, self._tick_size, self._step_size
+        )
 
         # set a time to refresh the depth cache
         if self._refresh_interval:
@@ -295,7 +462,14 @@ class BaseDepthCacheManager:
         return self._symbol
 
 
-class DepthCacheManager(BaseDepthCacheManager):
+class DiffDepthCacheManager(BaseDepthCacheManager):
+    """Depth cache initialised from an order book snapshot and updated with a diff depth stream
+
+    Events received while the snapshot is requested are buffered and replayed after it. Subclasses
+    request the snapshot in _get_order_book and check the update ids of an event in _in_sequence,
+    the cache is only initialised again when an event doesn't follow the book.
+    """
+
     def __init__(
         self,
         client,
@@ -306,26 +480,31 @@ class DepthCacheManager(BaseDepthCacheManager):
         limit=500,
         conv_type=float,
         ws_interval=None,
+        recorder=None,
+        tick_size: Optional[str] = None,
+        step_size: Optional[str] = None,
     ):
-        """Initialise the DepthCacheManager
+        super().__init__(
+            client, symbol, loop, refresh_interval, bm, limit, conv_type, tick_size, step_size
+        )
+        self._ws_interval = ws_interval
+        self._recorder = recorder
+        # events received while the snapshot is requested
+        self._depth_message_buffer: List[Dict] = []
+        # whether an event was applied since the snapshot, until then the events are compared
+        # with the snapshot instead of the previous event
+        self._synced = False
+
+    async def _get_order_book(self) -> Dict:
+        """Request the order book snapshot"""
+        raise NotImplementedError
 
-        :param client: Binance API client
-        :type client: binance.Client
-        :param loop: asyncio loop
-        :param symbol: Symbol to create depth cache for
-        :type symbol: string
-        :param refresh_interval: Optional number of seconds between cache refresh, use 0 or None to disable
-        :type refresh_interval: int
-        :param limit: Optional number of orders to get from orderbook
-        :type limit: int
-        :param conv_type: Optional type to represent price, and amount, default is float.
-        :type conv_type: function.
-        :param ws_interval: Optional interval for updates on websocket, default None. If not set, updates happen every second. Must be 0, None (1s) or 100 (100ms).
-        :type ws_interval: int
+    def _in_sequence(self, msg) -> Optional[bool]:
+        """Check an event follows the book
 
+        :return: True to apply it, False for a gap, None for an event older than the snapshot
         """
-        super().__init__(client, symbol, loop, refresh_interval, bm, limit, conv_type)
-        self._ws_interval = ws_interval
+        raise NotImplementedError
 
     async def _init_cache(self):
         """Initialise the depth cache calling REST endpoint
@@ -333,43 +512,27 @@ class DepthCacheManager(BaseDepthCacheManager):
         :return:
         """
         self._last_update_id = None
-        self._depth_message_buffer = []
+        self._synced = False
 
-        res = await self._client.get_order_book(symbol=self._symbol, limit=self._limit)
+        res = await self._get_order_book()
 
         # initialise or clear depth cache
         await super()._init_cache()
 
         # process bid and asks from the order book
         self._apply_orders(res)
-        assert self._depth_cache
-        for bid in res["bids"]:
-            self._depth_cache.add_bid(bid)
-        for ask in res["asks"]:
-            self._depth_cache.add_ask(ask)
 
         # set first update id
         self._last_update_id = res["lastUpdateId"]
 
-        # Apply any updates from the websocket
-        for msg in self._depth_message_buffer:
-            await self._process_depth_message(msg)
-
-        # clear the depth buffer
-        self._depth_message_buffer = []
-
-    async def _start_socket(self):
-        """Start the depth cache socket
-
-        :return:
-        """
-        if not getattr(self, "_depth_message_buffer", None):
-            self._depth_message_buffer = []
-
-        await super()._start_socket()
+        if self._recorder:
+            self._recorder.record_snapshot(self._symbol, self._depth_cache, self._last_update_id)
 
-    def _get_socket(self):
-        return self._bm.depth_socket(self._symbol, interval=self._ws_interval)
+        # Apply any updates from the websocket, taking the buffer first as a gap in it
+        # initialises the cache again
+        buffered, self._depth_message_buffer = self._depth_message_buffer, []
+        for msg in buffered:
+            await self._process_depth_message(msg)
 
     async def _process_depth_message(self, msg):
         """Process a depth event message.
@@ -378,19 +541,27 @@ class DepthCacheManager(BaseDepthCacheManager):
         :return:
 
         """
+        # events of the combined stream are wrapped with their stream name
+        msg = msg.get("data", msg)
 
         if self._last_update_id is None:
             # Initial depth snapshot fetch not yet performed, buffer messages
             self._depth_message_buffer.append(msg)
             return
 
-        if msg["u"] <= self._last_update_id:
+        in_sequence = self._in_sequence(msg)
+        if in_sequence is False:
+            # updates were missed, init cache again
+            self._log.warning(
+                f"Depth events of {self._symbol} missed after update {self._last_update_id}, "
+                f"event from {msg['U']} to {msg['u']}, reinitialising the cache"
+            )
+            await self._init_cache()
+            # a snapshot behind the event is requested again with the next event
+            in_sequence = self._in_sequence(msg)
+        if not in_sequence:
             # ignore any updates before the initial update id
             return
-        elif msg["U"] != self._last_update_id + 1:
-            # if not buffered check we get sequential updates
-            # otherwise init cache again
-            await self._init_cache()
 
         # add any bid or ask values
         self._apply_orders(msg)
@@ -399,6 +570,10 @@ class DepthCacheManager(BaseDepthCacheManager):
         res = self._depth_cache
 
         self._last_update_id = msg["u"]
+        self._synced = True
+
+        if self._recorder:
+            self._recorder.record_diff(self._symbol, msg, self._depth_cache)
 
         # after processing event see if we need to refresh the depth cache
         if self._refresh_interval and int(time.time()) > self._refresh_time:
@@ -407,28 +582,155 @@ class DepthCacheManager(BaseDepthCacheManager):
         return res
 
 
-class FuturesDepthCacheManager(BaseDepthCacheManager):
-    async def _process_depth_message(self, msg):
-        """Process a depth event message.
+class DepthCacheManager(DiffDepthCacheManager):
+    def __init__(
+        self,
+        client,
+        symbol,
+        loop=None,
+        refresh_interval: Optional[int] = None,
+        bm=None,
+        limit=500,
+        conv_type=float,
+        ws_interval=None,
+        recorder=None,
+        tick_size: Optional[str] = None,
+        step_size: Optional[str] = None,
+    ):
+        """Initialise the DepthCacheManager
 
-        :param msg: Depth event message.
-        :return:
+        :param client: Binance API client
+        :type client: binance.Client
+        :param loop: asyncio loop
+        :param symbol: Symbol to create depth cache for
+        :type symbol: string
+        :param refresh_interval: Optional number of seconds between cache refresh, use 0 or None to disable
+        :type refresh_interval: int
+        :param limit: Optional number of orders to get from orderbook
+        :type limit: int
+        :param conv_type: Optional type to represent price, and amount, default is float.
+        :type conv_type: function.
+        :param ws_interval: Optional interval for updates on websocket, default None. If not set, updates happen every second. Must be 0, None (1s) or 100 (100ms).
+        :type ws_interval: int
+        :param recorder: Optional DepthRecorder writing the snapshots and diffs to depth archives
+        :type recorder: binance.depth_archive.DepthRecorder
+        :param tick_size: Optional tickSize of the symbol to keep prices as integer ticks, needs step_size
+        :type tick_size: str
+        :param step_size: Optional stepSize of the symbol to keep quantities as integer lots
+        :type step_size: str
 
         """
-        msg = msg.get("data")
-        return await super()._process_depth_message(msg)
+        super().__init__(
+            client,
+            symbol,
+            loop,
+            refresh_interval,
+            bm,
+            limit,
+            conv_type,
+            ws_interval,
+            recorder,
+            tick_size,
+            step_size,
+        )
 
-    def _apply_orders(self, msg):
-        assert self._depth_cache
-        self._depth_cache._bids = msg.get("b", [])
-        self._depth_cache._asks = msg.get("a", [])
+    async def _get_order_book(self) -> Dict:
+        return await self._client.get_order_book(symbol=self._symbol, limit=self._limit)
 
-        # keeping update time
-        self._depth_cache.update_time = msg.get("E") or msg.get("lastUpdateId")
+    def _get_socket(self):
+        return self._bm.depth_socket(self._symbol, interval=self._ws_interval)
+
+    def _in_sequence(self, msg) -> Optional[bool]:
+        assert self._last_update_id is not None
+        if msg["u"] <= self._last_update_id:
+            return None
+        if self._synced:
+            return msg["U"] == self._last_update_id + 1
+        # the first event includes the update after the snapshot
+        return msg["U"] <= self._last_update_id + 1
+
+
+class FuturesDepthCacheManager(DiffDepthCacheManager):
+    def __init__(
+        self,
+        client,
+        symbol,
+        loop=None,
+        refresh_interval: Optional[int] = None,
+        bm=None,
+        limit=1000,
+        conv_type=float,
+        ws_interval=None,
+        futures_type: FuturesType = FuturesType.USD_M,
+        recorder=None,
+        tick_size: Optional[str] = None,
+        step_size: Optional[str] = None,
+    ):
+        """Initialise the FuturesDepthCacheManager
+
+        The book is initialised from futures_order_book, or futures_coin_order_book for COIN-M,
+        and kept up to date with the diff depth stream. Events are chained by their pu, the last
+        update id of the previous event, and the cache is only initialised again when an event
+        doesn't follow the previous one.
+
+        :param client: Binance API client
+        :type client: binance.Client
+        :param loop: asyncio loop
+        :param symbol: Symbol to create depth cache for
+        :type symbol: string
+        :param refresh_interval: Optional number of seconds between cache refresh, use 0 or None to disable
+        :type refresh_interval: int
+        :param limit: Optional number of orders to get from orderbook, default 1000
+        :type limit: int
+        :param conv_type: Optional type to represent price, and amount, default is float.
+        :type conv_type: function.
+        :param ws_interval: Optional interval for updates on websocket, default None (250ms). Must be None, 100 or 500.
+        :type ws_interval: int
+        :param futures_type: use USD-M or COIN-M futures default USD-M
+        :type futures_type: FuturesType
+        :param recorder: Optional DepthRecorder writing the snapshots and diffs to depth archives
+        :type recorder: binance.depth_archive.DepthRecorder
+        :param tick_size: Optional tickSize of the symbol to keep prices as integer ticks, needs step_size
+        :type tick_size: str
+        :param step_size: Optional stepSize of the symbol to keep quantities as integer lots
+        :type step_size: str
+
+        """
+        super().__init__(
+            client,
+            symbol,
+            loop,
+            refresh_interval,
+            bm,
+            limit,
+            conv_type,
+            ws_interval,
+            recorder,
+            tick_size,
+            step_size,
+        )
+        self._futures_type = futures_type
+
+    async def _get_order_book(self) -> Dict:
+        if self._futures_type == FuturesType.COIN_M:
+            return await self._client.futures_coin_order_book(
+                symbol=self._symbol, limit=self._limit
+            )
+        return await self._client.futures_order_book(symbol=self._symbol, limit=self._limit)
 
     def _get_socket(self):
-        sock = self._bm.futures_depth_socket(self._symbol)
-        return sock
+        return self._bm.futures_diff_depth_socket(
+            self._symbol, interval=self._ws_interval, futures_type=self._futures_type
+        )
+
+    def _in_sequence(self, msg) -> Optional[bool]:
+        assert self._last_update_id is not None
+        if self._synced:
+            return msg["pu"] == self._last_update_id
+        if msg["u"] < self._last_update_id:
+            return None
+        # the first event includes the last update of the snapshot
+        return msg["U"] <= self._last_update_id
 
 
 class OptionsDepthCacheManager(BaseDepthCacheManager):
@@ -436,6 +738,397 @@ class OptionsDepthCacheManager(BaseDepthCacheManager):
         return self._bm.options_depth_socket(self._symbol)
 
 
+class _DepthConnection:
+    """A combined stream connection of the MultiplexDepthCacheManager"""
+
+    def __init__(self, socket, streams: List[str]):
+        #: ReconnectingWebsocket of the combined stream
+        self.socket = socket
+        #: streams in the url, which are subscribed again by each reconnect
+        self.url_streams = set(streams)
+        #: streams the connection should be subscribed to
+        self.streams = set(streams)
+        #: websocket the subscriptions were sent on
+        self.ws = None
+        #: task reading the messages of the connection
+        self.reader: Optional[asyncio.Task] = None
+
+
+class MultiplexDepthCacheManager:
+    """Depth caches of many symbols kept over a few combined stream connections
+
+    The diff depth streams of the symbols are read from combined stream connections of up to
+    streams_per_connection streams each, and every event is routed by its stream name to the
+    book of its symbol. The sequence of each book is checked separately, a gap only requests a
+    new snapshot of that symbol while the other books keep updating. Symbols are added and
+    removed at runtime by subscribing and unsubscribing their streams.
+
+    .. code-block:: python
+
+        async with MultiplexDepthCacheManager(client, ["BNBBTC", "ETHBTC"]) as dcm:
+            await dcm.add_symbols(["LTCBTC"])
+            while True:
+                depth_cache = await dcm.recv()
+                print(depth_cache.symbol, depth_cache.best_bid())
+
+    """
+
+    #: combined stream connections allow up to 1024 streams
+    MAX_STREAMS_PER_CONNECTION = 1024
+
+    def __init__(
+        self,
+        client,
+        symbols: Optional[List[str]] = None,
+        bm=None,
+        limit: Optional[int] = None,
+        conv_type=float,
+        ws_interval=None,
+        futures_type: Optional[FuturesType] = None,
+        recorder=None,
+        filters: Optional[Dict[str, tuple]] = None,
+        streams_per_connection: int = 200,
+        max_snapshots: int = 5,
+    ):
+        """Initialise the MultiplexDepthCacheManager
+
+        :param client: Binance API client
+        :type client: binance.AsyncClient
+        :param symbols: Optional symbols to start with, more are added with add_symbols
+        :type symbols: list
+        :param bm: Optional BinanceSocketManager
+        :type bm: BinanceSocketManager
+        :param limit: Optional number of orders to get from orderbook, default 500 or 1000 for futures
+        :type limit: int
+        :param conv_type: Optional type to represent price, and amount, default is float.
+        :type conv_type: function.
+        :param ws_interval: Optional interval for updates on websocket, see DepthCacheManager and FuturesDepthCacheManager
+        :type ws_interval: int
+        :param futures_type: Optional USD-M or COIN-M to keep futures books, default spot
+        :type futures_type: FuturesType
+        :param recorder: Optional DepthRecorder writing the snapshots and diffs to depth archives
+        :type recorder: binance.depth_archive.DepthRecorder
+        :param filters: Optional (tickSize, stepSize) by symbol to keep integer ticks and lots, see symbol_filters
+        :type filters: dict
+        :param streams_per_connection: number of streams subscribed on one connection, default 200
+        :type streams_per_connection: int
+        :param max_snapshots: number of order book snapshots requested at the same time, default 5
+        :type max_snapshots: int
+
+        """
+        if not 0 < streams_per_connection <= self.MAX_STREAMS_PER_CONNECTION:
+            raise ValueError(
+                f"streams_per_connection must be between 1 and {self.MAX_STREAMS_PER_CONNECTION}"
+            )
+        self._client = client
+        self._bm = bm or BinanceSocketManager(client)
+        self._limit = limit
+        self._conv_type = conv_type
+        self._ws_interval = ws_interval
+        self._futures_type = futures_type
+        self._stream_suffix = "@depth"
+        if ws_interval is not None and (futures_type is not None or ws_interval != 0):
+            allowed = [100] if futures_type is None else [100, 500]
+            if ws_interval not in allowed:
+                raise ValueError(
+                    f"Websocket interval value not allowed. Allowed values are {allowed}"
+                )
+            self._stream_suffix = f"@depth@{ws_interval}ms"
+        self._recorder = recorder
+        self._filters = filters or {}
+        self._streams_per_connection = streams_per_connection
+        self._max_snapshots = max_snapshots
+        # created in __aenter__, on python < 3.10 they are bound to the loop current at creation
+        self._snapshot_limit: Optional[asyncio.Semaphore] = None
+        self._initial_symbols = list(symbols or [])
+        # managers of the symbols by stream name, only used for their books and sequence
+        self._managers: Dict[str, DiffDepthCacheManager] = {}
+        self._streams: Dict[str, str] = {}
+        self._connections: List[_DepthConnection] = []
+        # snapshots being requested by stream name
+        self._snapshots: Dict[str, asyncio.Task] = {}
+        # messages of all the connections waiting to be processed by recv
+        self._messages: Optional[asyncio.Queue] = None
+        self._request_id = 0
+        self._log = logging.getLogger(__name__)
+
+    async def __aenter__(self):
+        self._snapshot_limit = asyncio.Semaphore(self._max_snapshots)
+        self._messages = asyncio.Queue()
+        await self.add_symbols(self._initial_symbols)
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.close()
+
+    def _manager(self, symbol: str) -> DiffDepthCacheManager:
+        tick_size, step_size = self._filters.get(symbol, (None, None))
+        kwargs: Dict[str, Any] = {
+            "bm": self._bm,
+            "conv_type": self._conv_type,
+            "ws_interval": self._ws_interval,
+            "recorder": self._recorder,
+            "tick_size": tick_size,
+            "step_size": step_size,
+        }
+        if self._limit:
+            kwargs["limit"] = self._limit
+        if self._futures_type is None:
+            return DepthCacheManager(self._client, symbol, **kwargs)
+        return FuturesDepthCacheManager(
+            self._client, symbol, futures_type=self._futures_type, **kwargs
+        )
+
+    def _get_socket(self, streams: List[str]):
+        if self._futures_type is None:
+            return self._bm.multiplex_socket(streams)
+        return self._bm.futures_multiplex_socket(
+            streams, futures_type=self._futures_type, category="public"
+        )
+
+    async def add_symbols(self, symbols: List[str]):
+        """Start keeping the books of symbols
+
+        The streams are subscribed on the connections with room left, new connections are opened
+        for the others. The books are available once their snapshot is received.
+
+        :param symbols: symbols to add, the ones already kept are ignored
+        :type symbols: list
+
+        """
+        streams = []
+        for symbol in symbols:
+            symbol = symbol.upper()
+            if symbol in self._streams:
+                continue
+            stream = f"{symbol.lower()}{self._stream_suffix}"
+            self._streams[symbol] = stream
+            self._managers[stream] = self._manager(symbol)
+            streams.append(stream)
+
+        for connection in self._connections:
+            room = self._streams_per_connection - len(connection.streams)
+            if streams and room > 0:
+                subscribe, streams = streams[:room], streams[room:]
+                connection.streams.update(subscribe)
+                await self._send(connection, "SUBSCRIBE", subscribe)
+        while streams:
+            chunk = streams[: self._streams_per_connection]
+            streams = streams[self._streams_per_connection :]
+            connection = _DepthConnection(self._get_socket(chunk), chunk)
+            await self._open(connection)
+            connection.reader = asyncio.ensure_future(self._read(connection))
+            self._connections.append(connection)
+
+    async def _open(self, connection: _DepthConnection):
+        await connection.socket.__aenter__()
+        connection.ws = connection.socket.ws
+
+    async def _reopen(self, connection: _DepthConnection) -> bool:
+        """Open a connection again with its streams once its socket stopped reconnecting
+
+        :return: False if it couldn't be opened, its symbols are removed
+        """
+        try:
+            await connection.socket.__aexit__(None, None, None)
+            streams = sorted(connection.streams)
+            connection.socket = self._get_socket(streams)
+            connection.url_streams = set(streams)
+            await self._open(connection)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            symbols = [
+                symbol for symbol, stream in self._streams.items() if stream in connection.streams
+            ]
+            self._log.error(
+                f"Error opening the depth streams of {', '.join(symbols)} again, removing them: "
+                f"{e.__class__.__name__} ({e})"
+            )
+        # the connection isn't used for new symbols any more, its symbols can be added again
+        self._connections.remove(connection)
+        for symbol in symbols:
+            stream = self._streams.pop(symbol)
+            del self._managers[stream]
+            task = self._snapshots.pop(stream, None)
+            if task:
+                task.cancel()
+        return False
+
+    async def remove_symbols(self, symbols: List[str]):
+        """Stop keeping the books of symbols
+
+        The streams are unsubscribed and connections left without streams are closed.
+
+        :param symbols: symbols to remove, the ones not kept are ignored
+        :type symbols: list
+
+        """
+        removed = set()
+        for symbol in symbols:
+            stream = self._streams.pop(symbol.upper(), None)
+            if stream is None:
+                continue
+            removed.add(stream)
+            del self._managers[stream]
+            task = self._snapshots.pop(stream, None)
+            if task:
+                task.cancel()
+
+        for connection in list(self._connections):
+            unsubscribe = connection.streams & removed
+            if not unsubscribe:
+                continue
+            connection.streams -= unsubscribe
+            if connection.streams:
+                await self._send(connection, "UNSUBSCRIBE", sorted(unsubscribe))
+            else:
+                await self._close_connection(connection)
+
+    async def _send(self, connection: _DepthConnection, method: str, streams: List[str]):
+        if not streams or not connection.socket.ws:
+            # sent once the connection is open again
+            return
+        self._request_id += 1
+        payload = {"method": method, "params": list(streams), "id": self._request_id}
+        await connection.socket.ws.send(connection.socket.json_dumps(payload))
+
+    async def _resubscribe(self, connection: _DepthConnection):
+        """Align the subscriptions of a connection opened again with its url streams"""
+        await connection.socket._wait_for_reconnect()
+        if connection.socket.ws is None or connection.socket.ws is connection.ws:
+            return
+        connection.ws = connection.socket.ws
+        await self._send(
+            connection, "SUBSCRIBE", sorted(connection.streams - connection.url_streams)
+        )
+        await self._send(
+            connection, "UNSUBSCRIBE", sorted(connection.url_streams - connection.streams)
+        )
+
+    async def _read(self, connection: _DepthConnection):
+        assert self._messages
+        while True:
+            try:
+                msg = await connection.socket.recv()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._messages.put({"e": "error", "type": e.__class__.__name__, "m": f"{e}"})
+                # the socket gave up reconnecting, its books are initialised again from the
+                # events of the new socket
+                if await self._reopen(connection):
+                    continue
+                return
+            await self._messages.put(msg)
+            if connection.socket.ws is not connection.ws or msg.get("e") == "error":
+                # the connection may be opened again, without the streams subscribed since
+                try:
+                    await self._resubscribe(connection)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._log.warning(f"Error resubscribing depth streams: {e}")
+
+    async def _close_connection(self, connection: _DepthConnection):
+        self._connections.remove(connection)
+        if connection.reader:
+            connection.reader.cancel()
+        await connection.socket.__aexit__(None, None, None)
+
+    async def recv(self):
+        """Get the depth cache of the next symbol updated or initialised
+
+        :return: DepthCache of the updated symbol, or the message of a connection error
+        """
+        assert self._messages, "Use the manager with async with or await __aenter__ first"
+        while True:
+            res = await self._handle_message(await self._messages.get())
+            if res:
+                return res
+
+    async def _handle_message(self, msg):
+        if msg.get("e") == "error":
+            self._log.error(f"Error in multiplexed depth socket: {msg}")
+            return msg
+        stream = msg.get("stream")
+        dcm = self._managers.get(stream)
+        if dcm is None:
+            # a subscription response or an event of a removed symbol
+            return None
+        if "data" not in msg:
+            # the snapshot of the book was applied
+            return dcm.get_depth_cache() if dcm._last_update_id is not None else None
+        msg = msg["data"]
+        if stream not in self._snapshots and dcm._last_update_id is not None:
+            in_sequence = dcm._in_sequence(msg)
+            if in_sequence:
+                return await dcm._process_depth_message(msg)
+            if in_sequence is None:
+                return None
+            self._log.warning(
+                f"Depth events of {dcm.get_symbol()} missed after update {dcm._last_update_id}, "
+                f"event from {msg['U']} to {msg['u']}, reinitialising the cache"
+            )
+        # the event is applied after the snapshot, which is requested while the other books
+        # keep updating
+        dcm._depth_message_buffer.append(msg)
+        if stream not in self._snapshots:
+            self._snapshots[stream] = asyncio.ensure_future(self._init_cache(stream, dcm))
+        return None
+
+    async def _init_cache(self, stream: str, dcm: DiffDepthCacheManager):
+        assert self._snapshot_limit and self._messages
+        try:
+            async with self._snapshot_limit:
+                await dcm._init_cache()
+            # recv returns the book once it is initialised
+            await self._messages.put({"stream": stream})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # requested again with the next event
+            self._log.error(
+                f"Error initialising depth cache for {dcm.get_symbol()}: "
+                f"{e.__class__.__name__} ({e})"
+            )
+            dcm._depth_message_buffer = []
+        finally:
+            if self._snapshots.get(stream) is asyncio.current_task():
+                del self._snapshots[stream]
+
+    def get_depth_cache(self, symbol: str) -> Optional[DepthCache]:
+        """Get the current depth cache of a symbol
+
+        :param symbol: symbol of the book
+        :type symbol: str
+        :return: DepthCache object, None until the snapshot of the symbol is received
+        """
+        stream = self._streams.get(symbol.upper())
+        if stream is None or self._managers[stream]._last_update_id is None:
+            return None
+        return self._managers[stream].get_depth_cache()
+
+    def get_symbols(self) -> List[str]:
+        """Get the symbols kept
+
+        :return: list of symbols
+        """
+        return list(self._streams)
+
+    async def close(self):
+        """Close the connections and stop the snapshot requests
+
+        :return:
+        """
+        for task in self._snapshots.values():
+            task.cancel()
+        self._snapshots = {}
+        for connection in list(self._connections):
+            await self._close_connection(connection)
+
+
 class ThreadedDepthCacheManager(ThreadedApiManager):
     def __init__(
         self,
@@ -487,6 +1180,9 @@ class ThreadedDepthCacheManager(ThreadedApiManager):
         limit=10,
         conv_type=float,
         ws_interval=0,
+        recorder=None,
+        tick_size: Optional[str] = None,
+        step_size: Optional[str] = None,
     ) -> str:
         return self._start_depth_cache(
             dcm_class=DepthCacheManager,
@@ -497,6 +1193,9 @@ class ThreadedDepthCacheManager(ThreadedApiManager):
             limit=limit,
             conv_type=conv_type,
             ws_interval=ws_interval,
+            recorder=recorder,
+            tick_size=tick_size,
+            step_size=step_size,
         )
 
     def start_futures_depth_socket(
@@ -505,8 +1204,12 @@ class ThreadedDepthCacheManager(ThreadedApiManager):
         symbol: str,
         refresh_interval=None,
         bm=None,
-        limit=10,
+        limit=1000,
         conv_type=float,
+        tick_size: Optional[str] = None,
+        step_size: Optional[str] = None,
+        futures_type: FuturesType = FuturesType.USD_M,
+        ws_interval=None,
     ) -> str:
         return self._start_depth_cache(
             dcm_class=FuturesDepthCacheManager,
@@ -516,6 +1219,10 @@ class ThreadedDepthCacheManager(ThreadedApiManager):
             bm=bm,
             limit=limit,
             conv_type=conv_type,
+            tick_size=tick_size,
+            step_size=step_size,
+            futures_type=futures_type,
+            ws_interval=ws_interval,
         )
 
     def start_options_depth_socket(
@@ -0,0 +1,196 @@
+import logging
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+from ..enums import FuturesType, HistoricalKlinesType
+from ..helpers import interval_to_milliseconds
+from ..mmap_store import KLINE_EVENT_KEYS
+from .streams import BinanceSocketManager
+
+
+class KlineFeed:
+    """Closed klines of a symbol from a REST backfill followed by the live kline socket
+
+    The socket is opened before the backfill is requested, so kline events arriving during the
+    backfill wait in its queue. Klines are delivered once each, in open time order. When an event
+    opens later than the kline expected next, e.g. after the socket reconnected, the klines closed in
+    between are fetched through REST before it. Klines REST doesn't return yet are requested again
+    with the next closed kline or after an interval, and skipped once a live kline after them closes.
+
+    .. code-block:: python
+
+        async with KlineFeed(client, "BTCUSDT", "1m", backfill=500) as feed:
+            async for kline in feed:
+                strategy.on_closed_kline(kline)
+
+    """
+
+    def __init__(
+        self,
+        client,
+        symbol: str,
+        interval: str = "1m",
+        backfill: int = 500,
+        klines_type: HistoricalKlinesType = HistoricalKlinesType.SPOT,
+        bm: Optional[BinanceSocketManager] = None,
+    ):
+        """Initialise the KlineFeed
+
+        :param client: AsyncClient instance
+        :type client: binance.AsyncClient
+        :param symbol: Name of symbol pair e.g. BNBBTC
+        :type symbol: str
+        :param interval: Kline interval, default 1m
+        :type interval: str
+        :param backfill: number of closed klines fetched through REST before the live ones
+        :type backfill: int
+        :param klines_type: SPOT (default), FUTURES or FUTURES_COIN
+        :type klines_type: HistoricalKlinesType
+        :param bm: Optional BinanceSocketManager
+        :type bm: BinanceSocketManager
+
+        """
+        interval_ms = interval_to_milliseconds(interval)
+        if interval_ms is None or interval.endswith("M"):
+            raise ValueError(f"Interval {interval!r} doesn't have a fixed length")
+        if klines_type not in (
+            HistoricalKlinesType.SPOT,
+            HistoricalKlinesType.FUTURES,
+            HistoricalKlinesType.FUTURES_COIN,
+        ):
+            raise ValueError(f"Unsupported klines type {klines_type}")
+        self._client = client
+        self._symbol = symbol.upper()
+        self._interval = interval
+        self._interval_ms = interval_ms
+        self._backfill = backfill
+        self._klines_type = klines_type
+        self._bm = bm or BinanceSocketManager(client)
+        self._socket = None
+        # closed klines waiting to be returned by recv
+        self._pending: Deque[List] = deque()
+        # open time of the next kline to deliver, None until the first one
+        self._next_open_time: Optional[int] = None
+        # time after which klines REST didn't return are requested again for an open kline event
+        self._retry_time: Optional[int] = None
+        self._log = logging.getLogger(__name__)
+
+    async def __aenter__(self):
+        self._socket = self._get_socket()
+        await self._socket.__aenter__()
+        if self._backfill:
+            now = self._now()
+            # the backfill ends before the kline which is still open
+            current = now - now % self._interval_ms
+            try:
+                await self._fetch(current - self._backfill * self._interval_ms, current - 1)
+            except BaseException:
+                # __aexit__ isn't called when __aenter__ raises
+                await self._socket.__aexit__(None, None, None)
+                raise
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        self._log.debug(f"Exiting kline feed for {self._symbol}")
+        assert self._socket is not None
+        await self._socket.__aexit__(*args, **kwargs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> List:
+        return await self.recv()
+
+    def _get_socket(self):
+        if self._klines_type == HistoricalKlinesType.SPOT:
+            return self._bm.kline_socket(self._symbol, self._interval)
+        futures_type = (
+            FuturesType.USD_M
+            if self._klines_type == HistoricalKlinesType.FUTURES
+            else FuturesType.COIN_M
+        )
+        return self._bm._get_futures_socket(
+            f"{self._symbol.lower()}@kline_{self._interval}",
+            futures_type,
+            prefix="ws/",
+            category="market",
+        )
+
+    def _now(self) -> int:
+        return int(time.time() * 1000 + self._client.timestamp_offset)
+
+    async def recv(self) -> List:
+        """Get the next closed kline
+
+        :return: kline in the format returned by get_klines
+
+        .. code-block:: python
+
+            [
+                1499040000000,      # Open time
+                "0.01634790",       # Open
+                "0.80000000",       # High
+                "0.01575800",       # Low
+                "0.01577100",       # Close
+                "148976.11427815",  # Volume
+                1499644799999,      # Close time
+                "2434.19055334",    # Quote asset volume
+                308,                # Number of trades
+                "1756.87402397",    # Taker buy base asset volume
+                "28.46694368",      # Taker buy quote asset volume
+                "0"                 # Can be ignored
+            ]
+
+        """
+        assert self._socket is not None
+        while not self._pending:
+            await self._handle_message(await self._socket.recv())
+        return self._pending.popleft()
+
+    async def _handle_message(self, msg):
+        msg = msg.get("data", msg)
+        if msg.get("e") == "error":
+            # the socket reconnects by itself, the klines missed meanwhile are fetched with the
+            # next event
+            self._log.warning(f"Kline feed socket error for {self._symbol}: {msg}")
+            return
+        if msg.get("e") != "kline":
+            return
+        kline = msg["k"]
+        if self._next_open_time is not None and kline["t"] > self._next_open_time:
+            # klines closed while the socket wasn't streaming. Open kline events arrive every few
+            # seconds, klines REST didn't return are requested again for a closed kline or after
+            # an interval
+            if kline["x"] or self._retry_time is None or self._now() >= self._retry_time:
+                await self._fetch(self._next_open_time, kline["t"] - 1)
+        if kline["x"] and (self._next_open_time is None or kline["t"] >= self._next_open_time):
+            self._push([kline[key] for key in KLINE_EVENT_KEYS] + [kline.get("B", "0")])
+
+    async def _fetch(self, start_ts: int, end_ts: int):
+        self._log.debug(f"Fetching {self._symbol} klines from {start_ts} to {end_ts}")
+        klines = await self._client.get_historical_klines(
+            self._symbol,
+            self._interval,
+            start_ts,
+            end_ts,
+            klines_type=self._klines_type,
+            cache_dir=False,
+        )
+        for kline in klines:
+            if self._next_open_time is None or kline[0] >= self._next_open_time:
+                self._push(kline)
+        if self._next_open_time is None or self._next_open_time <= end_ts:
+            # REST may not have published the klines yet, they are requested again until a live
+            # kline after them closes
+            self._retry_time = self._now() + self._interval_ms
+            self._log.warning(
+                f"{self._symbol} klines from {self._next_open_time or start_ts} to {end_ts} "
+                f"aren't available yet"
+            )
+        else:
+            self._retry_time = None
+
+    def _push(self, kline: List):
+        self._pending.append(kline)
+        self._next_open_time = kline[0] + self._interval_ms
@@ -1245,6 +1245,60 @@ class BinanceSocketManager:
             category="public",
         )
 
+    def futures_diff_depth_socket(
+        self, symbol: str, interval: Optional[int] = None, futures_type=FuturesType.USD_M
+    ):
+        """Subscribe to a futures diff depth stream, used to maintain a local order book
+
+        https://developers.binance.com/docs/derivatives/usds-margined-futures/websocket-market-streams/Diff-Book-Depth-Streams
+
+        :param symbol: required
+        :type symbol: str
+        :param interval: optional interval for updates, default None (250ms). Must be None, 100 or 500
+        :type interval: int
+        :param futures_type: use USD-M or COIN-M futures default USD-M
+
+        Message Format
+
+        .. code-block:: python
+
+            {
+                "e": "depthUpdate",     # Event type
+                "E": 123456789,         # Event time
+                "T": 123456788,         # Transaction time
+                "s": "BTCUSDT",         # Symbol
+                "U": 157,               # First update ID in event
+                "u": 160,               # Final update ID in event
+                "pu": 149,              # Final update Id in last stream(ie `u` in last stream)
+                "b": [                  # Bids to be updated
+                    [
+                        "0.0024",       # Price level to be updated
+                        "10"            # Quantity
+                    ]
+                ],
+                "a": [                  # Asks to be updated
+                    [
+                        "0.0026",       # Price level to be updated
+                        "100"           # Quantity
+                    ]
+                ]
+            }
+
+        """
+        socket_name = symbol.lower() + "@depth"
+        if interval:
+            if interval in [100, 500]:
+                socket_name = f"{socket_name}@{interval}ms"
+            else:
+                raise ValueError(
+                    "Websocket interval value not allowed. Allowed values are [100, 500]"
+                )
+        return self._get_futures_socket(
+            socket_name,
+            futures_type=futures_type,
+            category="public",
+        )
+
     def futures_rpi_depth_socket(self, symbol: str, futures_type=FuturesType.USD_M):
         """Subscribe to a futures RPI (Retail Price Improvement) depth data stream
 
@@ -1746,3 +1800,16 @@ class ThreadedWebsocketManager(ThreadedApiManager):
             socket_name="futures_depth_socket",
             params={"symbol": symbol, "depth": depth, "futures_type": futures_type},
         )
+
+    def start_futures_diff_depth_socket(
+        self,
+        callback: Callable,
+        symbol: str,
+        interval: Optional[int] = None,
+        futures_type=FuturesType.USD_M,
+    ) -> str:
+        return self._start_async_socket(
+            callback=callback,
+            socket_name="futures_diff_depth_socket",
+            params={"symbol": symbol, "interval": interval, "futures_type": futures_type},
+        )
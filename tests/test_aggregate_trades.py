@@ -0,0 +1,134 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from binance.async_client import AsyncClient
+from binance.ratelimit import (
+    MARKET_FUTURES,
+    MARKET_SPOT,
+    AsyncWeightLimiter,
+    agg_trades_request_weight,
+)
+
+from .utils import fake_agg_trades_endpoint
+
+FIRST_TIME = 1519862400000
+
+
+async def collect(client, **kwargs):
+    return [t["a"] async for t in client.aggregate_trade_iter("BNBBTC", **kwargs)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [1, 4])
+async def test_aggregate_trade_iter_prefetch(prefetch):
+    client = AsyncClient("api_key", "api_secret")
+    # a gap in the ids makes the predicted pages overlap
+    ids = list(range(0, 2500)) + list(range(4000, 5200))
+    with patch.object(
+        client, "get_aggregate_trades", AsyncMock(side_effect=fake_agg_trades_endpoint(ids))
+    ):
+        expected = await collect(client, last_id=10)
+        calls = []
+        client.get_aggregate_trades.side_effect = fake_agg_trades_endpoint(ids, calls=calls)
+        trades = await collect(client, last_id=10, prefetch=prefetch)
+    await client.close_connection()
+
+    assert trades == expected == [i for i in ids if i > 10]
+    assert calls[0] == {"symbol": "BNBBTC", "fromId": 11, "limit": 1000}
+    assert calls[1]["fromId"] == 1011
+
+
+@pytest.mark.asyncio
+async def test_aggregate_trade_iter_prefetch_stops_early():
+    client = AsyncClient("api_key", "api_secret")
+    calls = []
+    with patch.object(
+        client,
+        "get_aggregate_trades",
+        AsyncMock(side_effect=fake_agg_trades_endpoint(range(10000), calls=calls)),
+    ):
+        iterator = client.aggregate_trade_iter("BNBBTC", start_str=1519862400000, prefetch=2)
+        trades = []
+        async for trade in iterator:
+            trades.append(trade["a"])
+            if len(trades) == 1500:
+                break
+        await iterator.aclose()
+    await client.close_connection()
+
+    assert trades == list(range(1500))
+    # the first page found by time, then the page being consumed and two pages ahead
+    assert len(calls) == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "market, endpoint",
+    [
+        (MARKET_SPOT, "get_aggregate_trades"),
+        (MARKET_FUTURES, "futures_aggregate_trades"),
+    ],
+)
+async def test_aggregate_trade_backfill(market, endpoint):
+    client = AsyncClient("api_key", "api_secret")
+    ids = list(range(0, 3000)) + list(range(3500, 10000))
+    calls = []
+    limiter = AsyncWeightLimiter(weight_per_minute=100000)
+    with patch.object(
+        client, endpoint, AsyncMock(side_effect=fake_agg_trades_endpoint(ids, calls=calls))
+    ):
+        assert await client.get_aggregate_trade_id_range(
+            "BTCUSDT", FIRST_TIME + 1500 * 1000, FIRST_TIME + 7000 * 1000 + 500, market=market
+        ) == (1500, 7000)
+        trades = [
+            t
+            async for t in client.aggregate_trade_backfill(
+                "BTCUSDT",
+                FIRST_TIME + 1500 * 1000,
+                FIRST_TIME + 7000 * 1000 + 500,
+                market=market,
+                concurrency=3,
+                weight_limiter=limiter,
+            )
+        ]
+        # without an end the range goes up to the latest trade
+        latest = [
+            t["a"]
+            async for t in client.aggregate_trade_backfill(
+                "BTCUSDT", FIRST_TIME + 9500 * 1000, market=market
+            )
+        ]
+    await client.close_connection()
+
+    assert [t["a"] for t in trades] == [i for i in ids if 1500 <= i <= 7000]
+    assert limiter.used_weight == 6 * agg_trades_request_weight(market)
+    assert latest == list(range(9500, 10000))
+
+
+@pytest.mark.asyncio
+async def test_aggregate_trade_id_range_searches_gaps():
+    client = AsyncClient("api_key", "api_secret")
+    # two months without trades between the first and last thousand trades
+    ids = list(range(0, 1000)) + list(range(5000000, 5001000))
+    calls = []
+    with patch.object(
+        client,
+        "get_aggregate_trades",
+        AsyncMock(side_effect=fake_agg_trades_endpoint(ids, calls=calls)),
+    ):
+        in_gap = await client.get_aggregate_trade_id_range(
+            "BNBBTC", FIRST_TIME + 2000 * 1000, FIRST_TIME + 5000500 * 1000
+        )
+        gap_calls = len(calls)
+        calls.clear()
+        before_listing = await client.get_aggregate_trade_id_range(
+            "BNBBTC", FIRST_TIME - 365 * 24 * 60 * 60 * 1000, FIRST_TIME + 500 * 1000
+        )
+    await client.close_connection()
+
+    assert in_gap == (5000000, 5000500)
+    assert gap_calls < 30
+    assert before_listing == (0, 500)
+    # the empty hour and the first trade, then the hour after the end
+    assert len(calls) == 3
@@ -0,0 +1,107 @@
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from binance.analytics import (
+    ANALYTICS_LOOKBACK,
+    ANALYTICS_OPEN_INTEREST,
+    ANALYTICS_TAKER_VOLUME,
+    analytics_windows,
+)
+from binance.async_client import AsyncClient
+from binance.client import Client
+from binance.ratelimit import MARKET_FUTURES_COIN
+
+from .utils import fake_futures_data_endpoint
+
+PERIOD = 5 * 60 * 1000
+# the statistics only go back 30 days, so the fake history is relative to now
+NOW = int(time.time() * 1000) // PERIOD * PERIOD
+FIRST_TIME = NOW - 20 * 24 * 60 * 60 * 1000
+
+
+def test_analytics_windows():
+    windows = analytics_windows("5m", NOW, FIRST_TIME, FIRST_TIME + 1200 * PERIOD)
+    assert windows == [
+        (FIRST_TIME, FIRST_TIME + 500 * PERIOD - 1),
+        (FIRST_TIME + 500 * PERIOD, FIRST_TIME + 1000 * PERIOD - 1),
+        (FIRST_TIME + 1000 * PERIOD, FIRST_TIME + 1200 * PERIOD),
+    ]
+    # the start is moved to the start of the lookback
+    assert analytics_windows("1d", NOW, 0)[0][0] == NOW - ANALYTICS_LOOKBACK
+    with pytest.raises(ValueError):
+        analytics_windows("3m", NOW)
+
+
+def test_get_futures_analytics():
+    client = Client("api_key", "api_secret", ping=False)
+    calls = []
+    end = FIRST_TIME + 1199 * PERIOD
+    with patch.object(
+        client,
+        "_request_futures_data_api",
+        side_effect=fake_futures_data_endpoint(FIRST_TIME, calls=calls),
+    ):
+        rows = client.get_futures_analytics(
+            ANALYTICS_OPEN_INTEREST, "5m", FIRST_TIME, end, symbol="BTCUSDT"
+        )
+        array = client.get_futures_analytics(
+            ANALYTICS_OPEN_INTEREST, "5m", FIRST_TIME, end, symbol="BTCUSDT", output="numpy"
+        )
+
+    assert [row["timestamp"] for row in rows] == list(range(FIRST_TIME, end + 1, PERIOD))
+    assert len(calls) == 6
+    assert all(path == "openInterestHist" and data["limit"] == 500 for path, data in calls)
+    assert calls[0][1]["symbol"] == "BTCUSDT"
+    assert array.dtype.names == ("timestamp", "sumOpenInterest", "sumOpenInterestValue")
+    assert array["sumOpenInterestValue"][5] == float(rows[5]["sumOpenInterestValue"])
+
+
+@pytest.mark.asyncio
+async def test_get_futures_analytics_async():
+    client = AsyncClient("api_key", "api_secret")
+    calls = []
+    fake = fake_futures_data_endpoint(FIRST_TIME, calls=calls)
+
+    async def duplicating(method, path, data=None, **kwargs):
+        # pages overlapping their neighbours are merged
+        before = dict(data, startTime=data["startTime"] - 2 * PERIOD, endTime=data["startTime"] - 1)
+        page = fake(method, path, data=data)
+        return fake(method, path, data=before) + page + page[-3:]
+
+    with patch.object(
+        client, "_request_futures_coin_data_api", AsyncMock(side_effect=duplicating)
+    ):
+        columns = await client.get_futures_analytics(
+            ANALYTICS_TAKER_VOLUME,
+            "5m",
+            FIRST_TIME - 10 * PERIOD,
+            market=MARKET_FUTURES_COIN,
+            output="columns",
+            concurrency=3,
+            pair="BTCUSD",
+            contractType="PERPETUAL",
+        )
+        # each request also fetches the rows before its window
+        requests = len(calls) // 2
+        rows = [
+            row
+            async for row in client.futures_analytics_generator(
+                ANALYTICS_TAKER_VOLUME,
+                "5m",
+                FIRST_TIME,
+                FIRST_TIME + 999 * PERIOD,
+                market=MARKET_FUTURES_COIN,
+                pair="BTCUSD",
+            )
+        ]
+    await client.close_connection()
+
+    timestamps = columns["timestamp"].tolist()
+    assert timestamps == list(range(FIRST_TIME, NOW + 1, PERIOD))
+    assert columns["takerSellVolValue"][0] == 4213.98
+    assert calls[0][0] == "takerBuySellVol"
+    assert client.get_futures_data_limiter(MARKET_FUTURES_COIN).used_weight == requests
+    end = FIRST_TIME + 1000 * PERIOD
+    assert [row["timestamp"] for row in rows] == list(range(FIRST_TIME, end, PERIOD))
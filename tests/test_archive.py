@@ -0,0 +1,234 @@
+import hashlib
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from binance.archive import (
+    ARCHIVE_AGG_TRADES,
+    ARCHIVE_KLINES,
+    ARCHIVE_TRADES,
+    archive_files,
+    import_kline_archives,
+    import_trade_archives,
+    iter_archive_klines,
+    iter_archive_trades,
+    parse_archive_name,
+    read_archive_klines,
+)
+from binance.client import Client
+from binance.columnar import OUTPUT_COLUMNS, OUTPUT_LIST
+from binance.enums import HistoricalKlinesType
+from binance.store import KlineStore
+
+from .utils import fake_klines_endpoint
+
+np = pytest.importorskip("numpy")
+
+DAY = 24 * 60 * 60 * 1000
+HOUR = 60 * 60 * 1000
+# 2018-03-01 00:00:00 UTC
+MARCH = 1519862400000
+APRIL = MARCH + 31 * DAY
+
+
+def kline_lines(start, count, timeframe=HOUR, scale=1):
+    klines = fake_klines_endpoint(start, start + (count - 1) * timeframe, timeframe)(limit=count)
+    for kline in klines:
+        kline[0] *= scale
+        kline[6] = kline[6] * scale + scale - 1
+    return [",".join(str(value) for value in kline) for kline in klines]
+
+
+def write_archive(directory, name, lines, header=None):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        content = "\n".join(([header] if header else []) + lines) + "\n"
+        archive.writestr(name.replace(".zip", ".csv"), content)
+    return path
+
+
+def test_parse_archive_name():
+    archive = parse_archive_name("/data/BTCUSDT-1h-2018-03.zip")
+    assert (archive.symbol, archive.kind, archive.interval) == ("BTCUSDT", ARCHIVE_KLINES, "1h")
+    assert (archive.start_ts, archive.end_ts) == (MARCH, APRIL)
+
+    archive = parse_archive_name("BTCUSD_PERP-aggTrades-2018-12-31.zip")
+    assert (archive.symbol, archive.kind, archive.interval) == (
+        "BTCUSD_PERP",
+        ARCHIVE_AGG_TRADES,
+        None,
+    )
+    assert archive.end_ts - archive.start_ts == DAY
+    assert parse_archive_name("BTCUSDT-2018-12.zip") is None
+    assert parse_archive_name("BTCUSDT-bookTicker-2018-12-31.zip") is None
+    assert parse_archive_name("BTCUSDT-1h-2018-03.zip.CHECKSUM") is None
+
+    # the last month of the year ends at the start of the next year
+    archive = parse_archive_name("BTCUSDT-1d-2018-12.zip")
+    assert archive.end_ts == 1546300800000
+
+
+def test_archive_files_skip_covered_days(tmp_path):
+    write_archive(tmp_path / "monthly", "BNBBTC-1h-2018-03.zip", kline_lines(MARCH, 24))
+    write_archive(tmp_path / "daily", "BNBBTC-1h-2018-03-31.zip", kline_lines(MARCH, 24))
+    write_archive(tmp_path / "daily", "BNBBTC-1h-2018-04-01.zip", kline_lines(APRIL, 24))
+    write_archive(tmp_path / "daily", "BNBBTC-1m-2018-04-01.zip", kline_lines(APRIL, 24))
+    write_archive(tmp_path / "daily", "ETHBTC-1h-2018-04-01.zip", kline_lines(APRIL, 24))
+
+    files = archive_files(tmp_path, "bnbbtc", ARCHIVE_KLINES, "1h")
+    assert [f.path.name for f in files] == ["BNBBTC-1h-2018-03.zip", "BNBBTC-1h-2018-04-01.zip"]
+    with pytest.raises(ValueError):
+        archive_files(tmp_path, "BNBBTC")
+
+
+def test_read_archive_klines(tmp_path):
+    lines = kline_lines(MARCH, 48)
+    path = write_archive(tmp_path, "BNBBTC-1h-2018-03-01.zip", lines)
+
+    klines = read_archive_klines(path)
+    assert len(klines) == 48
+    assert klines["open_time"][1] == MARCH + HOUR
+    assert klines["close"][0] == 1.5
+    assert klines["trades"].dtype == np.int64
+
+    # the API format keeps the strings of the archive
+    klines = read_archive_klines(path, OUTPUT_LIST)
+    assert klines[0] == fake_klines_endpoint(MARCH, MARCH, HOUR)(limit=1)[0]
+
+    columns = read_archive_klines(path, OUTPUT_COLUMNS)
+    assert columns["volume"].flags["C_CONTIGUOUS"]
+
+    # futures archives have a header and spot archives have microseconds from 2025
+    path = write_archive(
+        tmp_path, "BNBBTC-1h-2018-03-02.zip", kline_lines(MARCH, 3, scale=1000), "open_time,open"
+    )
+    klines = read_archive_klines(path)
+    assert klines["open_time"].tolist() == [MARCH, MARCH + HOUR, MARCH + 2 * HOUR]
+    assert klines["close_time"][0] == MARCH + HOUR - 1
+
+    # decoded block by block
+    blocks = list(iter_archive_klines(tmp_path / "BNBBTC-1h-2018-03-01.zip", chunk_bytes=1000))
+    assert len(blocks) > 1
+    assert sum(len(block) for block in blocks) == 48
+
+
+def test_import_kline_archives_top_up(tmp_path):
+    archives = tmp_path / "archives"
+    # the exchange has no klines for the last hour of March 3rd
+    march = kline_lines(MARCH, 3 * 24 - 1)
+    write_archive(archives, "BNBBTC-1h-2018-03.zip", march)
+    write_archive(archives, "BNBBTC-1h-2018-04-01.zip", kline_lines(APRIL, 24))
+
+    client = Client("api_key", "api_secret", ping=False)
+    store = KlineStore(tmp_path / "store")
+    end_ts = APRIL + 2 * DAY - 1
+    fake = fake_klines_endpoint(MARCH, end_ts, timeframe=HOUR)
+    with patch.object(client, "_klines", side_effect=fake) as klines_mock, patch.object(
+        client, "_get_earliest_valid_timestamp", return_value=MARCH
+    ):
+        imported = import_kline_archives(
+            store, archives, "BNBBTC", "1h", client=client, end_str=end_ts
+        )
+
+    assert imported.rows == 3 * 24 - 1 + 24
+    assert imported.rest_rows == 24
+    assert [path.name for path in imported.files] == [
+        "BNBBTC-1h-2018-03.zip",
+        "BNBBTC-1h-2018-04-01.zip",
+    ]
+    # only the day after the archives was requested
+    assert klines_mock.call_count == 1
+    assert klines_mock.call_args[1]["startTime"] == APRIL + DAY
+    assert store.covered_ranges("BNBBTC", "1h") == [(MARCH, APRIL + 2 * DAY)]
+    assert store.empty_ranges("BNBBTC", "1h") == [(MARCH + 3 * DAY - HOUR, APRIL)]
+    klines = store.get_klines("BNBBTC", "1h")
+    assert len(klines) == imported.rows + imported.rest_rows
+    assert klines[0] == fake(limit=1)[0]
+
+    # the store is then used by get_historical_klines without any request
+    with patch.object(client, "_klines", side_effect=fake) as klines_mock, patch.object(
+        client, "_get_earliest_valid_timestamp", return_value=MARCH
+    ):
+        klines = client.get_historical_klines(
+            "BNBBTC", "1h", MARCH, end_ts, cache_dir=tmp_path / "store"
+        )
+    assert klines_mock.call_count == 0
+    assert len(klines) == imported.rows + imported.rest_rows
+
+
+def test_import_kline_archives_checksum(tmp_path):
+    path = write_archive(tmp_path, "BNBBTC-1h-2018-03-01.zip", kline_lines(MARCH, 24))
+    checksum = tmp_path / "BNBBTC-1h-2018-03-01.zip.CHECKSUM"
+    checksum.write_text(f"{hashlib.sha256(path.read_bytes()).hexdigest()}  {path.name}\n")
+    store = KlineStore(tmp_path / "store")
+    kwargs = dict(klines_type=HistoricalKlinesType.FUTURES)
+    assert import_kline_archives(store, tmp_path, "BNBBTC", "1h", **kwargs).rows == 24
+
+    checksum.write_text(f"{'0' * 64}  {path.name}\n")
+    with pytest.raises(ValueError):
+        import_kline_archives(store, tmp_path, "BNBBTC", "1h", **kwargs)
+    assert import_kline_archives(store, tmp_path, "BNBBTC", "1h", verify=False, **kwargs).rows == 24
+
+
+def agg_trade_lines(start, count, spacing, best_match=True):
+    lines = []
+    for i in range(count):
+        line = f"{i},{100 + i}.5,0.25,{2 * i},{2 * i + 1},{start + i * spacing},{i % 2 == 0}"
+        lines.append(line + (",True" if best_match else ""))
+    return lines
+
+
+def test_iter_archive_trades(tmp_path):
+    path = write_archive(tmp_path, "BNBBTC-aggTrades-2018-03-01.zip", agg_trade_lines(MARCH, 4, 1))
+    (trades,) = iter_archive_trades(path)
+    assert trades["agg_trade_id"].tolist() == [0, 1, 2, 3]
+    assert trades["price"][1] == 101.5
+    assert trades["is_buyer_maker"].tolist() == [True, False, True, False]
+    assert trades["is_best_match"].all()
+
+    # futures archives have a header, lower case booleans and no is_best_match
+    lines = [line.lower() for line in agg_trade_lines(MARCH, 2, 1, best_match=False)]
+    path = write_archive(
+        tmp_path, "BNBBTC-aggTrades-2018-03-02.zip", lines, "agg_trade_id,price,quantity"
+    )
+    (trades,) = iter_archive_trades(path)
+    assert trades["is_buyer_maker"].tolist() == [True, False]
+    assert not trades["is_best_match"].any()
+
+    lines = [f"{i},1.5,2,3,{MARCH * 1000 + i},true" for i in range(3)]
+    path = write_archive(tmp_path, "BNBBTC-trades-2018-03-01.zip", lines)
+    (trades,) = iter_archive_trades(path, ARCHIVE_TRADES)
+    assert trades.dtype.names == (
+        "trade_id",
+        "price",
+        "quantity",
+        "quote_quantity",
+        "time",
+        "is_buyer_maker",
+    )
+    assert trades["time"].tolist() == [MARCH, MARCH, MARCH]
+
+
+def test_import_trade_archives(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    archives = tmp_path / "archives"
+    # 36 trades an hour apart over March 1st and 2nd
+    write_archive(archives, "BNBBTC-aggTrades-2018-03-01.zip", agg_trade_lines(MARCH, 24, HOUR))
+    write_archive(
+        archives, "BNBBTC-aggTrades-2018-03-02.zip", agg_trade_lines(MARCH + DAY, 12, HOUR)
+    )
+
+    written = import_trade_archives(tmp_path / "export", archives, "BNBBTC")
+    assert [path.name for path in written] == ["date=2018-03-01.parquet", "date=2018-03-02.parquet"]
+    table = pq.read_table(written[0])
+    assert table.num_rows == 24
+    assert table.column("time").to_pylist()[-1] == MARCH + 23 * HOUR
+    assert table.column("is_buyer_maker").to_pylist()[:2] == [True, False]
+    assert pq.read_table(written[1]).num_rows == 12
+    assert written[0].parent == tmp_path / "export" / "aggTrades" / "symbol=BNBBTC"
+
+    assert import_trade_archives(tmp_path / "export", archives, "ETHBTC") == []
+    with pytest.raises(ValueError):
+        import_trade_archives(tmp_path / "export", archives, "BNBBTC", kind="bookTicker")
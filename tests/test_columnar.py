@@ -0,0 +1,97 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from binance.client import Client
+from binance.columnar import (
+    MAX_PREALLOCATED_KLINES,
+    KlineArrayBuilder,
+    klines_output,
+    kline_dtype,
+    new_klines_output,
+)
+
+from .utils import fake_klines_endpoint
+
+np = pytest.importorskip("numpy")
+
+FIRST_OPEN_TIME = 1519862400000
+
+client = Client("api_key", "api_secret", ping=False)
+
+
+def test_kline_dtype_size():
+    assert kline_dtype().itemsize < 100
+
+
+def test_builder_grows_and_converts():
+    klines = fake_klines_endpoint(FIRST_OPEN_TIME, FIRST_OPEN_TIME + 2499 * 60000)(
+        limit=2500
+    )
+    builder = KlineArrayBuilder(capacity=10)
+    for i in range(0, len(klines), 1000):
+        builder.extend(klines[i : i + 1000])
+
+    array = builder.to_array()
+    assert len(array) == 2500
+    assert array["open_time"].dtype == np.int64
+    assert array["close"].dtype == np.float64
+    assert array["open_time"][-1] == klines[-1][0]
+    assert array["close"][0] == float(klines[0][4])
+    assert array["trades"][0] == klines[0][8]
+
+    columns = builder.to_columns()
+    assert columns["volume"].flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(columns["high"], array["high"])
+
+
+def test_preallocation_is_capped():
+    end_ts = FIRST_OPEN_TIME + 2499 * 60000
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, end_ts)
+    with patch.object(client, "_klines", side_effect=fake), patch(
+        "binance.client.new_klines_output", wraps=new_klines_output
+    ) as new_output:
+        # an end in the future doesn't preallocate the klines up to it
+        array = client.get_historical_klines(
+            "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, FIRST_OPEN_TIME, "1 Jan, 2100", output="numpy"
+        )
+
+    assert len(array) == 2500
+    assert new_output.call_args[0][1] <= (time.time() * 1000 - FIRST_OPEN_TIME) // 60000 + 1
+    assert len(KlineArrayBuilder(capacity=10**12)._array) == MAX_PREALLOCATED_KLINES
+
+
+def test_klines_output_unknown():
+    with pytest.raises(ValueError):
+        klines_output([], "frame")
+
+
+@pytest.mark.parametrize("limit", [None, 1500])
+def test_historical_klines_numpy_output(limit):
+    end_ts = FIRST_OPEN_TIME + 2499 * 60000
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, end_ts)
+    with patch.object(client, "_klines", side_effect=fake):
+        klines = client.get_historical_klines(
+            "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, FIRST_OPEN_TIME, end_ts, limit=limit
+        )
+        array = client.get_historical_klines(
+            "BNBBTC",
+            Client.KLINE_INTERVAL_1MINUTE,
+            FIRST_OPEN_TIME,
+            end_ts,
+            limit=limit,
+            output="numpy",
+        )
+        columns = client.get_historical_klines(
+            "BNBBTC",
+            Client.KLINE_INTERVAL_1MINUTE,
+            FIRST_OPEN_TIME,
+            end_ts,
+            limit=limit,
+            output="columns",
+        )
+
+    assert len(array) == len(klines) == (limit or 2500)
+    np.testing.assert_array_equal(array["open_time"], [k[0] for k in klines])
+    np.testing.assert_array_equal(columns["close"], [float(k[4]) for k in klines])
@@ -0,0 +1,238 @@
+import json
+import random
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from binance.depth_archive import (
+    COMPRESSION_LZMA,
+    COMPRESSION_NONE,
+    EVENT_DIFF,
+    EVENT_SNAPSHOT,
+    DepthArchiveReader,
+    DepthArchiveWriter,
+    DepthRecorder,
+)
+from binance.helpers import symbol_filters
+from binance.ws.depthcache import DepthCacheManager
+
+# 2018-03-01 00:00:00 UTC
+MARCH = 1519862400000
+DAY = 24 * 60 * 60 * 1000
+
+
+def price(ticks):
+    return f"{Decimal(ticks) / 100:.8f}"
+
+
+def quantity(lots):
+    return f"{Decimal(lots) / 1000:.8f}"
+
+
+def order_book(levels=50, update_id=100):
+    return {
+        "lastUpdateId": update_id,
+        "bids": [[price(10000 - i), quantity(1000 + i)] for i in range(levels)],
+        "asks": [[price(10001 + i), quantity(2000 + i)] for i in range(levels)],
+    }
+
+
+def diff_events(count, first_update_id=101, start=MARCH, spacing=100, seed=1):
+    rand = random.Random(seed)
+    events = []
+    update_id = first_update_id
+    for n in range(count):
+        last_update_id = update_id + rand.randint(0, 3)
+        events.append(
+            {
+                "e": "depthUpdate",
+                "E": start + n * spacing,
+                "s": "BNBBTC",
+                "U": update_id,
+                "u": last_update_id,
+                "b": [
+                    [price(10000 - rand.randint(0, 60)), quantity(rand.choice([0, 1, 2500]))]
+                    for _ in range(rand.randint(0, 4))
+                ],
+                "a": [
+                    [price(10001 + rand.randint(0, 60)), quantity(rand.randint(0, 5000))]
+                    for _ in range(rand.randint(0, 4))
+                ],
+            }
+        )
+        update_id = last_update_id + 1
+    return events
+
+
+async def record(recorder, events, snapshot_time=MARCH, **kwargs):
+    """Run the events through a DepthCacheManager, return the books after each event"""
+    client = MagicMock()
+    client.get_order_book = AsyncMock(return_value=order_book())
+    dcm = DepthCacheManager(client, "BNBBTC", bm=MagicMock(), recorder=recorder, **kwargs)
+    recorder_snapshot = recorder.record_snapshot
+    recorder.record_snapshot = lambda symbol, dc, update_id, timestamp=None: recorder_snapshot(
+        symbol, dc, update_id, snapshot_time if timestamp is None else timestamp
+    )
+    await dcm._init_cache()
+    books = {snapshot_time: (dcm.get_depth_cache().get_bids(), dcm.get_depth_cache().get_asks())}
+    for msg in events:
+        depth_cache = await dcm._depth_event(msg)
+        books[msg["E"]] = (depth_cache.get_bids(), depth_cache.get_asks())
+    recorder.close()
+    return books
+
+
+@pytest.mark.asyncio
+async def test_depth_recorder_replay(tmp_path):
+    events = diff_events(500)
+    recorder = DepthRecorder(tmp_path, snapshot_interval=10, block_events=40)
+    books = await record(recorder, events)
+
+    reader = DepthArchiveReader(tmp_path, "bnbbtc")
+    assert (reader.start_ts, reader.end_ts) == (MARCH, events[-1]["E"])
+    recorded = list(reader.events())
+    assert recorded[0].kind == EVENT_SNAPSHOT
+    assert len(recorded) == 501
+    # a snapshot is taken every 10 seconds in place of a diff
+    assert sum(event.kind == EVENT_SNAPSHOT for event in recorded) == 5
+    assert recorded[1].kind == EVENT_DIFF
+    assert (recorded[1].first_update_id, recorded[1].last_update_id) == (
+        events[0]["U"],
+        events[0]["u"],
+    )
+
+    for ts in (MARCH, MARCH + 50, MARCH + 9999, MARCH + 25000, events[-1]["E"] + 1000):
+        book = reader.book_at(ts)
+        expected = books[max(t for t in books if t <= ts)]
+        assert (book.get_bids(), book.get_asks()) == expected
+    assert reader.book_at(MARCH - 1) is None
+
+    # the replay yields the book after each event from start_ts
+    start_ts = MARCH + 12345
+    replayed = [
+        (book.timestamp, book.get_bids(), book.get_asks())
+        for book in reader.replay(start_ts, start_ts + 1000)
+    ]
+    assert [ts for ts, _, _ in replayed] == [
+        ts for ts in books if start_ts <= ts <= start_ts + 1000
+    ]
+    assert all((bids, asks) == books[ts] for ts, bids, asks in replayed)
+
+    depth_cache = reader.book_at(start_ts).to_depth_cache(Decimal)
+    assert isinstance(depth_cache.get_bids()[0][0], Decimal)
+    bids = [[float(price), float(quantity)] for price, quantity in depth_cache.get_bids()]
+    assert bids == books[MARCH + 12300][0]
+
+    # the archive is far smaller than the JSON events
+    size = sum(path.stat().st_size for path, _ in reader.files)
+    assert size * 5 < len(json.dumps(events))
+
+
+@pytest.mark.asyncio
+async def test_depth_recorder_days_and_filters(tmp_path):
+    # the events continue into the next day, which is written to a new file
+    events = diff_events(20, start=MARCH + DAY - 1000)
+    exchange_info = {
+        "symbols": [
+            {
+                "symbol": "BNBBTC",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": "0.01000000"},
+                    {"filterType": "LOT_SIZE", "stepSize": "0.00100000"},
+                ],
+            },
+            {"symbol": "ETHBTC", "filters": []},
+        ]
+    }
+    filters = symbol_filters(exchange_info)
+    assert filters == {"BNBBTC": ("0.01000000", "0.00100000")}
+    recorder = DepthRecorder(tmp_path, compression=COMPRESSION_LZMA, filters=filters)
+    books = await record(recorder, events, snapshot_time=MARCH + DAY - 2000)
+
+    reader = DepthArchiveReader(tmp_path, "BNBBTC")
+    assert [path.name for path, _ in reader.files] == [
+        "date=2018-03-01.depth",
+        "date=2018-03-02.depth",
+    ]
+    assert reader.files[0][1]["price_decimals"] == 2
+    snapshot = next(reader.events())
+    # prices are stored in ticks and quantities in lots
+    assert snapshot.bids[-1] == (10000, 1000)
+
+    last = events[-1]["E"]
+    book = reader.book_at(last)
+    assert (book.get_bids(), book.get_asks()) == books[last]
+    assert [book.timestamp for book in reader.replay(MARCH + DAY - 200)] == [
+        ts for ts in books if ts >= MARCH + DAY - 200
+    ]
+
+
+@pytest.mark.asyncio
+async def test_depth_recorder_integer_levels(tmp_path):
+    events = diff_events(50)
+    # the cache keeps ticks and lots, which are recorded as they are
+    recorder = DepthRecorder(tmp_path)
+    kwargs = {"conv_type": int, "tick_size": "0.01", "step_size": "0.001"}
+    books = await record(recorder, events, **kwargs)
+
+    reader = DepthArchiveReader(tmp_path, "BNBBTC")
+    assert reader.files[0][1]["price_decimals"] == 2
+    book = reader.book_at(events[-1]["E"])
+    assert (book.get_bids(int), book.get_asks(int)) == books[events[-1]["E"]]
+
+
+def test_depth_archive_writer_appends(tmp_path):
+    path = tmp_path / "BNBBTC.depth"
+    writer = DepthArchiveWriter(path, "BNBBTC", compression=COMPRESSION_NONE)
+    with pytest.raises(ValueError):
+        writer.write_diff(MARCH, 1, 1, [], [])
+    writer.write_snapshot(MARCH, 10, writer.levels([["1.5", "2"]]), [])
+    writer.write_diff(MARCH + 1, 11, 12, writer.levels([["1.5", "0"], ["1.4", "3"]]), [])
+    writer.close()
+
+    # a block cut off while it was written is dropped when the file is appended to
+    with open(path, "ab") as f:
+        f.write(b"DBLK\x00\x01")
+    writer = DepthArchiveWriter(path, "BNBBTC", compression=COMPRESSION_NONE)
+    writer.write_snapshot(MARCH + 2, 13, [], writer.levels([["1.6", "1.00000000"]]))
+    writer.close()
+
+    with pytest.raises(ValueError):
+        DepthArchiveWriter(path, "BNBBTC", tick_size="0.1")
+    with pytest.raises(ValueError):
+        writer.price_ticks("1.000000001")
+
+    directory = tmp_path / "archive"
+    (directory / "symbol=BNBBTC").mkdir(parents=True)
+    path.rename(directory / "symbol=BNBBTC" / "date=2018-03-01.depth")
+    reader = DepthArchiveReader(directory, "BNBBTC")
+    assert [dict(book.bids) for book in reader.replay(end_ts=MARCH + 1)] == [
+        {150000000: 200000000},
+        {140000000: 300000000},
+    ]
+    assert reader.book_at(MARCH + 2).asks == {160000000: 100000000}
+
+
+def test_depth_archive_reader_skips_to_snapshot(tmp_path):
+    directory = tmp_path / "symbol=BNBBTC"
+    directory.mkdir()
+    writer = DepthArchiveWriter(directory / "date=2018-03-01.depth", "BNBBTC")
+    writer.write_snapshot(MARCH, 10, writer.levels([["1.5", "2"]]), [])
+    writer.write_diff(MARCH + 1, 11, 11, writer.levels([["1.4", "1"]]), [])
+    writer.close()
+    # the next day starts with a diff, as if its first snapshot was lost
+    writer = DepthArchiveWriter(directory / "date=2018-03-02.depth", "BNBBTC")
+    writer._has_snapshot = True
+    writer.write_diff(MARCH + DAY, 20, 20, writer.levels([["1.3", "1"]]), [])
+    writer.write_snapshot(MARCH + DAY + 1, 21, writer.levels([["1.6", "3"]]), [])
+    writer.write_diff(MARCH + DAY + 2, 22, 22, writer.levels([["1.2", "1"]]), [])
+    writer.close()
+
+    reader = DepthArchiveReader(tmp_path, "BNBBTC")
+    books = {book.timestamp: dict(book.bids) for book in reader.replay()}
+    assert sorted(books) == [MARCH, MARCH + 1, MARCH + DAY + 1, MARCH + DAY + 2]
+    for ts, bids in books.items():
+        assert dict(reader.book_at(ts).bids) == bids
+    # the diff before the snapshot of the second day isn't applied
+    assert dict(reader.book_at(MARCH + DAY).bids) == books[MARCH + 1]
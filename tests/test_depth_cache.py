@@ -1,5 +1,16 @@
-from binance.ws.depthcache import DepthCache
+from binance.enums import FuturesType
+from binance.exceptions import ReadLoopClosed
+from binance.ws.depthcache import (
+    DepthCache,
+    DepthCacheManager,
+    FuturesDepthCacheManager,
+    MultiplexDepthCacheManager,
+    ThreadedDepthCacheManager,
+)
 from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import json
 import pytest
 
 TEST_SYMBOL = "BNBBTC"
@@ -47,3 +58,372 @@ def test_add_asks(fresh_cache):
 
     assert isinstance(asks[0][0], Decimal)
     assert isinstance(asks[0][1], Decimal)
+
+
+def test_updates_keep_the_book_sorted():
+    """Verify the sorted book follows updates and deletions without sorting on read"""
+    cache = DepthCache(TEST_SYMBOL)
+    for price in ["0.00019082", "0.00019460", "0.00019158", "0.00019157"]:
+        cache.add_bid([price, "1.00000000"])
+        cache.add_ask([f"0.0002{price[-4:]}", "2.00000000"])
+
+    # update an existing level, delete one and delete a level that doesn't exist
+    cache.add_bid(["0.00019158", "5.00000000"])
+    cache.add_bid(["0.00019460", "0.00000000"])
+    cache.add_bid(["0.00010000", "0.00000000"])
+    cache.add_ask(["0.00029082", "0.00000000"])
+
+    assert cache.get_bids() == [[0.00019158, 5.0], [0.00019157, 1.0], [0.00019082, 1.0]]
+    assert cache.get_asks() == [[0.00029157, 2.0], [0.00029158, 2.0], [0.0002946, 2.0]]
+
+    # the same price in another precision is the same level
+    cache.add_bid(["0.000191570", "3.00000000"])
+    assert len(cache.get_bids()) == 3
+    assert cache.get_bids()[1] == [0.00019157, 3.0]
+
+    cache.clear()
+    assert cache.get_bids() == [] and cache.get_asks() == []
+
+
+def test_top_of_book(fresh_cache):
+    """Verify the best levels are read without the rest of the book"""
+    assert fresh_cache.best_bid() is None
+    assert fresh_cache.mid() is None and fresh_cache.spread() is None
+
+    for i in range(10):
+        fresh_cache.add_bid([f"1.{i}", "1"])
+        fresh_cache.add_ask([f"2.{i}", str(i + 1)])
+
+    assert fresh_cache.best_bid() == [Decimal("1.9"), Decimal("1")]
+    assert fresh_cache.best_ask() == [Decimal("2.0"), Decimal("1")]
+    assert fresh_cache.mid() == Decimal("1.95")
+    assert fresh_cache.spread() == Decimal("0.1")
+
+    assert fresh_cache.get_bids(3) == fresh_cache.get_bids()[:3]
+    assert [price for price, _ in fresh_cache.get_asks(2)] == [Decimal("2.0"), Decimal("2.1")]
+    assert fresh_cache.get_bids(20) == fresh_cache.get_bids()
+    assert fresh_cache.get_bids(0) == [] and fresh_cache.get_asks(0) == []
+
+    fresh_cache.add_ask(["2.0", "0.00000000"])
+    assert fresh_cache.best_ask() == [Decimal("2.1"), Decimal("2")]
+
+
+def test_integer_levels():
+    """Verify prices and quantities kept as ticks and lots of the symbol filters"""
+    cache = DepthCache(TEST_SYMBOL, tick_size="0.01000000", step_size="0.00100000")
+    cache.add_bid(["0.10", "1.5"])
+    # the same price from another endpoint with another precision
+    cache.add_bid(["0.1000", "2.000"])
+    cache.add_bid(["0.07", "0.001"])
+    cache.add_ask(["0.30", "3"])
+    cache.add_ask(["0.31", "1"])
+    # deleted whatever the precision of the zero quantity
+    cache.add_ask(["0.310", "0.000"])
+
+    assert cache.get_bids() == [[0.1, 2.0], [0.07, 0.001]]
+    assert cache.get_asks() == [[0.3, 3.0]]
+    assert cache._bids == {10: 2000, 7: 1}
+    assert cache.mid() == 0.2
+    assert cache.spread() == 0.2
+
+    ticks = DepthCache(TEST_SYMBOL, int, tick_size="0.5", step_size="1")
+    ticks.add_bid(["10.5", "3"])
+    ticks.add_ask(["11.0", "2"])
+    assert ticks.best_bid() == [21, 3] and ticks.best_ask() == [22, 2]
+    assert ticks.spread() == 1
+
+    decimals = DepthCache(TEST_SYMBOL, Decimal, tick_size="0.5", step_size="1")
+    decimals.add_bid(["10.5", "3"])
+    assert decimals.get_bids(1) == [[Decimal("10.5"), Decimal("3")]]
+
+    with pytest.raises(ValueError):
+        ticks.add_bid(["10.25", "1"])
+    with pytest.raises(ValueError):
+        DepthCache(TEST_SYMBOL, tick_size="0.01")
+
+    ticks.load_levels({20: 1, 21: 4}, {23: 5, 22: 1})
+    assert ticks.get_bids() == [[21, 4], [20, 1]]
+    assert ticks.get_asks() == [[22, 1], [23, 5]]
+    with pytest.raises(ValueError):
+        DepthCache(TEST_SYMBOL).load_levels({20: 1}, {})
+
+
+def futures_event(first, last, previous, bids=(), asks=()):
+    return {
+        "stream": "btcusdt@depth",
+        "data": {
+            "e": "depthUpdate",
+            "E": last,
+            "s": "BTCUSDT",
+            "U": first,
+            "u": last,
+            "pu": previous,
+            "b": [list(bid) for bid in bids],
+            "a": [list(ask) for ask in asks],
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_futures_depth_cache_sequence():
+    """Verify the futures diff events are chained by pu and only real gaps resync"""
+    snapshots = [
+        {
+            "lastUpdateId": 100,
+            "E": 1,
+            "bids": [["10.0", "1"], ["9.9", "2"]],
+            "asks": [["10.1", "3"]],
+        },
+        {"lastUpdateId": 210, "E": 2, "bids": [["10.0", "5"]], "asks": [["10.2", "1"]]},
+    ]
+    client = MagicMock()
+    client.futures_order_book = AsyncMock(side_effect=snapshots)
+    dcm = FuturesDepthCacheManager(client, "BTCUSDT", bm=MagicMock())
+    await dcm._init_cache()
+    client.futures_order_book.assert_awaited_with(symbol="BTCUSDT", limit=1000)
+
+    # included in the snapshot
+    assert await dcm._depth_event(futures_event(90, 99, 89, bids=[("10.0", "0")])) is None
+    # the first event spans the snapshot's last update
+    depth_cache = await dcm._depth_event(futures_event(98, 103, 97, bids=[("9.8", "4")]))
+    assert depth_cache.get_bids() == [[10.0, 1.0], [9.9, 2.0], [9.8, 4.0]]
+    # U doesn't follow u in the futures streams, pu does
+    depth_cache = await dcm._depth_event(
+        futures_event(120, 130, 103, bids=[("9.9", "0")], asks=[("10.1", "0.000")])
+    )
+    assert depth_cache.get_bids() == [[10.0, 1.0], [9.8, 4.0]]
+    assert depth_cache.get_asks() == []
+    assert client.futures_order_book.await_count == 1
+
+    # events 131 to 199 were missed, the event is applied on the new snapshot
+    depth_cache = await dcm._depth_event(futures_event(200, 215, 199, asks=[("10.3", "2")]))
+    assert client.futures_order_book.await_count == 2
+    assert depth_cache.get_bids() == [[10.0, 5.0]]
+    assert depth_cache.get_asks() == [[10.2, 1.0], [10.3, 2.0]]
+    assert dcm._last_update_id == 215
+
+
+def test_threaded_futures_depth_socket_full_book():
+    tdcm = ThreadedDepthCacheManager()
+    with patch.object(tdcm, "_start_depth_cache") as start:
+        tdcm.start_futures_depth_socket(print, "BTCUSDT")
+    assert start.call_args.kwargs["limit"] == 1000
+    assert start.call_args.kwargs["dcm_class"] is FuturesDepthCacheManager
+
+
+@pytest.mark.asyncio
+async def test_futures_coin_depth_cache():
+    client = MagicMock()
+    client.futures_coin_order_book = AsyncMock(
+        return_value={"lastUpdateId": 5, "bids": [["100.0", "1"]], "asks": [["100.1", "2"]]}
+    )
+    bm = MagicMock()
+    dcm = FuturesDepthCacheManager(
+        client, "BTCUSD_PERP", bm=bm, limit=100, futures_type=FuturesType.COIN_M, ws_interval=100
+    )
+    await dcm._start_socket()
+    bm.futures_diff_depth_socket.assert_called_once_with(
+        "BTCUSD_PERP", interval=100, futures_type=FuturesType.COIN_M
+    )
+    await dcm._init_cache()
+    client.futures_coin_order_book.assert_awaited_once_with(symbol="BTCUSD_PERP", limit=100)
+    assert dcm.get_depth_cache().best_ask() == [100.1, 2.0]
+
+
+def depth_event(symbol, first, last, bids=()):
+    return {
+        "stream": f"{symbol.lower()}@depth",
+        "data": {
+            "e": "depthUpdate",
+            "E": last,
+            "s": symbol,
+            "U": first,
+            "u": last,
+            "b": [list(bid) for bid in bids],
+            "a": [],
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_depth_cache_first_event_spans_snapshot():
+    """Verify the first event after the snapshot doesn't need to start right after it"""
+    client = MagicMock()
+    client.get_order_book = AsyncMock(
+        return_value={"lastUpdateId": 100, "bids": [["1.0", "1"]], "asks": []}
+    )
+    dcm = DepthCacheManager(client, TEST_SYMBOL, bm=MagicMock())
+    await dcm._init_cache()
+    depth_cache = await dcm._depth_event(depth_event(TEST_SYMBOL, 95, 105, [("0.9", "2")])["data"])
+    assert depth_cache.get_bids() == [[1.0, 1.0], [0.9, 2.0]]
+    depth_cache = await dcm._depth_event(depth_event(TEST_SYMBOL, 106, 107, [("1.0", "0")])["data"])
+    assert depth_cache.get_bids() == [[0.9, 2.0]]
+    client.get_order_book.assert_awaited_once()
+
+
+class FakeMultiplexSocket:
+    def __init__(self, streams):
+        self.streams = streams
+        self.queue = asyncio.Queue()
+        self.ws = MagicMock(send=AsyncMock())
+        self.exited = False
+        self._wait_for_reconnect = AsyncMock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.exited = True
+
+    async def recv(self):
+        msg = await self.queue.get()
+        if isinstance(msg, Exception):
+            raise msg
+        return msg
+
+    def json_dumps(self, msg):
+        return json.dumps(msg)
+
+    def sent(self):
+        return [json.loads(call.args[0]) for call in self.ws.send.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_multiplex_depth_cache_manager():
+    """Verify the books of many symbols are kept over shared connections"""
+    snapshots = {
+        "BNBBTC": [
+            {"lastUpdateId": 100, "bids": [["1.0", "1"]], "asks": []},
+            {"lastUpdateId": 200, "bids": [["1.5", "1"]], "asks": []},
+        ],
+        "ETHBTC": [{"lastUpdateId": 50, "bids": [["2.0", "1"]], "asks": []}],
+    }
+    eth_released = asyncio.Event()
+
+    async def get_order_book(symbol, limit):
+        if symbol == "ETHBTC":
+            await eth_released.wait()
+        return snapshots[symbol].pop(0)
+
+    client = MagicMock()
+    client.get_order_book = AsyncMock(side_effect=get_order_book)
+    sockets = []
+    bm = MagicMock()
+    bm.multiplex_socket.side_effect = lambda streams: sockets.append(
+        FakeMultiplexSocket(streams)
+    ) or sockets[-1]
+
+    async def recv(dcm):
+        return await asyncio.wait_for(dcm.recv(), timeout=1)
+
+    dcm = MultiplexDepthCacheManager(
+        client, ["BNBBTC", "ethbtc"], bm=bm, streams_per_connection=2
+    )
+    # the queue and semaphore are created on the loop running the manager
+    assert dcm._messages is None
+    async with dcm:
+        assert [socket.streams for socket in sockets] == [["bnbbtc@depth", "ethbtc@depth"]]
+        first = sockets[0]
+        # the events received while the snapshots are requested are applied after them
+        for msg in (
+            depth_event("BNBBTC", 101, 101, [("0.9", "2")]),
+            depth_event("ETHBTC", 51, 51, [("1.9", "2")]),
+            depth_event("BNBBTC", 102, 103, [("0.8", "3")]),
+            {"result": None, "id": 1},
+        ):
+            first.queue.put_nowait(msg)
+        depth_cache = await recv(dcm)
+        assert depth_cache.symbol == "BNBBTC"
+        assert depth_cache.get_bids() == [[1.0, 1.0], [0.9, 2.0], [0.8, 3.0]]
+        # the book of BNBBTC is updated while the ETHBTC snapshot is pending
+        first.queue.put_nowait(depth_event("BNBBTC", 104, 104, [("0.7", "4")]))
+        depth_cache = await recv(dcm)
+        assert depth_cache.get_bids()[-1] == [0.7, 4.0]
+        assert dcm.get_depth_cache("ETHBTC") is None
+
+        eth_released.set()
+        depth_cache = await recv(dcm)
+        assert depth_cache.symbol == "ETHBTC"
+        assert depth_cache.get_bids() == [[2.0, 1.0], [1.9, 2.0]]
+        first.queue.put_nowait(depth_event("ETHBTC", 52, 52, [("2.0", "0")]))
+        assert (await recv(dcm)).get_bids() == [[1.9, 2.0]]
+
+        # a gap only initialises the book of its symbol again
+        first.queue.put_nowait(depth_event("BNBBTC", 150, 201, [("1.4", "1")]))
+        first.queue.put_nowait(depth_event("ETHBTC", 53, 53, [("1.8", "1")]))
+        depth_cache = await recv(dcm)
+        assert depth_cache.symbol == "ETHBTC"
+        depth_cache = await recv(dcm)
+        assert depth_cache.get_bids() == [[1.5, 1.0], [1.4, 1.0]]
+        first.queue.put_nowait(depth_event("BNBBTC", 202, 202, [("1.3", "1")]))
+        depth_cache = await recv(dcm)
+        assert depth_cache.get_bids() == [[1.5, 1.0], [1.4, 1.0], [1.3, 1.0]]
+        assert client.get_order_book.await_count == 3
+
+        # symbols are subscribed on the connections with room left
+        snapshots.update(LTCBTC=[], XRPBTC=[])
+        await dcm.add_symbols(["LTCBTC", "BNBBTC"])
+        await dcm.add_symbols(["XRPBTC"])
+        second = sockets[1]
+        assert second.streams == ["ltcbtc@depth"]
+        assert second.sent() == [{"method": "SUBSCRIBE", "params": ["xrpbtc@depth"], "id": 1}]
+        assert dcm.get_symbols() == ["BNBBTC", "ETHBTC", "LTCBTC", "XRPBTC"]
+
+        await dcm.remove_symbols(["ETHBTC", "LTCBTC", "XRPBTC"])
+        assert first.sent() == [{"method": "UNSUBSCRIBE", "params": ["ethbtc@depth"], "id": 2}]
+        assert second.exited and not first.exited
+        assert dcm.get_depth_cache("ETHBTC") is None
+
+        # the reconnected socket is subscribed to the streams of its url again
+        first.ws = MagicMock(send=AsyncMock())
+        first.queue.put_nowait({"e": "error", "type": "BinanceWebsocketClosed", "m": "closed"})
+        first.queue.put_nowait(depth_event("ETHBTC", 54, 54))
+        first.queue.put_nowait(depth_event("BNBBTC", 203, 203, [("1.2", "1")]))
+        assert (await recv(dcm))["type"] == "BinanceWebsocketClosed"
+        depth_cache = await recv(dcm)
+        assert depth_cache.get_bids()[-1] == [1.2, 1.0]
+        assert first.sent() == [{"method": "UNSUBSCRIBE", "params": ["ethbtc@depth"], "id": 3}]
+    assert first.exited
+
+    with pytest.raises(ValueError):
+        MultiplexDepthCacheManager(client, bm=bm, ws_interval=500)
+
+
+@pytest.mark.asyncio
+async def test_multiplex_depth_cache_manager_reopens_closed_connection():
+    """Verify a connection which stopped reconnecting is opened again or its symbols removed"""
+    snapshots = {
+        "BNBBTC": [
+            {"lastUpdateId": 100, "bids": [["1.0", "1"]], "asks": []},
+            {"lastUpdateId": 200, "bids": [["2.0", "1"]], "asks": []},
+        ],
+    }
+    client = MagicMock()
+    client.get_order_book = AsyncMock(
+        side_effect=lambda symbol, limit: snapshots[symbol].pop(0)
+    )
+    sockets = []
+    bm = MagicMock()
+    bm.multiplex_socket.side_effect = lambda streams: sockets.append(
+        FakeMultiplexSocket(streams)
+    ) or sockets[-1]
+
+    async def recv(dcm):
+        return await asyncio.wait_for(dcm.recv(), timeout=1)
+
+    async with MultiplexDepthCacheManager(client, ["BNBBTC"], bm=bm) as dcm:
+        sockets[0].queue.put_nowait(depth_event("BNBBTC", 101, 101))
+        assert (await recv(dcm)).get_bids() == [[1.0, 1.0]]
+
+        sockets[0].queue.put_nowait(ReadLoopClosed("closed"))
+        assert (await recv(dcm))["type"] == "ReadLoopClosed"
+        assert sockets[0].exited and sockets[1].streams == ["bnbbtc@depth"]
+        # the events of the new socket initialise the book again
+        sockets[1].queue.put_nowait(depth_event("BNBBTC", 190, 201, [("1.9", "1")]))
+        assert (await recv(dcm)).get_bids() == [[2.0, 1.0], [1.9, 1.0]]
+
+        bm.multiplex_socket.side_effect = ConnectionError("unreachable")
+        sockets[1].queue.put_nowait(ReadLoopClosed("closed"))
+        assert (await recv(dcm))["type"] == "ReadLoopClosed"
+        await asyncio.sleep(0)
+        assert dcm.get_symbols() == [] and dcm._connections == []
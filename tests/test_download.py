@@ -0,0 +1,161 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from binance.async_client import AsyncClient
+from binance.download import KlineDownloader, main, trading_symbols
+from binance.enums import HistoricalKlinesType
+from binance.store import KlineStore
+
+from .utils import fake_klines_endpoint
+
+FIRST_OPEN_TIME = 1519862400000
+END_TS = FIRST_OPEN_TIME + 2999 * 60000
+
+
+@pytest.mark.asyncio
+async def test_download_and_resume(tmp_path):
+    client = AsyncClient("api_key", "api_secret")
+    calls = []
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, END_TS, calls=calls)
+    reports = []
+
+    def downloader():
+        return KlineDownloader(
+            client,
+            tmp_path,
+            ["BNBBTC", "ethbtc"],
+            ["1m", "5m"],
+            start_str=FIRST_OPEN_TIME - 60000 * 100,
+            end_str=END_TS,
+            klines_types=[HistoricalKlinesType.SPOT, HistoricalKlinesType.FUTURES],
+            concurrency=3,
+            window_concurrency=2,
+            progress_callback=reports.append,
+        )
+
+    with patch.object(client, "_klines", AsyncMock(side_effect=fake)):
+        progress = await downloader().run()
+        assert progress.series_done == progress.series_total == 8
+        assert reports[-1] is progress
+
+        # a restart only reads the checkpoint
+        calls.clear()
+        progress = await downloader().run()
+        assert calls == []
+        assert progress.klines == 0
+    await client.close_connection()
+
+    store = KlineStore(tmp_path)
+    klines = store.get_klines("ETHBTC", "1m", klines_type=HistoricalKlinesType.FUTURES)
+    assert len(klines) == 3000
+    assert klines[-1][0] == END_TS
+    assert store.missing_ranges("BNBBTC", "5m", FIRST_OPEN_TIME, END_TS + 1) == []
+    with open(tmp_path / "download.json") as f:
+        assert json.load(f)["SPOT|BNBBTC|1m"] == END_TS + 1
+
+
+@pytest.mark.asyncio
+async def test_download_earlier_start(tmp_path):
+    client = AsyncClient("api_key", "api_secret")
+    calls = []
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, END_TS, calls=calls)
+
+    def downloader(start_str):
+        return KlineDownloader(
+            client, tmp_path, ["BNBBTC"], ["1m"], start_str=start_str, end_str=END_TS
+        )
+
+    with patch.object(client, "_klines", AsyncMock(side_effect=fake)):
+        await downloader(FIRST_OPEN_TIME + 2000 * 60000).run()
+        # a run with an earlier start fetches the older klines despite the checkpoint
+        calls.clear()
+        progress = await downloader(FIRST_OPEN_TIME).run()
+    await client.close_connection()
+
+    assert progress.klines == 2000
+    assert calls[0]["startTime"] == FIRST_OPEN_TIME
+    store = KlineStore(tmp_path)
+    assert store.missing_ranges("BNBBTC", "1m", FIRST_OPEN_TIME, END_TS + 1) == []
+
+    with pytest.raises(ValueError):
+        KlineDownloader(client, tmp_path, ["BNBBTC"], ["1m"], window_concurrency=0)
+
+
+@pytest.mark.asyncio
+async def test_download_later_start(tmp_path):
+    client = AsyncClient("api_key", "api_secret", kline_cache_dir=tmp_path)
+    calls = []
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, END_TS, calls=calls)
+
+    def downloader(start_str, end_str):
+        return KlineDownloader(
+            client, tmp_path, ["BNBBTC"], ["1m"], start_str=start_str, end_str=end_str
+        )
+
+    with patch.object(client, "_klines", AsyncMock(side_effect=fake)):
+        await downloader(FIRST_OPEN_TIME, FIRST_OPEN_TIME + 999 * 60000).run()
+        # the earliest kline is kept for a restart before the client is closed
+        assert (tmp_path / "earliest_timestamps.json").exists()
+        # a start after the checkpoint doesn't fetch the klines between them
+        calls.clear()
+        progress = await downloader(FIRST_OPEN_TIME + 2000 * 60000, END_TS).run()
+    await client.close_connection()
+
+    assert progress.klines == 1000
+    assert calls[0]["startTime"] == FIRST_OPEN_TIME + 2000 * 60000
+    store = KlineStore(tmp_path)
+    assert store.missing_ranges("BNBBTC", "1m", FIRST_OPEN_TIME, END_TS + 1) == [
+        (FIRST_OPEN_TIME + 999 * 60000 + 1, FIRST_OPEN_TIME + 2000 * 60000)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_download_symbol_filter(tmp_path):
+    client = AsyncClient("api_key", "api_secret")
+    info = {
+        "symbols": [
+            {"symbol": "BNBUSDT", "status": "TRADING", "quoteAsset": "USDT"},
+            {"symbol": "BNBBTC", "status": "TRADING", "quoteAsset": "BTC"},
+            {"symbol": "LUNAUSDT", "status": "BREAK", "quoteAsset": "USDT"},
+        ]
+    }
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, END_TS)
+    with patch.object(client, "_klines", AsyncMock(side_effect=fake)), patch.object(
+        client, "get_exchange_info", AsyncMock(return_value=info)
+    ):
+        downloader = KlineDownloader(
+            client, tmp_path, trading_symbols("usdt"), ["1h"], end_str=END_TS
+        )
+        assert await downloader.series() == [(HistoricalKlinesType.SPOT, "BNBUSDT", "1h")]
+    await client.close_connection()
+
+
+def test_main_arguments(tmp_path):
+    with patch("binance.download.KlineDownloader") as downloader, patch(
+        "binance.download.AsyncClient.create", AsyncMock()
+    ):
+        downloader.return_value.run = AsyncMock()
+        main(
+            [
+                str(tmp_path),
+                "--symbols",
+                "BNBBTC",
+                "--intervals",
+                "1m",
+                "1d",
+                "--types",
+                "spot",
+                "futures",
+                "--start",
+                str(FIRST_OPEN_TIME),
+            ]
+        )
+    args, kwargs = downloader.call_args
+    assert args[2:] == (["BNBBTC"], ["1m", "1d"])
+    assert kwargs["start_str"] == FIRST_OPEN_TIME
+    assert kwargs["klines_types"] == [
+        HistoricalKlinesType.SPOT,
+        HistoricalKlinesType.FUTURES,
+    ]
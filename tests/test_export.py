@@ -0,0 +1,128 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from binance.async_client import AsyncClient
+from binance.export import (
+    DAY_MS,
+    FORMAT_ARROW,
+    export_aggregate_trades,
+    export_klines,
+    export_trades,
+)
+
+from .utils import (
+    fake_agg_trades_endpoint,
+    fake_historical_trades_endpoint,
+    fake_klines_endpoint,
+)
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+# 2018-03-01 00:00:00 UTC
+FIRST_OPEN_TIME = 1519862400000
+
+
+def klines_client(last_open_time):
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, last_open_time, timeframe=3600000)
+    client = MagicMock()
+    client.get_historical_klines_generator.side_effect = (
+        lambda symbol, interval, start_str, end_str, klines_type: iter(
+            fake(startTime=start_str, endTime=end_str, limit=10000)
+        )
+    )
+    return client
+
+
+def test_export_klines_partitions_and_resume(tmp_path):
+    end_ts = FIRST_OPEN_TIME + 2 * DAY_MS + 5 * 3600000
+    client = klines_client(end_ts)
+    written = export_klines(client, tmp_path, "BNBBTC", "1h", FIRST_OPEN_TIME, end_ts)
+
+    directory = tmp_path / "klines" / "spot" / "1h" / "symbol=BNBBTC"
+    assert [p.name for p in written] == [
+        "date=2018-03-01.parquet",
+        "date=2018-03-02.parquet",
+        "date=2018-03-03.partial.parquet",
+    ]
+    table = pq.read_table(directory / "date=2018-03-01.parquet")
+    assert table.num_rows == 24
+    assert table.schema.field("open_time").type == pa.int64()
+    assert table.schema.field("close").type == pa.float64()
+    assert pq.read_table(directory / "date=2018-03-03.partial.parquet").num_rows == 6
+
+    # a later export resumes after the last completed day and replaces the partial day
+    end_ts = FIRST_OPEN_TIME + 3 * DAY_MS - 1
+    client = klines_client(end_ts)
+    written = export_klines(client, tmp_path, "BNBBTC", "1h", FIRST_OPEN_TIME, end_ts)
+    assert client.get_historical_klines_generator.call_args[0][2] == FIRST_OPEN_TIME + 2 * DAY_MS
+    assert [p.name for p in written] == ["date=2018-03-03.parquet"]
+    assert sorted(p.name for p in directory.iterdir()) == [
+        "date=2018-03-01.parquet",
+        "date=2018-03-02.parquet",
+        "date=2018-03-03.parquet",
+    ]
+
+
+def test_export_aggregate_trades_arrow(tmp_path):
+    trades = [
+        {
+            "a": i,
+            "p": "0.01633102",
+            "q": "4.70443515",
+            "f": i,
+            "l": i,
+            "T": FIRST_OPEN_TIME + i * 3600000,
+            "m": True,
+            "M": True,
+        }
+        for i in range(60)
+    ]
+    client = MagicMock()
+    client.aggregate_trade_iter.return_value = iter(trades)
+    end_ts = FIRST_OPEN_TIME + DAY_MS * 2 - 1
+    written = export_aggregate_trades(
+        client, tmp_path, "BNBBTC", FIRST_OPEN_TIME, end_ts, fmt=FORMAT_ARROW, row_group_size=10
+    )
+
+    assert [p.name for p in written] == ["date=2018-03-01.arrow", "date=2018-03-02.arrow"]
+    with pa.ipc.open_file(written[0]) as reader:
+        table = reader.read_all()
+        # 24 trades in row groups of 10
+        assert reader.num_record_batches == 3
+    assert table.num_rows == 24
+    assert table.column("price").to_pylist()[0] == 0.01633102
+    assert table.column("is_buyer_maker").type == pa.bool_()
+
+
+@pytest.mark.asyncio
+async def test_export_trades(tmp_path):
+    client = AsyncClient("api_key", "api_secret")
+    # two trades every minute for two and a half days
+    agg_ids = range(int(DAY_MS * 2.5 // 60000))
+    trade_ids = range(len(agg_ids) * 2)
+    with patch.object(
+        client,
+        "get_aggregate_trades",
+        AsyncMock(side_effect=fake_agg_trades_endpoint(agg_ids, spacing=60000)),
+    ), patch.object(
+        client,
+        "get_historical_trades",
+        AsyncMock(side_effect=fake_historical_trades_endpoint(trade_ids, spacing=60000)),
+    ):
+        end_ts = FIRST_OPEN_TIME + 2 * DAY_MS - 1
+        written = await export_trades(
+            client, tmp_path, "BNBBTC", FIRST_OPEN_TIME, end_ts, concurrency=8
+        )
+        assert [p.name for p in written] == ["date=2018-03-01.parquet", "date=2018-03-02.parquet"]
+        # completed days aren't fetched again
+        client.get_historical_trades.reset_mock()
+        assert await export_trades(client, tmp_path, "BNBBTC", FIRST_OPEN_TIME, end_ts) == []
+        client.get_historical_trades.assert_not_called()
+    await client.close_connection()
+
+    table = pq.read_table(written[1])
+    assert table.num_rows == DAY_MS // 60000 * 2
+    assert table.column("trade_id").to_pylist()[0] == DAY_MS // 60000 * 2
+    assert table.column("quote_quantity").type == pa.float64()
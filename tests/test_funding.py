@@ -0,0 +1,150 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from binance.async_client import AsyncClient
+from binance.client import Client
+from binance.enums import HistoricalKlinesType
+from binance.funding import (
+    FundingRateStore,
+    funding_report,
+    join_funding_klines,
+    sync_funding_rates,
+)
+from binance.ratelimit import MARKET_FUTURES_COIN
+
+from .utils import fake_funding_rate_endpoint, fake_klines_endpoint
+
+FIRST_TIME = 1519862400000
+HOUR = 60 * 60 * 1000
+FUNDING_INTERVAL = 8 * HOUR
+LAST_TIME = FIRST_TIME + 2999 * FUNDING_INTERVAL
+
+
+def perpetual(symbol, pair, contract_type="PERPETUAL", status="TRADING"):
+    return {"symbol": symbol, "pair": pair, "contractType": contract_type, "status": status}
+
+
+EXCHANGE_INFO = {
+    "symbols": [
+        perpetual("BTCUSDT", "BTCUSDT"),
+        perpetual("ETHUSDT", "ETHUSDT"),
+        perpetual("BTCUSDT_240628", "BTCUSDT", contract_type="CURRENT_QUARTER"),
+        perpetual("LUNAUSDT", "LUNAUSDT", status="SETTLING"),
+    ]
+}
+
+
+def test_funding_rate_iter():
+    client = Client("api_key", "api_secret", ping=False)
+    calls = []
+    fake = fake_funding_rate_endpoint(FIRST_TIME, LAST_TIME, calls=calls)
+    with patch.object(client, "futures_coin_funding_rate", side_effect=fake):
+        rates = list(
+            client.futures_funding_rate_iter(
+                "BTCUSD_PERP", FIRST_TIME + 1, market=MARKET_FUTURES_COIN
+            )
+        )
+
+    assert len(rates) == 2999
+    assert rates[0]["fundingTime"] == FIRST_TIME + FUNDING_INTERVAL + 3
+    assert [call["startTime"] for call in calls] == [
+        FIRST_TIME + 1,
+        rates[999]["fundingTime"] + 1,
+        rates[1999]["fundingTime"] + 1,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sync_funding_rates_incremental(tmp_path):
+    client = AsyncClient("api_key", "api_secret")
+    store = FundingRateStore(tmp_path)
+    calls = []
+    with patch.object(
+        client, "futures_exchange_info", AsyncMock(return_value=EXCHANGE_INFO)
+    ), patch.object(
+        client,
+        "futures_funding_rate",
+        AsyncMock(side_effect=fake_funding_rate_endpoint(FIRST_TIME, LAST_TIME, calls=calls)),
+    ):
+        assert await sync_funding_rates(client, store) == {"BTCUSDT": 3000, "ETHUSDT": 3000}
+        calls.clear()
+        with patch.object(
+            client,
+            "futures_funding_rate",
+            AsyncMock(
+                side_effect=fake_funding_rate_endpoint(
+                    FIRST_TIME, LAST_TIME + FUNDING_INTERVAL, calls=calls
+                )
+            ),
+        ):
+            assert await sync_funding_rates(client, store, ["BTCUSDT"]) == {"BTCUSDT": 1}
+    await client.close_connection()
+
+    assert calls == [
+        {"symbol": "BTCUSDT", "startTime": LAST_TIME + 4, "endTime": None, "limit": 1000}
+    ]
+    rates = store.get_funding_rates("btcusdt")
+    assert len(rates) == 3001
+    assert rates[-1] == {
+        "symbol": "BTCUSDT",
+        "fundingTime": LAST_TIME + FUNDING_INTERVAL + 3,
+        "fundingRate": "0.00010000",
+        "markPrice": "34287.54619963",
+    }
+    assert store.symbols() == ["BTCUSDT", "ETHUSDT"]
+
+
+def test_join_funding_klines():
+    rates = [
+        {"fundingTime": FIRST_TIME + 2, "fundingRate": "0.0001"},
+        {"fundingTime": FIRST_TIME + HOUR, "fundingRate": "-0.0002"},
+    ]
+    mark = [[FIRST_TIME, "101.5"], [FIRST_TIME + HOUR, "102.5"]]
+    index = [[FIRST_TIME, "101.0"]]
+    rows = join_funding_klines(rates, mark, index)
+    assert [(row["markPrice"], row["indexPrice"]) for row in rows] == [
+        (101.5, 101.0),
+        (102.5, None),
+    ]
+    assert rows[1]["fundingRate"] == -0.0002
+
+
+@pytest.mark.asyncio
+async def test_funding_report(tmp_path):
+    client = AsyncClient("api_key", "api_secret")
+    store = FundingRateStore(tmp_path)
+    klines_calls = []
+    last_time = FIRST_TIME + 99 * FUNDING_INTERVAL
+    fake_klines = fake_klines_endpoint(FIRST_TIME, last_time + HOUR, HOUR)
+
+    async def _klines(klines_type=None, **params):
+        klines_calls.append((klines_type, params))
+        return fake_klines(**params)
+
+    with patch.object(
+        client, "futures_exchange_info", AsyncMock(return_value=EXCHANGE_INFO)
+    ), patch.object(
+        client,
+        "futures_funding_rate",
+        AsyncMock(side_effect=fake_funding_rate_endpoint(FIRST_TIME, last_time)),
+    ), patch.object(client, "_klines", AsyncMock(side_effect=_klines)):
+        report = await funding_report(client, store, ["BTCUSDT"], start_str=FIRST_TIME)
+        requested = len(klines_calls)
+        # the klines are in the local store on the second run
+        await funding_report(client, store, ["BTCUSDT"], start_str=FIRST_TIME)
+    await client.close_connection()
+
+    rows = report["BTCUSDT"]
+    assert len(rows) == 100
+    assert rows[0] == {
+        "fundingTime": FIRST_TIME + 3,
+        "fundingRate": 0.0001,
+        "markPrice": 1.0,
+        "indexPrice": 1.0,
+    }
+    assert {klines_type for klines_type, _ in klines_calls} == {
+        HistoricalKlinesType.FUTURES_MARK_PRICE,
+        HistoricalKlinesType.FUTURES_INDEX_PRICE,
+    }
+    assert len(klines_calls) == requested
@@ -0,0 +1,154 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from binance.async_client import AsyncClient
+from binance.client import Client
+from binance.gaps import check_store, find_gaps, repair_store, repair_store_async
+from binance.store import KlineStore
+
+from .utils import fake_klines_endpoint
+
+FIRST_OPEN_TIME = 1519862400000
+MINUTE = 60000
+
+
+def test_find_gaps():
+    klines = fake_klines_endpoint(FIRST_OPEN_TIME, FIRST_OPEN_TIME + 99 * MINUTE)(limit=100)
+    assert not find_gaps(klines, "1m")
+
+    broken = klines[:10] + klines[20:50] + [klines[49]] + klines[51:]
+    broken.append([FIRST_OPEN_TIME + 30 * MINUTE + 1] + klines[0][1:])
+    gaps = find_gaps(broken, "1m", FIRST_OPEN_TIME - 2 * MINUTE, FIRST_OPEN_TIME + 101 * MINUTE)
+    assert gaps.missing == [
+        (FIRST_OPEN_TIME - 2 * MINUTE, FIRST_OPEN_TIME),
+        (FIRST_OPEN_TIME + 10 * MINUTE, FIRST_OPEN_TIME + 20 * MINUTE),
+        (FIRST_OPEN_TIME + 50 * MINUTE, FIRST_OPEN_TIME + 51 * MINUTE),
+        (FIRST_OPEN_TIME + 100 * MINUTE, FIRST_OPEN_TIME + 101 * MINUTE + 1),
+    ]
+    assert gaps.missing_count == 15
+    assert gaps.duplicates == [FIRST_OPEN_TIME + 49 * MINUTE]
+    assert gaps.misaligned == [FIRST_OPEN_TIME + 30 * MINUTE + 1]
+
+    # ranges known to be empty on the exchange aren't reported
+    gaps = find_gaps(
+        klines[:5] + klines[20:],
+        "1m",
+        known_empty=[(FIRST_OPEN_TIME + 5 * MINUTE, FIRST_OPEN_TIME + 15 * MINUTE)],
+    )
+    assert gaps.missing == [(FIRST_OPEN_TIME + 15 * MINUTE, FIRST_OPEN_TIME + 20 * MINUTE)]
+
+
+def outage_endpoint(calls=None):
+    # the exchange has no klines from minute 300 to 359
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, FIRST_OPEN_TIME + 999 * MINUTE, calls=calls)
+
+    def _klines(**params):
+        return [
+            k
+            for k in fake(**params)
+            if not FIRST_OPEN_TIME + 300 * MINUTE <= k[0] < FIRST_OPEN_TIME + 360 * MINUTE
+        ]
+
+    return _klines
+
+
+def test_repair_store(tmp_path):
+    client = Client("api_key", "api_secret", ping=False)
+    store = KlineStore(tmp_path)
+    end_ts = FIRST_OPEN_TIME + 999 * MINUTE
+    klines = outage_endpoint()(limit=1000)
+    # our own outage lost minutes 100 to 149
+    store.add_klines("BNBBTC", "1m", klines[:100] + klines[150:])
+
+    calls = []
+    with patch.object(client, "_klines", side_effect=outage_endpoint(calls)):
+        gaps = repair_store(client, store, "BNBBTC", "1m", FIRST_OPEN_TIME, end_ts)
+        assert gaps.missing == [
+            (FIRST_OPEN_TIME + 100 * MINUTE, FIRST_OPEN_TIME + 150 * MINUTE),
+            (FIRST_OPEN_TIME + 300 * MINUTE, FIRST_OPEN_TIME + 360 * MINUTE),
+        ]
+        assert not check_store(store, "BNBBTC", "1m", FIRST_OPEN_TIME, end_ts)
+        assert store.empty_ranges("BNBBTC", "1m") == [
+            (FIRST_OPEN_TIME + 300 * MINUTE, FIRST_OPEN_TIME + 360 * MINUTE)
+        ]
+
+        # the exchange outage isn't refetched again
+        calls.clear()
+        assert not repair_store(client, store, "BNBBTC", "1m", FIRST_OPEN_TIME, end_ts)
+        assert calls == []
+
+    assert len(store.get_klines("BNBBTC", "1m")) == 940
+
+
+@pytest.mark.asyncio
+async def test_repair_store_async(tmp_path):
+    client = AsyncClient("api_key", "api_secret")
+    store = KlineStore(tmp_path)
+    end_ts = FIRST_OPEN_TIME + 999 * MINUTE
+    klines = outage_endpoint()(limit=1000)
+    store.add_klines("BNBBTC", "1m", klines[:100] + klines[150:200] + klines[250:])
+
+    with patch.object(client, "_klines", AsyncMock(side_effect=outage_endpoint())):
+        gaps = await repair_store_async(
+            client, store, "BNBBTC", "1m", FIRST_OPEN_TIME, end_ts, concurrency=3
+        )
+    await client.close_connection()
+
+    assert gaps.missing_count == 160
+    assert not check_store(store, "BNBBTC", "1m", FIRST_OPEN_TIME, end_ts)
+    assert len(store.get_klines("BNBBTC", "1m")) == 940
+
+
+@pytest.mark.asyncio
+async def test_repair_store_async_concurrency(tmp_path):
+    client = AsyncClient("api_key", "api_secret")
+    store = KlineStore(tmp_path)
+    end_ts = FIRST_OPEN_TIME + 4999 * MINUTE
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, end_ts)
+    in_flight = []
+    peak = []
+
+    async def _klines(**params):
+        in_flight.append(params)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.001)
+        in_flight.remove(params)
+        return fake(**params)
+
+    store.add_klines("BNBBTC", "1m", fake(startTime=FIRST_OPEN_TIME + 2000 * MINUTE, limit=1000))
+    with patch.object(client, "_klines", AsyncMock(side_effect=_klines)):
+        # two windows of two pages each
+        await repair_store_async(
+            client, store, "BNBBTC", "1m", FIRST_OPEN_TIME, end_ts, concurrency=2
+        )
+    await client.close_connection()
+
+    assert len(store.get_klines("BNBBTC", "1m")) == 5000
+    assert max(peak) == 2
+
+
+def test_repair_store_recent_klines(tmp_path):
+    client = Client("api_key", "api_secret", ping=False)
+    store = KlineStore(tmp_path)
+    published = fake_klines_endpoint(FIRST_OPEN_TIME, FIRST_OPEN_TIME + 999 * MINUTE)
+    store.add_klines("BNBBTC", "1m", published(limit=1000)[:995])
+
+    def unpublished(**params):
+        # the last two closed klines aren't returned by REST yet
+        return [k for k in published(**params) if k[0] < FIRST_OPEN_TIME + 998 * MINUTE]
+
+    now = (FIRST_OPEN_TIME + 1000 * MINUTE + 30000) / 1000
+    with patch("binance.gaps.time.time", return_value=now):
+        with patch.object(client, "_klines", side_effect=unpublished):
+            gaps = repair_store(client, store, "BNBBTC", "1m", FIRST_OPEN_TIME + 900 * MINUTE)
+        assert gaps.missing_count == 5
+        assert store.empty_ranges("BNBBTC", "1m") == []
+        gaps = check_store(store, "BNBBTC", "1m", FIRST_OPEN_TIME + 900 * MINUTE)
+        assert gaps.missing_count == 2
+
+        # the klines are fetched once REST has them
+        with patch.object(client, "_klines", side_effect=published):
+            repair_store(client, store, "BNBBTC", "1m", FIRST_OPEN_TIME + 900 * MINUTE)
+        assert not check_store(store, "BNBBTC", "1m", FIRST_OPEN_TIME + 900 * MINUTE)
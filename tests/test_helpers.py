@@ -0,0 +1,76 @@
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import dateparser
+import pytest
+
+from binance import helpers
+from binance.exceptions import UnknownDateFormat
+from binance.helpers import convert_ts_str, date_to_milliseconds
+
+
+def dateparser_ms(date_str):
+    d = dateparser.parse(date_str, settings={"TIMEZONE": "UTC"})
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=timezone.utc)
+    return int(d.timestamp() * 1000)
+
+
+@pytest.mark.parametrize(
+    "date_str",
+    [
+        "1519862400000",
+        "1519862400",
+        "1 Jan, 2024",
+        "January 01, 2018",
+        "1 Jan 2024 UTC",
+        "Jan 1, 2024",
+        "2024/01/05",
+        "2024-01-01",
+        "2024-01-01 12:30:00",
+        "2024-01-01T12:30:00Z",
+        "2024-01-01T12:30:00.250Z",
+        "2024-01-01T12:30:00+02:00",
+    ],
+)
+def test_fast_path_matches_dateparser(date_str):
+    with patch.object(helpers, "_parse_dateparser", side_effect=AssertionError):
+        assert date_to_milliseconds(date_str) == dateparser_ms(date_str)
+
+
+def test_relative_and_objects():
+    now = int(time.time() * 1000)
+    assert abs(date_to_milliseconds("now UTC") - now) < 1000
+    assert abs(date_to_milliseconds("11 hours ago UTC") - (now - 11 * 3600 * 1000)) < 1000
+    assert abs(date_to_milliseconds("2 weeks ago") - (now - 14 * 86400 * 1000)) < 1000
+
+    aware = datetime(2024, 1, 1, 2, tzinfo=timezone(timedelta(hours=2)))
+    assert convert_ts_str(aware) == 1704067200000
+    assert convert_ts_str(datetime(2024, 1, 1)) == 1704067200000
+    assert convert_ts_str(date(2024, 1, 1)) == 1704067200000
+    assert convert_ts_str(1704067200000) == 1704067200000
+    assert convert_ts_str(None) is None
+
+
+def test_dateparser_fallback_cached():
+    with patch.object(dateparser, "parse", wraps=dateparser.parse) as parse:
+        first = date_to_milliseconds("1 month ago UTC")
+        assert date_to_milliseconds("1 month ago UTC") == first
+        assert parse.call_count == 1
+        with patch.object(helpers, "DATEPARSER_CACHE_TTL", 0):
+            date_to_milliseconds("1 month ago UTC")
+        assert parse.call_count == 2
+    with pytest.raises(UnknownDateFormat):
+        date_to_milliseconds("not a date")
+
+
+def test_dateparser_imported_lazily():
+    code = (
+        "import sys, binance.client, binance.helpers as h; "
+        "h.date_to_milliseconds('1 Jan, 2024'); "
+        "assert 'dateparser' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
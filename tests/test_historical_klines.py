@@ -5,6 +5,8 @@ from binance.client import Client
 import pytest
 import requests_mock
 
+from .utils import fake_klines_endpoint
+
 client = Client("api_key", "api_secret", ping=False)
 
 
@@ -341,3 +343,192 @@ def test_start_and_limit():
             limit=5,
         )
         assert len(klines) == 5
+
+
+@pytest.mark.asyncio
+async def test_historical_klines_concurrent():
+    """Test concurrent windows are reassembled in order and stop at the earliest timestamp"""
+    from unittest.mock import AsyncMock, patch
+    from binance.async_client import AsyncClient
+
+    first_open_time = 1519862400000
+    last_open_time = first_open_time + 4500 * 60000
+    calls = []
+    async_client = AsyncClient("api_key", "api_secret")
+    fake = fake_klines_endpoint(first_open_time, last_open_time, calls=calls)
+    with patch.object(async_client, "_klines", AsyncMock(side_effect=fake)):
+        sequential = await async_client.get_historical_klines(
+            "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, start_str=0, end_str=last_open_time
+        )
+        calls.clear()
+        klines = await async_client.get_historical_klines(
+            "BNBBTC",
+            Client.KLINE_INTERVAL_1MINUTE,
+            start_str=0,
+            end_str=last_open_time,
+            concurrency=3,
+        )
+    await async_client.close_connection()
+
+    assert klines == sequential
+    assert len(klines) == 4501
+    open_times = [k[0] for k in klines]
+    assert open_times == sorted(set(open_times))
+    # the earliest timestamp is cached by the first call, so only five windows starting at the listing
+    assert len(calls) == 5
+    assert min(c["startTime"] for c in calls) == first_open_time
+
+
+@pytest.mark.asyncio
+async def test_historical_klines_concurrent_limit():
+    """Test concurrent fetch respects the limit"""
+    from unittest.mock import AsyncMock, patch
+    from binance.async_client import AsyncClient
+
+    first_open_time = 1519862400000
+    async_client = AsyncClient("api_key", "api_secret")
+    fake = fake_klines_endpoint(first_open_time, first_open_time + 5000 * 60000)
+    with patch.object(async_client, "_klines", AsyncMock(side_effect=fake)):
+        klines = await async_client.get_historical_klines(
+            "BNBBTC",
+            Client.KLINE_INTERVAL_1MINUTE,
+            start_str=first_open_time,
+            limit=1500,
+            concurrency=2,
+        )
+    await async_client.close_connection()
+
+    assert len(klines) == 1500
+    assert klines[-1][0] == first_open_time + 1499 * 60000
+
+
+def test_earliest_valid_timestamp_cached(tmp_path):
+    """Test the earliest timestamp probe is only requested once and persisted"""
+    from binance.store import EarliestTimestampCache
+
+    cache_path = tmp_path / "earliest.json"
+    cached_client = Client("api_key", "api_secret", ping=False)
+    cached_client.earliest_timestamp_cache = EarliestTimestampCache(cache_path)
+    first_open_time = 1519862400000
+    calls = []
+    fake = fake_klines_endpoint(first_open_time, first_open_time + 10 * 60000, calls=calls)
+    from unittest.mock import patch
+
+    with patch.object(cached_client, "_klines", side_effect=fake):
+        for _ in range(2):
+            klines = cached_client.get_historical_klines(
+                "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, start_str=0
+            )
+            assert len(klines) == 11
+    probes = [c for c in calls if c["limit"] == 1]
+    assert len(probes) == 1
+    assert len(calls) == 3
+
+    # new entries are only saved by flush, called when the connection is closed
+    assert not cache_path.exists()
+    cached_client.close_connection()
+    assert cache_path.exists()
+    with patch.object(cached_client.earliest_timestamp_cache, "save") as save:
+        cached_client.close_connection()
+    save.assert_not_called()
+
+    # a new cache loads the persisted value
+    reloaded = EarliestTimestampCache(cache_path)
+    assert reloaded.get("BNBBTC", Client.KLINE_INTERVAL_1MINUTE) == first_open_time
+    reloaded.invalidate(symbol="BNBBTC")
+    assert reloaded.get("BNBBTC", Client.KLINE_INTERVAL_1MINUTE) is None
+    assert EarliestTimestampCache(cache_path).get("BNBBTC", "1m") is None
+
+
+def test_index_price_klines_requested_by_pair():
+    """Test the symbol of index price klines is sent as the pair"""
+    from unittest.mock import patch
+
+    from binance.enums import HistoricalKlinesType
+
+    with patch.object(client, "futures_index_price_klines", return_value=[]) as endpoint:
+        client._klines(
+            klines_type=HistoricalKlinesType.FUTURES_INDEX_PRICE,
+            symbol="BTCUSDT",
+            interval="1h",
+            limit=1,
+        )
+    endpoint.assert_called_once_with(pair="BTCUSDT", interval="1h", limit=1)
+
+
+def test_historical_klines_generator_prefetch():
+    """Test pages are fetched ahead on a background thread, up to the prefetch depth"""
+    import threading
+    from unittest.mock import patch
+
+    first_open_time = 1519862400000
+    last_open_time = first_open_time + 4999 * 60000
+    calls = []
+    fake = fake_klines_endpoint(first_open_time, last_open_time, calls=calls)
+    # set once the endpoint has been called that many times
+    called = {n: threading.Event() for n in range(1, 6)}
+
+    def counting(**params):
+        klines = fake(**params)
+        if len(calls) in called:
+            called[len(calls)].set()
+        return klines
+
+    prefetch_client = Client("api_key", "api_secret", ping=False)
+    with patch.object(prefetch_client, "_klines", side_effect=fake):
+        expected = list(
+            prefetch_client.get_historical_klines_generator(
+                "BNBBTC", "1m", first_open_time, last_open_time
+            )
+        )
+    calls.clear()
+    with patch.object(prefetch_client, "_klines", side_effect=counting):
+        klines = prefetch_client.get_historical_klines_generator(
+            "BNBBTC", "1m", first_open_time, last_open_time, prefetch=2
+        )
+        assert next(klines) == expected[0]
+        # the page being consumed, 2 pages in the buffer and 1 waiting for room, the generator
+        # pauses for a second after every third request
+        assert called[4].wait(10)
+        assert not called[5].wait(0.2)
+        assert [expected[0]] + list(klines) == expected
+
+        calls.clear()
+        for event in called.values():
+            event.clear()
+        klines = prefetch_client.get_historical_klines_generator(
+            "BNBBTC", "1m", first_open_time, last_open_time, prefetch=1
+        )
+        next(klines)
+        assert called[3].wait(10)
+        klines.close()
+        for thread in threading.enumerate():
+            if thread.name == "binance-read-ahead":
+                thread.join(10)
+        assert len(calls) == 3
+        assert not [t for t in threading.enumerate() if t.name == "binance-read-ahead"]
+
+
+def test_historical_klines_generator_prefetch_error():
+    """Test errors of the background thread are raised in the consumer"""
+    from unittest.mock import patch
+
+    from binance.exceptions import BinanceRequestException
+
+    first_open_time = 1519862400000
+    fake = fake_klines_endpoint(first_open_time, first_open_time + 4999 * 60000)
+
+    def failing(**params):
+        if params["startTime"] > first_open_time + 1000 * 60000:
+            raise BinanceRequestException("timeout")
+        return fake(**params)
+
+    prefetch_client = Client("api_key", "api_secret", ping=False)
+    klines = []
+    with patch.object(prefetch_client, "_klines", side_effect=failing):
+        with pytest.raises(BinanceRequestException):
+            for kline in prefetch_client.get_historical_klines_generator(
+                "BNBBTC", "1m", first_open_time, prefetch=3
+            ):
+                klines.append(kline)
+    assert len(klines) == 2000
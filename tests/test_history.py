@@ -0,0 +1,164 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from binance.async_client import AsyncClient
+from binance.client import Client
+from binance.history import (
+    DAY,
+    HISTORY_INCOME,
+    HISTORY_ORDERS,
+    HISTORY_TRADES,
+    account_history,
+    account_history_async,
+)
+from binance.ratelimit import MARKET_FUTURES, MARKET_SPOT
+
+FIRST_TIME = 1704067200000
+END_TIME = FIRST_TIME + 20 * DAY
+
+
+def make_rows(symbols, count=3000, key="id"):
+    # rows spread over the range, with bursts sharing a timestamp across page boundaries
+    rows = []
+    for i in range(count):
+        for j, symbol in enumerate(symbols):
+            rows.append(
+                {
+                    "symbol": symbol,
+                    key: i * len(symbols) + j,
+                    "incomeType": "FUNDING_FEE",
+                    "time": FIRST_TIME + (i // 10) * (END_TIME - FIRST_TIME) // (count // 10),
+                }
+            )
+    return rows
+
+
+def fake_history_endpoint(rows, window_ms, limit, calls=None):
+    """Serve account history like the trades, orders and income endpoints"""
+
+    def _history(**params):
+        if calls is not None:
+            calls.append(params)
+        for id_param, key in (("fromId", "id"), ("orderId", "orderId")):
+            if id_param in params:
+                assert "startTime" not in params and "endTime" not in params
+                selected = [
+                    row
+                    for row in rows
+                    if row[key] >= params[id_param] and params["symbol"] == row["symbol"]
+                ]
+                return sorted(selected, key=lambda row: row[key])[: params["limit"]]
+        assert params["endTime"] - params["startTime"] < window_ms
+        assert params["limit"] <= limit
+        selected = [
+            row
+            for row in rows
+            if params["startTime"] <= row["time"] <= params["endTime"]
+            and params.get("symbol") in (None, row["symbol"])
+        ]
+        return sorted(selected, key=lambda row: row["time"])[: params["limit"]]
+
+    return _history
+
+
+def test_account_history_futures_trades():
+    client = Client("api_key", "api_secret", ping=False)
+    rows = make_rows(["BTCUSDT", "ETHUSDT", "BNBUSDT"])
+    calls = []
+    fake = fake_history_endpoint(rows, 7 * DAY, 1000, calls)
+    with patch.object(client, "futures_account_trades", side_effect=fake):
+        trades = list(
+            account_history(
+                client, HISTORY_TRADES, FIRST_TIME, END_TIME, ["BTCUSDT", "ETHUSDT"]
+            )
+        )
+
+    expected = [row for row in rows if row["symbol"] != "BNBUSDT"]
+    assert len(trades) == len(expected) == 6000
+    assert [t["time"] for t in trades] == sorted(t["time"] for t in expected)
+    assert {(t["symbol"], t["id"]) for t in trades} == {(t["symbol"], t["id"]) for t in expected}
+    assert {call["symbol"] for call in calls} == {"BTCUSDT", "ETHUSDT"}
+
+
+def test_account_history_same_timestamp_pages_by_id():
+    client = Client("api_key", "api_secret", ping=False)
+    # 2500 trades in the same millisecond, more than two pages
+    rows = [
+        {"symbol": "BTCUSDT", "id": i, "time": FIRST_TIME + (i >= 500) + (i >= 3000)}
+        for i in range(3900)
+    ]
+    calls = []
+    fake = fake_history_endpoint(rows, 7 * DAY, 1000, calls)
+    with patch.object(client, "futures_account_trades", side_effect=fake):
+        trades = list(account_history(client, HISTORY_TRADES, FIRST_TIME, END_TIME, ["BTCUSDT"]))
+
+    assert [trade["id"] for trade in trades] == list(range(3900))
+    assert [call.get("fromId") for call in calls if "fromId" in call] == [1500, 2500]
+
+
+def test_account_history_income_key():
+    client = Client("api_key", "api_secret", ping=False)
+    # the same transaction id on two symbols
+    rows = [
+        {"symbol": symbol, "tranId": 1, "incomeType": "FUNDING_FEE", "time": FIRST_TIME}
+        for symbol in ("BTCUSDT", "ETHUSDT")
+    ]
+    fake = fake_history_endpoint(rows, 7 * DAY, 1000)
+    with patch.object(client, "futures_income_history", side_effect=fake):
+        income = list(account_history(client, HISTORY_INCOME, FIRST_TIME, END_TIME))
+
+    assert [row["symbol"] for row in income] == ["BTCUSDT", "ETHUSDT"]
+
+
+def test_account_history_requires_symbols():
+    client = Client("api_key", "api_secret", ping=False)
+    with pytest.raises(ValueError):
+        next(account_history(client, HISTORY_ORDERS, FIRST_TIME, market=MARKET_SPOT))
+    with pytest.raises(ValueError):
+        next(
+            account_history(client, HISTORY_INCOME, FIRST_TIME, ["BTCUSDT"], market=MARKET_SPOT)
+        )
+
+
+@pytest.mark.asyncio
+async def test_account_history_async_income():
+    client = AsyncClient("api_key", "api_secret")
+    rows = make_rows(["BTCUSDT", "ETHUSDT"], key="tranId")
+    calls = []
+    fake = fake_history_endpoint(rows, 7 * DAY, 1000, calls)
+    with patch.object(client, "futures_income_history", AsyncMock(side_effect=fake)):
+        income = [
+            row
+            async for row in account_history_async(
+                client,
+                HISTORY_INCOME,
+                FIRST_TIME,
+                END_TIME,
+                concurrency=3,
+                incomeType="FUNDING_FEE",
+            )
+        ]
+    await client.close_connection()
+
+    assert len(income) == len(rows)
+    assert [row["time"] for row in income] == sorted(row["time"] for row in rows)
+    assert all("symbol" not in call and call["incomeType"] == "FUNDING_FEE" for call in calls)
+    assert client.get_weight_limiter(MARKET_FUTURES).used_weight == 30 * len(calls)
+
+
+@pytest.mark.asyncio
+async def test_account_history_async_spot_orders():
+    client = AsyncClient("api_key", "api_secret")
+    rows = make_rows(["BNBBTC", "ETHBTC"], count=500, key="orderId")
+    fake = fake_history_endpoint(rows, DAY, 1000)
+    with patch.object(client, "get_all_orders", AsyncMock(side_effect=fake)):
+        orders = [
+            row
+            async for row in account_history_async(
+                client, HISTORY_ORDERS, FIRST_TIME, END_TIME, ["BNBBTC", "ETHBTC"], MARKET_SPOT
+            )
+        ]
+    await client.close_connection()
+
+    assert len(orders) == len(rows)
@@ -0,0 +1,200 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from binance.enums import HistoricalKlinesType
+from binance.ws.kline_feed import KlineFeed
+
+from .utils import fake_klines_endpoint
+
+FIRST_OPEN_TIME = 1519862400000
+MINUTE = 60000
+
+
+class FakeSocket:
+    def __init__(self, messages):
+        self.queue = asyncio.Queue()
+        for msg in messages:
+            self.queue.put_nowait(msg)
+        self.entered = False
+        self.exited = False
+
+    async def __aenter__(self):
+        self.entered = True
+        return self
+
+    async def __aexit__(self, *args):
+        self.exited = True
+
+    async def recv(self):
+        return await self.queue.get()
+
+
+def kline_event(n, closed=True):
+    kline = fake_klines_endpoint(FIRST_OPEN_TIME, FIRST_OPEN_TIME + 99 * MINUTE)(
+        startTime=FIRST_OPEN_TIME + n * MINUTE, limit=1
+    )[0]
+    keys = ("t", "o", "h", "l", "c", "v", "T", "q", "n", "V", "Q", "B")
+    k = dict(zip(keys, kline), s="BNBBTC", i="1m", x=closed)
+    return {"e": "kline", "E": k["T"], "s": "BNBBTC", "k": k}
+
+
+def feed_client(missing=(), late=()):
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, FIRST_OPEN_TIME + 99 * MINUTE)
+    # klines published by the first request after they were asked for
+    unpublished = set(late)
+
+    async def _historical_klines(symbol, interval, start_str, end_str, **kwargs):
+        klines = fake(startTime=start_str, endTime=end_str, limit=1000)
+        returned = [k for k in klines if (k[0] - FIRST_OPEN_TIME) // MINUTE not in missing]
+        requested = {(k[0] - FIRST_OPEN_TIME) // MINUTE for k in returned}
+        hidden = unpublished & requested
+        unpublished.difference_update(hidden)
+        return [k for k in returned if (k[0] - FIRST_OPEN_TIME) // MINUTE not in hidden]
+
+    client = MagicMock()
+    client.timestamp_offset = 0
+    client.get_historical_klines = AsyncMock(side_effect=_historical_klines)
+    return client
+
+
+def feed(client, socket, **kwargs):
+    bm = MagicMock()
+    bm.kline_socket.return_value = socket
+    bm._get_futures_socket.return_value = socket
+    return KlineFeed(client, "BNBBTC", "1m", bm=bm, **kwargs)
+
+
+async def received(kline_feed, count):
+    klines = [await kline_feed.recv() for _ in range(count)]
+    return [(kline[0] - FIRST_OPEN_TIME) // MINUTE for kline in klines]
+
+
+@pytest.mark.asyncio
+async def test_kline_feed_backfill_handover():
+    client = feed_client()
+    # events which arrived while the backfill was requested, kline 9 closed before the backfill
+    socket = FakeSocket(
+        [
+            kline_event(9),
+            kline_event(10, closed=False),
+            kline_event(10),
+            kline_event(11, closed=False),
+            {"e": "24hrTicker"},
+            kline_event(11),
+        ]
+    )
+    now = FIRST_OPEN_TIME + 10 * MINUTE + 30000
+    with patch("binance.ws.kline_feed.time.time", return_value=now / 1000):
+        async with feed(client, socket, backfill=5) as kline_feed:
+            assert socket.entered
+            assert await received(kline_feed, 6) == [5, 6, 7, 8, 9, 10]
+            kline = await kline_feed.recv()
+    assert socket.exited
+    client.get_historical_klines.assert_awaited_once()
+    assert client.get_historical_klines.call_args[0][2:] == (
+        FIRST_OPEN_TIME + 5 * MINUTE,
+        FIRST_OPEN_TIME + 10 * MINUTE - 1,
+    )
+    # the klines of the socket have the format of the REST ones
+    assert kline == (await client.get_historical_klines("BNBBTC", "1m", kline[0], kline[0]))[0]
+
+
+@pytest.mark.asyncio
+async def test_kline_feed_refetches_after_reconnect():
+    # no klines exist for minute 16, e.g. an exchange outage
+    client = feed_client(missing=(16,))
+    socket = FakeSocket(
+        [
+            kline_event(3),
+            {"e": "error", "type": "BinanceWebsocketClosed", "m": "Connection closed"},
+            # after the reconnect, klines 4 to 6 closed while the socket was down
+            kline_event(7, closed=False),
+            kline_event(7),
+            {"e": "error", "type": "BinanceWebsocketClosed", "m": "Connection closed"},
+            kline_event(17, closed=False),
+            kline_event(17),
+            kline_event(18),
+        ]
+    )
+    now = FIRST_OPEN_TIME + 3 * MINUTE + 1000
+    with patch("binance.ws.kline_feed.time.time", return_value=now / 1000):
+        async with feed(client, socket, backfill=2) as kline_feed:
+            assert await received(kline_feed, 7) == [1, 2, 3, 4, 5, 6, 7]
+            assert client.get_historical_klines.call_args[0][2:] == (
+                FIRST_OPEN_TIME + 4 * MINUTE,
+                FIRST_OPEN_TIME + 7 * MINUTE - 1,
+            )
+            assert await received(kline_feed, 10) == list(range(8, 16)) + [17, 18]
+    # the missing kline is requested again with the next event only, kline 17 closed after it
+    assert client.get_historical_klines.await_count == 4
+    assert client.get_historical_klines.call_args[0][2:] == (
+        FIRST_OPEN_TIME + 16 * MINUTE,
+        FIRST_OPEN_TIME + 17 * MINUTE - 1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_kline_feed_waits_for_klines_rest_has_not_published():
+    # kline 6 isn't returned yet by the request after the reconnect
+    client = feed_client(late=(6,))
+    socket = FakeSocket(
+        [
+            kline_event(3),
+            {"e": "error", "type": "BinanceWebsocketClosed", "m": "Connection closed"},
+            kline_event(7, closed=False),
+            kline_event(7),
+        ]
+    )
+    now = FIRST_OPEN_TIME + 3 * MINUTE + 1000
+    with patch("binance.ws.kline_feed.time.time", return_value=now / 1000):
+        async with feed(client, socket, backfill=2) as kline_feed:
+            assert await received(kline_feed, 7) == [1, 2, 3, 4, 5, 6, 7]
+    assert client.get_historical_klines.call_args[0][2:] == (
+        FIRST_OPEN_TIME + 6 * MINUTE,
+        FIRST_OPEN_TIME + 7 * MINUTE - 1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_kline_feed_futures_without_backfill():
+    client = feed_client()
+    socket = FakeSocket([kline_event(2, closed=False), kline_event(2), kline_event(3)])
+    kline_feed = feed(client, socket, backfill=0, klines_type=HistoricalKlinesType.FUTURES)
+    async with kline_feed:
+        assert await received(kline_feed, 2) == [2, 3]
+    client.get_historical_klines.assert_not_awaited()
+    kline_feed._bm._get_futures_socket.assert_called_once()
+    assert kline_feed._bm._get_futures_socket.call_args[0][0] == "bnbbtc@kline_1m"
+
+    with pytest.raises(ValueError):
+        KlineFeed(client, "BNBBTC", "1M", bm=MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_kline_feed_retries_once_per_interval():
+    # kline 6 isn't available until a live kline after it closes
+    client = feed_client(missing=(6,))
+    socket = FakeSocket(
+        [kline_event(3)]
+        + [kline_event(7, closed=False) for _ in range(5)]
+        + [kline_event(7), kline_event(8)]
+    )
+    now = FIRST_OPEN_TIME + 3 * MINUTE + 1000
+    with patch("binance.ws.kline_feed.time.time", return_value=now / 1000):
+        async with feed(client, socket, backfill=2) as kline_feed:
+            assert await received(kline_feed, 7) == [1, 2, 3, 4, 5, 7, 8]
+    # the backfill, the open kline 7 and the closed kline 7
+    assert client.get_historical_klines.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_kline_feed_backfill_failure_closes_socket():
+    client = feed_client()
+    client.get_historical_klines.side_effect = ConnectionError
+    socket = FakeSocket([])
+    with pytest.raises(ConnectionError):
+        async with feed(client, socket, backfill=2):
+            pass
+    assert socket.entered and socket.exited
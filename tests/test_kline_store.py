@@ -0,0 +1,130 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from binance.async_client import AsyncClient
+from binance.client import Client
+from binance.enums import HistoricalKlinesType
+from binance.store import KlineStore
+
+from .utils import fake_klines_endpoint
+
+FIRST_OPEN_TIME = 1519862400000
+
+
+def test_coverage_merge_and_missing_ranges(tmp_path):
+    store = KlineStore(tmp_path)
+    store.add_coverage("BNBBTC", "1m", 100, 200)
+    store.add_coverage("BNBBTC", "1m", 300, 400)
+    assert store.missing_ranges("BNBBTC", "1m", 0, 500) == [
+        (0, 100),
+        (200, 300),
+        (400, 500),
+    ]
+
+    # touching and overlapping ranges are merged
+    store.add_coverage("BNBBTC", "1m", 200, 350)
+    assert store.covered_ranges("BNBBTC", "1m") == [(100, 400)]
+    assert store.missing_ranges("BNBBTC", "1m", 150, 380) == []
+
+    # series are kept apart
+    assert store.covered_ranges("BNBBTC", "1m", HistoricalKlinesType.FUTURES) == []
+    assert store.covered_ranges("BNBBTC", "5m") == []
+
+
+def test_historical_klines_cache_dir(tmp_path):
+    """Test a second fetch of the same range is served by the store"""
+    client = Client("api_key", "api_secret", ping=False, kline_cache_dir=tmp_path)
+    end_ts = FIRST_OPEN_TIME + 2499 * 60000
+    calls = []
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, end_ts, calls=calls)
+    with patch.object(client, "_klines", side_effect=fake):
+        klines = client.get_historical_klines(
+            "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, FIRST_OPEN_TIME, end_ts
+        )
+        requested = len(calls)
+        cached = client.get_historical_klines(
+            "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, FIRST_OPEN_TIME, end_ts
+        )
+        assert len(calls) == requested
+
+        # extending the range only requests the missing part
+        calls.clear()
+        extended = client.get_historical_klines(
+            "BNBBTC",
+            Client.KLINE_INTERVAL_1MINUTE,
+            FIRST_OPEN_TIME - 60000 * 10,
+            end_ts + 60000 * 10,
+        )
+        assert len(calls) == 1
+        assert calls[0]["startTime"] == end_ts + 1
+
+    assert len(klines) == 2500
+    assert cached == klines
+    assert extended == klines
+    # the earliest timestamp is persisted next to the klines when the connection is closed
+    client.close_connection()
+    assert (tmp_path / "earliest_timestamps.json").exists()
+
+
+def test_historical_klines_cache_dir_true(tmp_path):
+    client = Client("api_key", "api_secret", ping=False, kline_cache_dir=tmp_path)
+    end_ts = FIRST_OPEN_TIME + 99 * 60000
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, end_ts)
+    with patch.object(client, "_klines", side_effect=fake):
+        klines = client.get_historical_klines(
+            "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, FIRST_OPEN_TIME, end_ts, cache_dir=True
+        )
+    client.close_connection()
+
+    assert len(klines) == 100
+    # True uses the kline_cache_dir of the client
+    assert len(KlineStore(tmp_path).get_klines("BNBBTC", "1m")) == 100
+    with pytest.raises(ValueError):
+        Client("api_key", "api_secret", ping=False).get_historical_klines(
+            "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, FIRST_OPEN_TIME, end_ts, cache_dir=True
+        )
+
+
+def test_historical_klines_cache_skips_open_klines(tmp_path):
+    """Test klines which haven't closed yet are requested but never stored"""
+    client = Client("api_key", "api_secret", ping=False)
+    now = 1519862400000 + 100 * 60000 + 30000
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, now - 30000)
+    with patch.object(client, "_klines", side_effect=fake), patch(
+        "binance.client.time.time", return_value=now / 1000
+    ):
+        klines = client.get_historical_klines(
+            "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, FIRST_OPEN_TIME, cache_dir=tmp_path
+        )
+
+    assert len(klines) == 101
+    stored = KlineStore(tmp_path).get_klines("BNBBTC", Client.KLINE_INTERVAL_1MINUTE)
+    assert len(stored) == 100
+    assert stored[-1][6] < now
+
+
+@pytest.mark.asyncio
+async def test_historical_klines_cache_dir_async(tmp_path):
+    client = AsyncClient("api_key", "api_secret")
+    end_ts = FIRST_OPEN_TIME + 2499 * 60000
+    calls = []
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, end_ts, calls=calls)
+    with patch.object(client, "_klines", AsyncMock(side_effect=fake)):
+        klines = await client.futures_historical_klines(
+            "BNBBTC",
+            Client.KLINE_INTERVAL_1MINUTE,
+            FIRST_OPEN_TIME,
+            end_ts,
+            concurrency=2,
+            cache_dir=tmp_path,
+        )
+        requested = len(calls)
+        cached = await client.futures_historical_klines(
+            "BNBBTC", Client.KLINE_INTERVAL_1MINUTE, FIRST_OPEN_TIME, end_ts, cache_dir=tmp_path
+        )
+    await client.close_connection()
+
+    assert len(calls) == requested
+    assert len(klines) == 2500
+    assert cached == klines
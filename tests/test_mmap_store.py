@@ -0,0 +1,141 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from binance.async_client import AsyncClient
+from binance.client import Client
+from binance.enums import HistoricalKlinesType
+from binance.mmap_store import GROW_ROWS, MmapKlineStore
+
+from .utils import fake_klines_endpoint
+
+np = pytest.importorskip("numpy")
+
+FIRST_OPEN_TIME = 1519862400000
+
+client = Client("api_key", "api_secret", ping=False)
+
+
+def kline_event(open_time, close="1.5", symbol="BNBBTC", interval="1m"):
+    return {
+        "e": "kline",
+        "E": open_time + 1000,
+        "s": symbol,
+        "k": {
+            "t": open_time,
+            "T": open_time + 59999,
+            "s": symbol,
+            "i": interval,
+            "f": 100,
+            "L": 200,
+            "o": "1.0",
+            "c": close,
+            "h": "2.0",
+            "l": "0.5",
+            "v": "10.0",
+            "n": 3,
+            "x": False,
+            "q": "15.0",
+            "V": "4.0",
+            "Q": "6.0",
+            "B": "0",
+        },
+    }
+
+
+def test_fetch_and_shared_read(tmp_path):
+    store = MmapKlineStore(tmp_path)
+    end_ts = FIRST_OPEN_TIME + 2499 * 60000
+    calls = []
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, end_ts, calls=calls)
+    with patch.object(client, "_klines", side_effect=fake):
+        assert store.fetch(client, "BNBBTC", "1m", FIRST_OPEN_TIME, end_ts) == 2500
+        calls.clear()
+        # fetching again resumes from the last stored kline
+        store.fetch(client, "BNBBTC", "1m", FIRST_OPEN_TIME, end_ts + 60000)
+    assert calls[0]["startTime"] == end_ts
+
+    series = store.series("BNBBTC", "1m")
+    assert series.last_open_time() == end_ts
+    assert len(series) % GROW_ROWS == 0
+    assert series.row(end_ts) - series.row(FIRST_OPEN_TIME) == 2499
+
+    reader = MmapKlineStore(tmp_path, readonly=True)
+    columns = reader.get("BNBBTC", "1m", FIRST_OPEN_TIME + 60000, FIRST_OPEN_TIME + 120000)
+    np.testing.assert_array_equal(
+        columns["open_time"], [FIRST_OPEN_TIME + 60000, FIRST_OPEN_TIME + 120000]
+    )
+    assert columns["close"].dtype == np.float64
+    assert isinstance(columns["close"].base, np.memmap)
+
+    # rows written after the reader mapped the files are picked up on the next get
+    store.add_kline_event(kline_event(FIRST_OPEN_TIME + GROW_ROWS * 60000 * 2, close="3.0"))
+    columns = reader.get("BNBBTC", "1m", FIRST_OPEN_TIME + GROW_ROWS * 60000 * 2)
+    assert columns["close"][0] == 3.0
+
+    with pytest.raises(ValueError):
+        reader.add_kline_event(kline_event(FIRST_OPEN_TIME))
+
+
+def test_refresh_while_the_files_grow(tmp_path):
+    store = MmapKlineStore(tmp_path)
+    store.add_kline_event(kline_event(FIRST_OPEN_TIME))
+    reader = MmapKlineStore(tmp_path, readonly=True)
+    series = reader.series("BNBBTC", "1m")
+    rows = len(series)
+
+    # the writer has grown some of the column files but not the others yet
+    for name in ("open_time", "open", "high"):
+        path = next(series.path.glob(f"{name}.*"))
+        with open(path, "r+b") as f:
+            f.truncate((rows + GROW_ROWS) * 8)
+    assert not series.refresh()
+    assert len(series) == rows
+    columns = reader.get("BNBBTC", "1m", FIRST_OPEN_TIME)
+    assert columns["close"][0] == 1.5
+
+
+def test_kline_events_and_missing_rows(tmp_path):
+    store = MmapKlineStore(tmp_path)
+    open_time = FIRST_OPEN_TIME + 5 * 60000
+    assert store.add_kline_event(kline_event(open_time, close="1.1"))
+    # updates of an open kline overwrite its row, multiplex messages are unwrapped
+    assert store.add_kline_event({"stream": "bnbbtc@kline_1m", "data": kline_event(open_time)})
+    assert not store.add_kline_event({"e": "error", "m": "Max reconnect retries reached"})
+    store.add_kline_event(kline_event(FIRST_OPEN_TIME + 5 * 60000, symbol="ETHBTC"))
+    store.add_kline_event(
+        kline_event(open_time, close="9.0"), klines_type=HistoricalKlinesType.FUTURES
+    )
+
+    series = store.series("BNBBTC", "1m")
+    columns = series.get(open_time, open_time)
+    assert columns["close"][0] == 1.5
+    assert store.get("BNBBTC", "1m", open_time, open_time, HistoricalKlinesType.FUTURES)[
+        "close"
+    ][0] == 9.0
+    np.testing.assert_array_equal(
+        series.missing_rows(FIRST_OPEN_TIME, open_time + 60000),
+        [FIRST_OPEN_TIME + i * 60000 for i in (0, 1, 2, 3, 4, 6)],
+    )
+
+    with pytest.raises(ValueError):
+        store.series("BNBBTC", "1M")
+    with pytest.raises(ValueError):
+        store.add_kline_event(kline_event(1400000000000))
+
+
+@pytest.mark.asyncio
+async def test_fetch_async(tmp_path):
+    async_client = AsyncClient("api_key", "api_secret")
+    store = MmapKlineStore(tmp_path)
+    end_ts = FIRST_OPEN_TIME + 2499 * 60000
+    fake = fake_klines_endpoint(FIRST_OPEN_TIME, end_ts)
+    with patch.object(async_client, "_klines", AsyncMock(side_effect=fake)):
+        count = await store.fetch_async(
+            async_client, "BNBBTC", "1m", FIRST_OPEN_TIME, end_ts, concurrency=2
+        )
+    await async_client.close_connection()
+
+    assert count == 2500
+    open_times = store.get("BNBBTC", "1m", FIRST_OPEN_TIME, end_ts)["open_time"]
+    np.testing.assert_array_equal(open_times, FIRST_OPEN_TIME + np.arange(2500) * 60000)
@@ -0,0 +1,166 @@
+from unittest.mock import patch
+
+import pytest
+
+from binance.resample import KlineResampler, as_kline_array, resample_klines
+
+np = pytest.importorskip("numpy")
+
+FIRST_OPEN_TIME = 1519862400000
+
+
+def make_klines(count, first_open_time=FIRST_OPEN_TIME, timeframe=60000):
+    rng = np.random.default_rng(1)
+    klines = []
+    for i in range(count):
+        open_, close = rng.uniform(90, 110, 2).round(2)
+        klines.append(
+            [
+                first_open_time + i * timeframe,
+                str(open_),
+                str(max(open_, close) + 1),
+                str(min(open_, close) - 1),
+                str(close),
+                str(round(rng.uniform(1, 10), 4)),
+                first_open_time + (i + 1) * timeframe - 1,
+                str(round(rng.uniform(100, 1000), 4)),
+                int(rng.integers(1, 100)),
+                "1.5",
+                "150.0",
+                "0",
+            ]
+        )
+    return klines
+
+
+def naive_bar(klines):
+    return (
+        float(klines[0][1]),
+        max(float(k[2]) for k in klines),
+        min(float(k[3]) for k in klines),
+        float(klines[-1][4]),
+        sum(float(k[5]) for k in klines),
+        sum(k[8] for k in klines),
+    )
+
+
+def test_resample_matches_naive_aggregation():
+    klines = make_klines(200)
+    bars = resample_klines(klines, "45m")
+
+    assert len(bars) == 5
+    assert bars["open_time"][0] == FIRST_OPEN_TIME
+    assert bars["close_time"][-1] == FIRST_OPEN_TIME + 5 * 45 * 60000 - 1
+    for i, bar in enumerate(bars):
+        expected = naive_bar(klines[i * 45 : (i + 1) * 45])
+        actual = (bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"], bar["trades"])
+        np.testing.assert_allclose(actual, expected)
+    assert bars["taker_buy_quote_volume"][0] == 150.0 * 45
+
+    # the last bar only has 20 of its 45 klines
+    assert len(resample_klines(klines, "45m", include_partial=False)) == 4
+
+
+def test_resample_offset_and_columns():
+    klines = make_klines(24 * 60)
+    columns = resample_klines(klines, "4h", offset="90m", output="columns")
+
+    # a partial first bar from 00:00 to 01:30
+    assert columns["open_time"][0] == FIRST_OPEN_TIME - (4 * 60 - 90) * 60000
+    assert columns["open_time"][1] == FIRST_OPEN_TIME + 90 * 60000
+    assert columns["volume"][0] == pytest.approx(sum(float(k[5]) for k in klines[:90]))
+    assert columns["close"].flags["C_CONTIGUOUS"]
+
+
+def test_as_kline_array_drops_unwritten_rows():
+    array = as_kline_array(make_klines(10))
+    # a store's rows which haven't been written yet
+    columns = {
+        name: np.concatenate([array[name], np.zeros(5, dtype=array.dtype[name])])
+        for name in array.dtype.names
+    }
+    assert len(as_kline_array(columns)) == 10
+
+
+def test_incremental_matches_batch():
+    klines = make_klines(500)
+    resampler = KlineResampler("10m")
+    for i in range(0, 300, 7):
+        resampler.update(klines[i : i + 7])
+    assert resampler.bars(include_partial=False)["open_time"][-1] == FIRST_OPEN_TIME + 290 * 60000
+
+    # updates of a kline that hasn't closed yet replace the earlier version
+    open_kline = list(klines[300])
+    open_kline[4] = "1000.0"
+    changed = resampler.update([open_kline])
+    assert changed["close"][-1] == 1000.0
+    resampler.update(klines[300:])
+
+    batch = resample_klines(klines, "10m")
+    incremental = resampler.bars()
+    np.testing.assert_array_equal(incremental, batch)
+
+    event = {
+        "e": "kline",
+        "k": dict(
+            zip(
+                ("t", "o", "h", "l", "c", "v", "T", "q", "n", "V", "Q"),
+                make_klines(1, FIRST_OPEN_TIME + 500 * 60000)[0][:11],
+            ),
+            x=True,
+        ),
+    }
+    assert len(resampler.update_event(event)) == 1
+    assert len(resampler.bars()) == len(batch) + 1
+
+
+def kline_event(kline, closed):
+    keys = ("t", "o", "h", "l", "c", "v", "T", "q", "n", "V", "Q")
+    return {"e": "kline", "k": dict(zip(keys, kline[:11]), x=closed)}
+
+
+def test_bar_waits_for_its_last_kline_to_close():
+    klines = make_klines(5)
+    resampler = KlineResampler("5m")
+    resampler.update(klines[:4])
+    # the last minute of the bar already has the close time of the bar while it is open
+    for close in ("200", "500", "900"):
+        last = list(klines[4])
+        last[2] = last[4] = close
+        bars = resampler.update_event(kline_event(last, closed=False))
+        assert bars["close"][-1] == float(close)
+        assert len(resampler.bars(include_partial=False)) == 0
+    bars = resampler.update_event(kline_event(last, closed=True))
+    complete = resampler.bars(include_partial=False)
+    assert len(complete) == 1
+    assert complete["close"][0] == complete["high"][0] == 900.0
+
+    # a bar from REST is partial while its last kline hasn't reached its close time
+    resampler = KlineResampler("5m")
+    now_ms = klines[4][6] - 30000
+    with patch("binance.resample.time.time", return_value=now_ms / 1000):
+        resampler.update(klines[:5])
+        assert len(resampler.bars(include_partial=False)) == 0
+        assert len(resample_klines(klines[:5], "5m", include_partial=False)) == 0
+    resampler.update(klines[4:5])
+    assert len(resampler.bars(include_partial=False)) == 1
+
+
+def test_unaligned_bars_raise():
+    klines = make_klines(10, timeframe=5 * 60000)
+    with pytest.raises(ValueError):
+        resample_klines(klines, "12m")
+    with pytest.raises(ValueError):
+        resample_klines(klines, "1h", offset="1m")
+    with pytest.raises(ValueError):
+        resample_klines([], "1h", offset="90s", base_interval="1m")
+    assert len(resample_klines(klines, "15m", offset="5m")) == 4
+
+    resampler = KlineResampler("12m")
+    with pytest.raises(ValueError):
+        resampler.update(klines)
+    with pytest.raises(ValueError):
+        KlineResampler("1h", offset="1m", base_interval="5m")
+    resampler = KlineResampler("15m")
+    resampler.update(klines)
+    assert resampler.base_interval_ms == 5 * 60000
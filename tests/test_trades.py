@@ -0,0 +1,102 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from binance.async_client import AsyncClient
+from binance.client import Client
+from binance.ratelimit import MARKET_FUTURES, MARKET_SPOT
+
+from .utils import fake_agg_trades_endpoint, fake_historical_trades_endpoint
+
+FIRST_TIME = 1519862400000
+AGG_IDS = range(5000)
+TRADE_IDS = range(10000)
+
+
+def test_historical_trade_iter():
+    client = Client("api_key", "api_secret", ping=False)
+    with patch.object(
+        client, "get_aggregate_trades", side_effect=fake_agg_trades_endpoint(AGG_IDS)
+    ), patch.object(
+        client,
+        "get_historical_trades",
+        side_effect=fake_historical_trades_endpoint(TRADE_IDS),
+    ):
+        trades = [t["id"] for t in client.historical_trade_iter("BNBBTC", FIRST_TIME + 1000 * 1000)]
+        resumed = [t["id"] for t in client.historical_trade_iter("BNBBTC", last_id=9000)]
+
+    assert trades == list(range(2000, 10000))
+    assert resumed == list(range(9001, 10000))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [0, 3])
+async def test_historical_trade_iter_async(prefetch):
+    client = AsyncClient("api_key", "api_secret")
+    calls = []
+    with patch.object(
+        client, "futures_aggregate_trades", AsyncMock(side_effect=fake_agg_trades_endpoint(AGG_IDS))
+    ), patch.object(
+        client,
+        "futures_historical_trades",
+        AsyncMock(side_effect=fake_historical_trades_endpoint(TRADE_IDS, calls=calls)),
+    ):
+        trades = [
+            t["id"]
+            async for t in client.historical_trade_iter(
+                "BTCUSDT", FIRST_TIME + 1000 * 1000, market=MARKET_FUTURES, prefetch=prefetch
+            )
+        ]
+    await client.close_connection()
+
+    assert trades == list(range(2000, 10000))
+    # pages of the futures limit
+    assert calls[1] == {"symbol": "BTCUSDT", "fromId": 2500, "limit": 500}
+
+
+@pytest.mark.asyncio
+async def test_historical_trade_backfill():
+    client = AsyncClient("api_key", "api_secret")
+    with patch.object(
+        client, "get_aggregate_trades", AsyncMock(side_effect=fake_agg_trades_endpoint(AGG_IDS))
+    ), patch.object(
+        client,
+        "get_historical_trades",
+        AsyncMock(side_effect=fake_historical_trades_endpoint(TRADE_IDS)),
+    ):
+        start, end = FIRST_TIME + 1000 * 1000, FIRST_TIME + 3000 * 1000 + 500
+        assert await client.get_trade_id_range("BNBBTC", start, end) == (2000, 6001)
+        trades = [
+            t["id"]
+            async for t in client.historical_trade_backfill(
+                "BNBBTC", start, end, market=MARKET_SPOT, concurrency=3
+            )
+        ]
+        resumed = [
+            t["id"]
+            async for t in client.historical_trade_backfill("BNBBTC", start, end, last_id=5000)
+        ]
+    await client.close_connection()
+
+    assert trades == list(range(2000, 6002))
+    assert resumed == list(range(5001, 6002))
+
+
+@pytest.mark.asyncio
+async def test_historical_trade_backfill_last_id_only():
+    client = AsyncClient("api_key", "api_secret")
+    agg_trades = AsyncMock(side_effect=fake_agg_trades_endpoint(AGG_IDS))
+    with patch.object(client, "get_aggregate_trades", agg_trades), patch.object(
+        client,
+        "get_historical_trades",
+        AsyncMock(side_effect=fake_historical_trades_endpoint(TRADE_IDS)),
+    ):
+        resumed = [t["id"] async for t in client.historical_trade_backfill("BNBBTC", last_id=9000)]
+        with pytest.raises(ValueError):
+            async for _ in client.historical_trade_backfill("BNBBTC"):
+                pass
+    await client.close_connection()
+
+    assert resumed == list(range(9001, 10000))
+    # only the latest trade is looked up
+    assert agg_trades.await_count == 1
@@ -14,3 +14,160 @@ def test_multiple_objects(obj_list, assertion_func):
     # Validate each object
     for obj in objects:
         assertion_func(obj)
+
+
+def fake_klines_endpoint(first_open_time, last_open_time, timeframe=60000, calls=None):
+    """Serve klines like the klines endpoint for a symbol listed at first_open_time"""
+
+    def _klines(klines_type=None, **params):
+        if calls is not None:
+            calls.append(params)
+        start = max(params.get("startTime") or first_open_time, first_open_time)
+        # align to the interval grid like the exchange does
+        start += (first_open_time - start) % timeframe
+        end = min(params.get("endTime") or last_open_time, last_open_time)
+        res = []
+        open_time = start
+        while open_time <= end and len(res) < params["limit"]:
+            res.append(
+                [
+                    open_time,
+                    "1.0",
+                    "2.0",
+                    "0.5",
+                    "1.5",
+                    "10.0",
+                    open_time + timeframe - 1,
+                    "15.0",
+                    3,
+                    "4.0",
+                    "6.0",
+                    "0",
+                ]
+            )
+            open_time += timeframe
+        return res
+
+    return _klines
+
+
+
+def fake_agg_trades_endpoint(ids, first_time=1519862400000, calls=None, spacing=1000):
+    """Serve aggregate trades like the aggTrades endpoint for a symbol with the given trade ids,
+    aggregate trade n is made at first_time + n * spacing"""
+    ids = sorted(ids)
+
+    def _agg_trades(**params):
+        if calls is not None:
+            calls.append(params)
+        limit = params.get("limit", 500)
+        if "fromId" in params:
+            selected = [i for i in ids if i >= params["fromId"]]
+        elif "startTime" not in params:
+            # the latest trades
+            selected = ids[-limit:]
+        else:
+            start = params.get("startTime", 0)
+            end = params.get("endTime", float("inf"))
+            selected = [i for i in ids if start <= first_time + i * spacing <= end]
+        return [
+            {
+                "a": i,
+                "p": "0.01633102",
+                "q": "4.70443515",
+                "f": i * 2,
+                "l": i * 2 + 1,
+                "T": first_time + i * spacing,
+                "m": True,
+                "M": True,
+            }
+            for i in selected[:limit]
+        ]
+
+    return _agg_trades
+
+
+def fake_historical_trades_endpoint(ids, first_time=1519862400000, calls=None, spacing=1000):
+    """Serve trades like the historicalTrades endpoint, trade ids 2n and 2n + 1 make up the
+    aggregate trade n of fake_agg_trades_endpoint"""
+    ids = sorted(ids)
+
+    def _trades(**params):
+        if calls is not None:
+            calls.append(params)
+        limit = params.get("limit", 500)
+        if "fromId" in params:
+            selected = [i for i in ids if i >= params["fromId"]]
+        else:
+            selected = ids[-limit:]
+        return [
+            {
+                "id": i,
+                "price": "4.00000100",
+                "qty": "12.00000000",
+                "quoteQty": "48.000012",
+                "time": first_time + (i // 2) * spacing,
+                "isBuyerMaker": True,
+                "isBestMatch": True,
+            }
+            for i in selected[:limit]
+        ]
+
+    return _trades
+
+
+def fake_futures_data_endpoint(first_time, period=300000, calls=None):
+    """Serve a statistic like the futures/data endpoints, one row per period from first_time to now"""
+
+    def _futures_data(method, path, data=None, **kwargs):
+        if calls is not None:
+            calls.append((path, data))
+        start = max(data.get("startTime", first_time), first_time)
+        start += (first_time - start) % period
+        end = data.get("endTime")
+        res = []
+        timestamp = start
+        while timestamp <= end and len(res) < data.get("limit", 30):
+            res.append(
+                {
+                    "symbol": data.get("symbol") or data.get("pair"),
+                    "sumOpenInterest": "20403.63700000",
+                    "sumOpenInterestValue": str(timestamp % 1000003),
+                    "takerBuyVol": "387.3300",
+                    "takerSellVol": "248.5030",
+                    "takerBuyVolValue": "2342.1220",
+                    "takerSellVolValue": "4213.9800",
+                    "timestamp": timestamp,
+                }
+            )
+            timestamp += period
+        return res
+
+    return _futures_data
+
+
+def fake_funding_rate_endpoint(first_time, last_time, interval=8 * 60 * 60 * 1000, calls=None):
+    """Serve funding rates like the fundingRate endpoint, one funding per interval, a few milliseconds
+    late like the exchange"""
+
+    def _funding_rate(**params):
+        if calls is not None:
+            calls.append(params)
+        start = max(params.get("startTime") or first_time, first_time)
+        start += (first_time - start) % interval
+        end = min(params.get("endTime") or last_time, last_time)
+        res = []
+        funding_time = start
+        while funding_time <= end and len(res) < params.get("limit", 100):
+            res.append(
+                {
+                    "symbol": params["symbol"],
+                    "fundingTime": funding_time + 3,
+                    "fundingRate": "0.00010000",
+                    "markPrice": "34287.54619963",
+                }
+            )
+            funding_time += interval
+        return res
+
+    return _funding_rate